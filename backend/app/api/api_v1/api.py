@@ -13,7 +13,8 @@ from app.api.api_v1.endpoints import (
     messages,
     admin,
     stats,
-    payments
+    payments,
+    search
 )
 
 # API V1主路由
@@ -32,4 +33,5 @@ api_router.include_router(locations.router, prefix="/locations", tags=["位置"]
 api_router.include_router(messages.router, prefix="/messages", tags=["消息"])
 api_router.include_router(admin.router, prefix="/admin", tags=["管理"])
 api_router.include_router(stats.router, prefix="/stats", tags=["统计"])
-api_router.include_router(payments.router, prefix="/payments", tags=["支付"])
\ No newline at end of file
+api_router.include_router(payments.router, prefix="/payments", tags=["支付"])
+api_router.include_router(search.router, prefix="/search", tags=["搜索"])
\ No newline at end of file
@@ -5,10 +5,13 @@ from sqlalchemy.orm import Session
 from app.core.security import create_access_token
 from datetime import timedelta
 from app.core.config import settings
+from app.core.http_client import HttpClient
+from app.core.scheduler import scheduler
 
 from app import schemas
 from app.api import deps
 from app.services import admin_service, notification_service
+from app.utils import cache_utils, job_utils
 
 router = APIRouter()
 
@@ -185,6 +188,30 @@ async def batch_update_system_config(
     )
 
 
+@router.get("/metrics/http", response_model=Dict, dependencies=[Depends(deps.get_current_admin)])
+async def get_http_metrics() -> Any:
+    """获取外部接口请求统计（按域名）"""
+    return {"data": HttpClient.get_metrics()}
+
+
+@router.get("/metrics/jobs", response_model=Dict, dependencies=[Depends(deps.get_current_admin)])
+async def get_job_metrics() -> Any:
+    """获取定时任务最近一次运行的统计"""
+    return {"data": job_utils.get_job_metrics()}
+
+
+@router.get("/metrics/cache", response_model=Dict, dependencies=[Depends(deps.get_current_admin)])
+async def get_cache_metrics() -> Any:
+    """获取缓存命中率、淘汰数等统计"""
+    return {"data": cache_utils.get_cache_stats()}
+
+
+@router.get("/scheduler/jobs", response_model=Dict, dependencies=[Depends(deps.get_current_admin)])
+async def get_scheduled_jobs() -> Any:
+    """获取定时任务调度状态（上次运行时间、耗时、影响行数）"""
+    return {"data": scheduler.get_status()}
+
+
 @router.get("/banners", response_model=schemas.common.PaginatedResponse, dependencies=[Depends(deps.get_current_admin)])
 async def search_banners(
     position: Optional[str] = Query(None),
@@ -204,7 +204,7 @@ async def refresh_token(
     """
     try:
         # 验证当前令牌
-        current_user = deps.get_current_user(db=db, token=token)
+        current_user = await deps.get_current_user(db=db, token=token)
         
         # 生成新令牌
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -230,10 +230,8 @@ async def logout(
     退出登录
     """
     # 清除用户缓存
-    from app.core.redis import RedisClient
-    from app.core.constants import CACHE_KEY_PREFIX
+    from app.core.principal import ainvalidate_user_principal
     
-    cache_key = f"{CACHE_KEY_PREFIX['user']}{current_user.id}"
-    RedisClient.delete(cache_key)
+    await ainvalidate_user_principal(current_user.id)
     
     return {"message": "退出成功"}
\ No newline at end of file
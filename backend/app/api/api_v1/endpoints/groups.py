@@ -1,6 +1,7 @@
 from typing import Any, List, Optional, Dict
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import schemas
@@ -23,15 +24,16 @@ async def search_groups(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     current_user: Optional[schemas.user.User] = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     搜索团购列表
     """
     user_id = current_user.id if current_user else None
     
-    groups, total = await group_service.search_groups(
+    result = await group_service.search_groups(
         db=db,
         keyword=keyword,
         merchant_id=merchant_id,
@@ -45,9 +47,17 @@ async def search_groups(
         sort_order=sort_order,
         user_id=user_id,
         skip=pagination["skip"],
-        limit=pagination["limit"]
+        limit=pagination["limit"],
+        cursor=cursor_params["cursor"],
+        with_total=cursor_params["with_total"]
     )
     
+    # 游标分页模式直接返回游标分页数据
+    if cursor_params["cursor"] is not None:
+        return {"data": result.to_dict()}
+    
+    groups, total = result
+    
     return {
         "data": {
             "items": groups,
@@ -63,7 +73,7 @@ async def search_groups(
 async def get_group(
     group_id: int = Path(..., ge=1),
     current_user: Optional[schemas.user.User] = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     获取团购详情
@@ -76,6 +76,25 @@ async def get_delivery_fee(
     return {"fee": fee}
 
 
+@router.post("/delivery-fees", response_model=Dict)
+async def get_delivery_fees(
+    merchant_ids: List[int] = Body(..., min_length=1, max_length=500),
+    address_id: int = Body(..., ge=1),
+    current_user: schemas.user.User = Depends(deps.get_current_active_user),
+    db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    批量计算多个商户的配送费
+    """
+    fees = await location_service.get_delivery_fees(
+        merchant_ids=merchant_ids,
+        user_address_id=address_id,
+        db=db
+    )
+    
+    return {"fees": fees}
+
+
 @router.post("/check-service-area", response_model=schemas.common.BooleanResponse)
 async def check_in_service_area(
     merchant_id: int = Body(..., ge=1),
@@ -95,6 +114,26 @@ async def check_in_service_area(
     
     return {"data": result}
 
+
+@router.post("/check-service-areas", response_model=Dict)
+async def check_in_service_areas(
+    merchant_ids: List[int] = Body(..., min_length=1, max_length=500),
+    latitude: float = Body(..., ge=-90, le=90),
+    longitude: float = Body(..., ge=-180, le=180),
+    db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    批量检查位置是否在多个商户的服务范围内
+    """
+    result = await location_service.check_in_service_areas(
+        merchant_ids=merchant_ids,
+        latitude=latitude,
+        longitude=longitude,
+        db=db
+    )
+    
+    return {"data": result}
+
 @router.post("/geocode", response_model=schemas.location.GeocodeResponse)
 async def geocode_address(
     geocode_req: schemas.location.GeocodeRequest = Body(...),
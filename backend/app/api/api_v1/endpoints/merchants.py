@@ -23,12 +23,13 @@ async def search_merchants(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     db: Session = Depends(deps.get_db)
 ) -> Any:
     """
     搜索商户列表
     """
-    merchants, total = await merchant_service.search_merchants(
+    result = await merchant_service.search_merchants(
         db=db,
         keyword=keyword,
         category_id=category_id,
@@ -39,9 +40,17 @@ async def search_merchants(
         sort_by=sort_by,
         sort_order=sort_order,
         skip=pagination["skip"],
-        limit=pagination["limit"]
+        limit=pagination["limit"],
+        cursor=cursor_params["cursor"],
+        with_total=cursor_params["with_total"]
     )
     
+    # 游标分页模式直接返回游标分页数据
+    if cursor_params["cursor"] is not None:
+        return {"data": result.to_dict()}
+    
+    merchants, total = result
+    
     return {
         "data": {
             "items": merchants,
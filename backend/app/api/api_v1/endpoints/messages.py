@@ -18,13 +18,14 @@ async def search_messages(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
     db: Session = Depends(deps.get_db)
 ) -> Any:
     """
     搜索消息列表
     """
-    messages, total = await message_service.search_messages(
+    result = await message_service.search_messages(
         db=db,
         user_id=current_user.id,
         merchant_id=current_user.merchant_id,
@@ -34,9 +35,17 @@ async def search_messages(
         sort_by=sort_by,
         sort_order=sort_order,
         skip=pagination["skip"],
-        limit=pagination["limit"]
+        limit=pagination["limit"],
+        cursor=cursor_params["cursor"],
+        with_total=cursor_params["with_total"]
     )
     
+    # 游标分页模式直接返回游标分页数据
+    if cursor_params["cursor"] is not None:
+        return {"data": result.to_dict()}
+    
+    messages, total = result
+    
     return {
         "data": {
             "items": messages,
@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Optional, Union, Tuple, Callable
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import schemas
@@ -41,7 +42,7 @@ async def create_order(
 async def get_order(
     order_id: int = Path(..., ge=1),
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     获取订单详情
@@ -65,8 +66,9 @@ async def search_orders(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     搜索订单列表
@@ -83,12 +85,12 @@ async def search_orders(
     if end_date:
         end_datetime = datetime.strptime(f"{end_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
     
-    orders, total = await order_service.search_orders(
+    result = await order_service.search_orders(
         db=db,
         user_id=current_user.id,
         merchant_id=None,
         group_id=group_id,
-        status=status,
+        order_status=status,
         payment_status=payment_status,
         delivery_status=delivery_status,
         keyword=keyword,
@@ -97,9 +99,17 @@ async def search_orders(
         sort_by=sort_by,
         sort_order=sort_order,
         skip=pagination["skip"],
-        limit=pagination["limit"]
+        limit=pagination["limit"],
+        cursor=cursor_params["cursor"],
+        with_total=cursor_params["with_total"]
     )
     
+    # 游标分页模式直接返回游标分页数据
+    if cursor_params["cursor"] is not None:
+        return {"data": result.to_dict()}
+    
+    orders, total = result
+    
     return {
         "data": {
             "items": orders,
@@ -220,8 +230,9 @@ async def get_merchant_orders(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     current_user: schemas.user.User = Depends(deps.get_current_merchant),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     获取商户订单列表
@@ -238,12 +249,12 @@ async def get_merchant_orders(
     if end_date:
         end_datetime = datetime.strptime(f"{end_date} 23:59:59", "%Y-%m-%d %H:%M:%S")
     
-    orders, total = await order_service.search_orders(
+    result = await order_service.search_orders(
         db=db,
         user_id=None,
         merchant_id=current_user.merchant_id,
         group_id=group_id,
-        status=status,
+        order_status=status,
         payment_status=payment_status,
         delivery_status=delivery_status,
         keyword=keyword,
@@ -252,9 +263,17 @@ async def get_merchant_orders(
         sort_by=sort_by,
         sort_order=sort_order,
         skip=pagination["skip"],
-        limit=pagination["limit"]
+        limit=pagination["limit"],
+        cursor=cursor_params["cursor"],
+        with_total=cursor_params["with_total"]
     )
     
+    # 游标分页模式直接返回游标分页数据
+    if cursor_params["cursor"] is not None:
+        return {"data": result.to_dict()}
+    
+    orders, total = result
+    
     return {
         "data": {
             "items": orders,
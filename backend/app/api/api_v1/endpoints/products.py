@@ -4,12 +4,14 @@ from typing import Any, List, Optional
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path, File, UploadFile
 from fastapi import status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import traceback
 
 from app import schemas
 from app.api import deps
 from app.services import product_service
+from app.utils.pagination_utils import InvalidCursorError
 
 router = APIRouter()
 
@@ -29,9 +31,10 @@ async def search_products(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     # 🔐 重新要求用户认证
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     搜索商品列表 - 需要用户登录
@@ -46,7 +49,7 @@ async def search_products(
         # 传递用户ID以获取个人化信息（如收藏状态）
         user_id = current_user.id
         
-        products, total = await product_service.search_products(
+        result = await product_service.search_products(
             db=db,
             keyword=keyword,
             category_id=category_id,
@@ -62,66 +65,18 @@ async def search_products(
             sort_order=sort_order,
             user_id=user_id,
             skip=pagination["skip"],
-            limit=pagination["limit"]
+            limit=pagination["limit"],
+            cursor=cursor_params["cursor"],
+            with_total=cursor_params["with_total"]
         )
         
-        print(f"✅ 服务层返回 {len(products)} 个商品")
+        # 游标分页模式直接返回游标分页数据
+        if cursor_params["cursor"] is not None:
+            return {"data": result.to_dict()}
         
-        # 强制检查返回类型并转换
-        if products and len(products) > 0:
-            first_item_type = type(products[0])
-            print(f"📊 检查第一个商品类型: {first_item_type}")
-            
-            if not isinstance(products[0], dict):
-                print(f"❌ 检测到ORM对象，强制转换为字典...")
-                
-                converted_products = []
-                for i, product in enumerate(products):
-                    try:
-                        if hasattr(product, '__dict__'):  # 是ORM对象
-                            product_dict = {
-                                "id": getattr(product, 'id', 0),
-                                "merchant_id": getattr(product, 'merchant_id', 0),
-                                "merchant_name": "",
-                                "name": getattr(product, 'name', ''),
-                                "thumbnail": getattr(product, 'thumbnail', ''),
-                                "original_price": float(getattr(product, 'original_price', 0) or 0),
-                                "current_price": float(getattr(product, 'current_price', 0) or 0),
-                                "group_price": float(getattr(product, 'group_price', 0)) if getattr(product, 'group_price') else None,
-                                "stock": int(getattr(product, 'stock', 0) or 0),
-                                "unit": getattr(product, 'unit', '件'),
-                                "description": getattr(product, 'description', ''),
-                                "sales": int(getattr(product, 'sales', 0) or 0),
-                                "views": int(getattr(product, 'views', 0) or 0),
-                                "status": int(getattr(product, 'status', 1) or 1),
-                                "sort_order": int(getattr(product, 'sort_order', 0) or 0),
-                                "is_hot": bool(getattr(product, 'is_hot', False)),
-                                "is_new": bool(getattr(product, 'is_new', True)),
-                                "is_recommend": bool(getattr(product, 'is_recommend', False)),
-                                "has_group": False,
-                                "favorite_count": 0,
-                                "is_favorite": False,  # 这里可以通过user_id查询真实的收藏状态
-                                "categories": [],
-                                "created_at": getattr(product, 'created_at', None),
-                                "updated_at": getattr(product, 'updated_at', None)
-                            }
-                            converted_products.append(product_dict)
-                            print(f"   ✅ 转换商品 {i+1}: {product_dict['name']}")
-                        else:
-                            converted_products.append(product)
-                    except Exception as e:
-                        print(f"   ❌ 转换商品 {i+1} 失败: {e}")
-                        continue
-                
-                products = converted_products
-                print(f"🎉 强制转换完成，现在有 {len(products)} 个字典")
+        products, total = result
         
-        # 最终类型检查
-        if products and not isinstance(products[0], dict):
-            raise HTTPException(
-                status_code=500,
-                detail=f"商品数据转换失败: {type(products[0])}"
-            )
+        print(f"✅ 服务层返回 {len(products)} 个商品")
         
         return {
             "data": {
@@ -136,6 +91,9 @@ async def search_products(
     except HTTPException as e:
         print(f"❌ HTTP异常: {e.detail}")
         raise
+    except InvalidCursorError:
+        # 由deps.get_cursor_params转换为400
+        raise
     except Exception as e:
         print(f"❌ API异常: {str(e)}")
         traceback.print_exc()
@@ -167,14 +125,15 @@ async def get_merchant_products(
     sort_by: Optional[str] = Query("created_at"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     current_user: schemas.user.User = Depends(deps.get_current_merchant),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """获取当前商户的商品列表 - 需要商户认证"""
     try:
         print(f"🏪 商户 {current_user.merchant_id} 请求商品列表")
         
-        products, total = await product_service.search_products(
+        result = await product_service.search_products(
             db=db,
             keyword=keyword,
             category_id=category_id,
@@ -191,49 +150,18 @@ async def get_merchant_products(
             sort_order=sort_order,
             user_id=current_user.id,  # 传递用户ID
             skip=pagination["skip"],
-            limit=pagination["limit"]
+            limit=pagination["limit"],
+            cursor=cursor_params["cursor"],
+            with_total=cursor_params["with_total"]
         )
         
-        print(f"✅ 商户商品列表获取成功: {len(products)} 个商品")
+        # 游标分页模式直接返回游标分页数据
+        if cursor_params["cursor"] is not None:
+            return {"data": result.to_dict()}
         
-        # 强制检查数据类型
-        if products and not isinstance(products[0], dict):
-            print(f"❌ 检测到ORM对象，强制转换...")
-            # 应用前面的强制转换逻辑
-            converted_products = []
-            for i, product in enumerate(products):
-                if hasattr(product, '__dict__'):
-                    product_dict = {
-                        "id": getattr(product, 'id', 0),
-                        "merchant_id": getattr(product, 'merchant_id', 0),
-                        "merchant_name": "",
-                        "name": getattr(product, 'name', ''),
-                        "thumbnail": getattr(product, 'thumbnail', ''),
-                        "original_price": float(getattr(product, 'original_price', 0) or 0),
-                        "current_price": float(getattr(product, 'current_price', 0) or 0),
-                        "group_price": float(getattr(product, 'group_price', 0)) if getattr(product, 'group_price') else None,
-                        "stock": int(getattr(product, 'stock', 0) or 0),
-                        "unit": getattr(product, 'unit', '件'),
-                        "description": getattr(product, 'description', ''),
-                        "sales": int(getattr(product, 'sales', 0) or 0),
-                        "views": int(getattr(product, 'views', 0) or 0),
-                        "status": int(getattr(product, 'status', 1) or 1),
-                        "sort_order": int(getattr(product, 'sort_order', 0) or 0),
-                        "is_hot": bool(getattr(product, 'is_hot', False)),
-                        "is_new": bool(getattr(product, 'is_new', True)),
-                        "is_recommend": bool(getattr(product, 'is_recommend', False)),
-                        "has_group": False,
-                        "favorite_count": 0,
-                        "is_favorite": False,
-                        "categories": [],
-                        "created_at": getattr(product, 'created_at', None),
-                        "updated_at": getattr(product, 'updated_at', None)
-                    }
-                    converted_products.append(product_dict)
-                else:
-                    converted_products.append(product)
-            products = converted_products
-            print(f"🎉 强制转换完成: {len(products)} 个字典")
+        products, total = result
+        
+        print(f"✅ 商户商品列表获取成功: {len(products)} 个商品")
         
         return {
             "data": {
@@ -247,6 +175,8 @@ async def get_merchant_products(
         
     except HTTPException:
         raise
+    except InvalidCursorError:
+        raise
     except Exception as e:
         print(f"❌ 获取商户商品列表失败: {str(e)}")
         traceback.print_exc()
@@ -262,7 +192,7 @@ async def get_product(
     product_id: int = Path(..., ge=1),
     # 🔐 重新要求用户认证
     current_user: schemas.user.User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     获取商品详情 - 需要用户登录
@@ -305,7 +235,7 @@ async def get_product(
 async def get_product(
     product_id: int = Path(..., ge=1),
     current_user: Optional[schemas.user.User] = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     获取商品详情
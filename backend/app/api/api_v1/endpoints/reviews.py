@@ -53,17 +53,18 @@ async def search_reviews(
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
     pagination: dict = Depends(deps.get_pagination_params),
+    cursor_params: dict = Depends(deps.get_cursor_params),
     db: Session = Depends(deps.get_db)
 ) -> Any:
     """
     搜索评价列表
     """
-    reviews, total = await review_service.search_reviews(
+    result = await review_service.search_reviews(
         db=db,
         product_id=product_id,
         merchant_id=merchant_id,
         user_id=user_id,
-        status=status,
+        review_status=status,
         min_rating=min_rating,
         max_rating=max_rating,
         has_reply=has_reply,
@@ -71,9 +72,17 @@ async def search_reviews(
         sort_by=sort_by,
         sort_order=sort_order,
         skip=pagination["skip"],
-        limit=pagination["limit"]
+        limit=pagination["limit"],
+        cursor=cursor_params["cursor"],
+        with_total=cursor_params["with_total"]
     )
     
+    # 游标分页模式直接返回游标分页数据
+    if cursor_params["cursor"] is not None:
+        return {"data": result.to_dict()}
+    
+    reviews, total = result
+    
     return {
         "data": {
             "items": reviews,
@@ -113,7 +122,7 @@ async def update_review_status(
     return await review_service.update_review_status(
         db=db,
         review_id=review_id,
-        status=status
+        review_status=status
     )
 
 
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List, Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.services import search_service
+
+router = APIRouter()
+
+
+@router.get("/suggest", response_model=List[Dict])
+async def suggest(
+    keyword: str = Query(..., min_length=1, max_length=50),
+    type: Literal["product", "merchant", "group"] = Query("product"),
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    搜索输入补全
+    根据已输入的关键词返回按相关度排序的商品、商户或团购名称
+    """
+    return await search_service.suggest(db, type, keyword, limit)
@@ -1,11 +1,13 @@
-from typing import Any, List, Optional
+from datetime import date
+from typing import Any, List, Literal, Optional
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Path
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.api import deps
-from app.services import stats_service
+from app.services import export_service, stats_service
+from app.utils.export_utils import export_response
 
 router = APIRouter()
 
@@ -119,4 +121,40 @@ async def get_merchant_dashboard(
     return await stats_service.get_merchant_dashboard(
         db=db,
         merchant_id=current_user.merchant_id
-    )
\ No newline at end of file
+    )
+
+
+ExportKind = Literal["orders", "sales", "products"]
+ExportFormat = Literal["csv", "xlsx"]
+
+
+@router.get("/export/{kind}", dependencies=[Depends(deps.get_current_admin)])
+async def export_stats(
+    kind: ExportKind,
+    start_date: date = Query(..., description="开始日期"),
+    end_date: date = Query(..., description="结束日期"),
+    merchant_id: Optional[int] = Query(None, description="商户ID，为空表示全平台"),
+    format: ExportFormat = Query("csv", description="导出格式")
+) -> Any:
+    """
+    流式导出订单明细、按日销售或商品销售数据（需要管理员权限）
+    """
+    headers, rows = export_service.get_export(kind, start_date, end_date, merchant_id)
+    filename = f"{kind}_{start_date:%Y%m%d}_{end_date:%Y%m%d}"
+    return export_response(filename, headers, rows, format)
+
+
+@router.get("/merchant-export/{kind}")
+async def export_merchant_stats(
+    kind: ExportKind,
+    start_date: date = Query(..., description="开始日期"),
+    end_date: date = Query(..., description="结束日期"),
+    format: ExportFormat = Query("csv", description="导出格式"),
+    current_user: schemas.user.User = Depends(deps.get_current_merchant)
+) -> Any:
+    """
+    流式导出本商户的订单明细、按日销售或商品销售数据
+    """
+    headers, rows = export_service.get_export(kind, start_date, end_date, current_user.merchant_id)
+    filename = f"{kind}_{current_user.merchant_id}_{start_date:%Y%m%d}_{end_date:%Y%m%d}"
+    return export_response(filename, headers, rows, format)
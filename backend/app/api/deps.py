@@ -1,4 +1,4 @@
-from typing import Dict, List, Any, Union, Optional, Tuple, Generator, TypeVar, Generic, Callable
+from typing import Dict, List, Any, Union, Optional, Tuple, Generator, AsyncGenerator, TypeVar, Generic, Callable
 from datetime import datetime
 from fastapi import Depends, HTTPException, status, Security, Query
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
@@ -9,13 +9,12 @@ from app.crud import crud_user  # 导入crud_user实例
 
 from app.core.config import settings
 from app.core.security import ALGORITHM
+from app.db import session
 from app.db.session import SessionLocal
-from app.models.user import User
 from app.models.merchant import Merchant
 from app.schemas.token import TokenPayload
-from app.core.redis import RedisClient
-from app.core.constants import CACHE_EXPIRE_TIME, CACHE_KEY_PREFIX
-from app.models.admin import Admin  # 添加此导入
+from app.core.principal import UserPrincipal, aload_admin_principal, aload_user_principal
+from app.utils.pagination_utils import InvalidCursorError, decode_cursor
 
 # OAuth2 密码流认证
 oauth2_scheme = OAuth2PasswordBearer(
@@ -40,25 +39,49 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
+async def get_async_db() -> AsyncGenerator:
+    """
+    获取异步数据库会话
+    
+    未启用异步引擎(DB_ASYNC_ENABLED)时退回同步会话，
+    服务层通过run_in_session同时支持两种会话
+    
+    Yields:
+        数据库会话
+    """
+    if session.AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+    
+    async with session.AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
-) -> User:
+) -> UserPrincipal:
     """
     获取当前用户
     
+    返回缓存的用户身份快照（id、open_id、nickname、is_active、is_admin、merchant_id），
+    缓存命中时不访问数据库；访问其他属性时才加载完整的用户对象
+    
     Args:
         db: 数据库会话
         token: JWT令牌
         
     Returns:
-        当前用户对象
+        当前用户身份
         
     Raises:
         HTTPException: 认证失败或用户不存在
     """
     try:
-        # 先从缓存获取用户信息
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[ALGORITHM]
         )
@@ -73,53 +96,30 @@ def get_current_user(
             )
             
         user_id = int(token_data.sub)
-        cache_key = f"{CACHE_KEY_PREFIX['user']}{user_id}"
-        user_data = RedisClient.get(cache_key)
-        
-        if user_data:
-            # 检查用户是否被禁用
-            if not user_data.get("is_active", True):
-                raise HTTPException(status_code=400, detail="用户已被禁用")
-                
-            # 从数据库获取完整用户信息
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="用户不存在"
-                )
-            return user
-        
-        # 缓存未命中，从数据库获取
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="用户不存在"
-            )
-        
-        # 更新缓存
-        RedisClient.set(cache_key, {
-            "id": user.id,
-            "open_id": user.open_id,
-            "nickname": user.nickname,
-            "is_active": user.is_active,
-            "is_admin": user.is_admin,
-            "merchant_id": user.merchant_id
-        }, CACHE_EXPIRE_TIME["user"])
-        
-        return user
-    except (JWTError, ValidationError):
+    except (JWTError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无法验证凭据",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    user = await aload_user_principal(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="用户不存在"
+        )
+    
+    # 检查用户是否被禁用
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="用户已被禁用")
+    
+    return user
 
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     """
     获取当前活跃用户
     
@@ -139,9 +139,9 @@ def get_current_active_user(
 
 
 async def get_current_merchant(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     """获取当前商户用户"""
     # 检查用户是否有关联的商户ID
     if not current_user.merchant_id:
@@ -165,9 +165,8 @@ credentials_exception = HTTPException(
     headers={"WWW-Authenticate": "Bearer"},
 )
 
-from app.models.admin import Admin  # 添加此导入
 
-def get_current_admin(
+async def get_current_admin(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
@@ -183,8 +182,11 @@ def get_current_admin(
     except JWTError:
         raise credentials_exception
     
-    # 从Admin模型查询而不是User模型
-    admin = db.query(Admin).filter(Admin.id == admin_id).first()
+    # 从Admin模型查询而不是User模型，身份快照缓存命中时不访问数据库
+    try:
+        admin = await aload_admin_principal(db, int(admin_id))
+    except ValueError:
+        raise credentials_exception
     if not admin:
         raise credentials_exception
     
@@ -217,3 +219,34 @@ def get_pagination_params(
 
 
 
+
+
+def get_cursor_params(
+    cursor: Optional[str] = Query(None, description="分页游标，首页传空字符串，传入后启用游标分页"),
+    with_total: bool = Query(False, description="游标分页时是否统计总数")
+) -> Generator:
+    """
+    获取游标分页参数
+    
+    游标可以解码但与当前排序方式不匹配（如换了sort_by）时，分页函数在接口执行中才会发现，
+    这里捕获InvalidCursorError一并返回400
+    
+    Args:
+        cursor: 上一页返回的next_cursor
+        with_total: 是否统计总数
+        
+    Yields:
+        游标分页参数字典
+        
+    Raises:
+        HTTPException: 游标无效或与排序方式不匹配
+    """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        yield {"cursor": cursor, "with_total": with_total}
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -40,11 +40,56 @@ class Settings(BaseSettings):
         print(f"数据库连接字符串: {conn_str}")
         return conn_str
     
+    # 数据库连接池配置
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # 获取连接超时(秒)
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # 连接回收时间(秒)，需小于MySQL wait_timeout
+    DB_POOL_PRE_PING: bool = True
+    
+    # 异步数据库引擎（aiomysql），启用后热点读接口使用AsyncSession
+    DB_ASYNC_ENABLED: bool = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+    
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
+        if isinstance(v, str):
+            return v
+        return f"mysql+aiomysql://{values.get('DB_USER')}:{values.get('DB_PASSWORD')}@{values.get('DB_HOST')}:{values.get('DB_PORT')}/{values.get('DB_NAME')}"
+    
     # Redis配置
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_PASSWORD: Optional[str] = os.getenv("REDIS_PASSWORD", "")
+    REDIS_SERIALIZER: str = os.getenv("REDIS_SERIALIZER", "json")  # 值序列化方式: json、orjson、msgpack
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))  # 连接池最大连接数（异步客户端每个事件循环一个连接池）
+    REDIS_POOL_TIMEOUT: float = 1.0  # 连接池耗尽时等待空闲连接的时间(秒)
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # 命令读写超时(秒)
+    REDIS_CONNECT_TIMEOUT: float = 1.0  # 建立连接超时(秒)
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # 空闲连接超过该时间(秒)后使用前先PING检查
+    
+    # 下单时是否先在Redis中预扣库存（秒杀等高并发场景），数据库库存仍是最终依据
+    STOCK_REDIS_ENABLED: bool = os.getenv("STOCK_REDIS_ENABLED", "false").lower() == "true"
+    
+    # 参与团购是否先在Redis中占位（人数上限和一人一次），数据库仍是最终依据
+    GROUP_JOIN_REDIS_ENABLED: bool = os.getenv("GROUP_JOIN_REDIS_ENABLED", "false").lower() == "true"
+    GROUP_JOIN_BATCH_SIZE: int = 200  # 每批写入的参与记录数
+    GROUP_JOIN_BATCH_WAIT: float = 0.005  # 凑批最长等待时间(秒)
+    
+    # 操作日志放入进程内有界队列，由后台任务批量写入，应用停止时写完队列
+    OPERATION_LOG_QUEUE_SIZE: int = 10000  # 队列容量
+    OPERATION_LOG_BATCH_SIZE: int = 500  # 每批写入的日志数
+    OPERATION_LOG_BATCH_WAIT: float = 0.2  # 凑批最长等待时间(秒)
+    OPERATION_LOG_PUT_TIMEOUT: float = 0.05  # 队列满时请求最多等待的时间(秒)，超时丢弃该条日志，0表示直接丢弃
+    
+    # 两级缓存：进程内LRU（L1）+ Redis（L2）
+    CACHE_L1_MAX_ENTRIES: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000"))  # 每个缓存实例的最大条目数
+    CACHE_L1_MAX_BYTES: int = int(os.getenv("CACHE_L1_MAX_BYTES", str(64 * 1024 * 1024)))  # 每个缓存实例的内存上限(字节)
+    CACHE_L2_ENABLED: bool = os.getenv("CACHE_L2_ENABLED", "true").lower() == "true"
+    CACHE_L2_DEFAULT_TTL: int = 3600  # 未指定过期时间时L2的过期时间(秒)
+    CACHE_L2_RETRY_INTERVAL: int = 30  # Redis出错后暂停使用L2的时间(秒)
+    CACHE_TAG_VERSION_TTL: float = 1.0  # 本地标签版本的同步间隔(秒)，即其他进程失效缓存的最长延迟
     
     # 跨域配置
     CORS_ORIGINS: List[str] = ["http://localhost:3000","*"] 
@@ -71,6 +116,53 @@ class Settings(BaseSettings):
     MAP_API_KEY: str = os.getenv("MAP_API_KEY", "")
     MAP_KEY: str = MAP_API_KEY 
     
+    # 外部HTTP请求配置（微信、地图、支付等）
+    HTTP_TIMEOUT: float = 10.0  # 总超时(秒)
+    HTTP_CONNECT_TIMEOUT: float = 3.0  # 连接超时(秒)
+    HTTP_MAX_CONNECTIONS: int = 100  # 连接池最大连接数
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20  # 保持的空闲长连接数
+    HTTP_PER_HOST_LIMIT: int = 20  # 单个域名最大并发请求数
+    HTTP_MAX_RETRIES: int = 2  # 幂等请求失败后的最大重试次数
+    
+    # 定时任务配置
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"  # 是否在应用进程内运行定时任务
+    ORDER_EXPIRE_CHECK_INTERVAL: int = 60  # 超时订单检查间隔(秒)
+    GROUP_EXPIRE_CHECK_INTERVAL: int = 60  # 过期团购检查间隔(秒)
+    ORDER_AUTO_CONFIRM_CRON: str = "5 * * * *"  # 自动确认收货执行时间(分 时 日 月 周)
+    ORDER_SEARCH_BACKFILL_CRON: str = "30 3 * * *"  # 历史订单搜索字段补全执行时间，启动时也会运行一次
+    SCHEDULER_JITTER: float = 10.0  # 触发时间随机延迟上限(秒)
+    JOB_BATCH_SIZE: int = 500  # 批处理任务每批处理的行数，每批独立提交事务
+    JOB_CHECKPOINT_ENABLED: bool = True  # 是否在Redis中保存批处理任务断点
+    MESSAGE_FANOUT_BATCH_SIZE: int = 5000  # 群发消息每批写入的接收者数，每批独立提交事务
+    
+    # 浏览量和销量先累加在缓冲中，定期合并写入数据库
+    COUNTER_REDIS_ENABLED: bool = os.getenv("COUNTER_REDIS_ENABLED", "false").lower() == "true"  # 多进程共享Redis缓冲，否则每个进程各自缓冲
+    COUNTER_FLUSH_INTERVAL: int = 5  # 写回数据库间隔(秒)
+    
+    # 仪表盘读取的每日统计汇总表，定时重新汇总有订单变动的日期
+    STATS_ROLLUP_INTERVAL: int = 60  # 汇总间隔(秒)，即仪表盘数据的最长延迟
+    
+    # 数据导出
+    EXPORT_BATCH_SIZE: int = 2000  # 流式查询每批读取的行数
+    EXPORT_CHUNK_SIZE: int = 64 * 1024  # 响应每块的字节数
+    EXPORT_MAX_DAYS: int = 366  # 单次导出的最大日期跨度(天)
+    
+    # 商品、商户、团购关键词搜索使用进程内倒排索引，未构建完成时回退到LIKE查询
+    SEARCH_INDEX_ENABLED: bool = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+    SEARCH_INDEX_REFRESH_INTERVAL: int = 60  # 增量同步其他进程修改的间隔(秒)
+    SEARCH_INDEX_BATCH_SIZE: int = 5000  # 全量构建时流式读取的每批行数
+    SEARCH_ID_CHUNK_SIZE: int = 2000  # 用索引命中的ID筛选时每条IN查询的ID数；按指定字段排序且命中数超过该值时改用LIKE
+    
+    # 按距离排序时从小范围开始查询，结果不足一页时逐步扩大范围
+    GEO_SEARCH_INITIAL_RADIUS_KM: float = 5.0  # 首次查询的半径(km)
+    GEO_SEARCH_RADIUS_GROWTH: float = 4.0  # 每次扩大的倍数
+    
+    # 相关商品由离线任务根据共同购买和同分类、同商户计算，详情页一次查询读取
+    RECOMMEND_REBUILD_CRON: str = "0 4 * * *"  # 相关商品重新计算时间
+    RECOMMEND_TOP_K: int = 20  # 每个商品保存的相关商品数
+    RECOMMEND_ORDER_DAYS: int = 180  # 统计共同购买的订单时间范围(天)
+    RECOMMEND_BATCH_SIZE: int = 200  # 每批计算的商品数，每批独立提交事务
+    
     # 文件上传配置
     UPLOAD_DIR: str = "static/uploads"
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # 5MB
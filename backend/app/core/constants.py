@@ -108,6 +108,12 @@ SYSTEM_CONFIG_KEYS = {
     "order_auto_confirm_time": "订单自动确认时间(天)",
 }
 
+# 未支付订单超时时间(分钟)，超时后订单自动取消并归还库存
+ORDER_PAY_TIMEOUT_MINUTES = 30
+
+# 已发货订单自动确认收货时间(天)
+ORDER_AUTO_CONFIRM_DAYS = 7
+
 # 缓存键前缀
 CACHE_KEY_PREFIX = {
     "user": "user:",
@@ -118,6 +124,10 @@ CACHE_KEY_PREFIX = {
     "token": "token:",
     "wechat": "wechat:",
     "config": "config:",
+    "stock": "stock:",
+    "job": "job:",
+    "cache": "cache:",
+    "counter": "counter:",
 }
 
 # 缓存过期时间(秒)
@@ -126,6 +136,9 @@ CACHE_EXPIRE_TIME = {
     "merchant": 3600,
     "product": 1800,
     "group": 600,
+    "product_detail": 300,  # 商品详情公共部分，库存和浏览量每次请求读取
+    "hot_products": 600,    # 相关商品不足时补充的全站热销商品
+    "group_detail": 60,     # 团购详情公共部分，参与人数变化时主动失效
     "order": 1800,
     "token": 86400 * 7,  # 7天
     "wechat": 7200,      # 2小时
@@ -6,9 +6,70 @@ from fastapi import FastAPI
 from sqlalchemy.orm import Session
 from sqlalchemy import text  # 添加这行导入
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, async_engine
 from app.core.config import settings
 from app.core.logging import configure_logging
+from app.core.http_client import HttpClient
+from app.core.redis import AsyncRedisClient
+from app.core.scheduler import CronTrigger, IntervalTrigger, scheduler
+from app.services import (
+    admin_service, counter_service, group_join_service, group_service, order_service, recommend_service,
+    rollup_service, search_service
+)
+
+
+def register_scheduled_jobs() -> None:
+    """注册订单和团购维护任务、计数器写回任务、统计汇总任务、搜索索引任务及相关商品计算任务"""
+    if scheduler.jobs:
+        return
+    jitter = settings.SCHEDULER_JITTER
+    scheduler.add_job(
+        "cancel_expired_orders",
+        order_service.check_and_cancel_expired_orders,
+        IntervalTrigger(settings.ORDER_EXPIRE_CHECK_INTERVAL, jitter=jitter)
+    )
+    scheduler.add_job(
+        "update_expired_groups",
+        group_service.check_and_update_expired_groups,
+        IntervalTrigger(settings.GROUP_EXPIRE_CHECK_INTERVAL, jitter=jitter)
+    )
+    scheduler.add_job(
+        "auto_confirm_orders",
+        order_service.check_and_auto_confirm_orders,
+        CronTrigger(settings.ORDER_AUTO_CONFIRM_CRON, jitter=jitter)
+    )
+    scheduler.add_job(
+        "backfill_order_search_text",
+        order_service.backfill_order_search_text,
+        CronTrigger(settings.ORDER_SEARCH_BACKFILL_CRON, jitter=jitter),
+        run_at_start=True
+    )
+    # 进程内缓冲时每个进程都要写回自己的计数
+    scheduler.add_job(
+        "flush_counters",
+        counter_service.flush_counters,
+        IntervalTrigger(settings.COUNTER_FLUSH_INTERVAL),
+        lease=settings.COUNTER_REDIS_ENABLED
+    )
+    scheduler.add_job(
+        "refresh_daily_stats",
+        rollup_service.refresh_daily_stats,
+        IntervalTrigger(settings.STATS_ROLLUP_INTERVAL, jitter=jitter)
+    )
+    scheduler.add_job(
+        "rebuild_product_relations",
+        recommend_service.rebuild_product_relations,
+        CronTrigger(settings.RECOMMEND_REBUILD_CRON, jitter=jitter)
+    )
+    # 搜索索引在每个进程内存中，启动时构建，之后增量同步
+    if settings.SEARCH_INDEX_ENABLED:
+        scheduler.add_job(
+            "refresh_search_indexes",
+            search_service.refresh_search_indexes,
+            IntervalTrigger(settings.SEARCH_INDEX_REFRESH_INTERVAL, jitter=jitter),
+            lease=False,
+            run_at_start=True
+        )
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
@@ -37,6 +98,11 @@ def create_start_app_handler(app: FastAPI) -> Callable:
         finally:
             db.close()
         
+        # 启动定时任务
+        if settings.SCHEDULER_ENABLED:
+            register_scheduled_jobs()
+            scheduler.start()
+        
         logging.info(f"应用启动成功，调试模式: {settings.DEBUG}")
     
     return start_app
@@ -52,6 +118,30 @@ def create_stop_app_handler(app: FastAPI) -> Callable:
         停止处理函数
     """
     async def stop_app() -> None:
+        # 停止定时任务
+        await scheduler.stop()
+        
+        # 写入排队中的团购参与请求
+        await group_join_service.join_batcher.close()
+        
+        # 写入排队中的操作日志
+        await admin_service.operation_log_writer.close()
+        
+        # 写回缓冲中的浏览量和销量
+        try:
+            await counter_service.flush_counters()
+        except Exception as e:
+            logging.error(f"写回计数器失败: {e}")
+        
+        # 关闭外部HTTP连接池
+        await HttpClient.close()
+        
+        # 关闭异步Redis连接池
+        await AsyncRedisClient.close()
+        
+        # 释放异步数据库连接池
+        if async_engine is not None:
+            await async_engine.dispose()
         logging.info("应用已停止")
     
     return stop_app
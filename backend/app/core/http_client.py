@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 默认重试的幂等请求方法
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# 需要重试的响应状态码
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class RetryableStatusError(Exception):
+    """上游返回可重试状态码"""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"上游返回状态码 {response.status_code}")
+        self.response = response
+
+
+class HostMetrics:
+    """单个域名的请求统计"""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms: Deque[float] = deque(maxlen=window)
+
+    def observe(self, elapsed_ms: float, error: bool) -> None:
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent_ms.append(elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))], 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class HttpClient:
+    """
+    外部接口异步HTTP客户端封装
+
+    每个事件循环共享一个连接池（保持长连接），按域名限制并发，
+    对幂等请求进行指数退避重试，并记录各域名的延迟统计
+    """
+    # 连接和信号量都绑定在事件循环上，每个事件循环（如定时任务线程中的循环）使用独立的客户端，
+    # 不会关闭仍在使用的其他循环的客户端；已结束的循环遗留的客户端在出现新循环时关闭
+    _clients: Dict[asyncio.AbstractEventLoop, Dict[Optional[Tuple[str, str]], httpx.AsyncClient]] = {}
+    _semaphores: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]] = {}
+    _metrics: Dict[str, HostMetrics] = {}
+
+    @classmethod
+    def get_client(cls, cert: Optional[Tuple[str, str]] = None) -> httpx.AsyncClient:
+        """
+        获取当前事件循环下的共享客户端
+
+        Args:
+            cert: 客户端证书(证书文件, 私钥文件)，需要双向认证的接口（如微信退款）使用独立连接池
+
+        Returns:
+            httpx异步客户端
+        """
+        loop = asyncio.get_running_loop()
+        clients = cls._clients.get(loop)
+        if clients is None:
+            cls._close_finished_loops()
+            clients = cls._clients[loop] = {}
+
+        client = clients.get(cert)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                cert=cert,
+            )
+            clients[cert] = client
+        return client
+
+    @classmethod
+    def _close_finished_loops(cls) -> None:
+        """关闭已关闭的事件循环上遗留的客户端"""
+        for loop in [loop for loop in cls._clients if loop.is_closed()]:
+            for client in cls._clients.pop(loop).values():
+                if not client.is_closed:
+                    cls._close_sockets(client)
+            cls._semaphores.pop(loop, None)
+
+    @staticmethod
+    def _close_sockets(client: httpx.AsyncClient) -> None:
+        """
+        直接关闭客户端连接池中的socket
+
+        事件循环关闭后无法再在其上执行aclose，只能关闭底层socket释放连接；
+        需要访问httpx/httpcore的内部属性，结构不同时跳过（连接在客户端被回收时关闭）
+        """
+        try:
+            connections = client._transport._pool.connections
+        except AttributeError:
+            return
+        for connection in connections:
+            stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+            if stream is None:
+                continue
+            sock = stream.get_extra_info("socket")
+            # asyncio返回的是TransportSocket包装，关闭其中的socket
+            sock = getattr(sock, "_sock", sock)
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError as e:
+                    logger.warning(f"关闭HTTP连接失败: {e}")
+
+    @classmethod
+    def _get_semaphore(cls, host: str) -> asyncio.Semaphore:
+        semaphores = cls._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(settings.HTTP_PER_HOST_LIMIT)
+        return semaphores[host]
+
+    @classmethod
+    def _get_metrics(cls, host: str) -> HostMetrics:
+        if host not in cls._metrics:
+            cls._metrics[host] = HostMetrics()
+        return cls._metrics[host]
+
+    @classmethod
+    async def request(
+        cls,
+        method: str,
+        url: str,
+        retries: Optional[int] = None,
+        cert: Optional[Tuple[str, str]] = None,
+        **kwargs: Any
+    ) -> httpx.Response:
+        """
+        发送HTTP请求
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            retries: 最大重试次数，默认幂等请求使用配置值，其他请求不重试
+            cert: 客户端证书(证书文件, 私钥文件)
+            **kwargs: 透传给httpx的参数(params, json, data, files, headers, timeout等)
+
+        Returns:
+            响应对象
+
+        Raises:
+            httpx.HTTPError: 请求失败且重试耗尽
+        """
+        method = method.upper()
+        if retries is None:
+            retries = settings.HTTP_MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+
+        client = cls.get_client(cert)
+        host = urlsplit(url).netloc
+        metrics = cls._get_metrics(host)
+        semaphore = cls._get_semaphore(host)
+
+        async def send() -> httpx.Response:
+            async with semaphore:
+                metrics.in_flight += 1
+                start = time.perf_counter()
+                error = True
+                try:
+                    response = await client.request(method, url, **kwargs)
+                    error = response.status_code >= 500
+                finally:
+                    metrics.in_flight -= 1
+                    metrics.observe((time.perf_counter() - start) * 1000, error)
+            if response.status_code in RETRY_STATUS_CODES:
+                raise RetryableStatusError(response)
+            return response
+
+        def before_sleep(retry_state) -> None:
+            metrics.retries += 1
+            logger.warning(f"请求 {method} {host} 失败，第{retry_state.attempt_number}次重试: {retry_state.outcome.exception()}")
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(retries + 1),
+            wait=wait_exponential(multiplier=0.2, max=2),
+            retry=retry_if_exception(lambda e: isinstance(e, (httpx.TransportError, RetryableStatusError))),
+            before_sleep=before_sleep,
+            reraise=True,
+        )
+        try:
+            return await retrying(send)
+        except RetryableStatusError as e:
+            # 重试耗尽后把最后一次响应交给调用方处理
+            return e.response
+
+    @classmethod
+    async def get(cls, url: str, **kwargs: Any) -> httpx.Response:
+        """发送GET请求"""
+        return await cls.request("GET", url, **kwargs)
+
+    @classmethod
+    async def post(cls, url: str, **kwargs: Any) -> httpx.Response:
+        """发送POST请求"""
+        return await cls.request("POST", url, **kwargs)
+
+    @classmethod
+    def get_metrics(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各域名的请求统计
+
+        Returns:
+            {域名: 统计数据}
+        """
+        return {host: metrics.to_dict() for host, metrics in cls._metrics.items()}
+
+    @classmethod
+    async def close(cls) -> None:
+        """关闭当前事件循环的连接池，以及已结束的事件循环遗留的连接池"""
+        loop = asyncio.get_running_loop()
+        for client in cls._clients.pop(loop, {}).values():
+            if not client.is_closed:
+                await client.aclose()
+        cls._semaphores.pop(loop, None)
+        cls._close_finished_loops()
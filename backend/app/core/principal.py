@@ -0,0 +1,179 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.constants import CACHE_EXPIRE_TIME
+from app.models.admin import Admin
+from app.models.user import User
+from app.utils.cache_utils import default_cache
+
+
+class _Principal:
+    """
+    已认证身份的轻量快照
+
+    快照字段直接从缓存读取；访问其他属性时才用请求的数据库会话加载完整ORM对象
+    """
+    __slots__ = ("_db", "_instance")
+    FIELDS: Tuple[str, ...] = ()
+    model: Type = None
+
+    def __init__(self, snapshot: Dict[str, Any], db: Optional[Session] = None):
+        for field in self.FIELDS:
+            setattr(self, field, snapshot.get(field))
+        self._db = db
+        self._instance = None
+
+    @classmethod
+    def snapshot(cls, instance: Any) -> Dict[str, Any]:
+        """从ORM对象生成可缓存的快照"""
+        return {field: getattr(instance, field) for field in cls.FIELDS}
+
+    @property
+    def instance(self) -> Any:
+        """完整的ORM对象，首次访问时加载"""
+        if self._instance is None:
+            if self._db is None:
+                raise RuntimeError(f"{type(self).__name__}没有可用的数据库会话")
+            self._instance = self._db.get(self.model, self.id)
+            if self._instance is None:
+                raise HTTPException(status_code=404, detail="用户不存在")
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        # 仅在快照中没有该属性时调用
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} id={self.id}>"
+
+
+class UserPrincipal(_Principal):
+    """当前用户"""
+    __slots__ = ("id", "open_id", "nickname", "is_active", "is_admin", "merchant_id")
+    FIELDS = __slots__
+    model = User
+
+
+class AdminPrincipal(_Principal):
+    """当前管理员"""
+    __slots__ = ("id", "username", "role", "is_active")
+    FIELDS = __slots__
+    model = Admin
+
+
+def _cache_key(kind: str, principal_id: int) -> str:
+    return f"principal:{kind}:{principal_id}"
+
+
+def _from_db(
+    db: Session, principal_cls: Type[_Principal], principal_id: int
+) -> Tuple[Optional[_Principal], Optional[Dict[str, Any]]]:
+    """缓存未命中时查询数据库，返回身份和需要写入缓存的快照"""
+    instance = db.get(principal_cls.model, principal_id)
+    if instance is None:
+        return None, None
+    snapshot = principal_cls.snapshot(instance)
+    principal = principal_cls(snapshot, db)
+    principal._instance = instance
+    return principal, snapshot
+
+
+def _load(
+    db: Session, kind: str, principal_cls: Type[_Principal], principal_id: int
+) -> Optional[_Principal]:
+    key = _cache_key(kind, principal_id)
+    snapshot = default_cache.get(key)
+    if snapshot is not None:
+        return principal_cls(snapshot, db)
+    principal, snapshot = _from_db(db, principal_cls, principal_id)
+    if snapshot is not None:
+        default_cache.set(key, snapshot, CACHE_EXPIRE_TIME["user"], tags=[f"{kind}:{principal_id}"])
+    return principal
+
+
+async def _aload(
+    db: Session, kind: str, principal_cls: Type[_Principal], principal_id: int
+) -> Optional[_Principal]:
+    key = _cache_key(kind, principal_id)
+    snapshot = await default_cache.aget(key)
+    if snapshot is not None:
+        return principal_cls(snapshot, db)
+    # 同步会话的查询放到线程中执行，避免阻塞事件循环
+    principal, snapshot = await asyncio.to_thread(_from_db, db, principal_cls, principal_id)
+    if snapshot is not None:
+        await default_cache.aset(key, snapshot, CACHE_EXPIRE_TIME["user"], tags=[f"{kind}:{principal_id}"])
+    return principal
+
+
+def load_user_principal(db: Session, user_id: int) -> Optional[UserPrincipal]:
+    """
+    获取用户身份快照，缓存未命中时查询数据库
+
+    Args:
+        db: 数据库会话（用于按需加载完整用户对象）
+        user_id: 用户ID
+
+    Returns:
+        用户身份，用户不存在返回None
+    """
+    return _load(db, "user", UserPrincipal, user_id)
+
+
+async def aload_user_principal(db: Session, user_id: int) -> Optional[UserPrincipal]:
+    """load_user_principal的异步版本，通过异步Redis客户端读取共享缓存"""
+    return await _aload(db, "user", UserPrincipal, user_id)
+
+
+def load_admin_principal(db: Session, admin_id: int) -> Optional[AdminPrincipal]:
+    """
+    获取管理员身份快照，缓存未命中时查询数据库
+
+    Args:
+        db: 数据库会话
+        admin_id: 管理员ID
+
+    Returns:
+        管理员身份，管理员不存在返回None
+    """
+    return _load(db, "admin", AdminPrincipal, admin_id)
+
+
+async def aload_admin_principal(db: Session, admin_id: int) -> Optional[AdminPrincipal]:
+    """load_admin_principal的异步版本"""
+    return await _aload(db, "admin", AdminPrincipal, admin_id)
+
+
+def cache_user_principal(user: User) -> None:
+    """登录后预先写入用户身份快照"""
+    default_cache.set(
+        _cache_key("user", user.id), UserPrincipal.snapshot(user), CACHE_EXPIRE_TIME["user"], tags=[f"user:{user.id}"]
+    )
+
+
+def invalidate_user_principal(user_id: int) -> None:
+    """用户资料、状态或商户绑定变更后使身份快照失效"""
+    default_cache.delete(_cache_key("user", user_id))
+    default_cache.invalidate_tags(f"user:{user_id}")
+
+
+def invalidate_admin_principal(admin_id: int) -> None:
+    """管理员信息、状态变更或删除后使身份快照失效"""
+    default_cache.delete(_cache_key("admin", admin_id))
+    default_cache.invalidate_tags(f"admin:{admin_id}")
+
+
+async def ainvalidate_user_principal(user_id: int) -> None:
+    """invalidate_user_principal的异步版本"""
+    await default_cache.adelete(_cache_key("user", user_id))
+    await default_cache.ainvalidate_tags(f"user:{user_id}")
+
+
+async def ainvalidate_admin_principal(admin_id: int) -> None:
+    """invalidate_admin_principal的异步版本"""
+    await default_cache.adelete(_cache_key("admin", admin_id))
+    await default_cache.ainvalidate_tags(f"admin:{admin_id}")
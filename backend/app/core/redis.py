@@ -1,30 +1,175 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+import re
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Union
 
 import redis
+from redis import asyncio as aioredis
 
 from app.core.config import settings
 from app.core.utils import JSONEncoder
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _encode_datetime(obj: Any) -> Any:
+    """日期时间与JSONEncoder保持相同格式"""
+    if isinstance(obj, datetime):
+        return obj.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(obj, date):
+        return obj.strftime("%Y-%m-%d")
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+# INCR/INCRBY写入的计数器值
+_INTEGER_PATTERN = re.compile(rb"-?[0-9]+")
+
+
+class JSONSerializer:
+    """
+    JSON序列化（默认）
+
+    字典、列表、布尔值和None序列化为JSON，字符串和数字原样写入；
+    读取时能解析为JSON的值返回解析结果，否则返回原始字符串
+    """
+    name = "json"
+    binary = False
+
+    def dumps(self, value: Any) -> Union[str, bytes, int, float]:
+        if isinstance(value, (dict, list, bool)) or value is None:
+            return self._dumps(value)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return value
+        return str(value)
+
+    def loads(self, value: Any) -> Any:
+        try:
+            return self._loads(value)
+        except (TypeError, ValueError):
+            return value
+
+    def _dumps(self, value: Any) -> Union[str, bytes]:
+        return json.dumps(value, ensure_ascii=False, cls=JSONEncoder)
+
+    def _loads(self, value: Any) -> Any:
+        return json.loads(value)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """orjson序列化，与JSON格式兼容，速度更快"""
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ModuleNotFoundError("缺少orjson模块，请安装: pip install orjson")
+
+    def _dumps(self, value: Any) -> str:
+        return orjson.dumps(
+            value, default=_encode_datetime, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        ).decode()
+
+    def _loads(self, value: Any) -> Any:
+        return orjson.loads(value)
+
+
+class MsgpackSerializer(JSONSerializer):
+    """
+    msgpack二进制序列化，体积更小，需使用不自动解码的客户端
+
+    整数按十进制文本写入，与INCR/INCRBY写入的计数器格式相同，读取时不经过msgpack解码
+    （否则b"5"会被解析为fixint 53）；任何msgpack编码结果都不会是多字节的纯数字文本，两者不会混淆
+    """
+    name = "msgpack"
+    binary = True
+
+    def __init__(self):
+        if msgpack is None:
+            raise ModuleNotFoundError("缺少msgpack模块，请安装: pip install msgpack")
+
+    def dumps(self, value: Any) -> bytes:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return msgpack.packb(value, default=_encode_datetime, use_bin_type=True)
+
+    def loads(self, value: Any) -> Any:
+        if isinstance(value, bytes) and _INTEGER_PATTERN.fullmatch(value):
+            return int(value)
+        try:
+            return msgpack.unpackb(value, raw=False, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError):
+            return value
+
+
+SERIALIZERS = {
+    "json": JSONSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def get_serializer(name: str) -> JSONSerializer:
+    """
+    按名称创建序列化器
+
+    Args:
+        name: json、orjson或msgpack
+
+    Returns:
+        序列化器
+
+    Raises:
+        ValueError: 不支持的序列化方式
+        ModuleNotFoundError: 对应模块未安装
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"不支持的Redis序列化方式: {name}")
+    return SERIALIZERS[name]()
+
+
+def _connection_kwargs(decode_responses: bool) -> Dict[str, Any]:
+    """同步和异步客户端共用的连接池配置"""
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "password": settings.REDIS_PASSWORD,
+        "decode_responses": decode_responses,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
 
 class RedisClient:
     """
-    Redis客户端封装
+    Redis客户端封装（同步）
+
+    供定时任务、脚本和同步代码使用；异步接口中使用AsyncRedisClient，避免阻塞事件循环
     """
     _instance = None
     _client = None
+    _raw_client = None
+    _serializer: Optional[JSONSerializer] = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(RedisClient, cls).__new__(cls)
-            cls._client = redis.Redis(
-                host=settings.REDIS_HOST,
-                port=settings.REDIS_PORT,
-                db=settings.REDIS_DB,
-                password=settings.REDIS_PASSWORD,
-                decode_responses=True  # 自动解码为字符串
-            )
+            # 自动解码为字符串
+            cls._client = redis.Redis(connection_pool=redis.BlockingConnectionPool(**_connection_kwargs(True)))
         return cls._instance
     
     @classmethod
@@ -39,6 +184,45 @@ class RedisClient:
             cls()
         return cls._client
     
+    @classmethod
+    def get_raw_client(cls) -> redis.Redis:
+        """
+        获取不自动解码的Redis客户端（二进制序列化使用）
+
+        Returns:
+            Redis客户端实例
+        """
+        if cls._raw_client is None:
+            cls._raw_client = redis.Redis(connection_pool=redis.BlockingConnectionPool(**_connection_kwargs(False)))
+        return cls._raw_client
+    
+    @classmethod
+    def get_serializer(cls) -> JSONSerializer:
+        """
+        获取值序列化器，由REDIS_SERIALIZER配置
+
+        Returns:
+            序列化器
+        """
+        if cls._serializer is None:
+            cls._serializer = get_serializer(settings.REDIS_SERIALIZER)
+        return cls._serializer
+    
+    @classmethod
+    def set_serializer(cls, serializer: Union[str, JSONSerializer]) -> None:
+        """
+        更换值序列化器
+
+        Args:
+            serializer: 序列化器或名称（json、orjson、msgpack）
+        """
+        cls._serializer = get_serializer(serializer) if isinstance(serializer, str) else serializer
+    
+    @classmethod
+    def _data_client(cls) -> redis.Redis:
+        """读写序列化值使用的客户端，二进制序列化时不自动解码"""
+        return cls.get_raw_client() if cls.get_serializer().binary else cls.get_client()
+    
     @classmethod
     def set(cls, key: str, value: Any, expire: Optional[int] = None) -> bool:
         """
@@ -52,17 +236,9 @@ class RedisClient:
         Returns:
             是否成功
         """
-        client = cls.get_client()
-        
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value, ensure_ascii=False, cls=JSONEncoder)
-        elif not isinstance(value, (str, int, float, bool)):
-            value = str(value)
-        
         try:
-            client.set(key, value)
-            if expire:
-                client.expire(key, expire)
+            # SET EX一次往返完成写入和过期设置
+            cls._data_client().set(key, cls.get_serializer().dumps(value), ex=expire or None)
             return True
         except Exception as e:
             logging.error(f"Redis设置键值失败: {e}")
@@ -79,19 +255,13 @@ class RedisClient:
         Returns:
             键值
         """
-        client = cls.get_client()
-        
         try:
-            value = client.get(key)
+            value = cls._data_client().get(key)
             
             if value is None:
                 return None
             
-            # 尝试解析JSON
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
+            return cls.get_serializer().loads(value)
         except Exception as e:
             logging.error(f"Redis获取键值失败: {e}")
             return None
@@ -226,15 +396,8 @@ class RedisClient:
         Returns:
             是否成功
         """
-        client = cls.get_client()
-        
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value, ensure_ascii=False, cls=JSONEncoder)
-        elif not isinstance(value, (str, int, float, bool)):
-            value = str(value)
-        
         try:
-            client.hset(name, key, value)
+            cls._data_client().hset(name, key, cls.get_serializer().dumps(value))
             return True
         except Exception as e:
             logging.error(f"Redis设置哈希表字段失败: {e}")
@@ -252,19 +415,13 @@ class RedisClient:
         Returns:
             字段值
         """
-        client = cls.get_client()
-        
         try:
-            value = client.hget(name, key)
+            value = cls._data_client().hget(name, key)
             
             if value is None:
                 return None
             
-            # 尝试解析JSON
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
+            return cls.get_serializer().loads(value)
         except Exception as e:
             logging.error(f"Redis获取哈希表字段失败: {e}")
             return None
@@ -280,19 +437,8 @@ class RedisClient:
         Returns:
             字段字典
         """
-        client = cls.get_client()
-        
         try:
-            result = client.hgetall(name)
-            
-            # 尝试解析每个值的JSON
-            for key, value in result.items():
-                try:
-                    result[key] = json.loads(value)
-                except json.JSONDecodeError:
-                    pass
-            
-            return result
+            return cls._decode_hash(cls._data_client().hgetall(name))
         except Exception as e:
             logging.error(f"Redis获取哈希表所有字段失败: {e}")
             return {}
@@ -335,4 +481,598 @@ class RedisClient:
             return bool(client.hexists(name, key))
         except Exception as e:
             logging.error(f"Redis检查哈希表字段是否存在失败: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    @classmethod
+    def _decode_hash(cls, result: Dict) -> Dict:
+        serializer = cls.get_serializer()
+        return {
+            (key.decode() if isinstance(key, bytes) else key): serializer.loads(value)
+            for key, value in result.items()
+        }
+    
+    @classmethod
+    def mget(cls, keys: Iterable[str]) -> List[Any]:
+        """
+        批量获取键值（一次往返）
+
+        Args:
+            keys: 键名列表
+
+        Returns:
+            与键顺序一致的值列表，不存在的键为None
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        
+        try:
+            serializer = cls.get_serializer()
+            return [None if value is None else serializer.loads(value) for value in cls._data_client().mget(keys)]
+        except Exception as e:
+            logging.error(f"Redis批量获取键值失败: {e}")
+            return [None] * len(keys)
+    
+    @classmethod
+    def mset(cls, mapping: Mapping[str, Any], expire: Union[int, Mapping[str, int], None] = None) -> bool:
+        """
+        批量设置键值（一次往返）
+
+        Args:
+            mapping: 键值字典
+            expire: 过期时间(秒)，可以是所有键共用的秒数或按键指定的字典，为空表示不过期
+
+        Returns:
+            是否成功
+        """
+        if not mapping:
+            return True
+        
+        serializer = cls.get_serializer()
+        values = {key: serializer.dumps(value) for key, value in mapping.items()}
+        
+        try:
+            client = cls._data_client()
+            if not expire:
+                client.mset(values)
+                return True
+            
+            # MSET不支持过期时间，使用非事务管道逐个SET EX
+            pipe = client.pipeline(transaction=False)
+            for key, value in values.items():
+                ttl = expire.get(key) if isinstance(expire, Mapping) else expire
+                pipe.set(key, value, ex=ttl or None)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Redis批量设置键值失败: {e}")
+            return False
+    
+    @classmethod
+    def hset_many(cls, name: str, mapping: Mapping[str, Any], expire: Optional[int] = None) -> bool:
+        """
+        批量设置哈希表字段
+
+        Args:
+            name: 哈希表名
+            mapping: 字段值字典
+            expire: 哈希表过期时间(秒)
+
+        Returns:
+            是否成功
+        """
+        if not mapping:
+            return True
+        
+        serializer = cls.get_serializer()
+        
+        try:
+            pipe = cls._data_client().pipeline(transaction=False)
+            pipe.hset(name, mapping={key: serializer.dumps(value) for key, value in mapping.items()})
+            if expire:
+                pipe.expire(name, expire)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Redis批量设置哈希表字段失败: {e}")
+            return False
+    
+    @classmethod
+    def hgetall_many(cls, names: Iterable[str]) -> List[Dict]:
+        """
+        批量获取多个哈希表的所有字段（一次往返）
+
+        Args:
+            names: 哈希表名列表
+
+        Returns:
+            与哈希表顺序一致的字段字典列表
+        """
+        names = list(names)
+        if not names:
+            return []
+        
+        try:
+            pipe = cls._data_client().pipeline(transaction=False)
+            for name in names:
+                pipe.hgetall(name)
+            return [cls._decode_hash(result) for result in pipe.execute()]
+        except Exception as e:
+            logging.error(f"Redis批量获取哈希表失败: {e}")
+            return [{} for _ in names]
+    
+    @classmethod
+    @contextmanager
+    def pipeline(cls, transaction: bool = False) -> Iterator[redis.client.Pipeline]:
+        """
+        管道上下文，退出时一次性发送所有命令
+
+        Args:
+            transaction: 是否使用MULTI/EXEC事务
+
+        Yields:
+            Redis管道（命令参数需自行序列化，可使用get_serializer().dumps）
+
+        示例:
+            with RedisClient.pipeline() as pipe:
+                pipe.incr("a")
+                pipe.expire("a", 60)
+        """
+        pipe = cls.get_client().pipeline(transaction=transaction)
+        try:
+            yield pipe
+            pipe.execute()
+        finally:
+            pipe.reset()
+
+
+class AsyncRedisClient:
+    """
+    异步Redis客户端封装（redis.asyncio），接口与RedisClient一致
+
+    连接绑定在创建它的事件循环上，因此每个事件循环使用独立的连接池；
+    值序列化方式与RedisClient共用，两者读写的数据互通
+    """
+    # 事件循环 -> {是否自动解码: 客户端}，事件循环销毁后自动移除
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, aioredis.Redis]]" = (
+        weakref.WeakKeyDictionary()
+    )
+    
+    @classmethod
+    def _loop_client(cls, decode_responses: bool) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        clients = cls._clients.setdefault(loop, {})
+        client = clients.get(decode_responses)
+        if client is None:
+            pool = aioredis.BlockingConnectionPool(**_connection_kwargs(decode_responses))
+            client = clients[decode_responses] = aioredis.Redis(connection_pool=pool)
+        return client
+    
+    @classmethod
+    def get_client(cls) -> aioredis.Redis:
+        """
+        获取当前事件循环的Redis客户端
+
+        Returns:
+            自动解码为字符串的异步Redis客户端
+
+        Raises:
+            RuntimeError: 不在事件循环中调用
+        """
+        return cls._loop_client(True)
+    
+    @classmethod
+    def get_raw_client(cls) -> aioredis.Redis:
+        """
+        获取当前事件循环不自动解码的Redis客户端（二进制序列化使用）
+
+        Returns:
+            异步Redis客户端
+        """
+        return cls._loop_client(False)
+    
+    @classmethod
+    def get_serializer(cls) -> JSONSerializer:
+        """获取值序列化器（与RedisClient相同）"""
+        return RedisClient.get_serializer()
+    
+    @classmethod
+    def _data_client(cls) -> aioredis.Redis:
+        return cls.get_raw_client() if cls.get_serializer().binary else cls.get_client()
+    
+    @classmethod
+    async def close(cls) -> None:
+        """关闭当前事件循环的连接池（应用停止时调用）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for client in cls._clients.pop(loop, {}).values():
+            try:
+                await client.aclose()
+                await client.connection_pool.disconnect()
+            except Exception as e:
+                logging.error(f"关闭Redis连接池失败: {e}")
+    
+    @classmethod
+    async def ping(cls) -> bool:
+        """
+        检查Redis是否可用
+
+        Returns:
+            是否可用
+        """
+        try:
+            return bool(await cls.get_client().ping())
+        except Exception as e:
+            logging.error(f"Redis连接检查失败: {e}")
+            return False
+    
+    @classmethod
+    async def set(cls, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        """
+        设置键值
+
+        Args:
+            key: 键名
+            value: 值
+            expire: 过期时间(秒)
+
+        Returns:
+            是否成功
+        """
+        try:
+            await cls._data_client().set(key, cls.get_serializer().dumps(value), ex=expire or None)
+            return True
+        except Exception as e:
+            logging.error(f"Redis设置键值失败: {e}")
+            return False
+    
+    @classmethod
+    async def get(cls, key: str) -> Any:
+        """
+        获取键值
+
+        Args:
+            key: 键名
+
+        Returns:
+            键值
+        """
+        try:
+            value = await cls._data_client().get(key)
+            return None if value is None else cls.get_serializer().loads(value)
+        except Exception as e:
+            logging.error(f"Redis获取键值失败: {e}")
+            return None
+    
+    @classmethod
+    async def delete(cls, key: str) -> bool:
+        """
+        删除键
+
+        Args:
+            key: 键名
+
+        Returns:
+            是否成功
+        """
+        try:
+            return bool(await cls.get_client().delete(key))
+        except Exception as e:
+            logging.error(f"Redis删除键失败: {e}")
+            return False
+    
+    @classmethod
+    async def exists(cls, key: str) -> bool:
+        """
+        检查键是否存在
+
+        Args:
+            key: 键名
+
+        Returns:
+            是否存在
+        """
+        try:
+            return bool(await cls.get_client().exists(key))
+        except Exception as e:
+            logging.error(f"Redis检查键是否存在失败: {e}")
+            return False
+    
+    @classmethod
+    async def expire(cls, key: str, seconds: int) -> bool:
+        """
+        设置键过期时间
+
+        Args:
+            key: 键名
+            seconds: 过期时间(秒)
+
+        Returns:
+            是否成功
+        """
+        try:
+            return bool(await cls.get_client().expire(key, seconds))
+        except Exception as e:
+            logging.error(f"Redis设置键过期时间失败: {e}")
+            return False
+    
+    @classmethod
+    async def ttl(cls, key: str) -> int:
+        """
+        获取键剩余过期时间
+
+        Args:
+            key: 键名
+
+        Returns:
+            剩余时间(秒),-1表示永不过期,-2表示键不存在
+        """
+        try:
+            return await cls.get_client().ttl(key)
+        except Exception as e:
+            logging.error(f"Redis获取键剩余过期时间失败: {e}")
+            return -2
+    
+    @classmethod
+    async def incr(cls, key: str, amount: int = 1) -> int:
+        """
+        键值递增
+
+        Args:
+            key: 键名
+            amount: 递增量
+
+        Returns:
+            递增后的值
+        """
+        try:
+            return await cls.get_client().incrby(key, amount)
+        except Exception as e:
+            logging.error(f"Redis键值递增失败: {e}")
+            return 0
+    
+    @classmethod
+    async def decr(cls, key: str, amount: int = 1) -> int:
+        """
+        键值递减
+
+        Args:
+            key: 键名
+            amount: 递减量
+
+        Returns:
+            递减后的值
+        """
+        try:
+            return await cls.get_client().decrby(key, amount)
+        except Exception as e:
+            logging.error(f"Redis键值递减失败: {e}")
+            return 0
+    
+    @classmethod
+    async def hset(cls, name: str, key: str, value: Any) -> bool:
+        """
+        设置哈希表字段
+
+        Args:
+            name: 哈希表名
+            key: 字段名
+            value: 值
+
+        Returns:
+            是否成功
+        """
+        try:
+            await cls._data_client().hset(name, key, cls.get_serializer().dumps(value))
+            return True
+        except Exception as e:
+            logging.error(f"Redis设置哈希表字段失败: {e}")
+            return False
+    
+    @classmethod
+    async def hget(cls, name: str, key: str) -> Any:
+        """
+        获取哈希表字段
+
+        Args:
+            name: 哈希表名
+            key: 字段名
+
+        Returns:
+            字段值
+        """
+        try:
+            value = await cls._data_client().hget(name, key)
+            return None if value is None else cls.get_serializer().loads(value)
+        except Exception as e:
+            logging.error(f"Redis获取哈希表字段失败: {e}")
+            return None
+    
+    @classmethod
+    async def hgetall(cls, name: str) -> Dict:
+        """
+        获取哈希表所有字段
+
+        Args:
+            name: 哈希表名
+
+        Returns:
+            字段字典
+        """
+        try:
+            return RedisClient._decode_hash(await cls._data_client().hgetall(name))
+        except Exception as e:
+            logging.error(f"Redis获取哈希表所有字段失败: {e}")
+            return {}
+    
+    @classmethod
+    async def hdel(cls, name: str, *keys: str) -> int:
+        """
+        删除哈希表字段
+
+        Args:
+            name: 哈希表名
+            keys: 字段名列表
+
+        Returns:
+            删除成功的字段数
+        """
+        try:
+            return await cls.get_client().hdel(name, *keys)
+        except Exception as e:
+            logging.error(f"Redis删除哈希表字段失败: {e}")
+            return 0
+    
+    @classmethod
+    async def hexists(cls, name: str, key: str) -> bool:
+        """
+        检查哈希表字段是否存在
+
+        Args:
+            name: 哈希表名
+            key: 字段名
+
+        Returns:
+            是否存在
+        """
+        try:
+            return bool(await cls.get_client().hexists(name, key))
+        except Exception as e:
+            logging.error(f"Redis检查哈希表字段是否存在失败: {e}")
+            return False
+    
+    @classmethod
+    async def mget(cls, keys: Iterable[str]) -> List[Any]:
+        """
+        批量获取键值（一次往返）
+
+        Args:
+            keys: 键名列表
+
+        Returns:
+            与键顺序一致的值列表，不存在的键为None
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        
+        try:
+            serializer = cls.get_serializer()
+            values = await cls._data_client().mget(keys)
+            return [None if value is None else serializer.loads(value) for value in values]
+        except Exception as e:
+            logging.error(f"Redis批量获取键值失败: {e}")
+            return [None] * len(keys)
+    
+    @classmethod
+    async def mset(cls, mapping: Mapping[str, Any], expire: Union[int, Mapping[str, int], None] = None) -> bool:
+        """
+        批量设置键值（一次往返）
+
+        Args:
+            mapping: 键值字典
+            expire: 过期时间(秒)，可以是所有键共用的秒数或按键指定的字典，为空表示不过期
+
+        Returns:
+            是否成功
+        """
+        if not mapping:
+            return True
+        
+        serializer = cls.get_serializer()
+        values = {key: serializer.dumps(value) for key, value in mapping.items()}
+        
+        try:
+            client = cls._data_client()
+            if not expire:
+                await client.mset(values)
+                return True
+            
+            pipe = client.pipeline(transaction=False)
+            for key, value in values.items():
+                ttl = expire.get(key) if isinstance(expire, Mapping) else expire
+                pipe.set(key, value, ex=ttl or None)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Redis批量设置键值失败: {e}")
+            return False
+    
+    @classmethod
+    async def hset_many(cls, name: str, mapping: Mapping[str, Any], expire: Optional[int] = None) -> bool:
+        """
+        批量设置哈希表字段
+
+        Args:
+            name: 哈希表名
+            mapping: 字段值字典
+            expire: 哈希表过期时间(秒)
+
+        Returns:
+            是否成功
+        """
+        if not mapping:
+            return True
+        
+        serializer = cls.get_serializer()
+        
+        try:
+            pipe = cls._data_client().pipeline(transaction=False)
+            pipe.hset(name, mapping={key: serializer.dumps(value) for key, value in mapping.items()})
+            if expire:
+                pipe.expire(name, expire)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Redis批量设置哈希表字段失败: {e}")
+            return False
+    
+    @classmethod
+    async def hgetall_many(cls, names: Iterable[str]) -> List[Dict]:
+        """
+        批量获取多个哈希表的所有字段（一次往返）
+
+        Args:
+            names: 哈希表名列表
+
+        Returns:
+            与哈希表顺序一致的字段字典列表
+        """
+        names = list(names)
+        if not names:
+            return []
+        
+        try:
+            pipe = cls._data_client().pipeline(transaction=False)
+            for name in names:
+                pipe.hgetall(name)
+            return [RedisClient._decode_hash(result) for result in await pipe.execute()]
+        except Exception as e:
+            logging.error(f"Redis批量获取哈希表失败: {e}")
+            return [{} for _ in names]
+    
+    @classmethod
+    @asynccontextmanager
+    async def pipeline(cls, transaction: bool = False) -> AsyncIterator[aioredis.client.Pipeline]:
+        """
+        管道上下文，退出时一次性发送所有命令
+
+        Args:
+            transaction: 是否使用MULTI/EXEC事务
+
+        Yields:
+            Redis管道
+
+        示例:
+            async with AsyncRedisClient.pipeline() as pipe:
+                pipe.incr("a")
+                pipe.expire("a", 60)
+        """
+        pipe = cls.get_client().pipeline(transaction=transaction)
+        try:
+            yield pipe
+            await pipe.execute()
+        finally:
+            await pipe.reset()
@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.constants import CACHE_KEY_PREFIX
+from app.core.redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+# 仅当租约仍属于当前进程时续期
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class IntervalTrigger:
+    """固定间隔触发"""
+
+    def __init__(self, seconds: float, jitter: float = 0):
+        if seconds <= 0:
+            raise ValueError("触发间隔必须大于0")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    @property
+    def period(self) -> float:
+        """最短触发周期(秒)"""
+        return self.seconds
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __repr__(self) -> str:
+        return f"interval[{self.seconds}s]"
+
+
+class CronTrigger:
+    """
+    类cron表达式触发：分 时 日 月 周
+
+    每个字段支持 *、*/n、a-b、a-b/n 以及逗号分隔的列表，周字段0和7表示周日
+    """
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str, jitter: float = 0):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"无效的cron表达式: {expression}")
+        self.expression = expression
+        self.jitter = jitter
+        self.minutes, self.hours, self.days, self.months, weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+        self.weekdays = {day % 7 for day in weekdays}
+        # 日和周都有限制时满足其一即可（与cron一致）
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(v) for v in part.split("-", 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"无效的cron字段: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    @property
+    def period(self) -> float:
+        """最短触发周期(秒)，cron精度为分钟"""
+        return 60
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.isoweekday() % 7) in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_run(self, after: datetime) -> datetime:
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 按月、日、时、分逐级跳过不匹配的时间段，最多查找4年
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months:
+                year = moment.year + (moment.month == 12)
+                moment = moment.replace(year=year, month=moment.month % 12 + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment
+        raise ValueError(f"cron表达式没有可触发的时间: {self.expression}")
+
+    def __repr__(self) -> str:
+        return f"cron[{self.expression}]"
+
+
+class ScheduledJob:
+    """定时任务及其运行状态"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        trigger: Any,
+        max_instances: int = 1,
+        in_thread: bool = True,
+        lease: bool = True,
+        run_at_start: bool = False
+    ):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.max_instances = max_instances
+        self.in_thread = in_thread
+        self.lease = lease
+        self.run_at_start = run_at_start
+
+        self.running = 0
+        self.run_count = 0
+        self.error_count = 0
+        self.skipped_count = 0
+        self.next_run_at: Optional[datetime] = None
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trigger": repr(self.trigger),
+            "running": self.running,
+            "max_instances": self.max_instances,
+            "run_count": self.run_count,
+            "error_count": self.error_count,
+            "skipped_count": self.skipped_count,
+            "next_run_at": self.next_run_at,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": round(self.last_duration_ms, 2) if self.last_duration_ms is not None else None,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """
+    进程内异步定时任务调度器
+
+    每个任务一个后台协程按触发器计算下次运行时间；任务运行中再次触发时按max_instances限制并发；
+    多进程部署（WORKERS > 1）时通过Redis租约保证每个触发周期只有一个进程运行任务
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._running: Set[asyncio.Task] = set()
+        self._owner = uuid.uuid4().hex
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        trigger: Any,
+        max_instances: int = 1,
+        in_thread: bool = True,
+        lease: bool = True,
+        run_at_start: bool = False
+    ) -> ScheduledJob:
+        """
+        注册定时任务
+
+        Args:
+            name: 任务名（唯一）
+            func: 无参异步函数，返回值作为运行结果（如更新行数）
+            trigger: IntervalTrigger或CronTrigger
+            max_instances: 同一任务在本进程内的最大并发运行数
+            in_thread: 是否在线程中运行（任务包含同步数据库操作时避免阻塞事件循环）
+            lease: 多进程部署时是否需要Redis租约
+            run_at_start: 调度器启动时是否立即运行一次（如构建进程内索引）
+
+        Returns:
+            定时任务
+        """
+        if name in self.jobs:
+            raise ValueError(f"定时任务已存在: {name}")
+        job = ScheduledJob(name, func, trigger, max_instances, in_thread, lease, run_at_start)
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        """启动所有任务的调度协程"""
+        loop = asyncio.get_running_loop()
+        for job in self.jobs.values():
+            self._tasks.append(loop.create_task(self._schedule(job)))
+        logger.info(f"定时任务调度器已启动，共 {len(self.jobs)} 个任务")
+
+    async def stop(self) -> None:
+        """停止调度并等待运行中的任务结束"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("定时任务调度器已停止")
+
+    def _spawn(self, job: ScheduledJob) -> None:
+        task = asyncio.create_task(self._run(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _schedule(self, job: ScheduledJob) -> None:
+        if job.run_at_start:
+            self._spawn(job)
+        while True:
+            job.next_run_at = job.trigger.next_run(datetime.now())
+            delay = (job.next_run_at - datetime.now()).total_seconds()
+            if job.trigger.jitter:
+                # 随机延迟，避免多个进程和任务在同一时刻访问数据库
+                delay += random.uniform(0, job.trigger.jitter)
+            await asyncio.sleep(max(0.0, delay))
+
+            if job.running >= job.max_instances:
+                job.skipped_count += 1
+                logger.warning(f"定时任务 {job.name} 仍在运行，跳过本次触发")
+                continue
+            self._spawn(job)
+
+    def _lease_key(self, job: ScheduledJob) -> str:
+        return f"{CACHE_KEY_PREFIX['job']}{job.name}:lease"
+
+    def _acquire_lease(self, job: ScheduledJob, ttl_ms: int) -> bool:
+        """
+        获取任务租约，租约在本触发周期内不释放，其他进程的同一次触发会被跳过
+
+        Redis不可用时仍然运行：定时任务均使用条件更新，重复运行不会产生错误数据
+        """
+        try:
+            return bool(RedisClient.get_client().set(self._lease_key(job), self._owner, nx=True, px=ttl_ms))
+        except Exception as e:
+            logger.error(f"获取定时任务 {job.name} 租约失败，直接运行: {e}")
+            return True
+
+    async def _keep_lease(self, job: ScheduledJob, ttl_ms: int) -> None:
+        """任务运行时间超过租约时定期续期"""
+        client = RedisClient.get_client()
+        while True:
+            await asyncio.sleep(ttl_ms / 3000)
+            try:
+                await asyncio.to_thread(client.eval, RENEW_LEASE_SCRIPT, 1, self._lease_key(job), self._owner, ttl_ms)
+            except Exception as e:
+                logger.error(f"定时任务 {job.name} 租约续期失败: {e}")
+
+    async def _run(self, job: ScheduledJob, force: bool = False) -> Any:
+        keeper = None
+        if job.lease and settings.WORKERS > 1 and not force:
+            ttl_ms = int(job.trigger.period * 900)  # 触发周期的90%
+            if not await asyncio.to_thread(self._acquire_lease, job, ttl_ms):
+                return None
+            keeper = asyncio.create_task(self._keep_lease(job, ttl_ms))
+
+        job.running += 1
+        job.last_run_at = datetime.now()
+        start = time.perf_counter()
+        try:
+            if job.in_thread:
+                job.last_result = await asyncio.to_thread(asyncio.run, job.func())
+            else:
+                job.last_result = await job.func()
+            job.last_error = None
+            return job.last_result
+        except Exception as e:
+            job.error_count += 1
+            job.last_error = str(e)
+            logger.error(f"定时任务 {job.name} 运行失败: {e}")
+            return None
+        finally:
+            job.running -= 1
+            job.run_count += 1
+            job.last_duration_ms = (time.perf_counter() - start) * 1000
+            if keeper:
+                keeper.cancel()
+
+    async def run_job(self, name: str) -> Any:
+        """
+        立即运行任务（不检查租约，仍受max_instances限制）
+
+        Args:
+            name: 任务名
+
+        Returns:
+            任务运行结果
+
+        Raises:
+            KeyError: 任务不存在
+            RuntimeError: 任务运行数已达上限
+        """
+        job = self.jobs[name]
+        if job.running >= job.max_instances:
+            raise RuntimeError(f"定时任务 {name} 正在运行")
+        return await self._run(job, force=True)
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """
+        获取所有任务的运行状态
+
+        Returns:
+            状态列表
+        """
+        return [job.to_dict() for job in self.jobs.values()]
+
+
+scheduler = Scheduler()
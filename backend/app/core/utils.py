@@ -7,11 +7,11 @@ import uuid
 from datetime import datetime, date
 from typing import Any, Dict, List, Optional, Union
 
-import requests
 from fastapi import UploadFile
 
 from app.core.config import settings
 from app.core.constants import StorageType
+from app.core.http_client import HttpClient
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -164,7 +164,7 @@ def format_dict_to_json(data: Dict[str, Any]) -> str:
     return json.dumps(data, ensure_ascii=False, cls=JSONEncoder)
 
 
-def send_wechat_message(
+async def send_wechat_message(
     open_id: str, 
     template_id: str, 
     data: Dict[str, Dict[str, str]], 
@@ -197,7 +197,7 @@ def send_wechat_message(
     if page:
         payload["page"] = page
     
-    response = requests.post(url, json=payload)
+    response = await HttpClient.post(url, json=payload)
     return response.json()
 
 
@@ -2,10 +2,10 @@ import json
 import time
 from typing import Dict, Optional, Any
 
-import requests
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.http_client import HttpClient
 from app.core.exceptions import AppException
 
 
@@ -15,7 +15,7 @@ class WechatAPI:
     """
     
     @staticmethod
-    def request_url(url: str, method: str = "GET", data: Optional[Dict] = None) -> Dict[str, Any]:
+    async def request_url(url: str, method: str = "GET", data: Optional[Dict] = None) -> Dict[str, Any]:
         """
         请求微信API
 
@@ -32,9 +32,9 @@ class WechatAPI:
         """
         try:
             if method.upper() == "GET":
-                response = requests.get(url)
+                response = await HttpClient.get(url)
             else:
-                response = requests.post(url, data=json.dumps(data) if data else None)
+                response = await HttpClient.post(url, content=json.dumps(data) if data else None)
             
             response_data = response.json()
             
@@ -52,7 +52,7 @@ class WechatAPI:
             )
     
     @staticmethod
-    def get_access_token() -> str:
+    async def get_access_token() -> str:
         """
         获取微信接口调用凭证
 
@@ -63,11 +63,11 @@ class WechatAPI:
             AppException: 获取失败
         """
         url = f"https://api.weixin.qq.com/cgi-bin/token?grant_type=client_credential&appid={settings.WECHAT_APPID}&secret={settings.WECHAT_SECRET}"
-        response = WechatAPI.request_url(url)
+        response = await WechatAPI.request_url(url)
         return response["access_token"]
     
     @staticmethod
-    def code2session(code: str) -> Dict[str, Any]:
+    async def code2session(code: str) -> Dict[str, Any]:
         """
         小程序登录，获取用户openid和session_key
 
@@ -81,7 +81,7 @@ class WechatAPI:
             AppException: 登录失败
         """
         url = f"https://api.weixin.qq.com/sns/jscode2session?appid={settings.WECHAT_APPID}&secret={settings.WECHAT_SECRET}&js_code={code}&grant_type=authorization_code"
-        response = WechatAPI.request_url(url)
+        response = await WechatAPI.request_url(url)
         
         if "openid" not in response:
             raise AppException(
@@ -92,7 +92,7 @@ class WechatAPI:
         return response
     
     @staticmethod
-    def send_subscribe_message(
+    async def send_subscribe_message(
         open_id: str, 
         template_id: str, 
         data: Dict[str, Dict[str, str]], 
@@ -113,7 +113,7 @@ class WechatAPI:
         Raises:
             AppException: 发送失败
         """
-        access_token = WechatAPI.get_access_token()
+        access_token = await WechatAPI.get_access_token()
         url = f"https://api.weixin.qq.com/cgi-bin/message/subscribe/send?access_token={access_token}"
         
         body = {
@@ -125,4 +125,4 @@ class WechatAPI:
         if page:
             body["page"] = page
         
-        return WechatAPI.request_url(url, method="POST", data=body)
\ No newline at end of file
+        return await WechatAPI.request_url(url, method="POST", data=body)
\ No newline at end of file
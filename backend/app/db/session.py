@@ -1,16 +1,57 @@
 # app/db/session.py
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+T = TypeVar("T")
+
+
+def get_engine_options(url: str) -> Dict[str, Any]:
+    """根据配置生成连接池参数（SQLite不使用连接池参数）"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, **get_engine_options(settings.SQLALCHEMY_DATABASE_URI))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎为可选项，未启用时不加载异步驱动
+async_engine = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+if settings.DB_ASYNC_ENABLED:
+    async_engine = create_async_engine(
+        settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+        **get_engine_options(settings.SQLALCHEMY_ASYNC_DATABASE_URI)
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     """获取数据库会话"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def run_in_session(db: Union[Session, AsyncSession], fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在数据库会话中执行同步查询函数
+
+    异步会话通过run_sync执行，数据库IO由异步驱动完成，不阻塞事件循环；
+    同步会话直接调用，便于服务层同时支持两种会话
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
@@ -1,5 +1,5 @@
 # app/models/admin.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base 
@@ -74,6 +74,10 @@ class Notice(Base):
 class OperationLog(Base):
     """操作日志表"""
     __tablename__ = "operation_logs"
+    __table_args__ = (
+        # 按操作时间倒序游标分页
+        Index("ix_operation_logs_time_id", "operation_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     operator_id = Column(Integer, comment="操作者ID")
@@ -1,5 +1,5 @@
 # app/models/merchant.py
-from sqlalchemy import DECIMAL, Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey
+from sqlalchemy import DECIMAL, Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -8,6 +8,10 @@ from app.models.category import Category
 class Merchant(Base):
     """商户表"""
     __tablename__ = "merchants"
+    __table_args__ = (
+        # 附近商户查询按经纬度矩形范围筛选
+        Index("ix_merchants_location", "latitude", "longitude"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(128), comment="商户名称")
@@ -35,6 +39,8 @@ class Merchant(Base):
     rating = Column(Float, default=5.0, comment="评分")
     commission_rate = Column(Float, default=0.05, comment="佣金率")
     balance = Column(Float, default=0.0, comment="账户余额")
+    total_sales = Column(Integer, default=0, comment="商品累计销量")
+    total_views = Column(Integer, default=0, comment="商品累计浏览量")
     created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
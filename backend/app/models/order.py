@@ -1,5 +1,5 @@
 # app/models/order.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base 
@@ -7,6 +7,18 @@ from app.db.base_class import Base
 class Order(Base):
     """订单表"""
     __tablename__ = "orders"
+    __table_args__ = (
+        # 每日统计按创建日期汇总、按更新时间查找需要重新汇总的日期
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_updated_at", "updated_at"),
+        # 判断用户是否首次在商户下单
+        Index("ix_orders_merchant_user", "merchant_id", "user_id", "created_at"),
+        # 我的订单、商户订单列表按创建时间倒序分页
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+        Index("ix_orders_merchant_created", "merchant_id", "created_at", "id"),
+        # 订单关键词搜索，MySQL使用ngram全文索引
+        Index("ix_orders_search_text", "search_text", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     order_no = Column(String(64), unique=True, index=True, comment="订单编号")
@@ -34,6 +46,7 @@ class Order(Base):
     refund_amount = Column(Float, default=0.0, comment="退款金额")
     buyer_comment = Column(Text, nullable=True, comment="买家备注")
     seller_comment = Column(Text, nullable=True, comment="卖家备注")
+    search_text = Column(Text, nullable=True, comment="关键词搜索字段: 订单号、商品名称、买家备注")
     created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
@@ -49,12 +62,18 @@ class Order(Base):
 class OrderItem(Base):
     """订单明细表"""
     __tablename__ = "order_items"
+    __table_args__ = (
+        # 按订单加载明细；相关商品离线计算按商品查找同一订单中的其他商品
+        Index("ix_order_items_order_product", "order_id", "product_id"),
+        Index("ix_order_items_product_order", "product_id", "order_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     order_id = Column(Integer, ForeignKey("orders.id"), comment="订单ID")
     product_id = Column(Integer, ForeignKey("products.id"), comment="商品ID")
     product_name = Column(String(128), comment="商品名称")
     product_image = Column(String(255), comment="商品图片")
+    specification_id = Column(Integer, ForeignKey("product_specifications.id"), nullable=True, comment="规格ID")
     specification = Column(String(128), nullable=True, comment="规格")
     price = Column(Float, comment="价格")
     quantity = Column(Integer, comment="数量")
@@ -1,5 +1,5 @@
 # app/models/product.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -69,4 +69,19 @@ class ProductSpecification(Base):
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
     # 关系
-    product = relationship("Product", back_populates="specifications")
\ No newline at end of file
+    product = relationship("Product", back_populates="specifications")
+
+
+class ProductRelation(Base):
+    """相关商品表，离线任务为每个商品保存得分最高的K个相关商品"""
+    __tablename__ = "product_relations"
+    __table_args__ = (
+        # 详情页按得分倒序读取
+        Index("ix_product_relations_product_score", "product_id", "score"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True, comment="商品ID")
+    related_product_id = Column(Integer, ForeignKey("products.id"), primary_key=True, comment="相关商品ID")
+    score = Column(Float, default=0.0, comment="相关度：共同购买相似度加同分类、同商户加分")
+    co_order_count = Column(Integer, default=0, comment="共同购买的订单数")
+    created_at = Column(DateTime, server_default=func.now(), comment="计算时间")
@@ -1,5 +1,5 @@
 # app/models/review.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base 
@@ -7,6 +7,10 @@ from app.db.base_class import Base
 class Review(Base):
     """评价表"""
     __tablename__ = "reviews"
+    __table_args__ = (
+        # 商品评价列表和评价汇总
+        Index("ix_reviews_product_status", "product_id", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), comment="用户ID")
@@ -32,10 +36,28 @@ class ReviewImage(Base):
     __tablename__ = "review_images"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    review_id = Column(Integer, ForeignKey("reviews.id"), comment="评价ID")
+    review_id = Column(Integer, ForeignKey("reviews.id"), index=True, comment="评价ID")
     image_url = Column(String(255), comment="图片URL")
     sort_order = Column(Integer, default=0, comment="排序")
     created_at = Column(DateTime, server_default=func.now(), comment="创建时间")
     
     # 关系
-    review = relationship("Review", back_populates="images")
\ No newline at end of file
+    review = relationship("Review", back_populates="images")
+
+
+class ProductReviewSummary(Base):
+    """商品评价汇总（只统计已审核的评价），评价审核状态变更时原子增减，历史商品首次读取时计算"""
+    __tablename__ = "product_review_summaries"
+
+    product_id = Column(Integer, primary_key=True, comment="商品ID")
+    review_count = Column(Integer, default=0, comment="评价数")
+    rated_count = Column(Integer, default=0, comment="有评分的评价数")
+    rating_sum = Column(Float, default=0.0, comment="评分合计")
+    rating_1_count = Column(Integer, default=0, comment="1星评价数")
+    rating_2_count = Column(Integer, default=0, comment="2星评价数")
+    rating_3_count = Column(Integer, default=0, comment="3星评价数")
+    rating_4_count = Column(Integer, default=0, comment="4星评价数")
+    rating_5_count = Column(Integer, default=0, comment="5星评价数")
+    image_count = Column(Integer, default=0, comment="有图评价数")
+    good_count = Column(Integer, default=0, comment="好评数（4星及以上）")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), comment="更新时间")
@@ -0,0 +1,78 @@
+# app/models/stats.py
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer
+
+from app.db.base_class import Base
+
+# 订单状态 -> 商户每日统计中的状态计数字段
+ORDER_STATUS_COLUMNS = {
+    0: "pending_count",
+    1: "paid_count",
+    2: "shipped_count",
+    3: "completed_count",
+    4: "cancelled_count",
+    5: "refunded_count",
+}
+
+
+class PlatformDailyStats(Base):
+    """平台每日统计（订单按创建日期汇总，由定时任务维护）"""
+    __tablename__ = "stats_platform_daily"
+
+    stat_date = Column(Date, primary_key=True, comment="统计日期")
+    order_count = Column(Integer, default=0, comment="订单数")
+    sales_order_count = Column(Integer, default=0, comment="计入销售额的订单数（已支付、已发货、已完成）")
+    sales_amount = Column(Float, default=0.0, comment="销售额")
+    new_user_count = Column(Integer, default=0, comment="新增用户数")
+    active_user_count = Column(Integer, default=0, comment="活跃用户数（下单用户）")
+    new_merchant_count = Column(Integer, default=0, comment="新增商户数")
+    refreshed_at = Column(DateTime, comment="汇总时间")
+
+
+class MerchantDailyStats(Base):
+    """商户每日统计"""
+    __tablename__ = "stats_merchant_daily"
+    __table_args__ = (
+        Index("ix_stats_merchant_daily_merchant", "merchant_id", "stat_date"),
+    )
+
+    stat_date = Column(Date, primary_key=True, comment="统计日期")
+    merchant_id = Column(Integer, primary_key=True, comment="商户ID")
+    order_count = Column(Integer, default=0, comment="订单数")
+    sales_order_count = Column(Integer, default=0, comment="计入销售额的订单数")
+    sales_amount = Column(Float, default=0.0, comment="销售额")
+    new_customer_count = Column(Integer, default=0, comment="首次在该商户下单的用户数")
+    pending_count = Column(Integer, default=0, comment="当天创建、当前待支付的订单数")
+    paid_count = Column(Integer, default=0, comment="当天创建、当前已支付的订单数")
+    shipped_count = Column(Integer, default=0, comment="当天创建、当前已发货的订单数")
+    completed_count = Column(Integer, default=0, comment="当天创建、当前已完成的订单数")
+    cancelled_count = Column(Integer, default=0, comment="当天创建、当前已取消的订单数")
+    refunded_count = Column(Integer, default=0, comment="当天创建、当前已退款的订单数")
+
+
+class ProductDailyStats(Base):
+    """商品每日销售统计"""
+    __tablename__ = "stats_product_daily"
+    __table_args__ = (
+        Index("ix_stats_product_daily_merchant", "merchant_id", "stat_date"),
+    )
+
+    stat_date = Column(Date, primary_key=True, comment="统计日期")
+    product_id = Column(Integer, primary_key=True, comment="商品ID")
+    merchant_id = Column(Integer, comment="商户ID")
+    sales_count = Column(Integer, default=0, comment="订单明细数")
+    sales_quantity = Column(Integer, default=0, comment="销售件数")
+    sales_amount = Column(Float, default=0.0, comment="销售额")
+
+
+class GroupDailyStats(Base):
+    """团购每日销售统计"""
+    __tablename__ = "stats_group_daily"
+    __table_args__ = (
+        Index("ix_stats_group_daily_merchant", "merchant_id", "stat_date"),
+    )
+
+    stat_date = Column(Date, primary_key=True, comment="统计日期")
+    group_id = Column(Integer, primary_key=True, comment="团购ID")
+    merchant_id = Column(Integer, comment="商户ID")
+    order_count = Column(Integer, default=0, comment="计入销售额的订单数")
+    sales_amount = Column(Float, default=0.0, comment="销售额")
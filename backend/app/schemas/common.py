@@ -33,12 +33,14 @@ class PaginationParams(BaseModel):
     
 
 class PaginatedData(GenericModel, Generic[T]):
-    """分页数据模型"""
+    """分页数据模型（游标分页时page/pages为空，total仅在请求时返回）"""
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_next: Optional[bool] = None
 
 
 class PaginatedResponse(ResponseBase, Generic[T]):
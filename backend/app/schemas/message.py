@@ -38,6 +38,8 @@ class MessageCreate(BaseModel):
     link_url: Optional[str] = None
     user_id: Optional[int] = None
     merchant_id: Optional[int] = None
+    user_ids: Optional[List[int]] = None
+    merchant_ids: Optional[List[int]] = None
     is_all_users: bool = False
     is_all_merchants: bool = False
 
@@ -1,19 +1,26 @@
+import asyncio
+import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc
+from sqlalchemy import func, desc, asc, insert
 from sqlalchemy.orm import Session
 from app.models.admin import Admin  # SQLAlchemy模型
 from app.schemas import admin as admin_schema  # Pydantic模型
 
+from app.core.principal import ainvalidate_admin_principal
 from app.core.security import get_password_hash, verify_password
 from app.core.jwt import create_token
 from app.models.admin import Admin, SystemConfig, Banner, Notice, OperationLog
+from app.core.config import settings
 from app.schemas.admin import (
     AdminCreate, AdminUpdate, SystemConfigCreate, SystemConfigUpdate,
     BannerCreate, BannerUpdate, NoticeCreate, NoticeUpdate
 )
+from app.utils.pagination_utils import CursorPaginatedData, apply_order, keyset_paginate
+
+logger = logging.getLogger(__name__)
 
 
 async def authenticate_admin(db: Session, username: str, password: str) -> Optional[admin_schema.Admin]:
@@ -97,6 +104,7 @@ async def update_admin(db: Session, admin_id: int, admin_data: AdminUpdate) -> A
     
     db.commit()
     db.refresh(admin)
+    await ainvalidate_admin_principal(admin_id)
     
     return admin
 
@@ -128,6 +136,7 @@ async def delete_admin(db: Session, admin_id: int) -> bool:
     
     db.delete(admin)
     db.commit()
+    await ainvalidate_admin_principal(admin_id)
     
     return True
 
@@ -484,6 +493,129 @@ async def get_active_notices(db: Session, type: Optional[str] = None) -> List[No
     return query.all()
 
 
+class OperationLogWriter:
+    """
+    操作日志异步写入器
+
+    日志放入有界队列后请求立即返回，由后台任务按批多行插入、每批提交一次。
+    队列满时请求最多等待put_timeout秒（反压），仍没有空位则丢弃该条日志并计数
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        put_timeout: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.put_timeout = put_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # 队列和后台任务绑定在事件循环上，循环变化时重新创建
+            self._loop = loop
+            self._queue = asyncio.Queue(self.queue_size or settings.OPERATION_LOG_QUEUE_SIZE)
+            self._task = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    def _persist(self, records: List[Dict[str, Any]]) -> None:
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        with self.session_factory() as db:
+            db.execute(insert(OperationLog), records)
+            db.commit()
+
+    async def _collect(self, queue: asyncio.Queue, first: Any) -> List[Any]:
+        """收集一批日志：等待最多max_wait秒或凑满batch_size"""
+        batch_size = self.batch_size or settings.OPERATION_LOG_BATCH_SIZE
+        max_wait = settings.OPERATION_LOG_BATCH_WAIT if self.max_wait is None else self.max_wait
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + max_wait
+        while len(batch) < batch_size and batch[-1] is not None:
+            timeout = deadline - asyncio.get_running_loop().time()
+            try:
+                if timeout > 0:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                else:
+                    batch.append(queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue, await queue.get())
+            stopping = batch[-1] is None
+            records = [record for record in batch if record is not None]
+            if records:
+                try:
+                    await asyncio.to_thread(self._persist, records)
+                    self.written += len(records)
+                except Exception as e:
+                    self.failed += len(records)
+                    logger.error(f"批量写入操作日志失败，丢失 {len(records)} 条: {e}")
+            if stopping:
+                return
+
+    async def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        放入写入队列
+
+        Returns:
+            是否已放入队列，队列满且等待超时时返回False
+        """
+        queue = self._ensure_started()
+        try:
+            queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            pass
+        put_timeout = settings.OPERATION_LOG_PUT_TIMEOUT if self.put_timeout is None else self.put_timeout
+        if put_timeout > 0:
+            try:
+                await asyncio.wait_for(queue.put(record), put_timeout)
+                return True
+            except asyncio.TimeoutError:
+                pass
+        self.dropped += 1
+        logger.warning(f"操作日志队列已满，丢弃日志: {record.get('module')}/{record.get('action')}")
+        return False
+
+    async def close(self) -> None:
+        """写入队列中剩余的日志并停止后台任务"""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        if not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列长度和写入、丢弃、失败的日志数"""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+operation_log_writer = OperationLogWriter()
+
+
 async def add_operation_log(
     db: Session,
     operator_id: int,
@@ -496,27 +628,29 @@ async def add_operation_log(
     request_params: Optional[Dict] = None,
     response_code: Optional[int] = None,
     response_message: Optional[str] = None
-) -> OperationLog:
-    """添加操作日志"""
-    log = OperationLog(
-        operator_id=operator_id,
-        operator_type=operator_type,
-        module=module,
-        action=action,
-        ip=ip,
-        request_method=request_method,
-        request_path=request_path,
-        request_params=request_params,
-        response_code=response_code,
-        response_message=response_message,
-        operation_time=datetime.now()
-    )
-    
-    db.add(log)
-    db.commit()
-    db.refresh(log)
-    
-    return log
+) -> bool:
+    """
+    添加操作日志
+
+    日志放入写入队列后立即返回，不在请求中插入和提交；操作时间取调用时间。
+    db参数保留以兼容原有调用
+
+    Returns:
+        是否已放入队列，队列满且等待超时时丢弃并返回False
+    """
+    return await operation_log_writer.submit({
+        "operator_id": operator_id,
+        "operator_type": operator_type,
+        "module": module,
+        "action": action,
+        "ip": ip,
+        "request_method": request_method,
+        "request_path": request_path,
+        "request_params": request_params,
+        "response_code": response_code,
+        "response_message": response_message,
+        "operation_time": datetime.now(),
+    })
 
 
 async def get_operation_logs(
@@ -528,9 +662,15 @@ async def get_operation_logs(
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     skip: int = 0,
-    limit: int = 20
-) -> Tuple[List[OperationLog], int]:
-    """获取操作日志"""
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[OperationLog], int], CursorPaginatedData]:
+    """
+    获取操作日志，按操作时间倒序
+
+    传入cursor（首页为空字符串）时按 (操作时间, ID) 游标分页，返回CursorPaginatedData
+    """
     query = db.query(OperationLog)
     
     # 筛选条件
@@ -552,10 +692,15 @@ async def get_operation_logs(
     if end_time:
         query = query.filter(OperationLog.operation_time <= end_time)
     
+    # 以日志ID作为最后的排序键保证顺序唯一
+    order_columns = [(OperationLog.operation_time, True), (OperationLog.id, True)]
+    if cursor is not None:
+        return keyset_paginate(query, order_columns, cursor, limit, with_total)
+    
     # 获取总数
     total = query.count()
     
     # 排序和分页
-    logs = query.order_by(OperationLog.operation_time.desc()).offset(skip).limit(limit).all()
+    logs = apply_order(query, order_columns).offset(skip).limit(limit).all()
     
-    return logs, total
\ No newline at end of file
+    return logs, total
@@ -0,0 +1,223 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.constants import CACHE_KEY_PREFIX
+from app.core.redis import RedisClient
+from app.db.session import SessionLocal
+from app.models.merchant import Merchant
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# 计数器对应的数据库字段：(对象类型, 计数器名) -> 字段
+COUNTER_COLUMNS = {
+    ("product", "views"): Product.views,
+    ("product", "sales"): Product.sales,
+    ("merchant", "views"): Merchant.total_views,
+    ("merchant", "sales"): Merchant.total_sales,
+}
+
+COUNTER_MODELS = {"product": Product, "merchant": Merchant}
+
+# 原子取出并清空计数器，返回 [key1的HGETALL结果, key2的HGETALL结果, ...]
+DRAIN_SCRIPT = """
+local result = {}
+for i = 1, #KEYS do
+    result[i] = redis.call('HGETALL', KEYS[i])
+    redis.call('DEL', KEYS[i])
+end
+return result
+"""
+
+# (对象类型, 计数器名, 对象ID) -> 增量
+CounterKey = Tuple[str, str, int]
+
+
+class LocalCounterBuffer:
+    """进程内计数器缓冲，每个进程独立写回数据库"""
+
+    def __init__(self):
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def incr(self, increments: Dict[CounterKey, int]) -> None:
+        with self._lock:
+            for key, delta in increments.items():
+                self._pending[key] += delta
+
+    def pending(self, scope: str, field: str, ids: Iterable[int]) -> Dict[int, int]:
+        with self._lock:
+            return {id_: self._pending.get((scope, field, id_), 0) for id_ in ids}
+
+    def drain(self) -> Dict[CounterKey, int]:
+        with self._lock:
+            drained, self._pending = self._pending, defaultdict(int)
+        return {key: delta for key, delta in drained.items() if delta}
+
+
+class RedisCounterBuffer:
+    """Redis计数器缓冲，多个进程共享，由一个进程写回数据库"""
+
+    @staticmethod
+    def _key(scope: str, field: str) -> str:
+        return f"{CACHE_KEY_PREFIX['counter']}{scope}:{field}"
+
+    def incr(self, increments: Dict[CounterKey, int]) -> None:
+        pipe = RedisClient.get_client().pipeline(transaction=False)
+        for (scope, field, id_), delta in increments.items():
+            pipe.hincrby(self._key(scope, field), id_, delta)
+        pipe.execute()
+
+    def pending(self, scope: str, field: str, ids: Iterable[int]) -> Dict[int, int]:
+        ids = list(ids)
+        if not ids:
+            return {}
+        values = RedisClient.get_client().hmget(self._key(scope, field), ids)
+        return {id_: int(value or 0) for id_, value in zip(ids, values)}
+
+    def drain(self) -> Dict[CounterKey, int]:
+        names = list(COUNTER_COLUMNS)
+        results = RedisClient.get_client().eval(
+            DRAIN_SCRIPT, len(names), *[self._key(scope, field) for scope, field in names]
+        )
+        drained = {}
+        for (scope, field), flat in zip(names, results):
+            for id_, delta in zip(flat[::2], flat[1::2]):
+                if int(delta):
+                    drained[(scope, field, int(id_))] = int(delta)
+        return drained
+
+
+local_buffer = LocalCounterBuffer()
+redis_buffer = RedisCounterBuffer()
+
+
+def _buffer():
+    return redis_buffer if settings.COUNTER_REDIS_ENABLED else local_buffer
+
+
+def _record(increments: Dict[CounterKey, int]) -> None:
+    try:
+        _buffer().incr(increments)
+    except Exception as e:
+        # Redis不可用时暂存在本进程，由本进程写回
+        logger.error(f"Redis计数器写入失败，暂存在本地: {e}")
+        local_buffer.incr(increments)
+
+
+def incr_views(product_id: int, merchant_id: Optional[int] = None, count: int = 1) -> None:
+    """
+    记录商品浏览量（延迟写入数据库）
+
+    Args:
+        product_id: 商品ID
+        merchant_id: 商户ID，提供时同时累加商户浏览量
+        count: 增量
+    """
+    increments = {("product", "views", product_id): count}
+    if merchant_id:
+        increments[("merchant", "views", merchant_id)] = count
+    _record(increments)
+
+
+def incr_sales(items: Iterable[Tuple[int, int]], merchant_id: Optional[int] = None) -> None:
+    """
+    记录商品销量（延迟写入数据库），退款和取消时传入负数
+
+    Args:
+        items: (商品ID, 数量) 列表
+        merchant_id: 商户ID，提供时同时累加商户销量
+    """
+    increments: Dict[CounterKey, int] = defaultdict(int)
+    for product_id, quantity in items:
+        increments[("product", "sales", product_id)] += quantity
+        if merchant_id:
+            increments[("merchant", "sales", merchant_id)] += quantity
+    if increments:
+        _record(increments)
+
+
+def get_pending(scope: str, field: str, ids: Iterable[int]) -> Dict[int, int]:
+    """
+    获取尚未写入数据库的计数增量，读取时与数据库中的值相加
+
+    Args:
+        scope: 对象类型（product/merchant）
+        field: 计数器名（views/sales）
+        ids: 对象ID列表
+
+    Returns:
+        以对象ID为键的增量字典
+    """
+    ids = list(ids)
+    pending = local_buffer.pending(scope, field, ids)
+    if settings.COUNTER_REDIS_ENABLED:
+        try:
+            for id_, delta in redis_buffer.pending(scope, field, ids).items():
+                pending[id_] += delta
+        except Exception as e:
+            logger.error(f"读取Redis计数器失败: {e}")
+    return pending
+
+
+def _apply(db: Session, drained: Dict[CounterKey, int]) -> int:
+    """每张表每批一条UPDATE，将增量加到计数字段上"""
+    by_scope: Dict[str, Dict[str, Dict[int, int]]] = defaultdict(lambda: defaultdict(dict))
+    for (scope, field, id_), delta in drained.items():
+        by_scope[scope][field][id_] = delta
+
+    updated = 0
+    for scope, fields in by_scope.items():
+        model = COUNTER_MODELS[scope]
+        ids = sorted({id_ for deltas in fields.values() for id_ in deltas})
+        for start in range(0, len(ids), settings.JOB_BATCH_SIZE):
+            chunk = ids[start:start + settings.JOB_BATCH_SIZE]
+            values = {}
+            for field, deltas in fields.items():
+                chunk_deltas = {id_: deltas[id_] for id_ in chunk if id_ in deltas}
+                if chunk_deltas:
+                    column = COUNTER_COLUMNS[(scope, field)]
+                    values[column] = func.coalesce(column, 0) + case(chunk_deltas, value=model.id, else_=0)
+            # 计数变化不影响更新时间
+            values[model.updated_at] = model.updated_at
+            updated += db.query(model).filter(model.id.in_(chunk)).update(values, synchronize_session=False)
+    return updated
+
+
+async def flush_counters() -> int:
+    """
+    将缓冲的浏览量和销量写回数据库（定时任务）
+
+    写入失败时增量放回缓冲，下次重试
+
+    Returns:
+        更新的行数
+    """
+    drained = local_buffer.drain()
+    if settings.COUNTER_REDIS_ENABLED:
+        try:
+            for key, delta in redis_buffer.drain().items():
+                drained[key] = drained.get(key, 0) + delta
+        except Exception as e:
+            logger.error(f"读取Redis计数器失败: {e}")
+    if not drained:
+        return 0
+
+    db = SessionLocal()
+    try:
+        updated = _apply(db, drained)
+        db.commit()
+        return updated
+    except Exception:
+        db.rollback()
+        local_buffer.incr(drained)
+        raise
+    finally:
+        db.close()
+
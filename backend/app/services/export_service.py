@@ -0,0 +1,130 @@
+from datetime import date, datetime, time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.merchant import Merchant
+from app.models.order import Order
+from app.models.product import Product
+from app.models.stats import MerchantDailyStats, PlatformDailyStats, ProductDailyStats
+
+ORDER_STATUS_NAMES = {0: "待支付", 1: "已支付", 2: "已发货", 3: "已完成", 4: "已取消", 5: "已退款"}
+
+ORDER_HEADERS = [
+    "订单ID", "订单编号", "商户ID", "商户名称", "用户ID", "团购ID", "订单金额", "实付金额",
+    "运费", "优惠", "状态", "支付方式", "支付时间", "创建时间",
+]
+PLATFORM_SALES_HEADERS = ["日期", "订单数", "成交订单数", "销售额", "新增用户", "活跃用户", "新增商户"]
+MERCHANT_SALES_HEADERS = ["日期", "订单数", "成交订单数", "销售额", "新客户数"]
+PRODUCT_HEADERS = ["商品ID", "商品名称", "商户ID", "订单明细数", "销售件数", "销售额"]
+
+
+def _stream(build_query: Callable[[Session], Query]) -> Iterator[Tuple]:
+    """
+    使用独立会话流式读取查询结果
+
+    yield_per启用服务端游标（MySQL为SSCursor），每次只取一批行；
+    会话在响应发送完毕或客户端断开后关闭
+    """
+    db = SessionLocal()
+    try:
+        yield from build_query(db).yield_per(settings.EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def _order_rows(start: datetime, end: datetime, merchant_id: Optional[int]) -> Iterator[Tuple]:
+    def build(db: Session) -> Query:
+        query = db.query(
+            Order.id, Order.order_no, Order.merchant_id, Merchant.name, Order.user_id, Order.group_id,
+            Order.total_amount, Order.actual_amount, Order.freight, Order.discount, Order.status,
+            Order.payment_method, Order.payment_time, Order.created_at
+        ).outerjoin(
+            Merchant, Merchant.id == Order.merchant_id
+        ).filter(Order.created_at.between(start, end))
+        if merchant_id:
+            query = query.filter(Order.merchant_id == merchant_id)
+        return query.order_by(Order.created_at, Order.id)
+
+    for row in _stream(build):
+        yield row[:10] + (ORDER_STATUS_NAMES.get(row.status, row.status),) + row[11:]
+
+
+def _sales_rows(start: datetime, end: datetime, merchant_id: Optional[int]) -> Iterator[Tuple]:
+    """按日销售数据，读取每日统计汇总表"""
+    def build(db: Session) -> Query:
+        if merchant_id:
+            return db.query(
+                MerchantDailyStats.stat_date, MerchantDailyStats.order_count, MerchantDailyStats.sales_order_count,
+                MerchantDailyStats.sales_amount, MerchantDailyStats.new_customer_count
+            ).filter(
+                MerchantDailyStats.merchant_id == merchant_id,
+                MerchantDailyStats.stat_date.between(start.date(), end.date())
+            ).order_by(MerchantDailyStats.stat_date)
+        return db.query(
+            PlatformDailyStats.stat_date, PlatformDailyStats.order_count, PlatformDailyStats.sales_order_count,
+            PlatformDailyStats.sales_amount, PlatformDailyStats.new_user_count,
+            PlatformDailyStats.active_user_count, PlatformDailyStats.new_merchant_count
+        ).filter(
+            PlatformDailyStats.stat_date.between(start.date(), end.date())
+        ).order_by(PlatformDailyStats.stat_date)
+
+    return _stream(build)
+
+
+def _product_rows(start: datetime, end: datetime, merchant_id: Optional[int]) -> Iterator[Tuple]:
+    """商品销售汇总，读取每日统计汇总表"""
+    def build(db: Session) -> Query:
+        query = db.query(
+            ProductDailyStats.product_id, Product.name, ProductDailyStats.merchant_id,
+            func.sum(ProductDailyStats.sales_count), func.sum(ProductDailyStats.sales_quantity),
+            func.sum(ProductDailyStats.sales_amount)
+        ).outerjoin(
+            Product, Product.id == ProductDailyStats.product_id
+        ).filter(ProductDailyStats.stat_date.between(start.date(), end.date()))
+        if merchant_id:
+            query = query.filter(ProductDailyStats.merchant_id == merchant_id)
+        return query.group_by(
+            ProductDailyStats.product_id, Product.name, ProductDailyStats.merchant_id
+        ).order_by(func.sum(ProductDailyStats.sales_amount).desc())
+
+    return _stream(build)
+
+
+def get_export(
+    kind: str, start_date: date, end_date: date, merchant_id: Optional[int] = None
+) -> Tuple[List[str], Iterator[Tuple]]:
+    """
+    获取导出数据
+
+    Args:
+        kind: orders（订单明细）、sales（按日销售）或products（商品销售）
+        start_date: 开始日期
+        end_date: 结束日期
+        merchant_id: 商户ID，为空表示全平台
+
+    Returns:
+        (表头, 数据行迭代器)，迭代时才查询数据库
+
+    Raises:
+        HTTPException: 日期范围无效或导出类型不存在
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="结束日期不能早于开始日期")
+    if (end_date - start_date).days >= settings.EXPORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"导出日期跨度不能超过{settings.EXPORT_MAX_DAYS}天")
+
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date, time.max)
+    if kind == "orders":
+        return ORDER_HEADERS, _order_rows(start, end, merchant_id)
+    if kind == "sales":
+        headers = MERCHANT_SALES_HEADERS if merchant_id else PLATFORM_SALES_HEADERS
+        return headers, _sales_rows(start, end, merchant_id)
+    if kind == "products":
+        return PRODUCT_HEADERS, _product_rows(start, end, merchant_id)
+    raise HTTPException(status_code=404, detail="导出类型不存在")
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.constants import CACHE_EXPIRE_TIME, CACHE_KEY_PREFIX
+from app.core.redis import RedisClient
+from app.models.group import Group, GroupParticipant
+
+logger = logging.getLogger(__name__)
+
+# 原子占位：检查是否已参与和是否满员，通过后加入集合并递增人数
+# 返回参与后的人数，0表示已满员，-1表示已参与，-2表示计数器未加载
+ADMIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -2
+end
+if redis.call('SISMEMBER', KEYS[2], ARGV[1]) == 1 then
+    return -1
+end
+local cap = tonumber(ARGV[2])
+if cap > 0 and tonumber(redis.call('GET', KEYS[1])) >= cap then
+    return 0
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return redis.call('INCR', KEYS[1])
+"""
+
+# 释放占位（取消参与或数据库拒绝时调用）
+RELEASE_SCRIPT = """
+if redis.call('SREM', KEYS[2], ARGV[1]) == 1 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+# 从数据库加载人数和已参与用户，已加载时不覆盖
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+for i = 3, #ARGV do
+    redis.call('SADD', KEYS[2], ARGV[i])
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+def _counter_keys(group_id: int) -> List[str]:
+    prefix = f"{CACHE_KEY_PREFIX['group']}{group_id}"
+    return [f"{prefix}:participants", f"{prefix}:members"]
+
+
+def _load_counters(db: Session, group_id: int) -> None:
+    """从数据库加载团购参与人数和参与用户集合到Redis"""
+    current = db.query(Group.current_participants).filter(Group.id == group_id).scalar() or 0
+    user_ids = [
+        user_id for (user_id,) in db.query(GroupParticipant.user_id).filter(
+            GroupParticipant.group_id == group_id,
+            GroupParticipant.status != 0  # 非取消状态
+        )
+    ]
+    RedisClient.get_client().eval(
+        LOAD_SCRIPT, 2, *_counter_keys(group_id), current, CACHE_EXPIRE_TIME["group"], *user_ids
+    )
+
+
+def _admit(db: Session, group_id: int, user_id: int, max_participants: Optional[int]) -> None:
+    """
+    在Redis中为用户占位，已参与或已满员时直接拒绝，不再争抢团购行锁
+
+    Redis不可用时跳过，由批量写入时的数据库检查兜底
+
+    Raises:
+        HTTPException: 已参与或已满员
+    """
+    keys = _counter_keys(group_id)
+    client = RedisClient.get_client()
+    try:
+        result = int(client.eval(ADMIT_SCRIPT, 2, *keys, user_id, max_participants or 0))
+        if result == -2:
+            _load_counters(db, group_id)
+            result = int(client.eval(ADMIT_SCRIPT, 2, *keys, user_id, max_participants or 0))
+    except Exception as e:
+        logger.error(f"Redis团购占位失败，使用数据库检查: {e}")
+        return
+
+    if result == -1:
+        raise HTTPException(status_code=400, detail="已参与该团购")
+    if result == 0:
+        raise HTTPException(status_code=400, detail="团购已满员")
+
+
+def release_seat(group_id: int, user_id: int) -> None:
+    """
+    释放用户在Redis中的团购占位（取消参与、订单取消或退款后调用）
+
+    Args:
+        group_id: 团购ID
+        user_id: 用户ID
+    """
+    if not settings.GROUP_JOIN_REDIS_ENABLED:
+        return
+    try:
+        RedisClient.get_client().eval(RELEASE_SCRIPT, 2, *_counter_keys(group_id), user_id)
+    except Exception as e:
+        logger.error(f"Redis释放团购占位失败: {e}")
+
+
+def persist_joins(db: Session, entries: List[Tuple[int, int]]) -> List[Union[Dict[str, Any], HTTPException]]:
+    """
+    批量写入团购参与记录
+
+    同一团购的参与请求在持有团购行锁时依次判断是否已参与、是否满员和是否为团长，
+    团购人数每批只更新一次
+
+    Args:
+        db: 数据库会话
+        entries: [(团购ID, 用户ID)]
+
+    Returns:
+        与entries一一对应的参与结果，失败项为HTTPException
+    """
+    results: List[Union[Dict[str, Any], HTTPException, None]] = [None] * len(entries)
+    indexes_by_group: Dict[int, List[int]] = defaultdict(list)
+    for index, (group_id, _) in enumerate(entries):
+        indexes_by_group[group_id].append(index)
+
+    created: List[Tuple[int, GroupParticipant, int]] = []
+    now = datetime.now()
+    # 按团购ID顺序加锁，避免批次之间死锁
+    for group_id in sorted(indexes_by_group):
+        indexes = indexes_by_group[group_id]
+        group = db.query(Group).filter(Group.id == group_id).with_for_update().first()
+        if not group or group.status != 1:  # 不是进行中
+            for index in indexes:
+                results[index] = HTTPException(status_code=400, detail="团购已结束或未开始")
+            continue
+
+        joined = {
+            user_id for (user_id,) in db.query(GroupParticipant.user_id).filter(
+                GroupParticipant.group_id == group_id,
+                GroupParticipant.user_id.in_({entries[index][1] for index in indexes}),
+                GroupParticipant.status != 0  # 非取消状态
+            )
+        }
+
+        current = group.current_participants or 0
+        for index in indexes:
+            user_id = entries[index][1]
+            if user_id in joined:
+                results[index] = HTTPException(status_code=400, detail="已参与该团购")
+                continue
+            if group.max_participants and current >= group.max_participants:
+                results[index] = HTTPException(status_code=400, detail="团购已满员")
+                continue
+
+            participant = GroupParticipant(
+                group_id=group_id,
+                user_id=user_id,
+                is_leader=current == 0,  # 第一个参与者为团长
+                status=1,  # 已参与
+                join_time=now
+            )
+            db.add(participant)
+            joined.add(user_id)
+            current += 1
+            created.append((index, participant, current))
+
+        group.current_participants = current
+
+    db.flush()  # 获取参与记录ID
+    for index, participant, current in created:
+        results[index] = {
+            "id": participant.id,
+            "group_id": participant.group_id,
+            "user_id": participant.user_id,
+            "is_leader": participant.is_leader,
+            "status": participant.status,
+            "join_time": participant.join_time,
+            "current_participants": current,
+        }
+    db.commit()
+
+    return results
+
+
+class GroupJoinBatcher:
+    """
+    团购参与请求合并写入器
+
+    并发的参与请求进入队列，由后台任务按批写入数据库，
+    热门团购的行锁和人数更新从每个请求一次降为每批一次
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: Optional[int] = None,
+        max_wait: Optional[float] = None
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # 队列和后台任务绑定在事件循环上，循环变化时重新创建
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    def _persist(self, entries: List[Tuple[int, int]]) -> List[Union[Dict[str, Any], HTTPException]]:
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        with self.session_factory() as db:
+            return persist_joins(db, entries)
+
+    async def _collect(self, queue: asyncio.Queue, first: Any) -> List[Any]:
+        """收集一批请求：等待最多max_wait秒或凑满batch_size"""
+        batch_size = self.batch_size or settings.GROUP_JOIN_BATCH_SIZE
+        max_wait = settings.GROUP_JOIN_BATCH_WAIT if self.max_wait is None else self.max_wait
+        batch = [first]
+        deadline = asyncio.get_running_loop().time() + max_wait
+        while len(batch) < batch_size and batch[-1] is not None:
+            timeout = deadline - asyncio.get_running_loop().time()
+            try:
+                if timeout > 0:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                else:
+                    batch.append(queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue, await queue.get())
+            stopping = batch[-1] is None
+            requests = [request for request in batch if request is not None]
+            if requests:
+                try:
+                    results = await asyncio.to_thread(self._persist, [(group_id, user_id) for group_id, user_id, _ in requests])
+                except Exception as e:
+                    logger.error(f"批量写入团购参与记录失败: {e}")
+                    results = [e] * len(requests)
+                for (_, _, future), result in zip(requests, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            if stopping:
+                return
+
+    async def submit(self, group_id: int, user_id: int) -> Dict[str, Any]:
+        """
+        提交参与请求并等待写入结果
+
+        Raises:
+            HTTPException: 已参与、已满员或团购已结束
+        """
+        queue = self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((group_id, user_id, future))
+        return await future
+
+    async def close(self) -> None:
+        """写入队列中剩余的请求并停止后台任务"""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        if not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+
+join_batcher = GroupJoinBatcher()
+
+
+async def join(db: Session, group_id: int, user_id: int, max_participants: Optional[int] = None) -> Dict[str, Any]:
+    """
+    参与团购：Redis占位后合并写入数据库
+
+    Args:
+        db: 数据库会话
+        group_id: 团购ID
+        user_id: 用户ID
+        max_participants: 最大参与人数，None或0表示不限
+
+    Returns:
+        参与记录
+
+    Raises:
+        HTTPException: 已参与、已满员或团购已结束
+    """
+    redis_enabled = settings.GROUP_JOIN_REDIS_ENABLED
+    if redis_enabled:
+        _admit(db, group_id, user_id, max_participants)
+
+    # 等待批量写入前归还请求会话占用的连接，避免并发请求占满连接池后写入任务拿不到连接
+    db.commit()
+    try:
+        return await join_batcher.submit(group_id, user_id)
+    except Exception:
+        # 数据库拒绝时归还Redis占位（已参与的用户占位保持不变）
+        if redis_enabled:
+            participant_exists = db.query(GroupParticipant.id).filter(
+                GroupParticipant.group_id == group_id,
+                GroupParticipant.user_id == user_id,
+                GroupParticipant.status != 0  # 非取消状态
+            ).first()
+            if not participant_exists:
+                release_seat(group_id, user_id)
+        raise
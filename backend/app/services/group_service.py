@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc, and_
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import case, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
 from app.models.group import Group, GroupParticipant
@@ -10,13 +12,20 @@ from app.models.product import Product
 from app.models.merchant import Merchant
 from app.models.user import User
 from app.schemas.group import GroupCreate, GroupUpdate
+from app.core.config import settings
+from app.core.constants import CACHE_EXPIRE_TIME
 from app.core.utils import calculate_distance
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, run_in_session
 from app.models.order import Order
+from app.services import group_join_service, search_service
+from app.utils.cache_utils import ainvalidate_tags, default_cache, invalidate_tags, invalidate_tags_after_commit
+from app.utils.job_utils import run_in_batches
+from app.utils.pagination_utils import CursorPaginatedData, apply_order, keyset_paginate
+from app.utils.geo_utils import paginate_by_distance, within_radius_condition
 
 
-async def get_group(db: Session, group_id: int, user_id: Optional[int] = None) -> Dict:
-    """获取团购详情"""
+def _load_group_detail(db: Session, group_id: int) -> Dict:
+    """加载团购详情中与用户和当前时间无关的部分（可缓存）"""
     group = db.query(Group).filter(Group.id == group_id).first()
     if not group:
         raise HTTPException(status_code=404, detail="团购不存在")
@@ -52,11 +61,6 @@ async def get_group(db: Session, group_id: int, user_id: Optional[int] = None) -
                 }
             })
     
-    # 计算剩余时间
-    remaining_seconds = 0
-    if group.status == 1 and group.end_time > datetime.now():
-        remaining_seconds = int((group.end_time - datetime.now()).total_seconds())
-    
     # 计算剩余人数
     remaining_count = 0
     if group.status == 1:
@@ -65,17 +69,6 @@ async def get_group(db: Session, group_id: int, user_id: Optional[int] = None) -
         else:
             remaining_count = 999  # 无上限
     
-    # 检查用户是否已参与
-    is_joined = False
-    if user_id:
-        participant = db.query(GroupParticipant).filter(
-            GroupParticipant.group_id == group_id,
-            GroupParticipant.user_id == user_id,
-            GroupParticipant.status != 0  # 非取消状态
-        ).first()
-        if participant:
-            is_joined = True
-    
     # 构建包含所有必要字段的商户信息
     merchant_data = None
     if merchant:
@@ -121,7 +114,8 @@ async def get_group(db: Session, group_id: int, user_id: Optional[int] = None) -
             "is_recommend": product.is_recommend
         }
     
-    return {
+    # 转换为JSON兼容类型，本地缓存和Redis缓存返回相同的数据
+    return jsonable_encoder({
         "id": group.id,
         "merchant_id": group.merchant_id,
         "product_id": group.product_id,
@@ -143,12 +137,66 @@ async def get_group(db: Session, group_id: int, user_id: Optional[int] = None) -
         "merchant": merchant_data,
         "product": product_data,
         "participants": participant_list,
-        "remaining_seconds": remaining_seconds,
-        "remaining_count": remaining_count,
-        "is_joined": is_joined
-    }
+        "remaining_count": remaining_count
+    })
+
+
+def _is_joined(db: Session, group_id: int, user_id: int) -> bool:
+    """检查用户是否已参与团购"""
+    return db.query(GroupParticipant.id).filter(
+        GroupParticipant.group_id == group_id,
+        GroupParticipant.user_id == user_id,
+        GroupParticipant.status != 0  # 非取消状态
+    ).first() is not None
+
 
-async def search_groups(
+async def get_group(db: Union[Session, AsyncSession], group_id: int, user_id: Optional[int] = None) -> Dict:
+    """
+    获取团购详情，同时支持同步会话和异步会话
+    
+    团购、商品、商户和参与者信息按团购ID缓存，
+    剩余时间和当前用户参与状态每次请求单独计算后覆盖
+    """
+    detail = await default_cache.get_or_load(
+        f"group_detail:{group_id}",
+        lambda: run_in_session(db, _load_group_detail, group_id),
+        CACHE_EXPIRE_TIME["group_detail"],
+        # 商品信息变更时同时失效
+        lambda detail: [f"group:{detail['id']}", f"product:{detail['product_id']}"]
+    )
+    
+    # 计算剩余时间
+    remaining_seconds = 0
+    end_time = datetime.fromisoformat(detail["end_time"]) if detail["end_time"] else None
+    if detail["status"] == 1 and end_time and end_time > datetime.now():
+        remaining_seconds = int((end_time - datetime.now()).total_seconds())
+    
+    is_joined = False
+    if user_id:
+        is_joined = await run_in_session(db, _is_joined, group_id, user_id)
+    
+    return {**detail, "remaining_seconds": remaining_seconds, "is_joined": is_joined}
+
+
+def invalidate_group_detail(*group_ids: int, db: Optional[Session] = None) -> None:
+    """
+    使团购详情缓存失效
+
+    传入db时在该会话提交后失效（事务中修改了团购时使用）
+    """
+    tags = [f"group:{group_id}" for group_id in group_ids]
+    if db is not None:
+        invalidate_tags_after_commit(db, *tags)
+    else:
+        invalidate_tags(*tags)
+
+
+async def ainvalidate_group_detail(*group_ids: int) -> None:
+    """invalidate_group_detail的异步版本，在异步服务中提交后调用"""
+    await ainvalidate_tags(*[f"group:{group_id}" for group_id in group_ids])
+
+
+def _search_groups(
     db: Session,
     keyword: Optional[str] = None,
     merchant_id: Optional[int] = None,
@@ -162,13 +210,36 @@ async def search_groups(
     sort_order: Optional[str] = None,
     user_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = 20
-) -> Tuple[List[Dict], int]:
-    """搜索团购列表"""
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """
+    搜索团购列表
+    
+    传入cursor（首页为空字符串）时使用游标分页，返回CursorPaginatedData。
+    传入经纬度时，按商户距离的筛选和排序均在分页之前完成。
+    关键词通过搜索索引匹配标题和描述，未指定排序时按相关度排序
+    """
     query = db.query(Group)
+    has_location = latitude is not None and longitude is not None
+    sort_columns = {
+        "price": Group.price,
+        "remaining_time": Group.end_time,  # 按剩余时间排序
+        "participants": Group.current_participants,
+        "created_at": Group.created_at
+    }
     
-    # 筛选条件
-    if keyword:
+    # 关键词优先使用搜索索引：未指定排序时按相关度分页，先用其他筛选条件过滤全部命中；
+    # 指定排序时用命中ID筛选，命中过多或索引未就绪时回退到LIKE
+    ranked = search_service.search_ids(Group, keyword) if keyword else None
+    by_relevance = ranked is not None and sort_by not in sort_columns and not (has_location and sort_by == "distance")
+    if ranked is not None and not by_relevance:
+        if len(ranked) <= settings.SEARCH_ID_CHUNK_SIZE:
+            query = query.filter(Group.id.in_([group_id for group_id, _ in ranked]))
+        else:
+            ranked = None
+    if ranked is None and keyword:
         query = query.filter(Group.title.ilike(f"%{keyword}%"))
     
     if merchant_id:
@@ -189,27 +260,60 @@ async def search_groups(
     if is_featured is not None:
         query = query.filter(Group.is_featured == is_featured)
     
-    # 查询总数
-    total = query.count()
-    
-    # 排序
-    if sort_by:
-        direction = desc if sort_order == "desc" else asc
-        if sort_by == "price":
-            query = query.order_by(direction(Group.price))
-        elif sort_by == "remaining_time":
-            # 按剩余时间排序
-            query = query.order_by(direction(Group.end_time))
-        elif sort_by == "participants":
-            query = query.order_by(direction(Group.current_participants))
-        elif sort_by == "created_at":
-            query = query.order_by(direction(Group.created_at))
+    # 排序，以团购ID作为最后的排序键保证顺序唯一
+    if sort_by in sort_columns:
+        descending = sort_order == "desc"
+        order_columns = [(sort_columns[sort_by], descending), (Group.id, descending)]
     else:
         # 默认按推荐和排序值排序
-        query = query.order_by(Group.is_featured.desc(), Group.sort_order.desc())
-    
-    # 分页
-    groups = query.offset(skip).limit(limit).all()
+        order_columns = [(Group.is_featured, True), (Group.sort_order, True), (Group.id, True)]
+    
+    page = None
+    if has_location and sort_by == "distance":
+        # 在数据库中按商户距离排序并分页
+        page = paginate_by_distance(
+            query.join(Merchant, Group.merchant_id == Merchant.id), Group.id,
+            Merchant.latitude, Merchant.longitude, latitude, longitude,
+            distance, sort_order == "desc", skip, limit, cursor, with_total
+        )
+        if cursor is not None:
+            nearby = page.items
+        else:
+            nearby, total = page
+            page = None
+        group_ids = [group_id for group_id, _ in nearby]
+        group_map = {
+            group.id: group
+            for group in db.query(Group).filter(Group.id.in_(group_ids)).all()
+        } if group_ids else {}
+        groups = [group_map[group_id] for group_id in group_ids if group_id in group_map]
+    else:
+        if has_location and distance is not None:
+            # 先在数据库中完成商户距离筛选，再按指定字段排序分页
+            query = query.join(Merchant, Group.merchant_id == Merchant.id).filter(
+                within_radius_condition(Merchant.latitude, Merchant.longitude, latitude, longitude, distance)
+            )
+        
+        # 分页
+        if by_relevance:
+            # 按相关度全局排序后再分页
+            page = search_service.paginate_ranked(query, Group.id, ranked, skip, limit, cursor, with_total)
+            if cursor is not None:
+                group_ids = page.items
+            else:
+                group_ids, total = page
+                page = None
+            group_map = {
+                group.id: group
+                for group in db.query(Group).filter(Group.id.in_(group_ids)).all()
+            } if group_ids else {}
+            groups = [group_map[group_id] for group_id in group_ids if group_id in group_map]
+        elif cursor is not None:
+            page = keyset_paginate(query, order_columns, cursor, limit, with_total)
+            groups = page.items
+        else:
+            total = query.count()
+            groups = apply_order(query, order_columns).offset(skip).limit(limit).all()
     
     # 处理结果
     result = []
@@ -284,30 +388,20 @@ async def search_groups(
             "is_joined": is_joined
         }
         
-        # 如果指定了距离筛选，只返回在范围内的商户
-        if distance is not None and merchant_distance is not None:
-            if merchant_distance <= distance:
-                result.append(group_data)
-        else:
-            result.append(group_data)
+        result.append(group_data)
     
-    # 如果应用了距离筛选，重新计算总数
-    if distance is not None and latitude and longitude:
-        total = len(result)
-        
-        # 按距离排序
-        if sort_by == "distance":
-            result.sort(
-                key=lambda x: x["merchant"]["distance"] if x["merchant"] and "distance" in x["merchant"] and x["merchant"]["distance"] is not None else float('inf'),
-                reverse=(sort_order == "desc")
-            )
-        
-        # 分页
-        result = result[skip:skip+limit]
+    if page is not None:
+        page.items = result
+        return page
     
     return result, total
 
 
+async def search_groups(db: Union[Session, AsyncSession], *args, **kwargs) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """搜索团购列表，同时支持同步会话和异步会话"""
+    return await run_in_session(db, _search_groups, *args, **kwargs)
+
+
 async def create_group(
     db: Session, 
     group_data: GroupCreate, 
@@ -364,6 +458,7 @@ async def create_group(
     db.add(group)
     db.commit()
     db.refresh(group)
+    search_service.index_objects(group)
     
     return group
 
@@ -417,6 +512,8 @@ async def update_group(db: Session, group_id: int, group_data: GroupUpdate, merc
         
         db.commit()
         db.refresh(group)
+        await ainvalidate_group_detail(group_id)
+        search_service.index_objects(group)
         
         return group
     except HTTPException as e:
@@ -447,60 +544,24 @@ async def join_group(db: Session, group_id: int, user_id: int) -> Dict:
         else:
             group.status = 3  # 已失败
         db.commit()
+        await ainvalidate_group_detail(group_id)
         
         raise HTTPException(status_code=400, detail="团购已过期")
     
-    # 检查是否达到最大人数限制
+    # 检查是否达到最大人数限制（快速失败，最终以批量写入时的检查为准）
     if group.max_participants and group.current_participants >= group.max_participants:
         raise HTTPException(status_code=400, detail="团购已满员")
     
-    # 检查用户是否已参与
-    existing_participant = db.query(GroupParticipant).filter(
-        GroupParticipant.group_id == group_id,
-        GroupParticipant.user_id == user_id,
-        GroupParticipant.status != 0  # 非取消状态
-    ).first()
-    
-    if existing_participant:
-        raise HTTPException(status_code=400, detail="已参与该团购")
-    
-    # 判断是否为团长
-    is_leader = False
-    if group.current_participants == 0:
-        is_leader = True
-    
-    # 创建参与记录
-    participant = GroupParticipant(
-        group_id=group_id,
-        user_id=user_id,
-        is_leader=is_leader,
-        status=1,  # 已参与
-        join_time=datetime.now()
-    )
-    
-    db.add(participant)
+    min_participants, max_participants = group.min_participants, group.max_participants
     
-    # 更新团购参与人数
-    group.current_participants += 1
-    
-    # 如果达到最小成团人数，更新状态
-    if group.current_participants >= group.min_participants:
-        # 状态保持进行中，直到结束时间到达
-        pass
-    
-    db.commit()
-    db.refresh(participant)
+    # 占位并合并写入参与记录，团长在持有团购行锁时确定
+    participant = await group_join_service.join(db, group_id, user_id, max_participants)
+    await ainvalidate_group_detail(group_id)
     
     return {
-        "id": participant.id,
-        "group_id": participant.group_id,
-        "user_id": participant.user_id,
-        "is_leader": participant.is_leader,
-        "status": participant.status,
-        "join_time": participant.join_time,
-        "current_participants": group.current_participants,
-        "min_participants": group.min_participants,
-        "max_participants": group.max_participants
+        **participant,
+        "min_participants": min_participants,
+        "max_participants": max_participants
     }
 
 
@@ -534,6 +595,7 @@ async def cancel_group_participation(db: Session, group_id: int, user_id: int) -
     
     # 更新团购参与人数
     group.current_participants -= 1
+    group_join_service.release_seat(group_id, user_id)
     
     # 处理团长情况
     if participant.is_leader:
@@ -549,6 +611,7 @@ async def cancel_group_participation(db: Session, group_id: int, user_id: int) -
             participant.is_leader = False
     
     db.commit()
+    await ainvalidate_group_detail(group_id)
     
     return True
 
@@ -689,22 +752,35 @@ async def get_merchant_groups(
     return result, total
 
 
-async def check_and_update_expired_groups():
-    """检查并更新过期团购状态（定时任务）"""
-    with SessionLocal() as db:
+async def check_and_update_expired_groups(batch_size: Optional[int] = None) -> int:
+    """检查并更新过期团购状态（定时任务），按团购ID分批更新"""
+    now = datetime.now()
+    
+    def fetch_batch(db: Session, after_id: int, limit: int) -> List[Any]:
         # 查找已过期但状态仍为进行中的团购
-        expired_groups = db.query(Group).filter(
+        return db.query(Group.id).filter(
             Group.status == 1,  # 进行中
-            Group.end_time < datetime.now()
-        ).all()
-        
-        for group in expired_groups:
-            # 根据是否达到最小成团人数更新状态
-            if group.current_participants >= group.min_participants:
-                group.status = 2  # 已成功
-            else:
-                group.status = 3  # 已失败
-        
-        db.commit()
-        
-        return len(expired_groups)
\ No newline at end of file
+            Group.end_time < now,
+            Group.id > after_id
+        ).order_by(Group.id).limit(limit).all()
+    
+    def process_batch(db: Session, rows: List[Any]) -> int:
+        group_ids = [row.id for row in rows]
+        # 根据是否达到最小成团人数更新状态
+        updated = db.query(Group).filter(
+            Group.id.in_(group_ids),
+            Group.status == 1  # 进行中
+        ).update({
+            Group.status: case(
+                (Group.current_participants >= Group.min_participants, 2),  # 已成功
+                else_=3  # 已失败
+            )
+        }, synchronize_session=False)
+        invalidate_group_detail(*group_ids, db=db)
+        return updated
+    
+    metrics = run_in_batches(
+        "update_expired_groups", SessionLocal, fetch_batch, process_batch,
+        batch_size or settings.JOB_BATCH_SIZE
+    )
+    return metrics.updated
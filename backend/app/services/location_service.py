@@ -1,14 +1,19 @@
+import asyncio
 import math
 from typing import Dict, List, Optional, Tuple, Union
 
 from fastapi import HTTPException
-import requests
+import numpy as np
+import httpx
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.http_client import HttpClient
 from app.core.utils import calculate_distance
+from app.utils.geo_utils import haversine_one_to_many, points_in_radius_mask
 from app.models.merchant import Merchant
 from app.models.user import Address
-from app.core.redis import RedisClient
+from app.core.redis import AsyncRedisClient
 from app.core.constants import CACHE_EXPIRE_TIME, CACHE_KEY_PREFIX
 
 
@@ -36,7 +41,7 @@ async def search_location(
         if keyword:
             params["keyword"] = keyword
         
-        response = requests.get(url, params=params)
+        response = await HttpClient.get(url, params=params)
         data = response.json()
         
         if data["status"] == 0:
@@ -83,7 +88,7 @@ async def get_address_by_location(latitude: float, longitude: float) -> Dict:
             "location": f"{latitude},{longitude}"
         }
         
-        response = requests.get(url, params=params)
+        response = await HttpClient.get(url, params=params)
         data = response.json()
         
         if data["status"] == 0:
@@ -128,7 +133,7 @@ async def calculate_distance_api(
             "to": f"{end_latitude},{end_longitude}"
         }
         
-        response = requests.get(url, params=params)
+        response = await HttpClient.get(url, params=params)
         data = response.json()
         
         if data["status"] == 0:
@@ -166,7 +171,7 @@ async def calculate_distance_api(
 async def get_delivery_fee(
     merchant_id: int,
     user_address_id: int,
-    db: requests.Session
+    db: Session
 ) -> float:
     """
     计算配送费
@@ -192,23 +197,63 @@ async def get_delivery_fee(
         address.latitude, address.longitude
     )
     
-    # 根据距离计算配送费
-    if distance <= 3:
-        return 5.0
-    elif distance <= 5:
-        return 7.0
-    elif distance <= 10:
-        return 10.0
-    else:
-        # 超过10公里，每增加1公里增加1元
-        return 10.0 + (distance - 10) * 1.0
+    return float(delivery_fees_for_distances([distance])[0])
+
+
+def delivery_fees_for_distances(distances) -> np.ndarray:
+    """
+    根据距离(km)批量计算配送费
+    
+    3公里内5元，5公里内7元，10公里内10元，超过10公里每增加1公里增加1元
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    return np.select(
+        [distances <= 3, distances <= 5, distances <= 10],
+        [5.0, 7.0, 10.0],
+        default=10.0 + (distances - 10) * 1.0
+    )
+
+
+async def get_delivery_fees(
+    merchant_ids: List[int],
+    user_address_id: int,
+    db: Session
+) -> Dict[int, float]:
+    """
+    批量计算多个商户到同一收货地址的配送费
+    """
+    # 获取用户地址
+    address = db.query(Address).filter(Address.id == user_address_id).first()
+    if not address:
+        raise HTTPException(status_code=404, detail="地址不存在")
+    
+    merchants = db.query(
+        Merchant.id, Merchant.latitude, Merchant.longitude
+    ).filter(Merchant.id.in_(merchant_ids)).all()
+    
+    # 没有经纬度时使用默认配送费
+    fees = {merchant.id: 5.0 for merchant in merchants}
+    if not address.latitude or not address.longitude:
+        return fees
+    
+    located = [merchant for merchant in merchants if merchant.latitude and merchant.longitude]
+    if located:
+        distances = haversine_one_to_many(
+            address.latitude, address.longitude,
+            [merchant.latitude for merchant in located],
+            [merchant.longitude for merchant in located]
+        )
+        for merchant, fee in zip(located, delivery_fees_for_distances(distances)):
+            fees[merchant.id] = float(fee)
+    
+    return fees
 
 
 async def check_in_service_area(
     merchant_id: int,
     latitude: float,
     longitude: float,
-    db: requests.Session
+    db: Session
 ) -> bool:
     """
     检查位置是否在商户服务范围内
@@ -232,6 +277,38 @@ async def check_in_service_area(
     return distance <= merchant.service_radius
 
 
+async def check_in_service_areas(
+    merchant_ids: List[int],
+    latitude: float,
+    longitude: float,
+    db: Session
+) -> Dict[int, bool]:
+    """
+    批量检查位置是否在多个商户的服务范围内
+    """
+    merchants = db.query(
+        Merchant.id, Merchant.latitude, Merchant.longitude, Merchant.service_radius
+    ).filter(Merchant.id.in_(merchant_ids)).all()
+    
+    # 没有经纬度或服务半径的商户不在服务范围内
+    result = {merchant.id: False for merchant in merchants}
+    located = [
+        merchant for merchant in merchants
+        if merchant.latitude and merchant.longitude and merchant.service_radius
+    ]
+    if located:
+        mask = points_in_radius_mask(
+            latitude, longitude,
+            [merchant.latitude for merchant in located],
+            [merchant.longitude for merchant in located],
+            [merchant.service_radius for merchant in located]
+        )
+        for merchant, in_area in zip(located, mask):
+            result[merchant.id] = bool(in_area)
+    
+    return result
+
+
 async def geocode_address(
     address: str,
     province: Optional[str] = None,
@@ -266,7 +343,7 @@ async def geocode_address(
             try:
                 cache_key = f"geocode:{full_address}"
                 print(f"调试 - 缓存键: {cache_key}")
-                cached_result = RedisClient.get(cache_key)
+                cached_result = await AsyncRedisClient.get(cache_key)
                 if cached_result:
                     print("调试 - 使用缓存结果")
                     return cached_result
@@ -285,7 +362,7 @@ async def geocode_address(
         # 添加超时设置
         try:
             print("调试 - 发送请求...")
-            response = requests.get(url, params=params, timeout=5)
+            response = await HttpClient.get(url, params=params, timeout=5)
             print(f"调试 - 响应状态码: {response.status_code}")
             
             if response.status_code != 200:
@@ -299,13 +376,13 @@ async def geocode_address(
             print(f"调试 - API状态码: {data.get('status')}")
             print(f"调试 - API消息: {data.get('message', '无消息')}")
             
-        except requests.Timeout:
+        except httpx.TimeoutException:
             print("调试 - 请求超时")
             raise HTTPException(
                 status_code=504,
                 detail="地图服务请求超时"
             )
-        except requests.RequestException as req_err:
+        except httpx.HTTPError as req_err:
             print(f"调试 - 请求异常: {str(req_err)}")
             raise HTTPException(
                 status_code=500,
@@ -346,7 +423,7 @@ async def geocode_address(
                     try:
                         cache_expiry = 86400  # 默认1天
                         print(f"调试 - 缓存结果, 有效期: {cache_expiry}秒")
-                        RedisClient.set(
+                        await AsyncRedisClient.set(
                             cache_key, 
                             result_dict, 
                             cache_expiry
@@ -393,8 +470,7 @@ async def batch_geocode_addresses(
     Returns:
         经纬度和地址详情列表
     """
-    results = []
-    for addr in addresses:
+    async def geocode_one(addr: Dict) -> Dict:
         try:
             result = await geocode_address(
                 address=addr.get("address", ""),
@@ -405,19 +481,20 @@ async def batch_geocode_addresses(
             )
             # 添加成功状态
             result["status"] = "success"
-            results.append(result)
+            return result
         except HTTPException as e:
             # 将错误信息添加到结果中
-            results.append({
+            return {
                 "address": addr.get("address", ""),
                 "province": addr.get("province", ""),
                 "city": addr.get("city", ""),
                 "district": addr.get("district", ""),
                 "error": e.detail,
                 "status": "failed"
-            })
+            }
     
-    return results
+    # 并发请求，并发数由HttpClient按域名限制
+    return list(await asyncio.gather(*[geocode_one(addr) for addr in addresses]))
 
 
 async def suggest_address(
@@ -458,7 +535,7 @@ async def suggest_address(
         if latitude is not None and longitude is not None:
             params["location"] = f"{latitude},{longitude}"
             
-        response = requests.get(url, params=params, timeout=3)
+        response = await HttpClient.get(url, params=params, timeout=3)
         data = response.json()
         
         if data["status"] == 0:
@@ -491,7 +568,6 @@ async def suggest_address(
     
 
 
-import math
 import logging
 
 def calculate_boundary_coordinates(latitude: float, longitude: float, radius: float) -> dict:
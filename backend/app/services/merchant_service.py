@@ -1,26 +1,31 @@
 # backend/app/services/merchant_service.py
 
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 import math
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc, and_, or_
+from sqlalchemy import func, and_, or_
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.config import settings
 from app.models.merchant import Merchant, MerchantCategory
 from app.models.category import Category
 from app.models.product import Product
 from app.models.user import User
+from app.utils.pagination_utils import CursorPaginatedData, InvalidCursorError, apply_order, keyset_paginate
+from app.utils.geo_utils import haversine_one_to_many, paginate_by_distance, within_radius_condition
 from app.schemas.merchant import (
     MerchantCreate, MerchantUpdate, CategoryCreate, CategoryUpdate
 )
+from app.core.principal import ainvalidate_user_principal
 from app.core.utils import calculate_distance
 from app.crud import crud_merchant, crud_category
+from app.services import search_service
 
 
-def safe_convert_merchant_to_dict(merchant: Merchant, db: Session = None, latitude: Optional[float] = None, longitude: Optional[float] = None) -> Dict:
-    """安全地将Merchant ORM对象转换为字典"""
+def safe_convert_merchant_to_dict(merchant: Merchant, db: Session = None, latitude: Optional[float] = None, longitude: Optional[float] = None, distance: Optional[float] = None) -> Dict:
+    """安全地将Merchant ORM对象转换为字典，distance为预先批量计算好的距离"""
     
     def safe_int(value, default=0):
         try:
@@ -87,9 +92,8 @@ def safe_convert_merchant_to_dict(merchant: Merchant, db: Session = None, latitu
             product_count = 0
         
         # 计算距离
-        distance = None
         try:
-            if latitude and longitude and merchant.latitude and merchant.longitude:
+            if distance is None and latitude and longitude and merchant.latitude and merchant.longitude:
                 distance = calculate_distance(
                     latitude, longitude, merchant.latitude, merchant.longitude
                 )
@@ -170,6 +174,31 @@ def safe_convert_merchant_to_dict(merchant: Merchant, db: Session = None, latitu
         }
 
 
+def _load_merchants_in_order(db: Session, merchant_ids: List[int]) -> List[Merchant]:
+    """按给定ID顺序批量加载商户"""
+    if not merchant_ids:
+        return []
+    merchants = db.query(Merchant).filter(Merchant.id.in_(merchant_ids)).all()
+    merchant_map = {merchant.id: merchant for merchant in merchants}
+    return [merchant_map[merchant_id] for merchant_id in merchant_ids if merchant_id in merchant_map]
+
+
+def _merchant_distances(merchants: List[Merchant], latitude: float, longitude: float) -> Dict[int, float]:
+    """批量计算用户位置到各商户的距离，跳过没有经纬度的商户"""
+    located = [
+        merchant for merchant in merchants
+        if merchant.latitude is not None and merchant.longitude is not None
+    ]
+    if not located:
+        return {}
+    distances = haversine_one_to_many(
+        latitude, longitude,
+        [merchant.latitude for merchant in located],
+        [merchant.longitude for merchant in located]
+    )
+    return {merchant.id: float(d) for merchant, d in zip(located, distances)}
+
+
 async def search_merchants(
     db: Session,
     keyword: Optional[str] = None,
@@ -181,17 +210,41 @@ async def search_merchants(
     sort_by: Optional[str] = None,
     sort_order: Optional[str] = None,
     skip: int = 0,
-    limit: int = 20
-) -> Tuple[List[Dict], int]:
-    """搜索商户列表"""
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """
+    搜索商户列表
+    
+    传入cursor（首页为空字符串）时使用游标分页，返回CursorPaginatedData。
+    传入经纬度时，distance筛选和sort_by=distance均在分页之前完成，
+    距离排序只包含有经纬度的商户。关键词通过搜索索引匹配名称、描述和地址，
+    未指定排序时按相关度排序
+    """
     
     print(f"🔍 开始商户搜索，参数: keyword={keyword}, category_id={category_id}")
     
     try:
         query = db.query(Merchant)
+        has_location = latitude is not None and longitude is not None
+        sort_columns = {
+            "rating": Merchant.rating,
+            "created_at": Merchant.created_at
+        }
         
-        # 筛选条件
-        if keyword:
+        # 关键词优先使用搜索索引：未指定排序时按相关度分页，先用其他筛选条件过滤全部命中；
+        # 指定排序时用命中ID筛选，命中过多或索引未就绪时回退到LIKE
+        ranked = search_service.search_ids(Merchant, keyword) if keyword else None
+        by_relevance = (
+            ranked is not None and sort_by not in sort_columns and not (has_location and sort_by == "distance")
+        )
+        if ranked is not None and not by_relevance:
+            if len(ranked) <= settings.SEARCH_ID_CHUNK_SIZE:
+                query = query.filter(Merchant.id.in_([merchant_id for merchant_id, _ in ranked]))
+            else:
+                ranked = None
+        if ranked is None and keyword:
             query = query.filter(
                 or_(
                     Merchant.name.ilike(f"%{keyword}%"),
@@ -212,28 +265,56 @@ async def search_merchants(
             # 默认只显示正常状态的商户
             query = query.filter(Merchant.status == 1)
         
-        # 查询总数
-        total = query.count()
-        print(f"📊 符合条件的商户总数: {total}")
-        
-        # 排序
-        if sort_by:
-            direction = desc if sort_order == "desc" else asc
-            if sort_by == "rating":
-                query = query.order_by(direction(Merchant.rating))
-            elif sort_by == "created_at":
-                query = query.order_by(direction(Merchant.created_at))
-            elif sort_by == "distance" and latitude and longitude:
-                # 距离排序需要特殊处理
-                pass
+        # 排序，以商户ID作为最后的排序键保证顺序唯一
+        if sort_by in sort_columns:
+            descending = sort_order == "desc"
+            order_columns = [(sort_columns[sort_by], descending), (Merchant.id, descending)]
         else:
             # 默认按评分和创建时间排序
-            query = query.order_by(Merchant.rating.desc(), Merchant.created_at.desc())
-        
-        # 分页
-        merchants = query.offset(skip).limit(limit).all()
+            order_columns = [(Merchant.rating, True), (Merchant.created_at, True), (Merchant.id, True)]
+        
+        page = None
+        if has_location and sort_by == "distance":
+            # 在数据库中按距离排序并分页
+            page = paginate_by_distance(
+                query, Merchant.id, Merchant.latitude, Merchant.longitude, latitude, longitude,
+                distance, sort_order == "desc", skip, limit, cursor, with_total
+            )
+            if cursor is not None:
+                nearby = page.items
+            else:
+                nearby, total = page
+                page = None
+            merchants = _load_merchants_in_order(db, [merchant_id for merchant_id, _ in nearby])
+        else:
+            if has_location and distance is not None:
+                # 先在数据库中完成距离筛选，再按指定字段排序分页
+                query = query.filter(
+                    within_radius_condition(Merchant.latitude, Merchant.longitude, latitude, longitude, distance)
+                )
+            
+            # 分页
+            if by_relevance:
+                # 按相关度全局排序后再分页
+                page = search_service.paginate_ranked(query, Merchant.id, ranked, skip, limit, cursor, with_total)
+                if cursor is not None:
+                    merchant_ids = page.items
+                else:
+                    merchant_ids, total = page
+                    page = None
+                merchants = _load_merchants_in_order(db, merchant_ids)
+            elif cursor is not None:
+                page = keyset_paginate(query, order_columns, cursor, limit, with_total)
+                merchants = page.items
+            else:
+                total = query.count()
+                print(f"📊 符合条件的商户总数: {total}")
+                merchants = apply_order(query, order_columns).offset(skip).limit(limit).all()
         print(f"📦 获取到 {len(merchants)} 个商户ORM对象")
         
+        # 一次性计算本页商户的距离
+        distances = _merchant_distances(merchants, latitude, longitude) if has_location else {}
+        
         # 转换为字典列表
         result = []
         for i, merchant in enumerate(merchants):
@@ -241,7 +322,7 @@ async def search_merchants(
                 print(f"🔄 正在转换第 {i+1} 个商户: ID={getattr(merchant, 'id', 'unknown')}")
                 
                 merchant_dict = safe_convert_merchant_to_dict(
-                    merchant, db, latitude, longitude
+                    merchant, db, distance=distances.get(merchant.id)
                 )
                 result.append(merchant_dict)
                 
@@ -251,31 +332,24 @@ async def search_merchants(
                 print(f"❌ 转换商户 {getattr(merchant, 'id', 'unknown')} 失败: {e}")
                 continue
         
-        # 如果指定了距离筛选，过滤结果
-        if distance is not None and latitude and longitude:
-            filtered_result = [
-                m for m in result 
-                if m['distance'] is not None and m['distance'] <= distance
-            ]
-            result = filtered_result
-            total = len(result)
-            
-            # 按距离排序
-            if sort_by == "distance":
-                result.sort(
-                    key=lambda x: x['distance'] if x['distance'] is not None else float('inf'),
-                    reverse=(sort_order == "desc")
-                )
-        
         print(f"🎉 成功转换 {len(result)} 个商户为字典格式")
         
+        if page is not None:
+            page.items = result
+            return page
+        
         return result, total
         
+    except InvalidCursorError:
+        # 由接口依赖转换为400
+        raise
     except Exception as e:
         print(f"❌ 商户搜索异常: {str(e)}")
         import traceback
         traceback.print_exc()
         
+        if cursor is not None:
+            return CursorPaginatedData(items=[], page_size=limit)
         return [], 0
 
 
@@ -334,6 +408,8 @@ async def create_merchant(db: Session, merchant_data: MerchantCreate, user_id: i
         
         db.commit()
         db.refresh(merchant)
+        await ainvalidate_user_principal(user_id)
+        search_service.index_objects(merchant)
         
         # 返回字典格式
         return safe_convert_merchant_to_dict(merchant, db)
@@ -410,6 +486,7 @@ async def update_merchant(
         
         db.commit()
         db.refresh(updated_merchant)
+        search_service.index_objects(updated_merchant)
         
         # 返回字典格式
         return safe_convert_merchant_to_dict(updated_merchant, db)
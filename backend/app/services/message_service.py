@@ -1,11 +1,17 @@
+import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.config import settings
+from app.models.merchant import Merchant
 from app.models.message import Message
+from app.models.user import User
+from app.utils.job_utils import run_in_batches
+from app.utils.pagination_utils import CursorPaginatedData, apply_order, keyset_paginate
 from app.schemas.message import MessageCreate, MessageUpdate, MessageType
 
 
@@ -31,65 +37,90 @@ async def create_message(db: Session, message_data: MessageCreate) -> Message:
     return message
 
 
-async def create_bulk_messages(db: Session, message_data: MessageCreate) -> int:
-    """批量创建消息"""
-    if message_data.is_all_users:
-        # 给所有用户发送消息
-        users = db.query(User).filter(User.is_active == True).all()
-        for user in users:
-            message = Message(
-                title=message_data.title,
-                content=message_data.content,
-                type=message_data.type,
-                link_type=message_data.link_type,
-                link_id=message_data.link_id,
-                link_url=message_data.link_url,
-                user_id=user.id,
-                is_read=False
-            )
-            db.add(message)
-        
-        db.commit()
-        return len(users)
-    
-    elif message_data.is_all_merchants:
-        # 给所有商户发送消息
-        merchants = db.query(Merchant).filter(Merchant.status == 1).all()
-        for merchant in merchants:
-            message = Message(
-                title=message_data.title,
-                content=message_data.content,
-                type=message_data.type,
-                link_type=message_data.link_type,
-                link_id=message_data.link_id,
-                link_url=message_data.link_url,
-                merchant_id=merchant.id,
-                is_read=False
-            )
-            db.add(message)
-        
-        db.commit()
-        return len(merchants)
-    
-    else:
-        # 单个消息
-        message = Message(
-            title=message_data.title,
-            content=message_data.content,
-            type=message_data.type,
-            link_type=message_data.link_type,
-            link_id=message_data.link_id,
-            link_url=message_data.link_url,
-            user_id=message_data.user_id,
-            merchant_id=message_data.merchant_id,
-            is_read=False
+def _message_values(message_data: MessageCreate) -> Dict[str, Any]:
+    """群发消息的公共字段"""
+    return {
+        "title": message_data.title,
+        "content": message_data.content,
+        "type": message_data.type,
+        "link_type": message_data.link_type,
+        "link_id": message_data.link_id,
+        "link_url": message_data.link_url,
+        "is_read": False,
+    }
+
+
+def _fan_out_to_all(
+    session_factory: Callable[[], Session],
+    values: Dict[str, Any],
+    model: Any,
+    active: Any,
+    recipient_column: Any
+) -> int:
+    """
+    给所有有效用户/商户写入消息
+
+    按ID分段扫描接收者，每段一条 INSERT ... SELECT 在数据库内生成消息行并独立提交，
+    接收者ID不经过应用进程；进度通过job_utils的任务统计（/metrics/jobs）查看
+    """
+    columns = list(values) + [recipient_column.key]
+
+    def fetch_batch(db: Session, after_id: int, limit: int):
+        return db.query(model.id).filter(active, model.id > after_id).order_by(model.id).limit(limit).all()
+
+    def process_batch(db: Session, rows) -> int:
+        recipients = select(*[literal(value) for value in values.values()], model.id).where(
+            active, model.id.between(rows[0][0], rows[-1][0])
         )
-        
-        db.add(message)
+        return db.execute(insert(Message).from_select(columns, recipients)).rowcount
+
+    metrics = run_in_batches(
+        f"message_fanout:{model.__tablename__}", session_factory, fetch_batch, process_batch,
+        batch_size=settings.MESSAGE_FANOUT_BATCH_SIZE, checkpoint=False
+    )
+    return metrics.updated
+
+
+def _fan_out_to_ids(db: Session, values: Dict[str, Any], recipient_column: Any, recipient_ids: List[int]) -> int:
+    """给指定的接收者ID分批写入消息，每批一条executemany插入并独立提交"""
+    recipient_ids = list(dict.fromkeys(recipient_ids))
+    batch_size = settings.MESSAGE_FANOUT_BATCH_SIZE
+    for i in range(0, len(recipient_ids), batch_size):
+        db.execute(insert(Message), [
+            {**values, recipient_column.key: recipient_id}
+            for recipient_id in recipient_ids[i:i + batch_size]
+        ])
         db.commit()
-        db.refresh(message)
-        
-        return 1
+    return len(recipient_ids)
+
+
+async def create_bulk_messages(db: Session, message_data: MessageCreate) -> int:
+    """
+    批量创建消息
+
+    全体用户/商户群发在线程池中按ID分段 INSERT ... SELECT，不阻塞事件循环，
+    也不在内存中构造ORM对象；指定ID列表时分批批量插入
+
+    Returns:
+        写入的消息数
+    """
+    values = _message_values(message_data)
+    if message_data.is_all_users or message_data.is_all_merchants:
+        if message_data.is_all_users:
+            model, active, column = User, User.is_active == True, Message.user_id
+        else:
+            model, active, column = Merchant, Merchant.status == 1, Message.merchant_id
+        session_factory = sessionmaker(bind=db.get_bind(), autoflush=False)
+        return await asyncio.to_thread(_fan_out_to_all, session_factory, values, model, active, column)
+
+    if message_data.user_ids or message_data.merchant_ids:
+        count = _fan_out_to_ids(db, values, Message.user_id, message_data.user_ids or [])
+        return count + _fan_out_to_ids(db, values, Message.merchant_id, message_data.merchant_ids or [])
+
+    # 单个消息
+    db.add(Message(**values, user_id=message_data.user_id, merchant_id=message_data.merchant_id))
+    db.commit()
+    return 1
 
 
 async def update_message(db: Session, message_id: int, message_data: MessageUpdate) -> Message:
@@ -187,9 +218,15 @@ async def search_messages(
     sort_by: Optional[str] = None,
     sort_order: Optional[str] = None,
     skip: int = 0,
-    limit: int = 20
-) -> Tuple[List[Message], int]:
-    """搜索消息列表"""
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[Message], int], CursorPaginatedData]:
+    """
+    搜索消息列表
+    
+    传入cursor（首页为空字符串）时使用游标分页，返回CursorPaginatedData
+    """
     query = db.query(Message)
     
     # 筛选条件
@@ -211,22 +248,27 @@ async def search_messages(
             (Message.content.ilike(f"%{keyword}%"))
         )
     
-    # 查询总数
-    total = query.count()
-    
-    # 排序
-    if sort_by:
-        direction = desc if sort_order == "desc" else asc
-        if sort_by == "created_at":
-            query = query.order_by(direction(Message.created_at))
-        elif sort_by == "read_time":
-            query = query.order_by(direction(Message.read_time))
+    # 排序，以消息ID作为最后的排序键保证顺序唯一
+    sort_columns = {
+        "created_at": Message.created_at,
+        "read_time": Message.read_time
+    }
+    if sort_by in sort_columns:
+        descending = sort_order == "desc"
+        order_columns = [(sort_columns[sort_by], descending), (Message.id, descending)]
     else:
         # 默认按创建时间倒序
-        query = query.order_by(Message.created_at.desc())
+        order_columns = [(Message.created_at, True), (Message.id, True)]
+    
+    # 游标分页
+    if cursor is not None:
+        return keyset_paginate(query, order_columns, cursor, limit, with_total)
+    
+    # 查询总数
+    total = query.count()
     
     # 分页
-    messages = query.offset(skip).limit(limit).all()
+    messages = apply_order(query, order_columns).offset(skip).limit(limit).all()
     
     return messages, total
 
@@ -346,48 +346,17 @@ async def _send_system_notification_task(
     """
     db = SessionLocal()
     try:
-        if is_all_users:
-            # 给所有用户发送消息
-            message_data = MessageCreate(
-                title=title,
-                content=content,
-                type=MessageType.SYSTEM,
-                is_all_users=True
-            )
-            await message_service.create_bulk_messages(db, message_data)
-        
-        elif is_all_merchants:
-            # 给所有商户发送消息
-            message_data = MessageCreate(
-                title=title,
-                content=content,
-                type=MessageType.SYSTEM,
-                is_all_merchants=True
-            )
-            await message_service.create_bulk_messages(db, message_data)
-        
-        else:
-            # 给指定用户发送消息
-            if user_ids:
-                for user_id in user_ids:
-                    message_data = MessageCreate(
-                        title=title,
-                        content=content,
-                        type=MessageType.SYSTEM,
-                        user_id=user_id
-                    )
-                    await message_service.create_message(db, message_data)
-            
-            # 给指定商户发送消息
-            if merchant_ids:
-                for merchant_id in merchant_ids:
-                    message_data = MessageCreate(
-                        title=title,
-                        content=content,
-                        type=MessageType.SYSTEM,
-                        merchant_id=merchant_id
-                    )
-                    await message_service.create_message(db, message_data)
+        # 全体群发按ID分段 INSERT ... SELECT，指定ID列表分批批量插入
+        message_data = MessageCreate(
+            title=title,
+            content=content,
+            type=MessageType.SYSTEM,
+            user_ids=user_ids,
+            merchant_ids=merchant_ids,
+            is_all_users=is_all_users,
+            is_all_merchants=is_all_merchants
+        )
+        await message_service.create_bulk_messages(db, message_data)
     
     finally:
         db.close()
\ No newline at end of file
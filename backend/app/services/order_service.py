@@ -1,16 +1,24 @@
+from collections import Counter
 from datetime import datetime, timedelta
 import uuid
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import bindparam, case, func, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.core.config import settings
+from app.core.constants import ORDER_AUTO_CONFIRM_DAYS, ORDER_PAY_TIMEOUT_MINUTES
+from app.db.session import SessionLocal, run_in_session
 from app.models.order import Order, OrderItem, Payment
 from app.models.user import User, Address
 from app.models.merchant import Merchant
 from app.models.product import Product, ProductSpecification
 from app.models.group import Group, GroupParticipant
+from app.services import counter_service, group_join_service, group_service, stock_service
+from app.utils.job_utils import run_in_batches
+from app.utils.pagination_utils import CursorPaginatedData, apply_order, keyset_paginate
 from app.schemas.order import OrderCreate, OrderUpdate, OrderItemCreate, OrderPayRequest, OrderRefundRequest, OrderCancelRequest, OrderDeliveryRequest
 
 
@@ -106,17 +114,13 @@ async def create_order(
         elif specification:
             price = product.current_price + specification.price_adjustment
         
-        # 检查库存
-        stock = specification.stock if specification else product.stock
-        if stock < item_data.quantity:
-            raise HTTPException(status_code=400, detail=f"商品 {product.name} 库存不足")
-        
         # 计算小计
         subtotal = price * item_data.quantity
         
         # 添加到订单项
         items_data.append({
             "product_id": product.id,
+            "specification_id": specification.id if specification else None,
             "product_name": product.name,
             "product_image": product.thumbnail,
             "specification": specification.name + ": " + specification.value if specification else None,
@@ -126,12 +130,17 @@ async def create_order(
         })
         
         total_amount += subtotal
-        
-        # 减少库存
-        if specification:
-            specification.stock -= item_data.quantity
-        else:
-            product.stock -= item_data.quantity
+    
+    # 条件扣减库存，库存不足时回滚已扣减的部分
+    stock_items = stock_service.merge_stock_items(
+        stock_service.StockItem(item["product_id"], item["specification_id"], item["quantity"])
+        for item in items_data
+    )
+    short_item = stock_service.reserve_stock(db, stock_items)
+    if short_item:
+        db.rollback()
+        product_name = next(item["product_name"] for item in items_data if item["product_id"] == short_item.product_id)
+        raise HTTPException(status_code=400, detail=f"商品 {product_name} 库存不足")
     
     # 生成订单号
     order_no = f"ORD{datetime.now().strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:6].upper()}"
@@ -150,7 +159,10 @@ async def create_order(
         status=0,  # 待支付
         payment_status=0,  # 未支付
         delivery_status=0,  # 未发货
-        buyer_comment=order_data.buyer_comment
+        buyer_comment=order_data.buyer_comment,
+        search_text=build_order_search_text(
+            order_no, [item["product_name"] for item in items_data], order_data.buyer_comment
+        )
     )
     
     db.add(order)
@@ -161,6 +173,7 @@ async def create_order(
         order_item = OrderItem(
             order_id=order.id,
             product_id=item_data["product_id"],
+            specification_id=item_data["specification_id"],
             product_name=item_data["product_name"],
             product_image=item_data["product_image"],
             specification=item_data["specification"],
@@ -174,19 +187,79 @@ async def create_order(
     if is_group_order and participant:
         participant.status = 1  # 已参与状态保持不变
     
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        stock_service.restore_stock_counters(stock_items)
+        raise
     db.refresh(order)
     
-    # 设置订单自动取消
-    # 在实际应用中，这里应该添加到任务队列中
-    # 这里只是示例，实际实现可能会有所不同
+    # 超过ORDER_PAY_TIMEOUT_MINUTES未支付的订单由定时任务取消并归还库存
     
     return order
 
 
-async def get_order(db: Session, order_id: int, user_id: Optional[int] = None, merchant_id: Optional[int] = None) -> Dict:
-    """获取订单详情"""
-    query = db.query(Order)
+def build_order_search_text(order_no: str, product_names: List[str], buyer_comment: Optional[str] = None) -> str:
+    """拼接订单关键词搜索字段：订单号、商品名称和买家备注"""
+    return " ".join([order_no, *product_names, buyer_comment or ""]).strip()
+
+
+def _keyword_filter(db: Session, keyword: str):
+    """
+    订单关键词条件
+
+    MySQL使用search_text上的ngram全文索引；关键词短于ngram长度或其他数据库时
+    使用LIKE，仍只扫描单个字段，不再关联订单明细
+    """
+    if db.get_bind().dialect.name == "mysql" and len(keyword) >= 2:
+        phrase = '"' + keyword.replace('"', " ") + '"'
+        return text("MATCH (orders.search_text) AGAINST (:order_keyword IN BOOLEAN MODE)").bindparams(
+            order_keyword=phrase
+        )
+    return Order.search_text.ilike(f"%{keyword}%")
+
+
+def _countdown_seconds(order: Order) -> Optional[int]:
+    """待支付订单的剩余支付时间(秒)，其他状态返回None"""
+    if order.status != 0:
+        return None
+    # 假设订单30分钟内有效，已过期但状态未更新时为0
+    expiry_time = order.created_at + timedelta(minutes=30)
+    return max(0, int((expiry_time - datetime.now()).total_seconds()))
+
+
+def _load_order_items(db: Session, order_ids: List[int]) -> Dict[int, List[OrderItem]]:
+    """一次查询加载多个订单的订单项"""
+    items: Dict[int, List[OrderItem]] = {order_id: [] for order_id in order_ids}
+    if order_ids:
+        for item in db.query(OrderItem).filter(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id):
+            items[item.order_id].append(item)
+    return items
+
+
+def _load_merchant_briefs(db: Session, merchant_ids: List[int]) -> Dict[int, Any]:
+    """一次查询加载多个商户的名称和Logo"""
+    merchant_ids = list(set(merchant_ids))
+    if not merchant_ids:
+        return {}
+    rows = db.query(Merchant.id, Merchant.name, Merchant.logo).filter(Merchant.id.in_(merchant_ids)).all()
+    return {row.id: row for row in rows}
+
+
+def _get_order(db: Session, order_id: int, user_id: Optional[int] = None, merchant_id: Optional[int] = None) -> Dict:
+    """
+    获取订单详情
+
+    订单与商户、地址、团购一次JOIN查询，订单项和支付记录各一次IN查询，共3条SQL
+    """
+    query = db.query(Order).options(
+        joinedload(Order.merchant),
+        joinedload(Order.address),
+        joinedload(Order.group),
+        selectinload(Order.items),
+        selectinload(Order.payments)
+    )
     
     # 用户查询自己的订单
     if user_id is not None:
@@ -201,36 +274,12 @@ async def get_order(db: Session, order_id: int, user_id: Optional[int] = None, m
     if not order:
         raise HTTPException(status_code=404, detail="订单不存在或无权限")
     
-    # 获取订单项
-    items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    
-    # 获取支付记录
-    payments = db.query(Payment).filter(Payment.order_id == order_id).all()
-    
-    # 获取地址
-    address = db.query(Address).filter(Address.id == order.address_id).first()
-    
-    # 获取商户信息
-    merchant = db.query(Merchant).filter(Merchant.id == order.merchant_id).first()
-    
-    # 获取团购信息
-    group = None
-    if order.group_id:
-        group = db.query(Group).filter(Group.id == order.group_id).first()
-    
-    # 计算倒计时（如果是待支付状态）
-    countdown_seconds = None
-    if order.status == 0:  # 待支付
-        # 假设订单30分钟内有效
-        order_time = order.created_at
-        expiry_time = order_time + timedelta(minutes=30)
-        now = datetime.now()
-        
-        if now < expiry_time:
-            countdown_seconds = int((expiry_time - now).total_seconds())
-        else:
-            # 订单已过期，但状态未更新
-            countdown_seconds = 0
+    items = sorted(order.items, key=lambda item: item.id)
+    payments = sorted(order.payments, key=lambda payment: payment.id)
+    address = order.address
+    merchant = order.merchant
+    group = order.group
+    countdown_seconds = _countdown_seconds(order)
     
     return {
         "id": order.id,
@@ -312,12 +361,17 @@ async def get_order(db: Session, order_id: int, user_id: Optional[int] = None, m
     }
 
 
-async def search_orders(
+async def get_order(db: Union[Session, AsyncSession], *args, **kwargs) -> Dict:
+    """获取订单详情，同时支持同步会话和异步会话"""
+    return await run_in_session(db, _get_order, *args, **kwargs)
+
+
+def _search_orders(
     db: Session,
     user_id: Optional[int] = None,
     merchant_id: Optional[int] = None,
     group_id: Optional[int] = None,
-    status: Optional[int] = None,
+    order_status: Optional[int] = None,
     payment_status: Optional[int] = None,
     delivery_status: Optional[int] = None,
     keyword: Optional[str] = None,
@@ -326,9 +380,16 @@ async def search_orders(
     sort_by: Optional[str] = None,
     sort_order: Optional[str] = None,
     skip: int = 0,
-    limit: int = 20
-) -> Tuple[List[Dict], int]:
-    """搜索订单列表"""
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """
+    搜索订单列表
+    
+    传入cursor（首页为空字符串）时使用游标分页，返回CursorPaginatedData。
+    每页固定4条SQL：总数（游标分页不需要总数时省略）、订单、订单项、商户
+    """
     query = db.query(Order)
     
     # 筛选条件
@@ -341,8 +402,8 @@ async def search_orders(
     if group_id is not None:
         query = query.filter(Order.group_id == group_id)
     
-    if status is not None:
-        query = query.filter(Order.status == status)
+    if order_status is not None:
+        query = query.filter(Order.status == order_status)
     
     if payment_status is not None:
         query = query.filter(Order.payment_status == payment_status)
@@ -351,15 +412,7 @@ async def search_orders(
         query = query.filter(Order.delivery_status == delivery_status)
     
     if keyword:
-        query = query.filter(
-            (Order.order_no.ilike(f"%{keyword}%")) |
-            (Order.buyer_comment.ilike(f"%{keyword}%")) |
-            Order.id.in_(
-                db.query(OrderItem.order_id).filter(
-                    OrderItem.product_name.ilike(f"%{keyword}%")
-                )
-            )
-        )
+        query = query.filter(_keyword_filter(db, keyword))
     
     if start_date:
         query = query.filter(Order.created_at >= start_date)
@@ -367,47 +420,38 @@ async def search_orders(
     if end_date:
         query = query.filter(Order.created_at <= end_date)
     
-    # 查询总数
-    total = query.count()
-    
-    # 排序
-    if sort_by:
-        direction = desc if sort_order == "desc" else asc
-        if sort_by == "created_at":
-            query = query.order_by(direction(Order.created_at))
-        elif sort_by == "total_amount":
-            query = query.order_by(direction(Order.total_amount))
-        elif sort_by == "payment_time":
-            query = query.order_by(direction(Order.payment_time))
+    # 排序，以订单ID作为最后的排序键保证顺序唯一
+    sort_columns = {
+        "created_at": Order.created_at,
+        "total_amount": Order.total_amount,
+        "payment_time": Order.payment_time
+    }
+    if sort_by in sort_columns:
+        descending = sort_order == "desc"
+        order_columns = [(sort_columns[sort_by], descending), (Order.id, descending)]
     else:
         # 默认按创建时间倒序
-        query = query.order_by(Order.created_at.desc())
+        order_columns = [(Order.created_at, True), (Order.id, True)]
     
     # 分页
-    orders = query.offset(skip).limit(limit).all()
+    page = None
+    if cursor is not None:
+        page = keyset_paginate(query, order_columns, cursor, limit, with_total)
+        orders = page.items
+    else:
+        total = query.count()
+        orders = apply_order(query, order_columns).offset(skip).limit(limit).all()
+    
+    # 批量加载本页订单的订单项和商户
+    items_map = _load_order_items(db, [order.id for order in orders])
+    merchants = _load_merchant_briefs(db, [order.merchant_id for order in orders])
     
     # 处理结果
     result = []
     for order in orders:
-        # 获取商户信息
-        merchant = db.query(Merchant).filter(Merchant.id == order.merchant_id).first()
-        
-        # 获取订单项
-        items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-        
-        # 计算倒计时（如果是待支付状态）
-        countdown_seconds = None
-        if order.status == 0:  # 待支付
-            # 假设订单30分钟内有效
-            order_time = order.created_at
-            expiry_time = order_time + timedelta(minutes=30)
-            now = datetime.now()
-            
-            if now < expiry_time:
-                countdown_seconds = int((expiry_time - now).total_seconds())
-            else:
-                # 订单已过期，但状态未更新
-                countdown_seconds = 0
+        merchant = merchants.get(order.merchant_id)
+        items = items_map[order.id]
+        countdown_seconds = _countdown_seconds(order)
         
         order_data = {
             "id": order.id,
@@ -443,9 +487,53 @@ async def search_orders(
         
         result.append(order_data)
     
+    if page is not None:
+        page.items = result
+        return page
+    
     return result, total
 
 
+async def search_orders(db: Union[Session, AsyncSession], *args, **kwargs) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """搜索订单列表，同时支持同步会话和异步会话"""
+    return await run_in_session(db, _search_orders, *args, **kwargs)
+
+
+def _order_stock_items(db: Session, order_id: int) -> List[stock_service.StockItem]:
+    """获取订单占用的库存项"""
+    order_items = db.query(OrderItem.product_id, OrderItem.specification_id, OrderItem.quantity).filter(
+        OrderItem.order_id == order_id
+    ).all()
+    return [stock_service.StockItem(*row) for row in order_items]
+
+
+def _order_sales_items(db: Session, order_id: int, sign: int = 1) -> List[Tuple[int, int]]:
+    """获取订单的(商品ID, 销量增量)列表"""
+    rows = db.query(OrderItem.product_id, OrderItem.quantity).filter(OrderItem.order_id == order_id).all()
+    return [(product_id, sign * quantity) for product_id, quantity in rows]
+
+
+def _cancel_unpaid_order(db: Session, order_id: int, reason: str) -> bool:
+    """
+    取消待支付订单并归还库存，不提交事务
+
+    通过条件更新切换订单状态，支付、用户取消和超时任务并发时只有一方成功，库存不会重复归还
+    """
+    updated = db.query(Order).filter(
+        Order.id == order_id,
+        Order.status == 0  # 待支付
+    ).update({
+        Order.status: 4,  # 已取消
+        Order.cancel_time: datetime.now(),
+        Order.cancel_reason: reason,
+    }, synchronize_session=False)
+    if not updated:
+        return False
+
+    stock_service.release_stock(db, _order_stock_items(db, order_id))
+    return True
+
+
 async def pay_order(db: Session, order_pay: OrderPayRequest, user_id: int) -> Dict:
     """订单支付（模拟）"""
     # 检查订单是否存在且属于该用户
@@ -463,14 +551,12 @@ async def pay_order(db: Session, order_pay: OrderPayRequest, user_id: int) -> Di
     
     # 检查订单是否已过期
     order_time = order.created_at
-    expiry_time = order_time + timedelta(minutes=30)
+    expiry_time = order_time + timedelta(minutes=ORDER_PAY_TIMEOUT_MINUTES)
     now = datetime.now()
     
     if now > expiry_time:
-        # 订单已过期，自动取消
-        order.status = 4  # 已取消
-        order.cancel_time = now
-        order.cancel_reason = "支付超时，系统自动取消"
+        # 订单已过期，自动取消并归还库存
+        _cancel_unpaid_order(db, order.id, "支付超时，系统自动取消")
         db.commit()
         
         raise HTTPException(status_code=400, detail="订单已过期")
@@ -494,11 +580,19 @@ async def pay_order(db: Session, order_pay: OrderPayRequest, user_id: int) -> Di
     
     db.add(payment)
     
-    # 更新订单状态
-    order.status = 1  # 已支付
-    order.payment_status = 1  # 已支付
-    order.payment_method = order_pay.payment_method
-    order.payment_time = now
+    # 更新订单状态（条件更新，防止与超时取消并发）
+    updated = db.query(Order).filter(
+        Order.id == order.id,
+        Order.status == 0  # 待支付
+    ).update({
+        Order.status: 1,  # 已支付
+        Order.payment_status: 1,  # 已支付
+        Order.payment_method: order_pay.payment_method,
+        Order.payment_time: now,
+    }, synchronize_session=False)
+    if not updated:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="订单状态不正确")
     
     # 如果是团购订单，更新团购参与状态
     if order.group_id:
@@ -510,17 +604,12 @@ async def pay_order(db: Session, order_pay: OrderPayRequest, user_id: int) -> Di
         if participant:
             participant.status = 2  # 已支付
     
-    # 更新商品销量
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            # Continuing order_service.py
-            product.sales += item.quantity
-    
     db.commit()
     db.refresh(order)
     
+    # 商品销量累加在计数器缓冲中，避免热门商品行锁竞争
+    counter_service.incr_sales(_order_sales_items(db, order.id), order.merchant_id)
+    
     return {
         "id": order.id,
         "order_no": order.order_no,
@@ -570,10 +659,9 @@ async def cancel_order(db: Session, order_cancel: OrderCancelRequest, user_id: i
         order.refund_reason = order_cancel.cancel_reason
         order.refund_amount = refund_amount
     else:
-        # 待支付订单直接取消
-        order.status = 4  # 已取消
-        order.cancel_time = datetime.now()
-        order.cancel_reason = order_cancel.cancel_reason
+        # 待支付订单直接取消并归还库存
+        if not _cancel_unpaid_order(db, order.id, order_cancel.cancel_reason):
+            raise HTTPException(status_code=400, detail="当前订单状态不允许取消")
     
     # 如果是团购订单，更新团购参与状态
     if order.group_id:
@@ -589,20 +677,20 @@ async def cancel_order(db: Session, order_cancel: OrderCancelRequest, user_id: i
             group = db.query(Group).filter(Group.id == order.group_id).first()
             if group:
                 group.current_participants -= 1
+            group_join_service.release_seat(order.group_id, user_id)
     
-    # 恢复商品库存
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            product.stock += item.quantity
-            
-            # 如果已支付，需要减少销量
-            if order.status == 5:  # 已退款
-                product.sales -= item.quantity
+    # 已支付订单恢复商品库存并减少销量（待支付订单已在取消时归还库存）
+    refunded = order.status == 5  # 已退款
+    if refunded:
+        stock_service.release_stock(db, _order_stock_items(db, order.id))
     
     db.commit()
     db.refresh(order)
+    if order.group_id:
+        await group_service.ainvalidate_group_detail(order.group_id)
+    
+    if refunded:
+        counter_service.incr_sales(_order_sales_items(db, order.id, -1), order.merchant_id)
     
     return order
 
@@ -659,17 +747,18 @@ async def refund_order(db: Session, order_refund: OrderRefundRequest, user_id: i
             group = db.query(Group).filter(Group.id == order.group_id).first()
             if group:
                 group.current_participants -= 1
+            group_join_service.release_seat(order.group_id, user_id)
     
-    # 恢复商品库存和减少销量
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            product.stock += item.quantity
-            product.sales -= item.quantity
+    # 恢复商品库存
+    stock_service.release_stock(db, _order_stock_items(db, order.id))
     
     db.commit()
     db.refresh(order)
+    if order.group_id:
+        await group_service.ainvalidate_group_detail(order.group_id)
+    
+    # 减少销量
+    counter_service.incr_sales(_order_sales_items(db, order.id, -1), order.merchant_id)
     
     return order
 
@@ -830,58 +919,138 @@ async def get_order_statistics(
     }
 
 
-async def check_and_cancel_expired_orders():
-    """检查并取消过期未支付订单（定时任务）"""
-    with SessionLocal() as db:
-        # 查找超过30分钟未支付的订单
-        expire_time = datetime.now() - timedelta(minutes=30)
-        expired_orders = db.query(Order).filter(
-            Order.status == 0,  # 待支付
-            Order.created_at < expire_time
+def _cancel_expired_order_batch(db: Session, rows: List[Any]) -> int:
+    """批量取消一批超时订单，归还库存并取消对应的团购参与"""
+    order_ids = [row.id for row in rows]
+    updated = db.query(Order).filter(
+        Order.id.in_(order_ids),
+        Order.status == 0  # 待支付
+    ).update({
+        Order.status: 4,  # 已取消
+        Order.cancel_time: datetime.now(),
+        Order.cancel_reason: "支付超时，系统自动取消",
+    }, synchronize_session=False)
+    
+    # 按商品规格汇总后归还库存
+    stock_rows = db.query(
+        OrderItem.product_id, OrderItem.specification_id, func.sum(OrderItem.quantity)
+    ).filter(
+        OrderItem.order_id.in_(order_ids)
+    ).group_by(OrderItem.product_id, OrderItem.specification_id).all()
+    stock_service.release_stock(db, [
+        stock_service.StockItem(product_id, specification_id, int(quantity))
+        for product_id, specification_id, quantity in stock_rows
+    ])
+    
+    # 取消团购参与并按团购汇总扣减人数
+    group_users = {(row.group_id, row.user_id) for row in rows if row.group_id}
+    if group_users:
+        participants = db.query(GroupParticipant.id, GroupParticipant.group_id, GroupParticipant.user_id).filter(
+            tuple_(GroupParticipant.group_id, GroupParticipant.user_id).in_(group_users),
+            GroupParticipant.status != 0  # 非取消状态
         ).all()
-        
-        for order in expired_orders:
-            # 更新订单状态
-            order.status = 4  # 已取消
-            order.cancel_time = datetime.now()
-            order.cancel_reason = "支付超时，系统自动取消"
+        if participants:
+            db.query(GroupParticipant).filter(
+                GroupParticipant.id.in_([p.id for p in participants])
+            ).update({GroupParticipant.status: 0}, synchronize_session=False)  # 已取消
             
-            # 如果是团购订单，更新团购参与状态
-            if order.group_id:
-                participant = db.query(GroupParticipant).filter(
-                    GroupParticipant.group_id == order.group_id,
-                    GroupParticipant.user_id == order.user_id
-                ).first()
-                
-                if participant:
-                    participant.status = 0  # 已取消
-                    
-                    # 更新团购人数
-                    group = db.query(Group).filter(Group.id == order.group_id).first()
-                    if group:
-                        group.current_participants -= 1
-        
-        db.commit()
-        
-        return len(expired_orders)
+            cancelled_by_group = Counter(p.group_id for p in participants)
+            db.query(Group).filter(Group.id.in_(cancelled_by_group)).update({
+                Group.current_participants: Group.current_participants - case(cancelled_by_group, value=Group.id, else_=0)
+            }, synchronize_session=False)
+            for p in participants:
+                group_join_service.release_seat(p.group_id, p.user_id)
+            group_service.invalidate_group_detail(*cancelled_by_group, db=db)
+    
+    return updated
+
 
+async def check_and_cancel_expired_orders(batch_size: Optional[int] = None) -> int:
+    """
+    检查并取消过期未支付订单（定时任务）
+    
+    按订单ID分批处理，每批锁定后用集合更新取消订单、归还库存和更新团购人数，
+    每批独立提交事务，中断后从断点继续
+    """
+    expire_time = datetime.now() - timedelta(minutes=ORDER_PAY_TIMEOUT_MINUTES)
+    
+    def fetch_batch(db: Session, after_id: int, limit: int) -> List[Any]:
+        # 锁定本批订单，防止与支付并发；其他任务锁定的订单跳过
+        return db.query(Order.id, Order.group_id, Order.user_id).filter(
+            Order.status == 0,  # 待支付
+            Order.created_at < expire_time,
+            Order.id > after_id
+        ).order_by(Order.id).limit(limit).with_for_update(skip_locked=True).all()
+    
+    metrics = run_in_batches(
+        "cancel_expired_orders", SessionLocal, fetch_batch, _cancel_expired_order_batch,
+        batch_size or settings.JOB_BATCH_SIZE
+    )
+    return metrics.updated
 
-async def check_and_auto_confirm_orders():
-    """检查并自动确认收货（定时任务）"""
-    with SessionLocal() as db:
-        # 查找超过7天已发货但未确认收货的订单
-        expire_time = datetime.now() - timedelta(days=7)
-        auto_confirm_orders = db.query(Order).filter(
+
+async def check_and_auto_confirm_orders(batch_size: Optional[int] = None) -> int:
+    """检查并自动确认收货（定时任务），按订单ID分批更新"""
+    expire_time = datetime.now() - timedelta(days=ORDER_AUTO_CONFIRM_DAYS)
+    
+    def fetch_batch(db: Session, after_id: int, limit: int) -> List[Any]:
+        # 查找超过自动确认时间已发货但未确认收货的订单
+        return db.query(Order.id).filter(
             Order.status == 2,  # 已发货
-            Order.delivery_time < expire_time
-        ).all()
-        
-        for order in auto_confirm_orders:
-            # 更新订单状态
-            order.status = 3  # 已完成
-            order.delivery_status = 2  # 已收货
-            order.completion_time = datetime.now()
-        
-        db.commit()
-        
-        return len(auto_confirm_orders)
\ No newline at end of file
+            Order.delivery_time < expire_time,
+            Order.id > after_id
+        ).order_by(Order.id).limit(limit).all()
+    
+    def process_batch(db: Session, rows: List[Any]) -> int:
+        return db.query(Order).filter(
+            Order.id.in_([row.id for row in rows]),
+            Order.status == 2  # 已发货
+        ).update({
+            Order.status: 3,  # 已完成
+            Order.delivery_status: 2,  # 已收货
+            Order.completion_time: datetime.now(),
+        }, synchronize_session=False)
+    
+    metrics = run_in_batches(
+        "auto_confirm_orders", SessionLocal, fetch_batch, process_batch,
+        batch_size or settings.JOB_BATCH_SIZE
+    )
+    return metrics.updated
+
+
+async def backfill_order_search_text(batch_size: Optional[int] = None) -> int:
+    """
+    为历史订单填充关键词搜索字段（定时任务），按订单ID分批更新
+
+    新订单在创建时写入；更新时保持updated_at不变，避免触发统计重新汇总
+    """
+    def fetch_batch(db: Session, after_id: int, limit: int) -> List[Any]:
+        return db.query(Order.id, Order.order_no, Order.buyer_comment).filter(
+            Order.search_text.is_(None),
+            Order.id > after_id
+        ).order_by(Order.id).limit(limit).all()
+    
+    def process_batch(db: Session, rows: List[Any]) -> int:
+        items_map = _load_order_items(db, [row.id for row in rows])
+        orders = Order.__table__
+        db.execute(
+            orders.update().where(orders.c.id == bindparam("order_id")).values(
+                search_text=bindparam("text"), updated_at=orders.c.updated_at
+            ),
+            [
+                {
+                    "order_id": row.id,
+                    "text": build_order_search_text(
+                        row.order_no, [item.product_name for item in items_map[row.id]], row.buyer_comment
+                    ),
+                }
+                for row in rows
+            ]
+        )
+        return len(rows)
+    
+    metrics = run_in_batches(
+        "backfill_order_search_text", SessionLocal, fetch_batch, process_batch,
+        batch_size or settings.JOB_BATCH_SIZE
+    )
+    return metrics.updated
@@ -4,10 +4,11 @@ import uuid
 from datetime import datetime
 from typing import Dict, Optional
 
-import requests
+import httpx
 from fastapi import HTTPException
 
 from app.core.config import settings
+from app.core.http_client import HttpClient
 
 
 async def create_wechat_payment(
@@ -69,7 +70,7 @@ async def create_wechat_payment(
     
     # 调用微信支付统一下单接口
     try:
-        response = requests.post(
+        response = await HttpClient.post(
             "https://api.mch.weixin.qq.com/pay/unifiedorder",
             data=xml.encode("utf-8"),
             headers={"Content-Type": "application/xml"}
@@ -110,7 +111,7 @@ async def create_wechat_payment(
         
         return pay_params
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"微信支付请求异常: {str(e)}")
 
 
@@ -215,7 +216,7 @@ async def create_wechat_refund(
     # 调用微信支付退款接口
     try:
         # 注意：微信支付退款接口需要证书
-        response = requests.post(
+        response = await HttpClient.post(
             "https://api.mch.weixin.qq.com/secapi/pay/refund",
             data=xml.encode("utf-8"),
             headers={"Content-Type": "application/xml"},
@@ -237,7 +238,7 @@ async def create_wechat_refund(
         
         return result
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"微信支付退款请求异常: {str(e)}")
 
 
@@ -1,13 +1,18 @@
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.config import settings
+from app.core.constants import CACHE_EXPIRE_TIME
 from app.crud import crud_product, crud_product_image, crud_product_specification
+from app.db.session import run_in_session
 from app.models.product import (
-    Product, ProductImage, ProductSpecification, product_categories
+    Product, ProductImage, ProductSpecification, ProductRelation, product_categories
 )
 from app.models.merchant import Merchant, Category
 from app.models.user import Favorite
@@ -15,76 +20,194 @@ from app.schemas.product import (
     ProductCreate, ProductUpdate, ProductImageCreate, ProductSpecificationCreate
 )
 from app.models.group import Group
-from app.models.order import OrderItem
-
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
-from app.models.product import Product, ProductImage, ProductSpecification
 from app.models.order import Order, OrderItem
-from app.models.group import Group
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import counter_service, search_service, stock_service
+from app.utils.cache_utils import ainvalidate_tags, cached, invalidate_tags
+from app.utils.pagination_utils import CursorPaginatedData, apply_order, keyset_paginate
+from app.utils.stats_utils import aggregate, count_if
+
+
+def _safe_int(value, default=0):
+    """安全转换为整数"""
+    try:
+        return int(value) if value is not None else default
+    except (ValueError, TypeError):
+        return default
 
 
-async def get_product(db: Session, product_id: int, user_id: Optional[int] = None) -> Dict:
-    """获取单个商品详情"""
+def _safe_float(value, default=0.0):
+    """安全转换为浮点数"""
+    try:
+        return float(value) if value is not None else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _safe_str(value, default=""):
+    """安全转换为字符串"""
+    return str(value) if value is not None else default
+
+
+def _safe_bool(value, default=False):
+    """安全转换为布尔值"""
+    try:
+        return bool(value) if value is not None else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _safe_datetime(value):
+    """安全处理日期时间"""
+    if isinstance(value, datetime):
+        return value
+    return None
+
+
+def hydrate_products(
+    db: Session,
+    products: List[Product],
+    user_id: Optional[int] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    批量加载商品关联数据
+    
+    整页商品的商户名称、分类、收藏数、当前用户收藏状态和进行中团购标记
+    各用一次集合查询加载，查询次数与商品数量无关
+    
+    Args:
+        db: 数据库会话
+        products: 商品ORM对象列表
+        user_id: 当前用户ID，为空时不查询收藏状态
+        
+    Returns:
+        以商品ID为键的关联数据字典
+    """
+    product_ids = [product.id for product in products]
+    hydrated = {
+        product_id: {
+            "merchant_name": "",
+            "categories": [],
+            "favorite_count": 0,
+            "is_favorite": False,
+            "has_group": False
+        } for product_id in product_ids
+    }
+    
+    if not product_ids:
+        return hydrated
+    
+    # 商户名称
+    merchant_ids = {product.merchant_id for product in products if product.merchant_id}
+    if merchant_ids:
+        merchant_names = dict(
+            db.query(Merchant.id, Merchant.name).filter(Merchant.id.in_(merchant_ids)).all()
+        )
+        for product in products:
+            hydrated[product.id]["merchant_name"] = _safe_str(merchant_names.get(product.merchant_id))
+    
+    # 商品分类
+    category_rows = db.query(product_categories.c.product_id, Category).join(
+        Category,
+        product_categories.c.category_id == Category.id
+    ).filter(
+        product_categories.c.product_id.in_(product_ids)
+    ).all()
+    
+    for product_id, category in category_rows:
+        hydrated[product_id]["categories"].append({
+            "id": category.id,
+            "name": _safe_str(category.name),
+            "icon": _safe_str(category.icon),
+            "sort_order": _safe_int(category.sort_order),
+            "is_active": _safe_bool(category.is_active, True),
+            "created_at": _safe_datetime(category.created_at),
+            "updated_at": _safe_datetime(category.updated_at)
+        })
+    
+    # 收藏数
+    favorite_counts = db.query(Favorite.product_id, func.count(Favorite.id)).filter(
+        Favorite.product_id.in_(product_ids)
+    ).group_by(Favorite.product_id).all()
+    
+    for product_id, count in favorite_counts:
+        hydrated[product_id]["favorite_count"] = _safe_int(count)
+    
+    # 当前用户收藏状态
+    if user_id:
+        favorite_rows = db.query(Favorite.product_id).filter(
+            Favorite.user_id == user_id,
+            Favorite.product_id.in_(product_ids)
+        ).all()
+        
+        for (product_id,) in favorite_rows:
+            hydrated[product_id]["is_favorite"] = True
+    
+    # 进行中团购
+    group_rows = db.query(Group.product_id).filter(
+        Group.product_id.in_(product_ids),
+        Group.status == 1,  # 进行中
+        Group.end_time > datetime.now()
+    ).distinct().all()
+    
+    for (product_id,) in group_rows:
+        hydrated[product_id]["has_group"] = True
+    
+    return hydrated
+
+
+def _build_product_dict(product: Product, extra: Dict[str, Any]) -> Dict:
+    """构建商品列表项字典"""
+    return {
+        "id": product.id,
+        "merchant_id": product.merchant_id,
+        "merchant_name": extra["merchant_name"],
+        "name": _safe_str(product.name),
+        "thumbnail": _safe_str(product.thumbnail),
+        "original_price": _safe_float(product.original_price),
+        "current_price": _safe_float(product.current_price),
+        "group_price": _safe_float(product.group_price) if product.group_price is not None else None,
+        "stock": _safe_int(product.stock),
+        "unit": _safe_str(product.unit, "件"),
+        "description": _safe_str(product.description),
+        "sales": _safe_int(product.sales),
+        "views": _safe_int(product.views),
+        "status": _safe_int(product.status, 1),
+        "sort_order": _safe_int(product.sort_order),
+        "is_hot": _safe_bool(product.is_hot),
+        "is_new": _safe_bool(product.is_new, True),
+        "is_recommend": _safe_bool(product.is_recommend),
+        "has_group": extra["has_group"],
+        "favorite_count": extra["favorite_count"],
+        "is_favorite": extra["is_favorite"],
+        "categories": extra["categories"],
+        "created_at": _safe_datetime(product.created_at),
+        "updated_at": _safe_datetime(product.updated_at)
+    }
+
+
+def build_product_list(db: Session, products: List[Product], user_id: Optional[int] = None) -> List[Dict]:
+    """将一页商品ORM对象转换为列表字典，浏览量和销量合并计数器缓冲中的增量"""
+    hydrated = hydrate_products(db, products, user_id)
+    product_ids = [product.id for product in products]
+    pending_views = counter_service.get_pending("product", "views", product_ids)
+    pending_sales = counter_service.get_pending("product", "sales", product_ids)
+    items = []
+    for product in products:
+        item = _build_product_dict(product, hydrated[product.id])
+        item["views"] += pending_views[product.id]
+        item["sales"] += pending_sales[product.id]
+        items.append(item)
+    return items
+
+
+def _load_product_detail(db: Session, product_id: int) -> Dict:
+    """加载商品详情中与用户无关的部分（可缓存）"""
     try:
         product = db.query(Product).filter(Product.id == product_id).first()
         
         if not product:
             raise HTTPException(status_code=404, detail="商品不存在")
         
-        # 定义安全的数据处理函数，避免None值和类型错误
-        def safe_int(value, default=0):
-            """安全转换为整数"""
-            try:
-                return int(value) if value is not None else default
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_float(value, default=0.0):
-            """安全转换为浮点数"""
-            try:
-                return float(value) if value is not None else default
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_str(value, default=""):
-            """安全转换为字符串"""
-            return str(value) if value is not None else default
-        
-        def safe_bool(value, default=False):
-            """安全转换为布尔值"""
-            try:
-                return bool(value) if value is not None else default
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_datetime(value):
-            """安全处理日期时间"""
-            if isinstance(value, datetime):
-                return value
-            return None
-        
-        # 安全增加浏览量
-        try:
-            current_views = safe_int(product.views)
-            product.views = current_views + 1
-            db.commit()
-        except Exception as e:
-            print(f"更新浏览量失败: {e}")
-            db.rollback()
-        
-        # 安全获取商户信息
-        merchant = None
-        merchant_name = ""
-        try:
-            merchant = db.query(Merchant).filter(Merchant.id == product.merchant_id).first()
-            if merchant:
-                merchant_name = safe_str(merchant.name)
-        except Exception as e:
-            print(f"获取商户信息失败: {e}")
-        
         # 安全获取商品图片
         images_data = []
         try:
@@ -95,10 +218,10 @@ async def get_product(db: Session, product_id: int, user_id: Optional[int] = Non
             for image in images:
                 images_data.append({
                     "id": image.id,
-                    "image_url": safe_str(image.image_url),
-                    "sort_order": safe_int(image.sort_order),
+                    "image_url": _safe_str(image.image_url),
+                    "sort_order": _safe_int(image.sort_order),
                     "product_id": product_id,
-                    "created_at": safe_datetime(image.created_at)
+                    "created_at": _safe_datetime(image.created_at)
                 })
         except Exception as e:
             print(f"获取商品图片失败: {e}")
@@ -114,115 +237,42 @@ async def get_product(db: Session, product_id: int, user_id: Optional[int] = Non
             for spec in specifications:
                 specs_data.append({
                     "id": spec.id,
-                    "name": safe_str(spec.name),
-                    "value": safe_str(spec.value),
-                    "price_adjustment": safe_float(spec.price_adjustment),
-                    "stock": safe_int(spec.stock),
-                    "sort_order": safe_int(spec.sort_order),
+                    "name": _safe_str(spec.name),
+                    "value": _safe_str(spec.value),
+                    "price_adjustment": _safe_float(spec.price_adjustment),
+                    "stock": _safe_int(spec.stock),
+                    "sort_order": _safe_int(spec.sort_order),
                     "product_id": product_id,
-                    "created_at": safe_datetime(spec.created_at),
-                    "updated_at": safe_datetime(spec.updated_at)
+                    "created_at": _safe_datetime(spec.created_at),
+                    "updated_at": _safe_datetime(spec.updated_at)
                 })
         except Exception as e:
             print(f"获取商品规格失败: {e}")
             specs_data = []
         
-        # 安全获取商品分类
-        categories_data = []
-        try:
-            categories = db.query(Category).join(
-                product_categories,
-                product_categories.c.category_id == Category.id
-            ).filter(
-                product_categories.c.product_id == product_id
-            ).all()
-            
-            for category in categories:
-                categories_data.append({
-                    "id": category.id,
-                    "name": safe_str(category.name),
-                    "icon": safe_str(category.icon),
-                    "sort_order": safe_int(category.sort_order),
-                    "is_active": safe_bool(category.is_active, True),
-                    "created_at": safe_datetime(category.created_at),
-                    "updated_at": safe_datetime(category.updated_at)
-                })
-        except Exception as e:
-            print(f"获取商品分类失败: {e}")
-            categories_data = []
-        
-        # 安全检查收藏状态
-        is_favorite = False
-        favorite_count = 0
-        try:
-            if user_id:
-                favorite = db.query(Favorite).filter(
-                    Favorite.user_id == user_id,
-                    Favorite.product_id == product_id
-                ).first()
-                is_favorite = bool(favorite)
-            
-            favorite_count = db.query(func.count(Favorite.id)).filter(
-                Favorite.product_id == product_id
-            ).scalar() or 0
-            favorite_count = safe_int(favorite_count)
-        except Exception as e:
-            print(f"检查收藏状态失败: {e}")
-            is_favorite = False
-            favorite_count = 0
-        
-        # 安全检查团购状态
-        has_group = False
+        # 商户、分类、收藏与团购状态与列表页共用批量加载
+        extra = {
+            "merchant_name": "",
+            "categories": [],
+            "favorite_count": 0,
+            "is_favorite": False,
+            "has_group": False
+        }
         try:
-            active_group = db.query(Group).filter(
-                Group.product_id == product_id,
-                Group.status == 1,  # 进行中
-                Group.end_time > datetime.now()
-            ).first()
-            has_group = bool(active_group)
+            extra = hydrate_products(db, [product])[product.id]
         except Exception as e:
-            print(f"检查团购状态失败: {e}")
-            has_group = False
+            print(f"获取商品关联数据失败: {e}")
         
         # 构建安全的响应数据，确保所有字段都有合适的默认值
-        product_data = {
-            "id": product.id,
-            "merchant_id": product.merchant_id,
-            "merchant_name": merchant_name,
-            "name": safe_str(product.name),
-            "thumbnail": safe_str(product.thumbnail),
-            "original_price": safe_float(product.original_price),
-            "current_price": safe_float(product.current_price),
-            "group_price": safe_float(product.group_price) if product.group_price is not None else None,
-            "stock": safe_int(product.stock),
-            "unit": safe_str(product.unit, "件"),
-            "description": safe_str(product.description),
-            "detail": safe_str(product.detail),
-            "sales": safe_int(product.sales),
-            "views": safe_int(product.views),
-            "status": safe_int(product.status, 1),
-            "sort_order": safe_int(product.sort_order),
-            "is_hot": safe_bool(product.is_hot),
-            "is_new": safe_bool(product.is_new, True),
-            "is_recommend": safe_bool(product.is_recommend),
-            "has_group": has_group,
-            "favorite_count": favorite_count,
-            "is_favorite": is_favorite,
-            "categories": categories_data,
+        product_data = _build_product_dict(product, extra)
+        product_data.update({
+            "detail": _safe_str(product.detail),
             "images": images_data,
-            "specifications": specs_data,
-            "created_at": safe_datetime(product.created_at),
-            "updated_at": safe_datetime(product.updated_at)
-        }
-        
-        # 添加调试信息，帮助定位问题
-        print(f"成功构建商品数据，商品ID: {product_id}")
-        print(f"数据字段数量: {len(product_data)}")
-        print(f"分类数量: {len(categories_data)}")
-        print(f"图片数量: {len(images_data)}")
-        print(f"规格数量: {len(specs_data)}")
+            "specifications": specs_data
+        })
         
-        return product_data
+        # 转换为JSON兼容类型，本地缓存和Redis缓存返回相同的数据
+        return jsonable_encoder(product_data)
         
     except HTTPException as e:
         # 重新抛出HTTP异常
@@ -237,7 +287,75 @@ async def get_product(db: Session, product_id: int, user_id: Optional[int] = Non
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail="获取商品详情时发生系统错误")
 
-async def search_products(
+
+def _load_product_overlay(db: Session, product_id: int, user_id: Optional[int] = None) -> Dict:
+    """记录浏览量并读取商品详情中每次请求都需要最新值的字段（含各规格库存）"""
+    rows = db.query(
+        Product.merchant_id, Product.views, Product.stock, Product.sales,
+        ProductSpecification.id.label("spec_id"), ProductSpecification.stock.label("spec_stock")
+    ).outerjoin(
+        ProductSpecification, ProductSpecification.product_id == Product.id
+    ).filter(Product.id == product_id).all()
+    if not rows:
+        # 商品已删除但详情仍在缓存中
+        invalidate_product_detail(product_id)
+        raise HTTPException(status_code=404, detail="商品不存在")
+    
+    row = rows[0]
+    
+    # 浏览量累加在计数器缓冲中，定期合并写入数据库
+    counter_service.incr_views(product_id, row.merchant_id)
+    
+    overlay = {
+        "views": _safe_int(row.views) + counter_service.get_pending("product", "views", [product_id])[product_id],
+        "stock": _safe_int(row.stock),
+        "sales": _safe_int(row.sales) + counter_service.get_pending("product", "sales", [product_id])[product_id],
+        "spec_stock": {r.spec_id: _safe_int(r.spec_stock) for r in rows if r.spec_id is not None},
+        "is_favorite": False
+    }
+    if user_id:
+        overlay["is_favorite"] = db.query(Favorite.id).filter(
+            Favorite.user_id == user_id,
+            Favorite.product_id == product_id
+        ).first() is not None
+    return overlay
+
+
+@cached(ttl=CACHE_EXPIRE_TIME["product_detail"], namespace="product_detail", tags=["product:{product_id}"])
+async def _get_product_detail(db: Union[Session, AsyncSession], product_id: int) -> Dict:
+    return await run_in_session(db, _load_product_detail, product_id)
+
+
+async def get_product(db: Union[Session, AsyncSession], product_id: int, user_id: Optional[int] = None) -> Dict:
+    """
+    获取商品详情，同时支持同步会话和异步会话
+    
+    商品信息、图片、规格、分类等公共部分按商品ID缓存，
+    浏览量、库存（含各规格库存）、销量和当前用户收藏状态每次请求单独查询后覆盖，
+    浏览量和销量包含计数器缓冲中尚未写入数据库的增量
+    """
+    detail = await _get_product_detail(db, product_id)
+    overlay = await run_in_session(db, _load_product_overlay, product_id, user_id)
+    spec_stock = overlay.pop("spec_stock")
+    # 缓存中的详情可能被多个请求共享，复制规格后再覆盖库存
+    specifications = [
+        {**spec, "stock": spec_stock.get(spec["id"], spec["stock"])}
+        for spec in detail.get("specifications", [])
+    ]
+    return {**detail, **overlay, "specifications": specifications}
+
+
+def invalidate_product_detail(*product_ids: int) -> None:
+    """使商品详情缓存及包含这些商品的团购详情缓存失效"""
+    invalidate_tags(*[f"product:{product_id}" for product_id in product_ids])
+
+
+async def ainvalidate_product_detail(*product_ids: int) -> None:
+    """invalidate_product_detail的异步版本"""
+    await ainvalidate_tags(*[f"product:{product_id}" for product_id in product_ids])
+
+
+def _search_products(
     db: Session,
     keyword: Optional[str] = None,
     category_id: Optional[int] = None,
@@ -249,66 +367,45 @@ async def search_products(
     is_new: Optional[bool] = None,
     is_recommend: Optional[bool] = None,
     has_group: Optional[bool] = None,
-    min_stock: Optional[int] = None,  # 添加 min_stock 参数
+    min_stock: Optional[int] = None,
     sort_by: Optional[str] = None,
     sort_order: Optional[str] = None,
     user_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = 20
-) -> Tuple[List[Dict], int]:
-    """搜索商品列表"""
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """
+    搜索商品
+    
+    cursor为None时按skip/limit分页，返回(商品列表, 总数)；
+    传入cursor（首页为空字符串）时按排序键+ID游标分页，返回CursorPaginatedData。
+    关键词通过搜索索引匹配名称和描述，未指定排序时按相关度排序
+    """
     query = db.query(Product)
     
-    # 安全数据处理函数
-    def safe_int(value, default=0):
-        try:
-            return int(value) if value is not None else default
-        except (ValueError, TypeError):
-            return default
-    
-    def safe_float(value, default=0.0):
-        try:
-            return float(value) if value is not None else default
-        except (ValueError, TypeError):
-            return default
-    
-    def safe_str(value, default=""):
-        return str(value) if value is not None else default
-    
-    def safe_bool(value, default=False):
-        try:
-            return bool(value) if value is not None else default
-        except (ValueError, TypeError):
-            return default
-    
-    def safe_datetime(value):
-        if isinstance(value, datetime):
-            return value
-        return None
-    
-    # 筛选条件
-    if keyword:
-        query = query.filter(
-            or_(
-                Product.name.ilike(f"%{keyword}%"),
-                Product.description.ilike(f"%{keyword}%")
-            )
-        )
+    # 关键词优先使用搜索索引：未指定排序时按相关度分页，先用其他筛选条件过滤全部命中；
+    # 指定排序时用命中ID筛选，命中过多或索引未就绪时回退到LIKE
+    ranked = search_service.search_ids(Product, keyword) if keyword else None
+    by_relevance = ranked is not None and not (sort_by and sort_order)
+    if ranked is not None and not by_relevance:
+        if len(ranked) <= settings.SEARCH_ID_CHUNK_SIZE:
+            query = query.filter(Product.id.in_([product_id for product_id, _ in ranked]))
+        else:
+            ranked = None
+    if ranked is None and keyword:
+        query = query.filter(Product.name.contains(keyword))
     
     if category_id:
-        query = query.join(
-            product_categories,
-            Product.id == product_categories.c.product_id
-        ).filter(product_categories.c.category_id == category_id)
+        # 使用EXISTS子查询，避免多分类商品因JOIN重复导致总数和分页错误
+        query = query.filter(Product.categories.any(Category.id == category_id))
     
     if merchant_id:
         query = query.filter(Product.merchant_id == merchant_id)
     
     if status is not None:
         query = query.filter(Product.status == status)
-    else:
-        # 默认只显示上架商品
-        query = query.filter(Product.status == 1)
     
     if min_price is not None:
         query = query.filter(Product.current_price >= min_price)
@@ -325,7 +422,15 @@ async def search_products(
     if is_recommend is not None:
         query = query.filter(Product.is_recommend == is_recommend)
     
-    # 库存筛选
+    if has_group is not None:
+        if has_group:
+            # 有团购活动的商品
+            query = query.filter(Product.groups.any())
+        else:
+            # 没有团购活动的商品
+            query = query.filter(~Product.groups.any())
+    
+    # 库存过滤
     if min_stock is not None:
         if min_stock == -1:  # 库存不足 (<=10)
             query = query.filter(Product.stock <= 10)
@@ -334,144 +439,52 @@ async def search_products(
         else:  # 库存 >= min_stock
             query = query.filter(Product.stock >= min_stock)
     
-    # 处理团购筛选
-    if has_group is not None:
-        if has_group:
-            # 查找有进行中团购的商品
-            query = query.join(
-                Group,
-                (Group.product_id == Product.id) & 
-                (Group.status == 1) &  # 进行中
-                (Group.end_time > datetime.now())
-            )
+    # 按相关度全局排序后再分页
+    if by_relevance:
+        page = search_service.paginate_ranked(query, Product.id, ranked, skip, limit, cursor, with_total)
+        if cursor is not None:
+            product_ids = page.items
         else:
-            # 查找没有进行中团购的商品
-            query = query.outerjoin(
-                Group,
-                (Group.product_id == Product.id) & 
-                (Group.status == 1) &  # 进行中
-                (Group.end_time > datetime.now())
-            ).filter(Group.id == None)
-    
-    # 查询总数
-    total = query.count()
+            product_ids, total = page
+            page = None
+        product_map = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_(product_ids)).all()
+        } if product_ids else {}
+        items = build_product_list(db, [product_map[i] for i in product_ids if i in product_map], user_id)
+        if page is not None:
+            page.items = items
+            return page
+        return items, total
+    
+    # 排序，以商品ID作为最后的排序键保证顺序唯一
+    order_columns = [(Product.created_at, True), (Product.id, True)]
+    if sort_by and sort_order:
+        if sort_by in Product.__table__.columns.keys():
+            descending = sort_order == "desc"
+            order_columns = [(getattr(Product, sort_by), descending), (Product.id, descending)]
+        else:
+            order_columns = [(Product.id, True)]
     
-    # 排序
-    if sort_by:
-        direction = desc if sort_order == "desc" else asc
-        if sort_by == "price":
-            query = query.order_by(direction(Product.current_price))
-        elif sort_by == "sales":
-            query = query.order_by(direction(Product.sales))
-        elif sort_by == "views":
-            query = query.order_by(direction(Product.views))
-        elif sort_by == "created_at":
-            query = query.order_by(direction(Product.created_at))
-    else:
-        # 默认按排序值和创建时间排序
-        query = query.order_by(Product.sort_order.desc(), Product.created_at.desc())
+    # 游标分页
+    if cursor is not None:
+        page = keyset_paginate(query, order_columns, cursor, limit, with_total)
+        page.items = build_product_list(db, page.items, user_id)
+        return page
     
-    # 分页
-    products = query.offset(skip).limit(limit).all()
+    # 获取总数
+    total = query.count()
     
-    # 处理结果 - 关键：转换为字典列表而不是返回 ORM 对象
-    result = []
-    for product in products:
-        try:
-            # 获取商户名称
-            merchant = None
-            try:
-                merchant = db.query(Merchant).filter(Merchant.id == product.merchant_id).first()
-            except Exception as e:
-                print(f"获取商户信息失败: {e}")
-            
-            # 获取商品分类
-            categories_data = []
-            try:
-                categories = db.query(Category).join(
-                    product_categories,
-                    product_categories.c.category_id == Category.id
-                ).filter(
-                    product_categories.c.product_id == product.id
-                ).all()
-                
-                for category in categories:
-                    categories_data.append({
-                        "id": category.id,
-                        "name": safe_str(category.name),
-                        "icon": safe_str(category.icon)
-                    })
-            except Exception as e:
-                print(f"获取商品分类失败: {e}")
-                categories_data = []
-            
-            # 检查是否收藏
-            is_favorite = False
-            favorite_count = 0
-            try:
-                if user_id:
-                    favorite = db.query(Favorite).filter(
-                        Favorite.user_id == user_id,
-                        Favorite.product_id == product.id
-                    ).first()
-                    is_favorite = bool(favorite)
-                
-                favorite_count = db.query(func.count(Favorite.id)).filter(
-                    Favorite.product_id == product.id
-                ).scalar() or 0
-            except Exception as e:
-                print(f"检查收藏状态失败: {e}")
-                is_favorite = False
-                favorite_count = 0
-            
-            # 检查是否有团购
-            has_group = False
-            try:
-                active_group = db.query(Group).filter(
-                    Group.product_id == product.id,
-                    Group.status == 1,  # 进行中
-                    Group.end_time > datetime.now()
-                ).first()
-                has_group = bool(active_group)
-            except Exception as e:
-                print(f"检查团购状态失败: {e}")
-                has_group = False
-            
-            # 构建字典数据 - 这是关键，确保返回字典而不是ORM对象
-            product_data = {
-                "id": product.id,
-                "merchant_id": product.merchant_id,
-                "merchant_name": merchant.name if merchant else "",
-                "name": safe_str(product.name),
-                "thumbnail": safe_str(product.thumbnail),
-                "original_price": safe_float(product.original_price),
-                "current_price": safe_float(product.current_price),
-                "group_price": safe_float(product.group_price) if product.group_price is not None else None,
-                "stock": safe_int(product.stock),
-                "unit": safe_str(product.unit, "件"),
-                "description": safe_str(product.description),
-                "sales": safe_int(product.sales),
-                "views": safe_int(product.views),
-                "status": safe_int(product.status, 1),
-                "is_hot": safe_bool(product.is_hot),
-                "is_new": safe_bool(product.is_new, True),
-                "is_recommend": safe_bool(product.is_recommend),
-                "has_group": has_group,
-                "favorite_count": safe_int(favorite_count),
-                "is_favorite": is_favorite,
-                "categories": categories_data,
-                "created_at": safe_datetime(product.created_at),
-                "updated_at": safe_datetime(product.updated_at)
-            }
-            
-            result.append(product_data)  # 添加字典而不是ORM对象
-            
-        except Exception as e:
-            print(f"处理商品 {product.id} 时出错: {e}")
-            continue  # 跳过出错的商品，继续处理其他商品
+    # 分页
+    products = apply_order(query, order_columns).offset(skip).limit(limit).all()
     
-    print(f"成功处理 {len(result)} 个商品，总共 {total} 个")
-    return result, total
+    # 批量加载关联数据并转换为字典
+    return build_product_list(db, products, user_id), total
+
+
+async def search_products(db: Union[Session, AsyncSession], *args, **kwargs) -> Union[Tuple[List[Dict], int], CursorPaginatedData]:
+    """搜索商品列表，同时支持同步会话和异步会话"""
+    return await run_in_session(db, _search_products, *args, **kwargs)
 
 
 async def create_product(db: Session, product_data: ProductCreate, merchant_id: int) -> Product:
@@ -509,6 +522,7 @@ async def create_product(db: Session, product_data: ProductCreate, merchant_id:
     
     db.commit()
     db.refresh(product)
+    search_service.index_objects(product)
     
     return product
 
@@ -548,6 +562,12 @@ async def update_product(db: Session, product_id: int, product_data: ProductUpda
     db.commit()
     db.refresh(updated_product)
     
+    # 库存变更后重新加载Redis库存计数器
+    if "stock" in product_dict:
+        await stock_service.ainvalidate_stock_counter(product_id)
+    await ainvalidate_product_detail(product_id)
+    search_service.index_objects(updated_product)
+    
     return updated_product
 
 
@@ -577,6 +597,7 @@ async def update_product_images(
         new_images.append(image)
     
     db.commit()
+    await ainvalidate_product_detail(product_id)
     
     return new_images
 
@@ -607,6 +628,8 @@ async def update_product_specifications(
         new_specs.append(spec)
     
     db.commit()
+    await stock_service.ainvalidate_stock_counter(product_id)
+    await ainvalidate_product_detail(product_id)
     
     return new_specs
 
@@ -631,6 +654,7 @@ async def delete_product(db: Session, product_id: int, merchant_id: int) -> bool
         # 如果有关联订单，则只能下架不能删除
         product.status = 0  # 下架
         db.commit()
+        await ainvalidate_product_detail(product_id)
         return False
     
     # 删除商品图片
@@ -644,82 +668,63 @@ async def delete_product(db: Session, product_id: int, merchant_id: int) -> bool
         product_categories.c.product_id == product_id
     ))
     
+    # 删除相关商品
+    db.query(ProductRelation).filter(
+        or_(ProductRelation.product_id == product_id, ProductRelation.related_product_id == product_id)
+    ).delete(synchronize_session=False)
+    
     # 删除商品
     db.delete(product)
     db.commit()
+    await ainvalidate_product_detail(product_id)
+    search_service.remove_objects(Product, product_id)
     
     return True
 
 
-async def get_related_products(db: Session, product_id: int, limit: int = 6):
-    """获取相关商品 - 增强版"""
-    try:
-        print(f"🔍 查找相关商品 - 商品ID: {product_id}")
-        
-        # 获取当前商品信息
-        current_product = db.query(Product).filter(Product.id == product_id).first()
-        if not current_product:
-            print("⚠️ 当前商品不存在")
-            return []
-        
-        # 策略1: 同商户的其他商品
-        same_merchant_products = db.query(Product).filter(
-            Product.merchant_id == current_product.merchant_id,
-            Product.id != product_id,
-            Product.status == 1
-        ).limit(limit // 2).all()
-        
-        print(f"📍 同商户商品: {len(same_merchant_products)}")
-        
-        # 策略2: 同分类的其他商品
-        related_by_category = []
-        if len(same_merchant_products) < limit:
-            # 获取当前商品的分类
-            from app.models.product import ProductCategory
-            current_categories = db.query(ProductCategory).filter(
-                ProductCategory.product_id == product_id
-            ).all()
-            
-            if current_categories:
-                category_ids = [pc.category_id for pc in current_categories]
-                
-                related_by_category = db.query(Product).join(ProductCategory).filter(
-                    ProductCategory.category_id.in_(category_ids),
-                    Product.id != product_id,
-                    Product.merchant_id != current_product.merchant_id,
-                    Product.status == 1
-                ).limit(limit - len(same_merchant_products)).all()
-                
-                print(f"🏷️ 同分类商品: {len(related_by_category)}")
-        
-        # 合并结果
-        related_products = same_merchant_products + related_by_category
-        
-        # 如果还不够，用热门商品补充
-        if len(related_products) < limit:
-            popular_products = db.query(Product).filter(
-                Product.id != product_id,
-                Product.status == 1
-            ).order_by(Product.sales.desc()).limit(limit - len(related_products)).all()
-            
-            # 去重
-            existing_ids = {p.id for p in related_products}
-            for product in popular_products:
-                if product.id not in existing_ids:
-                    related_products.append(product)
-                    if len(related_products) >= limit:
-                        break
-            
-            print(f"🔥 热门商品补充: {len(related_products)}")
-        
-        print(f"✅ 最终相关商品数量: {len(related_products)}")
-        return related_products[:limit]
-        
-    except Exception as e:
-        print(f"❌ 获取相关商品服务失败: {str(e)}")
-        return []
+# 相关商品和热销商品返回的字段
+_RELATED_COLUMNS = (
+    Product.id, Product.name, Product.thumbnail, Product.current_price, Product.original_price,
+    Product.sales, Product.status, Merchant.name.label("merchant_name")
+)
 
 
+@cached(ttl=CACHE_EXPIRE_TIME["hot_products"], namespace="hot_products")
+async def _get_hot_products(db: Session) -> List[Dict]:
+    rows = db.query(*_RELATED_COLUMNS).outerjoin(
+        Merchant, Merchant.id == Product.merchant_id
+    ).filter(
+        Product.status == 1
+    ).order_by(Product.sales.desc(), Product.id.desc()).limit(settings.RECOMMEND_TOP_K + 1).all()
+    return [dict(row._mapping) for row in rows]
+
+
+async def get_related_products(db: Session, product_id: int, limit: int = 6) -> List[Dict]:
+    """
+    获取相关商品
+
+    读取离线计算的相关商品表（共同购买、同分类、同商户），一次查询；
+    尚未计算或不足limit个时用缓存的全站热销商品补充
+    """
+    rows = db.query(*_RELATED_COLUMNS).join(
+        ProductRelation, ProductRelation.related_product_id == Product.id
+    ).outerjoin(
+        Merchant, Merchant.id == Product.merchant_id
+    ).filter(
+        ProductRelation.product_id == product_id,
+        Product.status == 1
+    ).order_by(ProductRelation.score.desc(), Product.sales.desc(), Product.id).limit(limit).all()
+    related = [dict(row._mapping) for row in rows]
+    
+    if len(related) < limit:
+        seen = {product_id, *(item["id"] for item in related)}
+        for item in await _get_hot_products(db):
+            if item["id"] not in seen:
+                related.append(item)
+                if len(related) >= limit:
+                    break
+    
+    return related
 
 
 async def get_product_by_id(db: Session, product_id: int) -> Optional[Product]:
@@ -837,6 +842,9 @@ async def batch_operation(
                         success_count += 1
         
         db.commit()
+        await ainvalidate_product_detail(*product_ids)
+        if operation == "delete":
+            search_service.remove_objects(Product, *product_ids)
         
         return {
             "success_count": success_count,
@@ -851,79 +859,50 @@ async def batch_operation(
 
 async def get_merchant_product_stats(db: Session, merchant_id: int) -> Dict[str, Any]:
     """获取商户商品统计数据"""
-    # 基础统计
-    total_products = db.query(Product).filter(Product.merchant_id == merchant_id).count()
-    
-    # 按状态统计
-    on_sale = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.status == 1)
-    ).count()
-    
-    off_sale = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.status == 0)
-    ).count()
-    
-    # 按标签统计
-    hot_products = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.is_hot == True)
-    ).count()
-    
-    new_products = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.is_new == True)
-    ).count()
-    
-    recommend_products = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.is_recommend == True)
-    ).count()
-    
-    # 库存统计
-    low_stock_products = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.stock < 10)
-    ).count()
-    
-    out_of_stock = db.query(Product).filter(
-        and_(Product.merchant_id == merchant_id, Product.stock == 0)
-    ).count()
-    
-    # 销售统计
-    total_sales = db.query(func.sum(Product.sales)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    total_views = db.query(func.sum(Product.views)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    # 价格统计
-    avg_price = db.query(func.avg(Product.current_price)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    max_price = db.query(func.max(Product.current_price)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    min_price = db.query(func.min(Product.current_price)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
+    # 条件聚合一次查询得到全部统计
+    stats = aggregate(
+        db, Product.merchant_id == merchant_id,
+        total_products=func.count(Product.id),
+        # 按状态统计
+        on_sale=count_if(Product.status == 1),
+        off_sale=count_if(Product.status == 0),
+        # 按标签统计
+        hot_products=count_if(Product.is_hot == True),
+        new_products=count_if(Product.is_new == True),
+        recommend_products=count_if(Product.is_recommend == True),
+        # 库存统计
+        low_stock_products=count_if(Product.stock < 10),
+        out_of_stock=count_if(Product.stock == 0),
+        total_stock=func.sum(Product.stock),
+        # 销售统计
+        total_sales=func.sum(Product.sales),
+        total_views=func.sum(Product.views),
+        # 价格统计
+        avg_price=func.avg(Product.current_price),
+        max_price=func.max(Product.current_price),
+        min_price=func.min(Product.current_price)
+    )
+    
+    # 加上尚未写入数据库的增量
+    total_sales = (stats["total_sales"] or 0) + counter_service.get_pending("merchant", "sales", [merchant_id])[merchant_id]
+    total_views = (stats["total_views"] or 0) + counter_service.get_pending("merchant", "views", [merchant_id])[merchant_id]
+    avg_price, max_price, min_price = stats["avg_price"], stats["max_price"], stats["min_price"]
     
     return {
         "basic_stats": {
-            "total_products": total_products,
-            "on_sale": on_sale,
-            "off_sale": off_sale,
+            "total_products": stats["total_products"],
+            "on_sale": int(stats["on_sale"]),
+            "off_sale": int(stats["off_sale"]),
         },
         "tag_stats": {
-            "hot_products": hot_products,
-            "new_products": new_products,
-            "recommend_products": recommend_products,
+            "hot_products": int(stats["hot_products"]),
+            "new_products": int(stats["new_products"]),
+            "recommend_products": int(stats["recommend_products"]),
         },
         "stock_stats": {
-            "low_stock_products": low_stock_products,
-            "out_of_stock": out_of_stock,
-            "total_stock": db.query(func.sum(Product.stock)).filter(
-                Product.merchant_id == merchant_id
-            ).scalar() or 0,
+            "low_stock_products": int(stats["low_stock_products"]),
+            "out_of_stock": int(stats["out_of_stock"]),
+            "total_stock": stats["total_stock"] or 0,
         },
         "sales_stats": {
             "total_sales": total_sales,
@@ -936,90 +915,3 @@ async def get_merchant_product_stats(db: Session, merchant_id: int) -> Dict[str,
             "min_price": float(min_price) if min_price else 0,
         }
     }
-
-
-# 需要修改现有的search_products方法，添加min_stock参数支持
-async def search_products(
-    db: Session,
-    keyword: Optional[str] = None,
-    category_id: Optional[int] = None,
-    merchant_id: Optional[int] = None,
-    status: Optional[int] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    is_hot: Optional[bool] = None,
-    is_new: Optional[bool] = None,
-    is_recommend: Optional[bool] = None,
-    has_group: Optional[bool] = None,
-    min_stock: Optional[int] = None,  # 新增参数
-    sort_by: Optional[str] = None,
-    sort_order: Optional[str] = None,
-    user_id: Optional[int] = None,
-    skip: int = 0,
-    limit: int = 10
-):
-    """搜索商品"""
-    query = db.query(Product)
-    
-    # 基础过滤条件
-    if keyword:
-        query = query.filter(Product.name.contains(keyword))
-    
-    if category_id:
-        query = query.join(Product.categories).filter(
-            Product.categories.any(id=category_id)
-        )
-    
-    if merchant_id:
-        query = query.filter(Product.merchant_id == merchant_id)
-    
-    if status is not None:
-        query = query.filter(Product.status == status)
-    
-    if min_price is not None:
-        query = query.filter(Product.current_price >= min_price)
-    
-    if max_price is not None:
-        query = query.filter(Product.current_price <= max_price)
-    
-    if is_hot is not None:
-        query = query.filter(Product.is_hot == is_hot)
-    
-    if is_new is not None:
-        query = query.filter(Product.is_new == is_new)
-    
-    if is_recommend is not None:
-        query = query.filter(Product.is_recommend == is_recommend)
-    
-    if has_group is not None:
-        if has_group:
-            # 有团购活动的商品
-            query = query.filter(Product.groups.any())
-        else:
-            # 没有团购活动的商品
-            query = query.filter(~Product.groups.any())
-    
-    # 新增：库存过滤
-    if min_stock is not None:
-        if min_stock == -1:  # 库存不足 (<=10)
-            query = query.filter(Product.stock <= 10)
-        elif min_stock == -2:  # 已售罄 (=0)
-            query = query.filter(Product.stock == 0)
-        else:  # 库存 >= min_stock
-            query = query.filter(Product.stock >= min_stock)
-    
-    # 排序
-    if sort_by and sort_order:
-        if hasattr(Product, sort_by):
-            order_func = desc if sort_order == "desc" else asc
-            query = query.order_by(order_func(getattr(Product, sort_by)))
-    else:
-        query = query.order_by(desc(Product.created_at))
-    
-    # 获取总数
-    total = query.count()
-    
-    # 分页
-    products = query.offset(skip).limit(limit).all()
-    
-    return products, total
\ No newline at end of file
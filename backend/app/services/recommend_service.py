@@ -0,0 +1,211 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, insert
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductRelation, product_categories
+from app.utils.job_utils import run_in_batches
+
+# 计入共同购买的订单状态：已支付、已发货、已完成
+PURCHASE_STATUSES = (1, 2, 3)
+
+# 共同购买相似度在0~1之间，同分类、同商户在此基础上加分
+CATEGORY_WEIGHT = 0.3
+MERCHANT_WEIGHT = 0.2
+
+
+def _load_pools(db: Session, size: int) -> Tuple[Dict[int, List[Tuple]], Dict[int, List[Tuple]]]:
+    """
+    流式读取上架商品，保留每个分类、每个商户销量最高的若干商品作为候选
+
+    Returns:
+        (分类ID -> [(商品ID, 商户ID, 销量), ...], 商户ID -> [...])，均按销量降序
+    """
+    by_category: Dict[int, List[Tuple]] = defaultdict(list)
+    by_merchant: Dict[int, List[Tuple]] = defaultdict(list)
+    order = (Product.sales.desc(), Product.id.desc())
+    batch = settings.JOB_BATCH_SIZE
+
+    for product_id, merchant_id, sales in db.query(
+        Product.id, Product.merchant_id, Product.sales
+    ).filter(Product.status == 1).order_by(*order).yield_per(batch):
+        pool = by_merchant[merchant_id]
+        if len(pool) < size:
+            pool.append((product_id, merchant_id, sales or 0))
+
+    for category_id, product_id, merchant_id, sales in db.query(
+        product_categories.c.category_id, Product.id, Product.merchant_id, Product.sales
+    ).join(
+        product_categories, product_categories.c.product_id == Product.id
+    ).filter(Product.status == 1).order_by(*order).yield_per(batch):
+        pool = by_category[category_id]
+        if len(pool) < size:
+            pool.append((product_id, merchant_id, sales or 0))
+
+    return by_category, by_merchant
+
+
+def _purchase_counts(db: Session, since: datetime) -> Dict[int, int]:
+    """各商品在时间范围内的购买订单数"""
+    return dict(db.query(
+        OrderItem.product_id, func.count(func.distinct(OrderItem.order_id))
+    ).join(
+        Order, Order.id == OrderItem.order_id
+    ).filter(
+        Order.status.in_(PURCHASE_STATUSES),
+        Order.created_at >= since
+    ).group_by(OrderItem.product_id).all())
+
+
+def _co_purchases(db: Session, product_ids: List[int], since: datetime) -> List[Any]:
+    """
+    一批商品的共同购买统计
+
+    Returns:
+        [(商品ID, 相关商品ID, 共同订单数, 相关商品商户ID, 相关商品销量, 是否有相同分类), ...]，
+        只包含上架的相关商品
+    """
+    item, other = aliased(OrderItem), aliased(OrderItem)
+    co = db.query(
+        item.product_id.label("product_id"),
+        other.product_id.label("related_id"),
+        func.count(func.distinct(item.order_id)).label("co_count")
+    ).join(
+        other, and_(other.order_id == item.order_id, other.product_id != item.product_id)
+    ).join(
+        Order, Order.id == item.order_id
+    ).filter(
+        item.product_id.in_(product_ids),
+        Order.status.in_(PURCHASE_STATUSES),
+        Order.created_at >= since
+    ).group_by(item.product_id, other.product_id).subquery()
+
+    own, related = product_categories.alias(), product_categories.alias()
+    same_category = exists().where(
+        own.c.product_id == co.c.product_id,
+        related.c.product_id == co.c.related_id,
+        own.c.category_id == related.c.category_id
+    )
+    return db.query(
+        co.c.product_id, co.c.related_id, co.c.co_count, Product.merchant_id, Product.sales, same_category
+    ).join(
+        Product, Product.id == co.c.related_id
+    ).filter(Product.status == 1).all()
+
+
+def _score_related(
+    product_id: int,
+    merchant_id: Optional[int],
+    category_ids: List[int],
+    co_purchases: List[Tuple[int, int, Optional[int], int, bool]],
+    by_category: Dict[int, List[Tuple]],
+    by_merchant: Dict[int, List[Tuple]],
+    purchases: Dict[int, int],
+    top_k: int
+) -> List[Dict[str, Any]]:
+    """
+    计算一个商品的相关商品
+
+    得分 = 共同订单数 / sqrt(两商品各自的订单数之积) + 同分类加分 + 同商户加分，
+    得分相同时销量高的在前
+
+    Args:
+        product_id: 商品ID
+        merchant_id: 商品的商户ID
+        category_ids: 商品的分类ID
+        co_purchases: [(相关商品ID, 共同订单数, 商户ID, 销量, 是否有相同分类), ...]
+        by_category: 各分类的候选商品
+        by_merchant: 各商户的候选商品
+        purchases: 各商品的购买订单数
+        top_k: 保留的相关商品数
+
+    Returns:
+        product_relations表的行
+    """
+    # 相关商品ID -> [共同订单数, 商户ID, 销量, 是否有相同分类]
+    candidates: Dict[int, List[Any]] = {}
+    for related_id, co_count, related_merchant_id, sales, same_category in co_purchases:
+        candidates[related_id] = [co_count, related_merchant_id, sales or 0, bool(same_category)]
+    for category_id in category_ids:
+        for related_id, related_merchant_id, sales in by_category.get(category_id, ()):
+            candidate = candidates.setdefault(related_id, [0, related_merchant_id, sales, True])
+            candidate[3] = True
+    for related_id, related_merchant_id, sales in by_merchant.get(merchant_id, ()):
+        candidates.setdefault(related_id, [0, related_merchant_id, sales, False])
+    candidates.pop(product_id, None)
+
+    own_count = purchases.get(product_id, 0)
+    scored = []
+    for related_id, (co_count, related_merchant_id, sales, same_category) in candidates.items():
+        score = 0.0
+        if co_count:
+            score += co_count / math.sqrt(max(own_count * purchases.get(related_id, 0), co_count * co_count))
+        if same_category:
+            score += CATEGORY_WEIGHT
+        if merchant_id is not None and related_merchant_id == merchant_id:
+            score += MERCHANT_WEIGHT
+        scored.append((score, sales, related_id, co_count))
+
+    scored.sort(key=lambda item: (-item[0], -item[1], item[2]))
+    return [
+        {"product_id": product_id, "related_product_id": related_id, "score": round(score, 6), "co_order_count": co_count}
+        for score, _, related_id, co_count in scored[:top_k]
+    ]
+
+
+async def rebuild_product_relations(batch_size: Optional[int] = None) -> int:
+    """
+    重新计算相关商品（定时任务）
+
+    先读取各分类、各商户的热销候选和各商品订单数，再按商品ID分批统计共同购买，
+    每批替换这些商品的相关商品行并提交，读取方始终能看到完整的旧结果或新结果
+
+    Returns:
+        写入的相关商品行数
+    """
+    since = datetime.now() - timedelta(days=settings.RECOMMEND_ORDER_DAYS)
+    top_k = settings.RECOMMEND_TOP_K
+    with SessionLocal() as db:
+        by_category, by_merchant = _load_pools(db, top_k)
+        purchases = _purchase_counts(db, since)
+
+    def fetch_batch(db: Session, after_id: int, limit: int) -> List[Any]:
+        return db.query(Product.id, Product.merchant_id).filter(
+            Product.id > after_id
+        ).order_by(Product.id).limit(limit).all()
+
+    def process_batch(db: Session, rows: List[Any]) -> int:
+        product_ids = [row.id for row in rows]
+        categories = defaultdict(list)
+        for product_id, category_id in db.query(
+            product_categories.c.product_id, product_categories.c.category_id
+        ).filter(product_categories.c.product_id.in_(product_ids)):
+            categories[product_id].append(category_id)
+        co_purchases = defaultdict(list)
+        for product_id, *values in _co_purchases(db, product_ids, since):
+            co_purchases[product_id].append(values)
+
+        relations = []
+        for row in rows:
+            relations.extend(_score_related(
+                row.id, row.merchant_id, categories[row.id], co_purchases[row.id],
+                by_category, by_merchant, purchases, top_k
+            ))
+        db.query(ProductRelation).filter(
+            ProductRelation.product_id.in_(product_ids)
+        ).delete(synchronize_session=False)
+        if relations:
+            db.execute(insert(ProductRelation), relations)
+        return len(relations)
+
+    metrics = run_in_batches(
+        "rebuild_product_relations", SessionLocal, fetch_batch, process_batch,
+        batch_size or settings.RECOMMEND_BATCH_SIZE
+    )
+    return metrics.updated
@@ -0,0 +1,188 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import exists, func, insert
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.merchant import Merchant
+from app.models.order import Order, OrderItem
+from app.models.stats import (
+    ORDER_STATUS_COLUMNS, GroupDailyStats, MerchantDailyStats, PlatformDailyStats, ProductDailyStats
+)
+from app.models.user import User
+from app.utils.stats_utils import date_range, to_date
+
+# 计入销售额的订单状态：已支付、已发货、已完成
+SALES_STATUSES = (1, 2, 3)
+
+ROLLUP_MODELS = (PlatformDailyStats, MerchantDailyStats, ProductDailyStats, GroupDailyStats)
+
+
+def _date_ranges(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """将日期合并为连续区间"""
+    ranges: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if ranges and day == ranges[-1][1] + timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def rebuild_daily_stats(db: Session, start: date, end: date, refreshed_at: Optional[datetime] = None) -> int:
+    """
+    重新汇总日期区间内的每日统计（不提交事务）
+
+    每张源表一条GROUP BY查询，删除区间内的旧汇总后批量写入
+
+    Args:
+        db: 数据库会话
+        start: 开始日期
+        end: 结束日期（包含）
+        refreshed_at: 汇总时间，定时任务据此查找之后变动的订单
+
+    Returns:
+        写入的汇总行数
+    """
+    start_dt = datetime.combine(start, time.min)
+    end_dt = datetime.combine(end, time.max)
+    order_day = func.date(Order.created_at)
+    in_range = Order.created_at.between(start_dt, end_dt)
+    in_sales = Order.status.in_(SALES_STATUSES)
+
+    platform = {
+        day: {"stat_date": day, "order_count": 0, "sales_order_count": 0, "sales_amount": 0.0,
+              "new_user_count": 0, "active_user_count": 0, "new_merchant_count": 0,
+              "refreshed_at": refreshed_at or datetime.now()}
+        for day in date_range(start, end)
+    }
+    merchants: Dict[Tuple[date, int], Dict[str, Any]] = defaultdict(dict)
+
+    # 订单数、销售额和状态分布
+    rows = db.query(
+        order_day, Order.merchant_id, Order.status, func.count(Order.id), func.sum(Order.actual_amount)
+    ).filter(in_range).group_by(order_day, Order.merchant_id, Order.status).all()
+    for day, merchant_id, status, count, amount in rows:
+        day = to_date(day)
+        stats = merchants[(day, merchant_id)]
+        stats["order_count"] = stats.get("order_count", 0) + count
+        platform[day]["order_count"] += count
+        if status in SALES_STATUSES:
+            stats["sales_order_count"] = stats.get("sales_order_count", 0) + count
+            stats["sales_amount"] = stats.get("sales_amount", 0.0) + float(amount or 0)
+            platform[day]["sales_order_count"] += count
+            platform[day]["sales_amount"] += float(amount or 0)
+        if status in ORDER_STATUS_COLUMNS:
+            stats[ORDER_STATUS_COLUMNS[status]] = count
+
+    # 活跃用户（下单用户）
+    for day, count in db.query(order_day, func.count(func.distinct(Order.user_id))).filter(
+        in_range
+    ).group_by(order_day):
+        platform[to_date(day)]["active_user_count"] = count
+
+    # 首次在商户下单的用户：当天之前在该商户没有订单
+    earlier = aliased(Order)
+    first_order = ~exists().where(
+        earlier.merchant_id == Order.merchant_id,
+        earlier.user_id == Order.user_id,
+        earlier.created_at < order_day
+    )
+    for day, merchant_id, count in db.query(
+        order_day, Order.merchant_id, func.count(func.distinct(Order.user_id))
+    ).filter(in_range, first_order).group_by(order_day, Order.merchant_id):
+        merchants[(to_date(day), merchant_id)]["new_customer_count"] = count
+
+    for model, field in ((User, "new_user_count"), (Merchant, "new_merchant_count")):
+        created_day = func.date(model.created_at)
+        for day, count in db.query(created_day, func.count(model.id)).filter(
+            model.created_at.between(start_dt, end_dt)
+        ).group_by(created_day):
+            platform[to_date(day)][field] = count
+
+    products = [
+        {"stat_date": to_date(day), "product_id": product_id, "merchant_id": merchant_id,
+         "sales_count": count, "sales_quantity": int(quantity or 0), "sales_amount": float(amount or 0)}
+        for day, product_id, merchant_id, count, quantity, amount in db.query(
+            order_day, OrderItem.product_id, Order.merchant_id,
+            func.count(OrderItem.id), func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal)
+        ).join(Order, Order.id == OrderItem.order_id).filter(
+            in_range, in_sales
+        ).group_by(order_day, OrderItem.product_id, Order.merchant_id)
+    ]
+
+    groups = [
+        {"stat_date": to_date(day), "group_id": group_id, "merchant_id": merchant_id,
+         "order_count": count, "sales_amount": float(amount or 0)}
+        for day, group_id, merchant_id, count, amount in db.query(
+            order_day, Order.group_id, Order.merchant_id, func.count(Order.id), func.sum(Order.actual_amount)
+        ).filter(
+            in_range, in_sales, Order.group_id.isnot(None)
+        ).group_by(order_day, Order.group_id, Order.merchant_id)
+    ]
+
+    merchant_rows = [
+        {"stat_date": day, "merchant_id": merchant_id, **stats}
+        for (day, merchant_id), stats in merchants.items() if merchant_id is not None
+    ]
+
+    for model in ROLLUP_MODELS:
+        db.query(model).filter(model.stat_date.between(start, end)).delete(synchronize_session=False)
+    written = 0
+    for model, values in (
+        (PlatformDailyStats, list(platform.values())),
+        (MerchantDailyStats, merchant_rows),
+        (ProductDailyStats, products),
+        (GroupDailyStats, groups),
+    ):
+        if values:
+            db.execute(insert(model), values)
+            written += len(values)
+    return written
+
+
+def _dirty_days(db: Session) -> List[date]:
+    """
+    需要重新汇总的日期
+
+    首次运行时从最早的数据开始全部汇总；之后只汇总今天、上次汇总的日期，
+    以及上次汇总后有订单变动（支付、发货、取消、退款等）的订单创建日期
+    """
+    today = date.today()
+    last = db.query(func.max(PlatformDailyStats.refreshed_at)).scalar()
+    if last is None:
+        firsts = [db.query(func.min(model.created_at)).scalar() for model in (Order, User, Merchant)]
+        first = min([to_date(value) for value in firsts if value] or [today])
+        return date_range(first, today)
+
+    # 多回看一个汇总间隔，避免应用与数据库时钟的偏差
+    since = last - timedelta(seconds=settings.STATS_ROLLUP_INTERVAL)
+    changed = db.query(func.date(Order.created_at)).filter(Order.updated_at >= since).distinct().all()
+    days = {to_date(day) for (day,) in changed if day}
+    days.update({last.date(), today})
+    return sorted(days)
+
+
+async def refresh_daily_stats() -> int:
+    """
+    重新汇总有变动的日期（定时任务）
+
+    Returns:
+        重新汇总的天数
+    """
+    db = SessionLocal()
+    try:
+        refreshed_at = datetime.now()
+        days = _dirty_days(db)
+        for start, end in _date_ranges(days):
+            rebuild_daily_stats(db, start, end, refreshed_at)
+        db.commit()
+        return len(days)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
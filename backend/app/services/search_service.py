@@ -0,0 +1,261 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.group import Group
+from app.models.merchant import Merchant
+from app.models.product import Product
+from app.utils.pagination_utils import CursorPaginatedData, InvalidCursorError, decode_cursor, keyset_paginate_list
+from app.utils.search_utils import InvertedIndex
+
+logger = logging.getLogger(__name__)
+
+# 各模型的索引，字段权重：标题/名称3，其他文本1
+product_index = InvertedIndex({"name": 3, "description": 1})
+merchant_index = InvertedIndex({"name": 3, "description": 1, "address": 1})
+group_index = InvertedIndex({"title": 3, "description": 1})
+
+INDEXES: Dict[Any, InvertedIndex] = {
+    Product: product_index,
+    Merchant: merchant_index,
+    Group: group_index,
+}
+
+# 各索引最后一次同步的时间
+_synced_at: Dict[Any, datetime] = {}
+
+
+def _records(rows) -> Any:
+    for row in rows:
+        yield row[0], row._mapping
+
+
+def _index_query(db: Session, model: Any):
+    index = INDEXES[model]
+    return db.query(model.id, *[getattr(model, field) for field in index.fields])
+
+
+def index_objects(*objects: Any) -> None:
+    """
+    创建或更新后写入搜索索引，索引尚未构建时忽略（由全量构建收录）
+
+    Args:
+        *objects: 商品、商户或团购ORM对象
+    """
+    for obj in objects:
+        index = INDEXES.get(type(obj))
+        if index is not None and index.ready:
+            index.add(obj.id, {field: getattr(obj, field) for field in index.fields})
+
+
+def remove_objects(model: Any, *ids: int) -> None:
+    """
+    删除后从搜索索引中移除
+
+    Args:
+        model: 模型类
+        *ids: 记录ID
+    """
+    index = INDEXES[model]
+    for record_id in ids:
+        index.remove(record_id)
+
+
+def rebuild_index(db: Session, model: Any) -> int:
+    """
+    从数据库全量构建索引，流式读取，构建期间旧索引仍可查询
+
+    Args:
+        db: 数据库会话
+        model: 模型类
+
+    Returns:
+        索引的记录数
+    """
+    started = datetime.now()
+    rows = _index_query(db, model).yield_per(settings.SEARCH_INDEX_BATCH_SIZE)
+    count = INDEXES[model].rebuild(_records(rows))
+    _synced_at[model] = started
+    return count
+
+
+def sync_index(db: Session, model: Any) -> int:
+    """
+    增量同步最近更新的记录（包含其他进程中的修改）
+
+    Args:
+        db: 数据库会话
+        model: 模型类
+
+    Returns:
+        同步的记录数
+    """
+    started = datetime.now()
+    # 回退一个同步周期，避免事务提交晚于updated_at导致漏掉
+    since = _synced_at[model] - timedelta(seconds=settings.SEARCH_INDEX_REFRESH_INTERVAL)
+    index = INDEXES[model]
+    count = 0
+    for doc_id, record in _records(_index_query(db, model).filter(model.updated_at >= since)):
+        index.add(doc_id, record)
+        count += 1
+    _synced_at[model] = started
+    return count
+
+
+async def refresh_search_indexes() -> int:
+    """
+    刷新各搜索索引的定时任务：未构建的索引全量构建，已构建的增量同步
+
+    每个进程维护自己的索引，任务不需要租约
+
+    Returns:
+        写入索引的记录数
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        return 0
+    total = 0
+    with SessionLocal() as db:
+        for model, index in INDEXES.items():
+            if index.ready and model in _synced_at:
+                total += sync_index(db, model)
+            else:
+                count = rebuild_index(db, model)
+                logger.info(f"搜索索引 {model.__tablename__} 构建完成，共 {count} 条")
+                total += count
+    return total
+
+
+def search_ids(model: Any, keyword: str, limit: Optional[int] = None) -> Optional[List[Tuple[int, float]]]:
+    """
+    使用搜索索引查询关键词
+
+    最后一个词按前缀匹配（如iphone匹配iphone15），词中间的子串（如phone）不匹配
+
+    Args:
+        model: 模型类
+        keyword: 关键词
+        limit: 最多返回的记录数，默认返回全部命中，由调用方筛选后再分页
+
+    Returns:
+        [(ID, 相关度), ...]，按相关度降序；索引未启用或未构建时返回None，调用方回退到LIKE查询
+    """
+    index = INDEXES[model]
+    if not settings.SEARCH_INDEX_ENABLED or not index.ready:
+        return None
+    return index.search(keyword, limit, prefix=True)
+
+
+async def suggest(db: Session, kind: str, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    搜索框输入补全，最后一个词按前缀匹配
+
+    Args:
+        db: 数据库会话
+        kind: product、merchant或group
+        prefix: 已输入的文本
+        limit: 返回数量
+
+    Returns:
+        [{"id": ID, "name": 名称}, ...]，按相关度排序，只包含上架商品、正常商户和进行中的团购
+    """
+    model, name_column, visible = {
+        "product": (Product, Product.name, Product.status == 1),
+        "merchant": (Merchant, Merchant.name, Merchant.status == 1),
+        "group": (Group, Group.title, Group.status == 1),
+    }[kind]
+    index = INDEXES[model]
+    if not settings.SEARCH_INDEX_ENABLED or not index.ready:
+        return []
+    # 多取一些候选，过滤掉不可见的记录后仍能凑满
+    ranked = index.search(prefix, limit * 3, prefix=True)
+    if not ranked:
+        return []
+    names = dict(db.query(model.id, name_column).filter(model.id.in_([i for i, _ in ranked]), visible).all())
+    return [{"id": i, "name": names[i]} for i, _ in ranked if i in names][:limit]
+
+
+def filter_ranked(
+    query, id_column: Any, ranked: List[Tuple[int, float]], needed: Optional[int] = None
+) -> List[Tuple[int, float]]:
+    """
+    保留满足查询其他筛选条件的候选，顺序不变
+
+    按相关度顺序每次取SEARCH_ID_CHUNK_SIZE个候选执行一条IN查询
+
+    Args:
+        query: 已应用其他筛选条件的查询（不含关键词条件）
+        id_column: ID列
+        ranked: search_ids的返回值
+        needed: 凑够该数量后停止筛选，None表示筛选全部候选
+
+    Returns:
+        [(ID, 相关度), ...]
+    """
+    chunk_size = settings.SEARCH_ID_CHUNK_SIZE
+    result = []
+    for start in range(0, len(ranked), chunk_size):
+        chunk = ranked[start:start + chunk_size]
+        matched = {
+            row[0] for row in query.with_entities(id_column).filter(id_column.in_([i for i, _ in chunk])).all()
+        }
+        result.extend(item for item in chunk if item[0] in matched)
+        if needed is not None and len(result) >= needed:
+            break
+    return result
+
+
+def paginate_ranked(
+    query,
+    id_column: Any,
+    ranked: List[Tuple[int, float]],
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[int], int], CursorPaginatedData]:
+    """
+    按相关度分页，分页前先用查询的其他筛选条件过滤全部候选
+
+    游标分页且不需要总数时只筛选到本页为止
+
+    Args:
+        query: 已应用其他筛选条件的查询（不含关键词条件）
+        id_column: ID列
+        ranked: search_ids的返回值
+        skip: 跳过的记录数（cursor为None时）
+        limit: 每页数量
+        cursor: 游标，None表示使用skip分页
+        with_total: 游标分页时是否统计总数
+
+    Returns:
+        cursor为None时返回(本页ID列表, 总数)，否则返回items为本页ID列表的CursorPaginatedData
+
+    Raises:
+        InvalidCursorError: 游标无效或与排序方式不匹配
+    """
+    def key(item: Tuple[int, float]) -> List[Any]:
+        return [item[1], item[0]]
+
+    if cursor is None:
+        matched = filter_ranked(query, id_column, ranked)
+        return [i for i, _ in matched[skip:skip + limit]], len(matched)
+
+    if with_total:
+        page = keyset_paginate_list(filter_ranked(query, id_column, ranked), key, cursor, limit, True, True)
+    else:
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2:
+                raise InvalidCursorError("分页游标与排序方式不匹配")
+            try:
+                ranked = [item for item in ranked if key(item) < values]
+            except TypeError:
+                raise InvalidCursorError("分页游标与排序方式不匹配")
+        # 多筛选一条用于判断是否还有下一页
+        page = keyset_paginate_list(filter_ranked(query, id_column, ranked, limit + 1), key, None, limit)
+    page.items = [i for i, _ in page.items]
+    return page
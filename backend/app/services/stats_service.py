@@ -2,7 +2,7 @@ from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, desc, asc, text
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 
 from app.models.user import User
@@ -12,86 +12,79 @@ from app.models.group import Group
 from app.models.order import Order
 from app.models.review import Review
 from app.models.order import Order, OrderItem  # 添加OrderItem导入
+from app.models.stats import (
+    ORDER_STATUS_COLUMNS, GroupDailyStats, MerchantDailyStats, PlatformDailyStats, ProductDailyStats
+)
+from app.services import counter_service
+from app.utils.stats_utils import date_range
 
 
 async def get_admin_dashboard(db: Session) -> Dict:
-    """获取管理员仪表盘数据"""
-    # 用户总数
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    
-    # 商户总数
-    total_merchants = db.query(func.count(Merchant.id)).scalar() or 0
-    
-    # 订单总数
-    total_orders = db.query(func.count(Order.id)).scalar() or 0
-    
-    # 销售总额
-    total_sales = db.query(func.sum(Order.actual_amount)).filter(
-        Order.status.in_([1, 2, 3])  # 已支付、已发货、已完成
-    ).scalar() or 0
-    
-    # 今日数据
+    """
+    获取管理员仪表盘数据
+
+    全部读取每日统计汇总表（rollup_service定时维护），不扫描订单和用户表
+    """
     today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    # 今日新增用户
-    today_users = db.query(func.count(User.id)).filter(
-        User.created_at.between(today_start, today_end)
-    ).scalar() or 0
-    
-    # 今日新增商户
-    today_merchants = db.query(func.count(Merchant.id)).filter(
-        Merchant.created_at.between(today_start, today_end)
-    ).scalar() or 0
-    
-    # 今日订单数
-    today_orders = db.query(func.count(Order.id)).filter(
-        Order.created_at.between(today_start, today_end)
-    ).scalar() or 0
-    
-    # 今日销售额
-    today_sales = db.query(func.sum(Order.actual_amount)).filter(
-        Order.status.in_([1, 2, 3]),  # 已支付、已发货、已完成
-        Order.created_at.between(today_start, today_end)
-    ).scalar() or 0
+    days = date_range(today - timedelta(days=6), today)
+    
+    # 累计数据
+    totals = db.query(
+        func.sum(PlatformDailyStats.new_user_count),
+        func.sum(PlatformDailyStats.new_merchant_count),
+        func.sum(PlatformDailyStats.order_count),
+        func.sum(PlatformDailyStats.sales_amount)
+    ).one()
+    total_users, total_merchants, total_orders, total_sales = (value or 0 for value in totals)
+    
+    # 最近7天（含今日）
+    daily = {
+        row.stat_date: row for row in db.query(PlatformDailyStats).filter(
+            PlatformDailyStats.stat_date.between(days[0], today)
+        )
+    }
+    empty = PlatformDailyStats(
+        order_count=0, sales_amount=0, new_user_count=0, active_user_count=0, new_merchant_count=0
+    )
+    today_stats = daily.get(today, empty)
     
     # 销售趋势（最近7天）
-    sales_trend = []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = datetime.combine(day, datetime.max.time())
-        
-        day_orders = db.query(func.count(Order.id)).filter(
-            Order.created_at.between(day_start, day_end)
-        ).scalar() or 0
-        
-        day_sales = db.query(func.sum(Order.actual_amount)).filter(
-            Order.status.in_([1, 2, 3]),  # 已支付、已发货、已完成
-            Order.created_at.between(day_start, day_end)
-        ).scalar() or 0
-        
-        sales_trend.append({
+    sales_trend = [
+        {
             "date": day.strftime("%Y-%m-%d"),
-            "orders": day_orders,
-            "sales": float(day_sales)
+            "orders": daily.get(day, empty).order_count,
+            "sales": float(daily.get(day, empty).sales_amount)
+        } for day in days
+    ]
+    
+    # 用户趋势（最近7天），累计用户数从总数倒推
+    user_trend = []
+    total_user_count = total_users
+    for day in reversed(days):
+        stats = daily.get(day, empty)
+        user_trend.append({
+            "date": day.strftime("%Y-%m-%d"),
+            "new_user_count": stats.new_user_count,
+            "active_user_count": stats.active_user_count,
+            "total_user_count": total_user_count
         })
+        total_user_count -= stats.new_user_count
+    user_trend.reverse()
     
     # 热门商户
     top_merchants = db.query(
         Merchant.id,
         Merchant.name,
-        func.count(Order.id).label("order_count"),
-        func.sum(Order.actual_amount).label("sales_amount")
+        func.sum(MerchantDailyStats.sales_order_count).label("order_count"),
+        func.sum(MerchantDailyStats.sales_amount).label("sales_amount")
     ).join(
-        Order, Order.merchant_id == Merchant.id
+        MerchantDailyStats, MerchantDailyStats.merchant_id == Merchant.id
     ).filter(
-        Order.status.in_([1, 2, 3])  # 已支付、已发货、已完成
+        MerchantDailyStats.sales_order_count > 0
     ).group_by(
         Merchant.id
     ).order_by(
-        func.sum(Order.actual_amount).desc()
+        func.sum(MerchantDailyStats.sales_amount).desc()
     ).limit(5).all()
     
     # 热门商品
@@ -99,64 +92,31 @@ async def get_admin_dashboard(db: Session) -> Dict:
         Product.id,
         Product.name,
         Product.thumbnail,
-        func.count(OrderItem.id).label("sales_count"),
-        func.sum(OrderItem.subtotal).label("sales_amount")
-    ).join(
-        OrderItem, OrderItem.product_id == Product.id
+        func.sum(ProductDailyStats.sales_count).label("sales_count"),
+        func.sum(ProductDailyStats.sales_amount).label("sales_amount")
     ).join(
-        Order, Order.id == OrderItem.order_id
-    ).filter(
-        Order.status.in_([1, 2, 3])  # 已支付、已发货、已完成
+        ProductDailyStats, ProductDailyStats.product_id == Product.id
     ).group_by(
         Product.id
     ).order_by(
-        func.sum(OrderItem.subtotal).desc()
+        func.sum(ProductDailyStats.sales_amount).desc()
     ).limit(5).all()
     
-    # 用户趋势（最近7天）
-    user_trend = []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = datetime.combine(day, datetime.max.time())
-        
-        # 新增用户
-        new_users = db.query(func.count(User.id)).filter(
-            User.created_at.between(day_start, day_end)
-        ).scalar() or 0
-        
-        # 活跃用户（下单用户）
-        active_users = db.query(func.count(func.distinct(Order.user_id))).filter(
-            Order.created_at.between(day_start, day_end)
-        ).scalar() or 0
-        
-        # 累计用户
-        total_users_day = db.query(func.count(User.id)).filter(
-            User.created_at <= day_end
-        ).scalar() or 0
-        
-        user_trend.append({
-            "date": day.strftime("%Y-%m-%d"),
-            "new_user_count": new_users,
-            "active_user_count": active_users,
-            "total_user_count": total_users_day
-        })
-    
     return {
-        "total_users": total_users,
-        "total_merchants": total_merchants,
-        "total_orders": total_orders,
+        "total_users": int(total_users),
+        "total_merchants": int(total_merchants),
+        "total_orders": int(total_orders),
         "total_sales": float(total_sales),
-        "today_users": today_users,
-        "today_merchants": today_merchants,
-        "today_orders": today_orders,
-        "today_sales": float(today_sales),
+        "today_users": today_stats.new_user_count,
+        "today_merchants": today_stats.new_merchant_count,
+        "today_orders": today_stats.order_count,
+        "today_sales": float(today_stats.sales_amount),
         "sales_trend": sales_trend,
         "top_merchants": [
             {
                 "merchant_id": m.id,
                 "merchant_name": m.name,
-                "order_count": m.order_count,
+                "order_count": int(m.order_count or 0),
                 "sales_amount": float(m.sales_amount or 0)
             } for m in top_merchants
         ],
@@ -165,7 +125,7 @@ async def get_admin_dashboard(db: Session) -> Dict:
                 "product_id": p.id,
                 "product_name": p.name,
                 "product_image": p.thumbnail,
-                "sales_count": p.sales_count,
+                "sales_count": int(p.sales_count or 0),
                 "sales_amount": float(p.sales_amount or 0)
             } for p in top_products
         ],
@@ -174,141 +134,101 @@ async def get_admin_dashboard(db: Session) -> Dict:
 
 
 async def get_merchant_dashboard(db: Session, merchant_id: int) -> Dict:
-    """获取商户仪表盘数据"""
+    """
+    获取商户仪表盘数据
+
+    订单、销售、客户和状态统计读取每日统计汇总表（rollup_service定时维护）
+    """
     # 检查商户是否存在
     merchant = db.query(Merchant).filter(Merchant.id == merchant_id).first()
     if not merchant:
         raise HTTPException(status_code=404, detail="商户不存在")
     
-    # 销售总额
-    total_sales = db.query(func.sum(Order.actual_amount)).filter(
-        Order.merchant_id == merchant_id,
-        Order.status.in_([1, 2, 3])  # 已支付、已发货、已完成
-    ).scalar() or 0
-    
-    # 订单总数
-    total_orders = db.query(func.count(Order.id)).filter(
-        Order.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    # 商品总数
-    total_products = db.query(func.count(Product.id)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    # 客户总数
-    total_customers = db.query(func.count(func.distinct(Order.user_id))).filter(
-        Order.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    # 今日数据
     today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    # 今日销售额
-    today_sales = db.query(func.sum(Order.actual_amount)).filter(
-        Order.merchant_id == merchant_id,
-        Order.status.in_([1, 2, 3]),  # 已支付、已发货、已完成
-        Order.created_at.between(today_start, today_end)
-    ).scalar() or 0
+    days = date_range(today - timedelta(days=6), today)
+    
+    # 累计数据和订单状态统计
+    status_columns = [getattr(MerchantDailyStats, column) for column in ORDER_STATUS_COLUMNS.values()]
+    totals = db.query(
+        func.sum(MerchantDailyStats.sales_amount),
+        func.sum(MerchantDailyStats.order_count),
+        func.sum(MerchantDailyStats.new_customer_count),
+        *[func.sum(column) for column in status_columns]
+    ).filter(MerchantDailyStats.merchant_id == merchant_id).one()
+    total_sales, total_orders, total_customers = (value or 0 for value in totals[:3])
+    order_status_counts = {
+        str(order_status): int(count or 0) for order_status, count in zip(ORDER_STATUS_COLUMNS, totals[3:])
+    }
     
-    # 今日订单数
-    today_orders = db.query(func.count(Order.id)).filter(
-        Order.merchant_id == merchant_id,
-        Order.created_at.between(today_start, today_end)
-    ).scalar() or 0
+    # 商品总数；浏览量读取商户累计浏览量（counter_service维护），加上尚未写入数据库的增量
+    total_products = db.query(func.count(Product.id)).filter(Product.merchant_id == merchant_id).scalar()
+    total_views = (merchant.total_views or 0) + counter_service.get_pending("merchant", "views", [merchant_id])[merchant_id]
     
-    # 今日商品浏览量
-    today_views = db.query(func.sum(Product.views)).filter(
-        Product.merchant_id == merchant_id
-    ).scalar() or 0
-    
-    # 销售趋势（最近7天）
-    sales_trend = []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = datetime.combine(day, datetime.max.time())
-        
-        day_orders = db.query(func.count(Order.id)).filter(
-            Order.merchant_id == merchant_id,
-            Order.created_at.between(day_start, day_end)
-        ).scalar() or 0
-        
-        day_sales = db.query(func.sum(Order.actual_amount)).filter(
-            Order.merchant_id == merchant_id,
-            Order.status.in_([1, 2, 3]),  # 已支付、已发货、已完成
-            Order.created_at.between(day_start, day_end)
-        ).scalar() or 0
-        
-        sales_trend.append({
+    # 销售趋势（最近7天，含今日）
+    daily = {
+        row.stat_date: row for row in db.query(MerchantDailyStats).filter(
+            MerchantDailyStats.merchant_id == merchant_id,
+            MerchantDailyStats.stat_date.between(days[0], today)
+        )
+    }
+    empty = MerchantDailyStats(order_count=0, sales_amount=0)
+    sales_trend = [
+        {
             "date": day.strftime("%Y-%m-%d"),
-            "orders": day_orders,
-            "sales": float(day_sales)
-        })
+            "orders": daily.get(day, empty).order_count,
+            "sales": float(daily.get(day, empty).sales_amount)
+        } for day in days
+    ]
+    today_stats = daily.get(today, empty)
     
     # 热门商品
     top_products = db.query(
         Product.id,
         Product.name,
         Product.thumbnail,
-        func.count(OrderItem.id).label("sales_count"),
-        func.sum(OrderItem.subtotal).label("sales_amount")
+        func.sum(ProductDailyStats.sales_count).label("sales_count"),
+        func.sum(ProductDailyStats.sales_amount).label("sales_amount")
     ).join(
-        OrderItem, OrderItem.product_id == Product.id
-    ).join(
-        Order, Order.id == OrderItem.order_id
+        ProductDailyStats, ProductDailyStats.product_id == Product.id
     ).filter(
-        Product.merchant_id == merchant_id,
-        Order.status.in_([1, 2, 3])  # 已支付、已发货、已完成
+        ProductDailyStats.merchant_id == merchant_id
     ).group_by(
         Product.id
     ).order_by(
-        func.sum(OrderItem.subtotal).desc()
+        func.sum(ProductDailyStats.sales_amount).desc()
     ).limit(5).all()
     
     # 热门团购
     top_groups = db.query(
         Group.id,
         Group.title,
-        func.count(Order.id).label("order_count"),
-        func.sum(Order.actual_amount).label("sales_amount")
+        func.sum(GroupDailyStats.order_count).label("order_count"),
+        func.sum(GroupDailyStats.sales_amount).label("sales_amount")
     ).join(
-        Order, Order.group_id == Group.id
+        GroupDailyStats, GroupDailyStats.group_id == Group.id
     ).filter(
-        Group.merchant_id == merchant_id,
-        Order.status.in_([1, 2, 3])  # 已支付、已发货、已完成
+        GroupDailyStats.merchant_id == merchant_id
     ).group_by(
         Group.id
     ).order_by(
-        func.sum(Order.actual_amount).desc()
+        func.sum(GroupDailyStats.sales_amount).desc()
     ).limit(5).all()
     
-    # 订单状态统计
-    order_status_counts = {}
-    for status in range(6):  # 0-5
-        count = db.query(func.count(Order.id)).filter(
-            Order.merchant_id == merchant_id,
-            Order.status == status
-        ).scalar() or 0
-        order_status_counts[str(status)] = count
-    
     return {
         "total_sales": float(total_sales),
-        "total_orders": total_orders,
+        "total_orders": int(total_orders),
         "total_products": total_products,
-        "total_customers": total_customers,
-        "today_sales": float(today_sales),
-        "today_orders": today_orders,
-        "today_views": today_views,
+        "total_customers": int(total_customers),
+        "today_sales": float(today_stats.sales_amount),
+        "today_orders": today_stats.order_count,
+        "today_views": total_views,
         "sales_trend": sales_trend,
         "top_products": [
             {
                 "id": p.id,
                 "name": p.name,
                 "thumbnail": p.thumbnail,
-                "sales_count": p.sales_count,
+                "sales_count": int(p.sales_count or 0),
                 "sales_amount": float(p.sales_amount or 0)
             } for p in top_products
         ],
@@ -316,7 +236,7 @@ async def get_merchant_dashboard(db: Session, merchant_id: int) -> Dict:
             {
                 "id": g.id,
                 "title": g.title,
-                "order_count": g.order_count,
+                "order_count": int(g.order_count or 0),
                 "sales_amount": float(g.sales_amount or 0)
             } for g in top_groups
         ],
@@ -0,0 +1,234 @@
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.constants import CACHE_KEY_PREFIX, ORDER_PAY_TIMEOUT_MINUTES
+from app.core.redis import AsyncRedisClient, RedisClient
+from app.models.product import Product, ProductSpecification
+
+logger = logging.getLogger(__name__)
+
+# Redis库存计数器的过期时间与未支付订单超时时间一致，
+# 每个超时周期内至少从MySQL重新加载一次，修正计数器与数据库之间的偏差
+STOCK_COUNTER_EXPIRE = ORDER_PAY_TIMEOUT_MINUTES * 60
+
+# 未使用规格时计数器的字段名
+PRODUCT_FIELD = "0"
+
+# 原子预扣多个商品的库存：全部充足才扣减
+# 返回0表示成功，i表示第i项库存不足，-i表示第i项计数器未加载
+RESERVE_SCRIPT = """
+for i = 1, #KEYS do
+    local stock = redis.call('HGET', KEYS[i], ARGV[2 * i - 1])
+    if not stock then
+        return -i
+    end
+    if tonumber(stock) < tonumber(ARGV[2 * i]) then
+        return i
+    end
+end
+for i = 1, #KEYS do
+    redis.call('HINCRBY', KEYS[i], ARGV[2 * i - 1], -tonumber(ARGV[2 * i]))
+end
+return 0
+"""
+
+# 归还预扣的库存，计数器已过期的项由下次加载时从数据库读取
+RESTORE_SCRIPT = """
+for i = 1, #KEYS do
+    if redis.call('HEXISTS', KEYS[i], ARGV[2 * i - 1]) == 1 then
+        redis.call('HINCRBY', KEYS[i], ARGV[2 * i - 1], ARGV[2 * i])
+    end
+end
+return 0
+"""
+
+# 从数据库加载计数器，已存在时不覆盖
+LOAD_SCRIPT = """
+if redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 1 and redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 0
+"""
+
+
+class StockItem(NamedTuple):
+    """库存预占项"""
+    product_id: int
+    specification_id: Optional[int]
+    quantity: int
+
+
+def merge_stock_items(items: Iterable[StockItem]) -> List[StockItem]:
+    """
+    合并同一商品规格的预占项，并按(商品ID, 规格ID)排序
+
+    固定的加锁顺序可以避免并发下单时多行更新互相等待导致死锁
+
+    Args:
+        items: 预占项列表
+
+    Returns:
+        合并排序后的预占项列表
+    """
+    merged: Dict[Tuple[int, Optional[int]], int] = {}
+    for item in items:
+        key = (item.product_id, item.specification_id)
+        merged[key] = merged.get(key, 0) + item.quantity
+    return [
+        StockItem(product_id, specification_id, quantity)
+        for (product_id, specification_id), quantity in sorted(merged.items(), key=lambda kv: (kv[0][0], kv[0][1] or 0))
+    ]
+
+
+def _counter_key(item: StockItem) -> str:
+    return f"{CACHE_KEY_PREFIX['stock']}{item.product_id}"
+
+
+def _counter_field(item: StockItem) -> str:
+    return str(item.specification_id) if item.specification_id else PRODUCT_FIELD
+
+
+def _script_args(items: List[StockItem], sign: int = 1) -> Tuple[List[str], List[int]]:
+    keys, args = [], []
+    for item in items:
+        keys.append(_counter_key(item))
+        args.extend([_counter_field(item), sign * item.quantity])
+    return keys, args
+
+
+def _load_counter(db: Session, item: StockItem) -> None:
+    """从数据库加载商品（规格）库存到Redis计数器"""
+    if item.specification_id:
+        stock = db.query(ProductSpecification.stock).filter(
+            ProductSpecification.id == item.specification_id
+        ).scalar()
+    else:
+        stock = db.query(Product.stock).filter(Product.id == item.product_id).scalar()
+
+    RedisClient.get_client().eval(
+        LOAD_SCRIPT, 1, _counter_key(item), _counter_field(item), int(stock or 0), STOCK_COUNTER_EXPIRE
+    )
+
+
+def _pre_deduct(db: Session, items: List[StockItem]) -> Optional[int]:
+    """
+    在Redis中预扣库存
+
+    Returns:
+        None表示预扣成功或Redis不可用（退回数据库扣减），否则返回库存不足项的下标
+    """
+    keys, args = _script_args(items)
+    client = RedisClient.get_client()
+    try:
+        # 计数器未加载时加载后重试，每项最多加载一次
+        for _ in range(len(items) + 1):
+            result = int(client.eval(RESERVE_SCRIPT, len(keys), *keys, *args))
+            if result == 0:
+                return None
+            if result > 0:
+                return result - 1
+            _load_counter(db, items[-result - 1])
+    except Exception as e:
+        logger.error(f"Redis预扣库存失败，使用数据库扣减: {e}")
+    return None
+
+
+def restore_stock_counters(items: List[StockItem]) -> None:
+    """
+    归还Redis中预扣的库存（数据库扣减失败或事务回滚时调用）
+
+    Args:
+        items: 已预扣的库存项
+    """
+    if not settings.STOCK_REDIS_ENABLED or not items:
+        return
+    keys, args = _script_args(items)
+    try:
+        RedisClient.get_client().eval(RESTORE_SCRIPT, len(keys), *keys, *args)
+    except Exception as e:
+        logger.error(f"Redis归还库存失败: {e}")
+
+
+def invalidate_stock_counter(product_id: int) -> None:
+    """
+    删除商品的Redis库存计数器（商户修改库存或规格后调用），下次下单时从数据库重新加载
+
+    Args:
+        product_id: 商品ID
+    """
+    if not settings.STOCK_REDIS_ENABLED:
+        return
+    RedisClient.delete(f"{CACHE_KEY_PREFIX['stock']}{product_id}")
+
+
+async def ainvalidate_stock_counter(product_id: int) -> None:
+    """invalidate_stock_counter的异步版本，在异步服务中使用"""
+    if not settings.STOCK_REDIS_ENABLED:
+        return
+    await AsyncRedisClient.delete(f"{CACHE_KEY_PREFIX['stock']}{product_id}")
+
+
+def _deduct(db: Session, item: StockItem) -> bool:
+    """条件扣减数据库库存: UPDATE ... SET stock = stock - qty WHERE stock >= qty"""
+    if item.specification_id:
+        updated = db.query(ProductSpecification).filter(
+            ProductSpecification.id == item.specification_id,
+            ProductSpecification.stock >= item.quantity
+        ).update({ProductSpecification.stock: ProductSpecification.stock - item.quantity}, synchronize_session=False)
+    else:
+        updated = db.query(Product).filter(
+            Product.id == item.product_id,
+            Product.stock >= item.quantity
+        ).update({Product.stock: Product.stock - item.quantity}, synchronize_session=False)
+    return updated == 1
+
+
+def reserve_stock(db: Session, items: List[StockItem]) -> Optional[StockItem]:
+    """
+    预占订单库存
+
+    启用Redis预扣时先在Redis中原子扣减，库存不足的请求直接返回，不再争抢数据库行锁；
+    之后在数据库中条件扣减，数据库库存始终是最终依据。
+    本函数不提交事务，调用方提交失败时需回滚事务并调用restore_stock_counters
+
+    Args:
+        db: 数据库会话
+        items: 预占项列表（已通过merge_stock_items合并排序）
+
+    Returns:
+        全部预占成功返回None，否则返回库存不足的预占项（已扣减的数据库库存需由调用方回滚事务）
+    """
+    if settings.STOCK_REDIS_ENABLED:
+        short = _pre_deduct(db, items)
+        if short is not None:
+            return items[short]
+
+    for item in items:
+        if not _deduct(db, item):
+            restore_stock_counters(items)
+            return item
+    return None
+
+
+def release_stock(db: Session, items: List[StockItem]) -> None:
+    """
+    归还订单占用的库存（订单取消、超时、退款时调用），不提交事务
+
+    Args:
+        db: 数据库会话
+        items: 归还项列表
+    """
+    items = merge_stock_items(items)
+    for item in items:
+        if item.specification_id:
+            db.query(ProductSpecification).filter(
+                ProductSpecification.id == item.specification_id
+            ).update({ProductSpecification.stock: ProductSpecification.stock + item.quantity}, synchronize_session=False)
+        else:
+            db.query(Product).filter(
+                Product.id == item.product_id
+            ).update({Product.stock: Product.stock + item.quantity}, synchronize_session=False)
+    restore_stock_counters(items)
@@ -3,11 +3,10 @@ from typing import Dict, List, Optional, Tuple, Union
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import func
 
-from app.core.constants import CACHE_EXPIRE_TIME, CACHE_KEY_PREFIX
+from app.core.principal import ainvalidate_user_principal, cache_user_principal
 from app.core.security import create_access_token, verify_password, get_password_hash
-from app.core.redis import RedisClient
 from app.crud import crud_user, crud_address
 from app.models.user import User, Address, Favorite
 from app.models.order import Order
@@ -103,16 +102,8 @@ async def login_or_create_user(
         expires_in=60 * 60 * 24 * 7  # 7天(秒)
     )
     
-    # 缓存用户信息
-    cache_key = f"{CACHE_KEY_PREFIX['user']}{user.id}"
-    RedisClient.set(cache_key, {
-        "id": user.id,
-        "open_id": user.open_id,
-        "nickname": user.nickname,
-        "is_active": user.is_active,
-        "is_admin": user.is_admin,
-        "merchant_id": user.merchant_id
-    }, CACHE_EXPIRE_TIME["user"])
+    # 缓存用户身份快照
+    cache_user_principal(user)
     
     return user, is_new_user, token
 
@@ -250,8 +241,7 @@ async def update_user_profile(db: Session, user_id: int, user_data: UserUpdate)
     updated_user = crud_user.update(db, db_obj=user, obj_in=user_data)
     
     # 更新缓存
-    cache_key = f"{CACHE_KEY_PREFIX['user']}{user_id}"
-    RedisClient.delete(cache_key)
+    await ainvalidate_user_principal(user_id)
     
     return updated_user
 
@@ -424,8 +414,7 @@ async def bind_phone(db: Session, user_id: int, phone: str) -> User:
     db.refresh(user)
     
     # 更新缓存
-    cache_key = f"{CACHE_KEY_PREFIX['user']}{user_id}"
-    RedisClient.delete(cache_key)
+    await ainvalidate_user_principal(user_id)
     
     return user
 
@@ -445,7 +434,6 @@ async def unbind_phone(db: Session, user_id: int) -> User:
     db.refresh(user)
     
     # 更新缓存
-    cache_key = f"{CACHE_KEY_PREFIX['user']}{user_id}"
-    RedisClient.delete(cache_key)
+    await ainvalidate_user_principal(user_id)
     
     return user
\ No newline at end of file
@@ -2,11 +2,12 @@ import json
 import time
 from typing import Dict, Optional, Tuple, Any
 
-import requests
+import httpx
 from fastapi import HTTPException
 
 from app.core.config import settings
-from app.core.redis import RedisClient
+from app.core.http_client import HttpClient
+from app.core.redis import AsyncRedisClient
 from app.core.constants import CACHE_KEY_PREFIX, CACHE_EXPIRE_TIME
 
 
@@ -19,7 +20,7 @@ async def get_access_token() -> str:
     """
     # 先从缓存获取
     cache_key = f"{CACHE_KEY_PREFIX['wechat']}access_token"
-    access_token = RedisClient.get(cache_key)
+    access_token = await AsyncRedisClient.get(cache_key)
     
     if access_token:
         return access_token
@@ -27,7 +28,7 @@ async def get_access_token() -> str:
     # 缓存不存在，从微信服务器获取
     try:
         url = f"https://api.weixin.qq.com/cgi-bin/token?grant_type=client_credential&appid={settings.WECHAT_APPID}&secret={settings.WECHAT_SECRET}"
-        response = requests.get(url)
+        response = await HttpClient.get(url)
         data = response.json()
         
         if "access_token" in data:
@@ -35,13 +36,13 @@ async def get_access_token() -> str:
             expires_in = data.get("expires_in", 7200)
             
             # 缓存access_token，过期时间比实际少5分钟，确保安全
-            RedisClient.set(cache_key, access_token, expires_in - 300)
+            await AsyncRedisClient.set(cache_key, access_token, expires_in - 300)
             
             return access_token
         else:
             raise HTTPException(status_code=400, detail=f"获取access_token失败: {data.get('errmsg')}")
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"获取access_token请求异常: {str(e)}")
 
 
@@ -57,7 +58,7 @@ async def code2session(code: str) -> Dict[str, str]:
     """
     try:
         url = f"https://api.weixin.qq.com/sns/jscode2session?appid={settings.WECHAT_APPID}&secret={settings.WECHAT_SECRET}&js_code={code}&grant_type=authorization_code"
-        response = requests.get(url)
+        response = await HttpClient.get(url)
         data = response.json()
         
         if "openid" in data:
@@ -69,7 +70,7 @@ async def code2session(code: str) -> Dict[str, str]:
         else:
             raise HTTPException(status_code=400, detail=f"小程序登录失败: {data.get('errmsg')}")
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"小程序登录请求异常: {str(e)}")
 
 
@@ -150,7 +151,7 @@ async def send_subscribe_message(
         params["page"] = page
     
     try:
-        response = requests.post(url, json=params)
+        response = await HttpClient.post(url, json=params)
         result = response.json()
         
         if result.get("errcode") != 0:
@@ -158,7 +159,7 @@ async def send_subscribe_message(
         
         return result
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"发送订阅消息请求异常: {str(e)}")
 
 
@@ -186,7 +187,7 @@ async def get_wx_qrcode(
     }
     
     try:
-        response = requests.post(url, json=params)
+        response = await HttpClient.post(url, json=params)
         
         # 判断返回是否为JSON（错误情况）
         if response.headers.get("Content-Type", "").startswith("application/json"):
@@ -196,7 +197,7 @@ async def get_wx_qrcode(
         # 返回二进制数据
         return response.content
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"获取小程序码请求异常: {str(e)}")
 
 
@@ -219,7 +220,7 @@ async def check_message_security(content: str) -> bool:
     }
     
     try:
-        response = requests.post(url, json=params)
+        response = await HttpClient.post(url, json=params)
         result = response.json()
         
         if result.get("errcode") == 0:
@@ -231,7 +232,7 @@ async def check_message_security(content: str) -> bool:
             # 其他错误
             raise HTTPException(status_code=400, detail=f"内容安全检查失败: {result.get('errmsg')}")
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"内容安全检查请求异常: {str(e)}")
 
 
@@ -256,7 +257,7 @@ async def check_image_security(image_data: bytes) -> bool:
     }
     
     try:
-        response = requests.post(url, files=files)
+        response = await HttpClient.post(url, files=files)
         result = response.json()
         
         if result.get("errcode") == 0:
@@ -268,5 +269,5 @@ async def check_image_security(image_data: bytes) -> bool:
             # 其他错误
             raise HTTPException(status_code=400, detail=f"图片安全检查失败: {result.get('errmsg')}")
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"图片安全检查请求异常: {str(e)}")
\ No newline at end of file
@@ -1,9 +1,17 @@
-import time
+import asyncio
+import hashlib
+import inspect
 import json
+import logging
+import math
 import pickle
-import hashlib
-from typing import Any, Dict, List, Optional, Tuple, Union, Callable
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 try:
     import redis
@@ -11,163 +19,873 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
 
-# 内存缓存
-_local_cache: Dict[str, Tuple[Any, float, Optional[float]]] = {}  # key -> (value, timestamp, ttl)
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.constants import CACHE_KEY_PREFIX
+from app.core.utils import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# 缓存未命中标记（缓存值本身可能为None）
+MISSING = object()
+
 
 def cache_key(*args: Any, **kwargs: Any) -> str:
     """
     生成缓存键
-    
+
     Args:
         *args: 位置参数
         **kwargs: 关键字参数
-        
+
     Returns:
         缓存键
     """
     # 将参数转换为字符串
     key_parts = []
-    
+
     # 添加位置参数
     for arg in args:
         key_parts.append(str(arg))
-    
+
     # 添加关键字参数（按键排序）
     for k in sorted(kwargs.keys()):
         key_parts.append(f"{k}={kwargs[k]}")
-    
+
     # 生成键
     key = ":".join(key_parts)
-    
+
     # 如果键太长，使用哈希值
     if len(key) > 100:
         key = hashlib.md5(key.encode()).hexdigest()
-    
+
     return key
 
+
+def _estimate_size(value: Any) -> int:
+    """估算缓存值占用的内存(字节)"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class CacheStats:
+    """缓存命中统计"""
+
+    FIELDS = ("l1_hits", "l2_hits", "misses", "loads", "early_refreshes", "coalesced",
+              "evictions", "expirations", "invalidations", "l2_errors")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        # 缓存实例在线程池和事件循环之间共享，计数需要加锁
+        self._lock = threading.Lock()
+
+    def incr(self, field: str, amount: int = 1) -> None:
+        """计数加一"""
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {field: getattr(self, field) for field in self.FIELDS}
+        lookups = result["l1_hits"] + result["l2_hits"] + result["misses"]
+        result["hit_rate"] = round((result["l1_hits"] + result["l2_hits"]) / lookups, 4) if lookups else None
+        return result
+
+
+class CacheEntry:
+    """缓存条目"""
+    __slots__ = ("value", "expires_at", "tags", "delta", "size")
+
+    def __init__(self, value: Any, expires_at: Optional[float], tags: Dict[str, int], delta: float, size: int = 0):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+        self.delta = delta  # 重新计算该值的耗时(秒)，用于提前刷新
+        self.size = size
+
+
+class LRUCache:
+    """
+    按条目数和内存占用限制的进程内LRU缓存
+
+    超过任一限制时淘汰最久未使用的条目，过期条目在读取时删除
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, stats: Optional[CacheStats] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = stats or CacheStats()
+        self.size_bytes = 0
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= time.time():
+                self._remove(key)
+                self.stats.incr("expirations")
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        entry.size = _estimate_size(entry.value)
+        if entry.size > self.max_bytes:
+            # 单个值超过内存上限时不缓存
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = entry
+            self.size_bytes += entry.size
+            while len(self._data) > self.max_entries or self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.stats.incr("evictions")
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key: str) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self.size_bytes -= entry.size
+        return True
+
+
+class TwoTierCache:
+    """
+    两级缓存：进程内LRU（L1）+ Redis（L2）
+
+    - 标签失效：每个标签有版本号（保存在Redis中），条目记录写入时的标签版本，版本变化后条目失效；
+      本进程的失效立即生效，其他进程在CACHE_TAG_VERSION_TTL秒内感知
+    - 防击穿：get_or_load对同一个键只执行一次加载，并按加载耗时概率性提前刷新
+    - Redis出错后暂停使用L2一段时间，避免每次请求都等待连接超时
+
+    L2使用JSON序列化，日期时间会被转换为字符串
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        use_redis: bool = True
+    ):
+        self.name = name
+        self.stats = CacheStats()
+        self.l1 = LRUCache(
+            max_entries or settings.CACHE_L1_MAX_ENTRIES,
+            max_bytes or settings.CACHE_L1_MAX_BYTES,
+            self.stats
+        )
+        self.use_redis = use_redis and REDIS_AVAILABLE
+        self._l2_disabled_until = 0.0
+        self._versions: Dict[str, Tuple[int, float]] = {}  # 标签 -> (版本号, 同步时间)
+        self._changed_at: Dict[str, float] = {}  # 标签 -> 本进程最近一次发现版本变化的时间
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    # ---------- Redis ----------
+
+    def _redis_key(self, key: str) -> str:
+        return f"{CACHE_KEY_PREFIX['cache']}{self.name}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{CACHE_KEY_PREFIX['cache']}{self.name}:tag:{tag}"
+
+    def _l2_available(self) -> bool:
+        return self.use_redis and settings.CACHE_L2_ENABLED and time.time() >= self._l2_disabled_until
+
+    def _redis(self) -> Optional[Any]:
+        """同步Redis客户端（同步代码、定时任务和脚本使用）"""
+        if not self._l2_available():
+            return None
+        from app.core.redis import RedisClient
+        return RedisClient.get_client()
+
+    def _aredis(self) -> Optional[Any]:
+        """当前事件循环的异步Redis客户端"""
+        if not self._l2_available():
+            return None
+        from app.core.redis import AsyncRedisClient
+        return AsyncRedisClient.get_client()
+
+    def _l2_failed(self, e: Exception) -> None:
+        self.stats.incr("l2_errors")
+        self._l2_disabled_until = time.time() + settings.CACHE_L2_RETRY_INTERVAL
+        logger.error(f"Redis缓存不可用，{settings.CACHE_L2_RETRY_INTERVAL}秒内仅使用本地缓存: {e}")
+
+    # ---------- 标签版本 ----------
+
+    def _stale_tags(self, tags: Sequence[str], now: float) -> List[str]:
+        """本地记录超过同步间隔、需要从Redis读取的标签"""
+        return [
+            tag for tag in tags
+            if tag not in self._versions or now - self._versions[tag][1] > settings.CACHE_TAG_VERSION_TTL
+        ]
+
+    def _set_version(self, tag: str, version: int, now: float) -> None:
+        previous = self._versions.get(tag)
+        if previous is not None and previous[0] != version:
+            self._changed_at[tag] = now
+        self._versions[tag] = (version, now)
+
+    def _merge_versions(self, tags: Sequence[str], stale: Sequence[str], values: Sequence[Any], now: float) -> Dict[str, int]:
+        for tag, value in zip(stale, values):
+            self._set_version(tag, int(value or 0), now)
+        return {tag: self._versions.get(tag, (0, now))[0] for tag in tags}
+
+    def _current_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """获取标签当前版本，本地记录超过同步间隔时从Redis批量读取"""
+        tags = list(tags)
+        if not tags:
+            return {}
+        now = time.time()
+        client = self._redis()
+        stale = self._stale_tags(tags, now) if client is not None else []
+        values: List[Any] = []
+        if stale:
+            try:
+                values = client.mget([self._tag_key(tag) for tag in stale])
+            except Exception as e:
+                self._l2_failed(e)
+        return self._merge_versions(tags, stale, values, now)
+
+    async def _acurrent_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """_current_versions的异步版本"""
+        tags = list(tags)
+        if not tags:
+            return {}
+        now = time.time()
+        client = self._aredis()
+        stale = self._stale_tags(tags, now) if client is not None else []
+        values: List[Any] = []
+        if stale:
+            try:
+                values = await client.mget([self._tag_key(tag) for tag in stale])
+            except Exception as e:
+                self._l2_failed(e)
+        return self._merge_versions(tags, stale, values, now)
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """
+        按标签使缓存失效
+
+        Args:
+            *tags: 标签
+        """
+        if not tags:
+            return
+        self.stats.incr("invalidations")
+        versions = None
+        client = self._redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline()
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                versions = pipe.execute()
+            except Exception as e:
+                self._l2_failed(e)
+        self._record_invalidation(tags, versions)
+
+    async def ainvalidate_tags(self, *tags: str) -> None:
+        """invalidate_tags的异步版本，通过异步客户端更新Redis中的标签版本"""
+        if not tags:
+            return
+        self.stats.incr("invalidations")
+        versions = None
+        client = self._aredis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for tag in tags:
+                        pipe.incr(self._tag_key(tag))
+                    versions = await pipe.execute()
+            except Exception as e:
+                self._l2_failed(e)
+        self._record_invalidation(tags, versions)
+
+    def _record_invalidation(self, tags: Sequence[str], versions: Optional[Sequence[Any]]) -> None:
+        """记录失效后的标签版本，Redis不可用时在本地递增"""
+        now = time.time()
+        for i, tag in enumerate(tags):
+            version = int(versions[i]) if versions is not None else self._versions.get(tag, (0, now))[0] + 1
+            self._set_version(tag, version, now)
+            self._changed_at[tag] = now
+
+    def _changed_since(self, tags: Iterable[str], since: float) -> bool:
+        """标签在since之后是否（在本进程已知范围内）发生过变化"""
+        return any(self._changed_at.get(tag, 0.0) >= since for tag in tags)
+
+    # ---------- 读写 ----------
+
+    def _l1_entry(self, key: str, versions: Dict[str, int], entry: CacheEntry) -> Optional[CacheEntry]:
+        if versions == entry.tags:
+            self.stats.incr("l1_hits")
+            return entry
+        self.l1.delete(key)
+        return None
+
+    @staticmethod
+    def _decode(raw: Any) -> CacheEntry:
+        data = json.loads(raw)
+        return CacheEntry(data["v"], data.get("e"), data.get("t") or {}, data.get("d", 0.0))
+
+    def _l2_entry(self, key: str, versions: Dict[str, int], entry: CacheEntry) -> Optional[CacheEntry]:
+        if versions == entry.tags:
+            self.stats.incr("l2_hits")
+            self.l1.set(key, entry)
+            return entry
+        return None
+
+    def _get_entry(self, key: str) -> Optional[CacheEntry]:
+        entry = self.l1.get(key)
+        if entry is not None:
+            entry = self._l1_entry(key, self._current_versions(entry.tags), entry)
+            if entry is not None:
+                return entry
+
+        client = self._redis()
+        if client is not None:
+            try:
+                raw = client.get(self._redis_key(key))
+            except Exception as e:
+                self._l2_failed(e)
+                raw = None
+            if raw is not None:
+                entry = self._decode(raw)
+                entry = self._l2_entry(key, self._current_versions(entry.tags), entry)
+                if entry is not None:
+                    return entry
+
+        self.stats.incr("misses")
+        return None
+
+    async def _aget_entry(self, key: str) -> Optional[CacheEntry]:
+        """_get_entry的异步版本，通过异步客户端访问L2"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            entry = self._l1_entry(key, await self._acurrent_versions(entry.tags), entry)
+            if entry is not None:
+                return entry
+
+        client = self._aredis()
+        if client is not None:
+            try:
+                raw = await client.get(self._redis_key(key))
+            except Exception as e:
+                self._l2_failed(e)
+                raw = None
+            if raw is not None:
+                entry = self._decode(raw)
+                entry = self._l2_entry(key, await self._acurrent_versions(entry.tags), entry)
+                if entry is not None:
+                    return entry
+
+        self.stats.incr("misses")
+        return None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+            default: 未命中时的返回值
+
+        Returns:
+            缓存值
+        """
+        entry = self._get_entry(key)
+        return default if entry is None else entry.value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = (),
+        delta: float = 0.0,
+        local_only: bool = False,
+        versions: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        设置缓存值
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间(秒)，None表示不过期（L2仍使用默认过期时间）
+            tags: 标签，用于批量失效
+            delta: 计算该值的耗时(秒)
+            local_only: 只写入L1
+            versions: 计算该值之前读取的标签版本，默认读取当前版本；
+                计算期间标签被失效时，条目记录的旧版本会使其在下次读取时失效
+        """
+        expires_at = time.time() + ttl if ttl else None
+        if versions is None:
+            versions = self._current_versions(tags)
+        entry = CacheEntry(value, expires_at, versions, delta)
+        self.l1.set(key, entry)
+
+        client = None if local_only else self._redis()
+        payload = self._encode(entry) if client is not None else None
+        if payload is None:
+            return
+        try:
+            client.set(self._redis_key(key), payload, ex=ttl or settings.CACHE_L2_DEFAULT_TTL)
+        except Exception as e:
+            self._l2_failed(e)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """get的异步版本，在事件循环中使用，不阻塞其他请求"""
+        entry = await self._aget_entry(key)
+        return default if entry is None else entry.value
+
+    async def aset(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Sequence[str] = (),
+        delta: float = 0.0,
+        local_only: bool = False,
+        versions: Optional[Dict[str, int]] = None
+    ) -> None:
+        """set的异步版本，参数相同"""
+        expires_at = time.time() + ttl if ttl else None
+        if versions is None:
+            versions = await self._acurrent_versions(tags)
+        entry = CacheEntry(value, expires_at, versions, delta)
+        self.l1.set(key, entry)
+
+        client = None if local_only else self._aredis()
+        payload = self._encode(entry) if client is not None else None
+        if payload is None:
+            return
+        try:
+            await client.set(self._redis_key(key), payload, ex=ttl or settings.CACHE_L2_DEFAULT_TTL)
+        except Exception as e:
+            self._l2_failed(e)
+
+    @staticmethod
+    def _encode(entry: CacheEntry) -> Optional[str]:
+        try:
+            return json.dumps(
+                {"v": entry.value, "e": entry.expires_at, "t": entry.tags, "d": entry.delta},
+                ensure_ascii=False, cls=JSONEncoder
+            )
+        except (TypeError, ValueError):
+            # 无法序列化的值只缓存在本地
+            return None
+
+    def delete(self, key: str) -> None:
+        """删除缓存值"""
+        self.l1.delete(key)
+        client = self._redis()
+        if client is not None:
+            try:
+                client.delete(self._redis_key(key))
+            except Exception as e:
+                self._l2_failed(e)
+
+    async def adelete(self, key: str) -> None:
+        """delete的异步版本"""
+        self.l1.delete(key)
+        client = self._aredis()
+        if client is not None:
+            try:
+                await client.delete(self._redis_key(key))
+            except Exception as e:
+                self._l2_failed(e)
+
+    def clear_local(self) -> None:
+        """清空本进程的L1缓存"""
+        self.l1.clear()
+        self._versions.clear()
+        self._changed_at.clear()
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Union[Sequence[str], Callable[[Any], Sequence[str]]] = (),
+        beta: float = 1.0
+    ) -> Any:
+        """
+        获取缓存值，未命中时调用loader加载并写入缓存
+
+        同一事件循环内对同一个键的并发未命中只调用一次loader；
+        临近过期时按 XFetch 算法（剩余时间 < 加载耗时 * beta * -ln(rand)）由单个请求提前刷新，
+        其他请求继续使用旧值
+
+        Args:
+            key: 缓存键
+            loader: 无参异步加载函数
+            ttl: 过期时间(秒)
+            tags: 标签，也可以是根据加载结果返回标签的函数
+            beta: 提前刷新系数，越大越早刷新，0表示不提前刷新
+
+        Returns:
+            缓存值
+        """
+        entry = await self._aget_entry(key)
+        inflight_key = (id(asyncio.get_running_loop()), key)
+        if entry is not None:
+            early = (
+                beta > 0 and entry.expires_at is not None and entry.delta > 0
+                and time.time() - entry.delta * beta * math.log(random.random() or 1e-12) >= entry.expires_at
+            )
+            if not early or inflight_key in self._inflight:
+                return entry.value
+            self.stats.incr("early_refreshes")
+
+        future = self._inflight.get(inflight_key)
+        if future is not None:
+            self.stats.incr("coalesced")
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        try:
+            # 标签版本在加载前读取，加载期间发生的失效会使写入的条目直接过时
+            started_at = time.time()
+            versions = None if callable(tags) else await self._acurrent_versions(tags)
+            start = time.perf_counter()
+            value = await loader()
+            self.stats.incr("loads")
+            delta = time.perf_counter() - start
+            if callable(tags):
+                # 标签由加载结果决定时无法预先读取版本，加载期间标签变化过则不写入
+                tags = tags(value)
+                versions = await self._acurrent_versions(tags)
+                if not self._changed_since(tags, started_at):
+                    await self.aset(key, value, ttl, tags, delta, versions=versions)
+            else:
+                await self.aset(key, value, ttl, tags, delta, versions=versions)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            if entry is not None:
+                # 提前刷新失败时继续使用旧值
+                logger.error(f"缓存 {key} 提前刷新失败: {e}")
+                future.set_result(entry.value)
+                return entry.value
+            future.set_exception(e)
+            # 没有等待者时避免"异常未被获取"警告
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            统计数据
+        """
+        return {
+            "name": self.name,
+            "l1_entries": len(self.l1),
+            "l1_bytes": self.l1.size_bytes,
+            "l2_enabled": self._redis() is not None,
+            **self.stats.to_dict(),
+        }
+
+
+# 默认缓存（L1 + Redis）和仅本地缓存
+default_cache = TwoTierCache("default")
+local_cache = TwoTierCache("local", use_redis=False)
+
+
+def _format_tags(tags: Union[Sequence[str], Callable[..., Sequence[str]]], arguments: Dict[str, Any]) -> List[str]:
+    if callable(tags):
+        return list(tags(**arguments))
+    return [tag.format(**arguments) for tag in tags]
+
+
+def cached(
+    ttl: Optional[int] = None,
+    namespace: Optional[str] = None,
+    tags: Union[Sequence[str], Callable[..., Sequence[str]]] = (),
+    ignore: Sequence[str] = ("db",),
+    cache: Optional[TwoTierCache] = None,
+    beta: float = 1.0
+):
+    """
+    缓存装饰器，支持同步和异步函数
+
+    Args:
+        ttl: 过期时间(秒)
+        namespace: 缓存键前缀，默认使用函数的模块名和名称
+        tags: 标签列表，可使用参数占位符如 "product:{product_id}"，也可以是根据参数返回标签的函数
+        ignore: 不参与缓存键的参数名（如数据库会话）
+        cache: 缓存实例，默认default_cache
+        beta: 提前刷新系数（仅异步函数）
+
+    Returns:
+        装饰器函数
+
+    被装饰的函数增加以下方法:
+        invalidate(*args, **kwargs): 删除指定参数的缓存
+        invalidate_all(): 使该函数的全部缓存失效
+    """
+    def decorator(func: Callable):
+        store = cache or default_cache
+        base = namespace or f"{func.__module__}.{func.__qualname__}"
+        function_tag = f"fn:{base}"
+        signature = inspect.signature(func)
+
+        def bind(args: Tuple, kwargs: Dict) -> Dict[str, Any]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+
+        def build_key(arguments: Dict[str, Any]) -> str:
+            key_arguments = {name: value for name, value in arguments.items() if name not in ignore}
+            return f"{base}:{cache_key(**key_arguments)}"
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                arguments = bind(args, kwargs)
+                return await store.get_or_load(
+                    build_key(arguments),
+                    lambda: func(*args, **kwargs),
+                    ttl,
+                    [function_tag] + _format_tags(tags, arguments),
+                    beta
+                )
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                arguments = bind(args, kwargs)
+                key = build_key(arguments)
+                value = store.get(key, MISSING)
+                if value is MISSING:
+                    key_tags = [function_tag] + _format_tags(tags, arguments)
+                    versions = store._current_versions(key_tags)
+                    start = time.perf_counter()
+                    value = func(*args, **kwargs)
+                    store.stats.incr("loads")
+                    store.set(key, value, ttl, key_tags, time.perf_counter() - start, versions=versions)
+                return value
+
+        def invalidate(*args, **kwargs) -> None:
+            # 未传入的被忽略参数（如db）用None占位
+            for name in ignore:
+                if name in signature.parameters and name not in kwargs:
+                    position = list(signature.parameters).index(name)
+                    if position >= len(args):
+                        kwargs[name] = None
+            store.delete(build_key(bind(args, kwargs)))
+
+        def invalidate_all() -> None:
+            store.invalidate_tags(function_tag)
+
+        wrapper.invalidate = invalidate
+        wrapper.invalidate_all = invalidate_all
+        wrapper.clear_cache = invalidate
+        return wrapper
+
+    return decorator
+
+
+def invalidate_tags(*tags: str) -> None:
+    """
+    按标签使默认缓存失效
+
+    Args:
+        *tags: 标签
+    """
+    default_cache.invalidate_tags(*tags)
+
+
+async def ainvalidate_tags(*tags: str) -> None:
+    """
+    invalidate_tags的异步版本，在异步服务中使用，不阻塞事件循环
+
+    Args:
+        *tags: 标签
+    """
+    await default_cache.ainvalidate_tags(*tags)
+
+
+# 会话中等待提交后失效的缓存标签
+_PENDING_TAGS_KEY = "cache_invalidate_tags"
+
+
+def _invalidate_pending_tags(session: Any) -> None:
+    tags = session.info.pop(_PENDING_TAGS_KEY, None)
+    if tags:
+        default_cache.invalidate_tags(*tags)
+
+
+def _discard_pending_tags(session: Any) -> None:
+    session.info.pop(_PENDING_TAGS_KEY, None)
+
+
+def invalidate_tags_after_commit(db: Any, *tags: str) -> None:
+    """
+    会话提交后按标签使默认缓存失效，回滚时丢弃
+
+    在提交前失效时，并发读取可能重新加载尚未提交前的数据并缓存到过期
+
+    Args:
+        db: 数据库会话（同步Session）
+        *tags: 标签
+    """
+    db.info.setdefault(_PENDING_TAGS_KEY, set()).update(tags)
+    if not event.contains(db, "after_commit", _invalidate_pending_tags):
+        event.listen(db, "after_commit", _invalidate_pending_tags)
+        event.listen(db, "after_rollback", _discard_pending_tags)
+
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    """
+    获取各缓存实例的统计
+
+    Returns:
+        统计列表
+    """
+    return [default_cache.get_stats(), local_cache.get_stats()]
+
+
 def set_cache(key: str, value: Any, ttl: Optional[int] = None) -> bool:
     """
     设置本地缓存
-    
+
     Args:
         key: 缓存键
         value: 缓存值
         ttl: 过期时间(秒)
-        
+
     Returns:
         是否成功
     """
-    timestamp = time.time()
-    _local_cache[key] = (value, timestamp, ttl)
+    local_cache.set(key, value, ttl)
     return True
 
+
 def get_cache(key: str) -> Optional[Any]:
     """
     获取本地缓存
-    
+
     Args:
         key: 缓存键
-        
+
     Returns:
         缓存值，不存在或已过期返回None
     """
-    if key not in _local_cache:
-        return None
-    
-    value, timestamp, ttl = _local_cache[key]
-    
-    # 检查是否已过期
-    if ttl is not None:
-        if time.time() - timestamp > ttl:
-            # 已过期，删除缓存
-            del _local_cache[key]
-            return None
-    
-    return value
+    return local_cache.get(key)
+
 
 def delete_cache(key: str) -> bool:
     """
     删除本地缓存
-    
+
     Args:
         key: 缓存键
-        
+
     Returns:
         是否成功
     """
-    if key in _local_cache:
-        del _local_cache[key]
-        return True
-    return False
+    return local_cache.l1.delete(key)
+
 
 def clear_cache() -> None:
     """
     清空本地缓存
     """
-    _local_cache.clear()
+    local_cache.clear_local()
+
 
-def redis_set(key: str, value: Any, ttl: Optional[int] = None, redis_client: Optional[redis.Redis] = None) -> bool:
+def redis_set(key: str, value: Any, ttl: Optional[int] = None, redis_client: Optional["redis.Redis"] = None) -> bool:
     """
     设置Redis缓存
-    
+
     Args:
         key: 缓存键
         value: 缓存值
         ttl: 过期时间(秒)
         redis_client: Redis客户端
-        
+
     Returns:
         是否成功
-        
+
     Raises:
         ModuleNotFoundError: Redis模块未安装
     """
     if not REDIS_AVAILABLE:
         raise ModuleNotFoundError("缺少Redis模块，请安装: pip install redis")
-    
+
     if redis_client is None:
         raise ValueError("缺少Redis客户端")
-    
+
     # 序列化值
     if isinstance(value, (dict, list, tuple, set)):
         value = json.dumps(value)
     elif not isinstance(value, (str, int, float, bool)):
         value = pickle.dumps(value)
-    
+
     # 设置缓存
     if ttl is None:
         result = redis_client.set(key, value)
     else:
         result = redis_client.setex(key, ttl, value)
-    
+
     return bool(result)
 
-def redis_get(key: str, redis_client: Optional[redis.Redis] = None) -> Optional[Any]:
+
+def redis_get(key: str, redis_client: Optional["redis.Redis"] = None) -> Optional[Any]:
     """
     获取Redis缓存
-    
+
     Args:
         key: 缓存键
         redis_client: Redis客户端
-        
+
     Returns:
         缓存值，不存在返回None
-        
+
     Raises:
         ModuleNotFoundError: Redis模块未安装
     """
     if not REDIS_AVAILABLE:
         raise ModuleNotFoundError("缺少Redis模块，请安装: pip install redis")
-    
+
     if redis_client is None:
         raise ValueError("缺少Redis客户端")
-    
+
     # 获取缓存
     value = redis_client.get(key)
-    
+
     if value is None:
         return None
-    
+
     # 尝试反序列化
     if isinstance(value, bytes):
         try:
@@ -181,99 +899,48 @@ def redis_get(key: str, redis_client: Optional[redis.Redis] = None) -> Optional[
             except:
                 # 返回原始值
                 return value
-    
+
     return value
 
-def redis_delete(key: str, redis_client: Optional[redis.Redis] = None) -> bool:
+
+def redis_delete(key: str, redis_client: Optional["redis.Redis"] = None) -> bool:
     """
     删除Redis缓存
-    
+
     Args:
         key: 缓存键
         redis_client: Redis客户端
-        
+
     Returns:
         是否成功
-        
+
     Raises:
         ModuleNotFoundError: Redis模块未安装
     """
     if not REDIS_AVAILABLE:
         raise ModuleNotFoundError("缺少Redis模块，请安装: pip install redis")
-    
+
     if redis_client is None:
         raise ValueError("缺少Redis客户端")
-    
+
     return bool(redis_client.delete(key))
 
-def cache_decorator(ttl: Optional[int] = None, prefix: str = "", use_redis: bool = False, redis_client: Optional[redis.Redis] = None):
+
+def cache_decorator(ttl: Optional[int] = None, prefix: str = "", use_redis: bool = False, redis_client: Optional["redis.Redis"] = None):
     """
-    缓存装饰器
-    
+    缓存装饰器（兼容旧接口，新代码请使用cached）
+
     Args:
         ttl: 过期时间(秒)
         prefix: 缓存键前缀
-        use_redis: 是否使用Redis
-        redis_client: Redis客户端
-        
+        use_redis: 是否使用Redis（通过core.redis.RedisClient）
+        redis_client: 已废弃，保留以兼容旧调用
+
     Returns:
         装饰器函数
     """
     def decorator(func: Callable):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # 生成缓存键
-            base_key = f"{prefix}:{func.__module__}.{func.__name__}"
-            arguments_key = cache_key(*args, **kwargs)
-            cache_key_str = f"{base_key}:{arguments_key}"
-            
-            # 尝试获取缓存
-            if use_redis:
-                if not REDIS_AVAILABLE:
-                    raise ModuleNotFoundError("缺少Redis模块，请安装: pip install redis")
-                
-                if redis_client is None:
-                    raise ValueError("缺少Redis客户端")
-                
-                cached_value = redis_get(cache_key_str, redis_client)
-            else:
-                cached_value = get_cache(cache_key_str)
-            
-            if cached_value is not None:
-                return cached_value
-            
-            # 执行函数
-            result = func(*args, **kwargs)
-            
-            # 缓存结果
-            if use_redis:
-                redis_set(cache_key_str, result, ttl, redis_client)
-            else:
-                set_cache(cache_key_str, result, ttl)
-            
-            return result
-        
-        # 添加清除缓存的方法
-        def clear_cache_func(cls_or_self = None, *args, **kwargs):
-            if cls_or_self is not None and not isinstance(cls_or_self, type):
-                args = (cls_or_self,) + args
-            
-            base_key = f"{prefix}:{func.__module__}.{func.__name__}"
-            
-            if args or kwargs:
-                # 清除特定参数的缓存
-                arguments_key = cache_key(*args, **kwargs)
-                cache_key_str = f"{base_key}:{arguments_key}"
-                
-                if use_redis:
-                    redis_delete(cache_key_str, redis_client)
-                else:
-                    delete_cache(cache_key_str)
-            else:
-                # 清除所有该函数的缓存
-                pass  # 需要模式匹配，本地缓存和Redis实现方式不同
-        
-        wrapper.clear_cache = clear_cache_func
-        return wrapper
-    
-    return decorator
\ No newline at end of file
+        namespace = f"{prefix}:{func.__module__}.{func.__qualname__}"
+        return cached(ttl=ttl, namespace=namespace, ignore=(), cache=default_cache if use_redis else local_cache)(func)
+
+    return decorator
@@ -0,0 +1,115 @@
+import csv
+import io
+import tempfile
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Sequence
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def iter_csv(headers: Sequence[str], rows: Iterable[Sequence], chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    逐批写入CSV并按块输出，内存占用与总行数无关
+
+    Args:
+        headers: 表头
+        rows: 数据行（可以是数据库流式查询结果）
+        chunk_size: 每次输出的字节数阈值
+
+    Yields:
+        UTF-8编码的CSV数据块（首块带BOM，Excel可直接打开中文）
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, 1000))
+        if not batch:
+            break
+        writer.writerows(batch)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(
+    headers: Sequence[str], rows: Iterable[Sequence], sheet_title: str = "Sheet1", chunk_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    使用openpyxl只写模式生成XLSX并按块输出
+
+    只写模式的行数据追加写入临时文件，打包后的xlsx也写入临时文件，
+    内存占用与总行数无关；xlsx是zip格式，全部行写完后才开始输出
+
+    Args:
+        headers: 表头
+        rows: 数据行
+        sheet_title: 工作表名称
+        chunk_size: 每次输出的字节数
+
+    Yields:
+        XLSX文件数据块
+    """
+    from openpyxl import Workbook
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append(list(row))
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(
+    filename: str, headers: Sequence[str], rows: Iterable[Sequence], export_format: str = "csv"
+) -> StreamingResponse:
+    """
+    生成流式下载响应
+
+    Args:
+        filename: 文件名（不含扩展名）
+        headers: 表头
+        rows: 数据行，响应发送时才迭代
+        export_format: csv或xlsx
+
+    Returns:
+        流式响应
+
+    Raises:
+        HTTPException: 不支持的导出格式
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="不支持的导出格式")
+    if export_format == "csv":
+        body = iter_csv(headers, rows)
+    else:
+        body = iter_xlsx(headers, rows, sheet_title=filename[:31])
+    name = quote(f"{filename}.{export_format}")
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{name}"}
+    )
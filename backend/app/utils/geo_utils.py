@@ -1,5 +1,16 @@
 import math
-from typing import Tuple, Dict, Any, List, Optional
+from typing import Tuple, Dict, Any, List, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.core.http_client import HttpClient
+from app.utils.pagination_utils import CursorPaginatedData, InvalidCursorError, decode_cursor, encode_cursor
+
+# 地球平均半径(km)
+EARTH_RADIUS_KM = 6371
 
 def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """
@@ -71,7 +82,107 @@ def is_point_in_circle(point_lat: float, point_lng: float, center_lat: float, ce
     distance = calculate_distance(point_lat, point_lng, center_lat, center_lng)
     return distance <= radius_km
 
-def geocode(address: str, api_key: str) -> Tuple[float, float]:
+def haversine_one_to_many(lat: float, lng: float, lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """
+    批量计算一个点到多个点的距离(km)
+    
+    Args:
+        lat: 起点纬度
+        lng: 起点经度
+        lats: 终点纬度数组
+        lngs: 终点经度数组
+        
+    Returns:
+        距离数组(km)，与lats等长
+    """
+    lat1 = math.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=np.float64)) - math.radians(lng)
+    
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_matrix(
+    lats1: Sequence[float],
+    lngs1: Sequence[float],
+    lats2: Sequence[float],
+    lngs2: Sequence[float]
+) -> np.ndarray:
+    """
+    计算两组点之间的距离矩阵(km)
+    
+    Args:
+        lats1: 第一组纬度数组，长度M
+        lngs1: 第一组经度数组，长度M
+        lats2: 第二组纬度数组，长度N
+        lngs2: 第二组经度数组，长度N
+        
+    Returns:
+        M×N的距离矩阵(km)
+    """
+    lat1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lng1 = np.radians(np.asarray(lngs1, dtype=np.float64))[:, np.newaxis]
+    lat2 = np.radians(np.asarray(lats2, dtype=np.float64))[np.newaxis, :]
+    lng2 = np.radians(np.asarray(lngs2, dtype=np.float64))[np.newaxis, :]
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def points_in_radius_mask(
+    lat: float,
+    lng: float,
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    radius_km: Union[float, Sequence[float]]
+) -> np.ndarray:
+    """
+    批量判断多个点是否在指定点的半径范围内
+    
+    Args:
+        lat: 圆心纬度
+        lng: 圆心经度
+        lats: 点纬度数组
+        lngs: 点经度数组
+        radius_km: 半径(km)，可以是与点等长的数组（如各商户的服务半径）
+        
+    Returns:
+        布尔数组
+    """
+    return haversine_one_to_many(lat, lng, lats, lngs) <= np.asarray(radius_km, dtype=np.float64)
+
+def bounding_box_mask(
+    lat: float,
+    lng: float,
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    radius_km: float
+) -> np.ndarray:
+    """
+    批量判断多个点是否落在圆的外接经纬度矩形内，用于精确计算前的粗过滤
+    
+    Args:
+        lat: 圆心纬度
+        lng: 圆心经度
+        lats: 点纬度数组
+        lngs: 点经度数组
+        radius_km: 半径(km)
+        
+    Returns:
+        布尔数组
+    """
+    south, north, west, east = get_bounding_box(lat, lng, radius_km)
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    
+    lat_mask = (lats >= south) & (lats <= north)
+    if west <= east:
+        lng_mask = (lngs >= west) & (lngs <= east)
+    else:
+        lng_mask = (lngs >= west) | (lngs <= east)
+    return lat_mask & lng_mask
+
+async def geocode(address: str, api_key: str) -> Tuple[float, float]:
     """
     地理编码，将地址转换为经纬度
     
@@ -85,7 +196,6 @@ def geocode(address: str, api_key: str) -> Tuple[float, float]:
     Raises:
         Exception: 地理编码失败
     """
-    import requests
     
     url = "https://apis.map.qq.com/ws/geocoder/v1/"
     params = {
@@ -93,7 +203,7 @@ def geocode(address: str, api_key: str) -> Tuple[float, float]:
         "key": api_key
     }
     
-    response = requests.get(url, params=params)
+    response = await HttpClient.get(url, params=params)
     data = response.json()
     
     if data["status"] == 0:
@@ -102,7 +212,7 @@ def geocode(address: str, api_key: str) -> Tuple[float, float]:
     else:
         raise Exception(f"地理编码失败: {data['message']}")
 
-def reverse_geocode(lat: float, lng: float, api_key: str) -> Dict[str, Any]:
+async def reverse_geocode(lat: float, lng: float, api_key: str) -> Dict[str, Any]:
     """
     反向地理编码，将经纬度转换为地址
     
@@ -114,7 +224,6 @@ def reverse_geocode(lat: float, lng: float, api_key: str) -> Dict[str, Any]:
     Returns:
         地址信息
     """
-    import requests
     
     url = "https://apis.map.qq.com/ws/geocoder/v1/"
     params = {
@@ -122,7 +231,7 @@ def reverse_geocode(lat: float, lng: float, api_key: str) -> Dict[str, Any]:
         "key": api_key
     }
     
-    response = requests.get(url, params=params)
+    response = await HttpClient.get(url, params=params)
     data = response.json()
     
     if data["status"] == 0:
@@ -178,7 +287,7 @@ def get_bounds(coords: List[Tuple[float, float]]) -> Tuple[Tuple[float, float],
     
     return ((min(lats), min(lngs)), (max(lats), max(lngs)))
 
-def search_nearby_poi(lat: float, lng: float, keyword: Optional[str] = None, radius: int = 1000, api_key: str = None) -> List[Dict[str, Any]]:
+async def search_nearby_poi(lat: float, lng: float, keyword: Optional[str] = None, radius: int = 1000, api_key: str = None) -> List[Dict[str, Any]]:
     """
     搜索附近兴趣点(POI)
     
@@ -192,7 +301,6 @@ def search_nearby_poi(lat: float, lng: float, keyword: Optional[str] = None, rad
     Returns:
         POI列表
     """
-    import requests
     
     url = "https://apis.map.qq.com/ws/place/v1/search"
     params = {
@@ -203,7 +311,7 @@ def search_nearby_poi(lat: float, lng: float, keyword: Optional[str] = None, rad
     if keyword:
         params["keyword"] = keyword
     
-    response = requests.get(url, params=params)
+    response = await HttpClient.get(url, params=params)
     data = response.json()
     
     if data["status"] == 0:
@@ -262,4 +370,246 @@ def calculate_delivery_fee(distance_km: float, base_fee: float = 5.0, free_dista
     extra_distance = distance_km - free_distance_km
     extra_fee = math.ceil(extra_distance) * fee_per_km
     
-    return base_fee + extra_fee
\ No newline at end of file
+    return base_fee + extra_fee
+
+def get_bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    计算以某点为圆心、指定半径的圆的外接经纬度矩形
+    
+    矩形一定包含整个圆，可用作距离筛选的粗过滤条件
+    
+    Args:
+        lat: 圆心纬度
+        lng: 圆心经度
+        radius_km: 半径(km)
+        
+    Returns:
+        (south, north, west, east)，west大于east表示跨越180度经线
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular_radius)
+    south = lat - delta_lat
+    north = lat + delta_lat
+    
+    # 覆盖极点或半径过大时，经度不做限制
+    if south <= -90 or north >= 90 or angular_radius >= math.pi / 2:
+        return (max(south, -90.0), min(north, 90.0), -180.0, 180.0)
+    
+    delta_lng = math.degrees(math.asin(min(1.0, math.sin(angular_radius) / math.cos(math.radians(lat)))))
+    west = lng - delta_lng
+    east = lng + delta_lng
+    
+    # 处理跨越180度经线的情况
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    
+    return (south, north, west, east)
+
+def bounding_box_condition(lat_column, lng_column, lat: float, lng: float, radius_km: float):
+    """
+    构建经纬度落在外接矩形内的SQL条件，可利用经纬度索引
+    
+    Args:
+        lat_column: 纬度列
+        lng_column: 经度列
+        lat: 圆心纬度
+        lng: 圆心经度
+        radius_km: 半径(km)
+        
+    Returns:
+        SQLAlchemy条件表达式
+    """
+    south, north, west, east = get_bounding_box(lat, lng, radius_km)
+    
+    if west <= east:
+        lng_condition = lng_column.between(west, east)
+    else:
+        lng_condition = or_(lng_column >= west, lng_column <= east)
+    
+    return and_(lat_column.between(south, north), lng_condition)
+
+def distance_expression(lat_column, lng_column, lat: float, lng: float):
+    """
+    构建到指定点距离(km)的SQL表达式（Haversine公式）
+    
+    需要数据库支持三角函数（MySQL，或启用了数学函数的SQLite 3.35+）
+    
+    Args:
+        lat_column: 纬度列
+        lng_column: 经度列
+        lat: 圆心纬度
+        lng: 圆心经度
+        
+    Returns:
+        SQLAlchemy表达式
+    """
+    lat_rad = math.radians(lat)
+    half_dlat = func.sin((func.radians(lat_column) - lat_rad) / 2)
+    half_dlng = func.sin((func.radians(lng_column) - math.radians(lng)) / 2)
+    a = half_dlat * half_dlat + math.cos(lat_rad) * func.cos(func.radians(lat_column)) * half_dlng * half_dlng
+    # 浮点误差可能使a略大于1
+    a = case((a > 1, 1.0), else_=a)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+def within_radius_condition(lat_column, lng_column, lat: float, lng: float, radius_km: float):
+    """
+    构建到指定点距离不超过半径的SQL条件
+    
+    外接矩形条件利用经纬度索引缩小范围，距离表达式只对矩形内的行计算
+    
+    Args:
+        lat_column: 纬度列
+        lng_column: 经度列
+        lat: 圆心纬度
+        lng: 圆心经度
+        radius_km: 半径(km)
+        
+    Returns:
+        SQLAlchemy条件表达式
+    """
+    return and_(
+        bounding_box_condition(lat_column, lng_column, lat, lng, radius_km),
+        distance_expression(lat_column, lng_column, lat, lng) <= radius_km
+    )
+
+def nearest_by_distance(
+    query: Query,
+    id_column,
+    lat_column,
+    lng_column,
+    lat: float,
+    lng: float,
+    limit: int,
+    offset: int = 0,
+    radius_km: Optional[float] = None,
+    descending: bool = False,
+    after: Optional[Tuple[float, Any]] = None
+) -> List[Tuple[Any, float]]:
+    """
+    按到指定点的距离在数据库中排序，只读取一页
+    
+    正序时先在较小半径（GEO_SEARCH_INITIAL_RADIUS_KM）的圆内查询，结果不足一页时按
+    GEO_SEARCH_RADIUS_GROWTH倍扩大半径重新查询，候选范围始终由外接矩形经索引限定；
+    圆内的结果都比圆外的近，因此圆内已满一页时就是全局排序的结果。
+    倒序时最远的结果不在小范围内，只按radius_km限定范围
+    
+    Args:
+        query: 已应用其他筛选条件的查询对象
+        id_column: 结果ID列
+        lat_column: 纬度列
+        lng_column: 经度列
+        lat: 圆心纬度
+        lng: 圆心经度
+        limit: 读取数量
+        offset: 跳过的数量
+        radius_km: 半径(km)，为空时不限制距离
+        descending: 是否按距离倒序
+        after: 游标位置(距离, ID)，只返回排在其后的结果
+        
+    Returns:
+        [(id, 距离km), ...]，距离相同时按ID排序
+    """
+    distance = distance_expression(lat_column, lng_column, lat, lng)
+    query = query.filter(lat_column.isnot(None), lng_column.isnot(None))
+    if after is not None:
+        after_distance, after_id = after
+        if descending:
+            seek = or_(distance < after_distance, and_(distance == after_distance, id_column < after_id))
+        else:
+            seek = or_(distance > after_distance, and_(distance == after_distance, id_column > after_id))
+        query = query.filter(seek)
+    label = distance.label("distance")
+    order = (label.desc(), id_column.desc()) if descending else (label, id_column)
+    query = query.with_entities(id_column, label).distinct().order_by(*order)
+    
+    def fetch(radius: Optional[float]) -> List[Tuple[Any, float]]:
+        bounded = query
+        if radius is not None:
+            bounded = bounded.filter(within_radius_condition(lat_column, lng_column, lat, lng, radius))
+        return [(row[0], float(row[1])) for row in bounded.offset(offset).limit(limit).all()]
+    
+    if not descending:
+        # 半个地球周长之外没有更远的点
+        max_radius = radius_km if radius_km is not None else math.pi * EARTH_RADIUS_KM
+        radius = settings.GEO_SEARCH_INITIAL_RADIUS_KM + (after[0] if after is not None else 0)
+        while radius < max_radius:
+            rows = fetch(radius)
+            if len(rows) >= limit:
+                return rows
+            radius *= settings.GEO_SEARCH_RADIUS_GROWTH
+    
+    return fetch(radius_km)
+
+def paginate_by_distance(
+    query: Query,
+    id_column,
+    lat_column,
+    lng_column,
+    lat: float,
+    lng: float,
+    radius_km: Optional[float] = None,
+    descending: bool = False,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    with_total: bool = False
+) -> Union[Tuple[List[Tuple[Any, float]], int], CursorPaginatedData]:
+    """
+    按距离排序分页，排序和分页都在数据库中完成
+    
+    Args:
+        query: 已应用其他筛选条件的查询对象
+        id_column: 结果ID列
+        lat_column: 纬度列
+        lng_column: 经度列
+        lat: 圆心纬度
+        lng: 圆心经度
+        radius_km: 半径(km)，为空时不限制距离
+        descending: 是否按距离倒序
+        skip: 偏移分页的跳过数量
+        limit: 每页数量
+        cursor: 游标分页的游标（首页为空字符串），为None时使用偏移分页
+        with_total: 游标分页时是否统计总数
+        
+    Returns:
+        偏移分页返回([(id, 距离km), ...], 总数)；游标分页返回items为[(id, 距离km), ...]的CursorPaginatedData
+        
+    Raises:
+        InvalidCursorError: 游标无效或与排序方式不匹配
+    """
+    def count() -> int:
+        counted = query.filter(lat_column.isnot(None), lng_column.isnot(None))
+        if radius_km is not None:
+            counted = counted.filter(within_radius_condition(lat_column, lng_column, lat, lng, radius_km))
+        return counted.with_entities(func.count(func.distinct(id_column))).scalar() or 0
+    
+    if cursor is None:
+        rows = nearest_by_distance(
+            query, id_column, lat_column, lng_column, lat, lng, limit, skip, radius_km, descending
+        )
+        return rows, count()
+    
+    after = None
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not isinstance(values[0], (int, float)):
+            raise InvalidCursorError("分页游标与排序方式不匹配")
+        after = (float(values[0]), values[1])
+    
+    # 多取一条用于判断是否还有下一页
+    rows = nearest_by_distance(
+        query, id_column, lat_column, lng_column, lat, lng, limit + 1, 0, radius_km, descending, after
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
+    
+    return CursorPaginatedData(
+        items=rows,
+        page_size=limit,
+        next_cursor=next_cursor,
+        total=count() if with_total else None
+    )
@@ -1,8 +1,9 @@
 import json
-import aiohttp
 import requests
 from typing import Dict, Any, Optional, Union, List, Tuple
 
+from app.core.http_client import HttpClient
+
 async def async_get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: int = 10) -> Dict[str, Any]:
     """
     异步GET请求
@@ -19,10 +20,9 @@ async def async_get(url: str, params: Optional[Dict[str, Any]] = None, headers:
     Raises:
         Exception: 请求异常
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params, headers=headers, timeout=timeout) as response:
-            response.raise_for_status()
-            return await response.json()
+    response = await HttpClient.get(url, params=params, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
 
 async def async_post(url: str, data: Optional[Dict[str, Any]] = None, json_data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: int = 10) -> Dict[str, Any]:
     """
@@ -41,10 +41,9 @@ async def async_post(url: str, data: Optional[Dict[str, Any]] = None, json_data:
     Raises:
         Exception: 请求异常
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, data=data, json=json_data, headers=headers, timeout=timeout) as response:
-            response.raise_for_status()
-            return await response.json()
+    response = await HttpClient.post(url, data=data, json=json_data, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
 
 def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: int = 10) -> Dict[str, Any]:
     """
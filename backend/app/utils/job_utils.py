@@ -0,0 +1,151 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.constants import CACHE_KEY_PREFIX
+from app.core.redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+# 最近一次运行的统计，按任务名保存
+_last_runs: Dict[str, "JobRunMetrics"] = {}
+
+
+class JobRunMetrics:
+    """批处理任务单次运行的统计"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now()
+        self.scanned = 0
+        self.updated = 0
+        self.batches = 0
+        self.resumed_from = 0
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "scanned": self.scanned,
+            "updated": self.updated,
+            "batches": self.batches,
+            "resumed_from": self.resumed_from,
+            "duration_ms": round(self.duration_ms, 2),
+            "error": self.error,
+        }
+
+
+def _checkpoint_key(name: str) -> str:
+    return f"{CACHE_KEY_PREFIX['job']}{name}:checkpoint"
+
+
+def get_checkpoint(name: str) -> int:
+    """
+    获取任务的断点（最后处理的ID），Redis不可用时从头开始
+
+    Args:
+        name: 任务名
+
+    Returns:
+        最后处理的ID
+    """
+    if not settings.JOB_CHECKPOINT_ENABLED:
+        return 0
+    value = RedisClient.get(_checkpoint_key(name))
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def save_checkpoint(name: str, last_id: int) -> None:
+    """保存任务断点，0表示清除"""
+    if not settings.JOB_CHECKPOINT_ENABLED:
+        return
+    if last_id:
+        RedisClient.set(_checkpoint_key(name), last_id)
+    else:
+        RedisClient.delete(_checkpoint_key(name))
+
+
+def run_in_batches(
+    name: str,
+    session_factory: Callable[[], Session],
+    fetch_batch: Callable[[Session, int, int], Sequence[Any]],
+    process_batch: Callable[[Session, Sequence[Any]], int],
+    batch_size: int = 500,
+    max_batches: Optional[int] = None,
+    checkpoint: bool = True
+) -> JobRunMetrics:
+    """
+    按ID分批执行定时任务，每批独立提交事务
+
+    每批提交后保存断点，进程中断后下次运行从断点继续；完整跑完后清除断点，
+    下次运行从头扫描。运行期间统计即可通过get_job_metrics查看进度
+
+    Args:
+        name: 任务名，用于断点和统计
+        session_factory: 会话工厂
+        fetch_batch: 查询一批待处理行 fetch_batch(db, after_id, limit)，按ID升序返回，行的第一列为ID
+        process_batch: 处理一批行并返回更新行数 process_batch(db, rows)，不需要提交事务
+        batch_size: 每批行数
+        max_batches: 单次运行最多处理的批数，None表示不限
+        checkpoint: 是否保存断点，一次性任务（如消息群发）不需要断点续跑
+
+    Returns:
+        运行统计
+    """
+    metrics = _last_runs[name] = JobRunMetrics(name)
+    start = time.perf_counter()
+    last_id = metrics.resumed_from = get_checkpoint(name) if checkpoint else 0
+
+    try:
+        with session_factory() as db:
+            while max_batches is None or metrics.batches < max_batches:
+                rows = fetch_batch(db, last_id, batch_size)
+                if not rows:
+                    last_id = 0
+                    break
+
+                metrics.updated += process_batch(db, rows)
+                db.commit()
+
+                metrics.scanned += len(rows)
+                metrics.batches += 1
+                last_id = rows[-1][0]
+                if checkpoint:
+                    save_checkpoint(name, last_id)
+
+                if len(rows) < batch_size:
+                    last_id = 0
+                    break
+            if checkpoint:
+                save_checkpoint(name, last_id)
+    except Exception as e:
+        metrics.error = str(e)
+        logger.error(f"定时任务 {name} 执行失败，已保存断点 {last_id}: {e}")
+        raise
+    finally:
+        metrics.duration_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"定时任务 {name}: 扫描 {metrics.scanned} 行，更新 {metrics.updated} 行，"
+            f"{metrics.batches} 批，耗时 {metrics.duration_ms:.1f}ms"
+        )
+
+    return metrics
+
+
+def get_job_metrics() -> List[Dict[str, Any]]:
+    """
+    获取各定时任务最近一次（或正在进行的）运行的统计
+
+    Returns:
+        统计列表
+    """
+    return [metrics.to_dict() for metrics in _last_runs.values()]
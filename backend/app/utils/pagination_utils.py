@@ -1,7 +1,12 @@
-from typing import Dict, Generic, List, Optional, TypeVar, Union, Any, Tuple
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, Generic, List, Optional, TypeVar, Union, Any, Tuple
 from pydantic import BaseModel
 from sqlalchemy.orm import Query
-from sqlalchemy import func
+from sqlalchemy import func, and_, or_, false
 from math import ceil
 
 T = TypeVar('T')
@@ -202,4 +207,256 @@ def create_pagination_metadata(page: int, page_size: int, total: int, base_url:
     metadata["links"]["first"] = url_pattern.format(1)
     metadata["links"]["last"] = url_pattern.format(total_pages) if total_pages > 0 else url_pattern.format(1)
     
-    return metadata
\ No newline at end of file
+    return metadata
+
+class InvalidCursorError(ValueError):
+    """分页游标无效或与排序方式不匹配"""
+
+
+class CursorPaginatedData(Generic[T]):
+    """游标分页数据"""
+    def __init__(
+        self,
+        items: List[T],
+        page_size: int,
+        next_cursor: Optional[str] = None,
+        total: Optional[int] = None
+    ):
+        self.items = items
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.total = total
+    
+    @property
+    def has_next(self) -> bool:
+        """是否有下一页"""
+        return self.next_cursor is not None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "items": self.items,
+            "total": self.total,
+            "page_size": self.page_size,
+            "next_cursor": self.next_cursor,
+            "has_next": self.has_next
+        }
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    将排序键值编码为不透明游标
+    
+    Args:
+        values: 最后一条记录的排序键值列表
+        
+    Returns:
+        URL安全的游标字符串
+    """
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append({"dt": value.isoformat()})
+        elif isinstance(value, date):
+            encoded.append({"d": value.isoformat()})
+        elif isinstance(value, Decimal):
+            # 转为浮点数会丢失精度，导致定位到错误的位置
+            encoded.append({"dec": str(value)})
+        else:
+            encoded.append(value)
+    
+    raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    解码游标
+    
+    Args:
+        cursor: 游标字符串
+        
+    Returns:
+        排序键值列表
+        
+    Raises:
+        InvalidCursorError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursorError("无效的分页游标")
+    
+    if not isinstance(values, list):
+        raise InvalidCursorError("无效的分页游标")
+    
+    decoded = []
+    for value in values:
+        if isinstance(value, dict) and "dt" in value:
+            decoded.append(datetime.fromisoformat(value["dt"]))
+        elif isinstance(value, dict) and "d" in value:
+            decoded.append(date.fromisoformat(value["d"]))
+        elif isinstance(value, dict) and "dec" in value:
+            decoded.append(Decimal(value["dec"]))
+        else:
+            decoded.append(value)
+    return decoded
+
+def apply_order(query: Query, order_columns: List[Tuple[Any, bool]]) -> Query:
+    """
+    按排序键列表排序
+    
+    Args:
+        query: SQLAlchemy查询对象
+        order_columns: (列, 是否倒序) 列表，最后一项应为主键以保证顺序唯一
+        
+    Returns:
+        排序后的查询对象
+    """
+    return query.order_by(*[
+        column.desc() if descending else column.asc()
+        for column, descending in order_columns
+    ])
+
+def _seek_condition(order_columns: List[Tuple[Any, bool]], values: List[Any]):
+    """
+    构建“位于游标之后”的查询条件
+    
+    按MySQL的NULL排序规则处理空值：升序时NULL在前，倒序时NULL在后
+    """
+    conditions = []
+    for i, (column, descending) in enumerate(order_columns):
+        value = values[i]
+        
+        # 前面的排序键全部相等
+        equals = []
+        for j, (prev_column, _) in enumerate(order_columns[:i]):
+            prev_value = values[j]
+            equals.append(prev_column.is_(None) if prev_value is None else prev_column == prev_value)
+        
+        # 当前排序键严格位于游标之后
+        if descending:
+            if value is None:
+                continue
+            after = or_(column < value, column.is_(None))
+        else:
+            after = column.isnot(None) if value is None else column > value
+        
+        conditions.append(and_(*equals, after))
+    
+    return or_(*conditions) if conditions else false()
+
+def _cursor_value_matches(column: Any, value: Any) -> bool:
+    """游标中的值与排序列的类型是否一致，无法确定列类型时视为一致"""
+    if value is None:
+        return True
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return True
+    if python_type in (int, float, Decimal):
+        return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+    if python_type is date:
+        return isinstance(value, date) and not isinstance(value, datetime)
+    return isinstance(value, python_type)
+
+def keyset_paginate(
+    query: Query,
+    order_columns: List[Tuple[Any, bool]],
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    with_total: bool = False
+) -> CursorPaginatedData:
+    """
+    对SQL查询进行游标（键集）分页
+    
+    按排序键定位下一页，避免OFFSET扫描；只有在with_total为真时才执行COUNT
+    
+    Args:
+        query: 已应用筛选条件、尚未排序的查询对象
+        order_columns: (列, 是否倒序) 列表，最后一项应为主键
+        cursor: 上一页返回的游标，为空表示第一页
+        limit: 每页数量
+        with_total: 是否统计总数
+        
+    Returns:
+        游标分页数据，items为ORM对象列表
+        
+    Raises:
+        InvalidCursorError: 游标无效或与排序方式不匹配
+    """
+    total = query.count() if with_total else None
+    
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(order_columns) or not all(
+            _cursor_value_matches(column, value) for (column, _), value in zip(order_columns, values)
+        ):
+            raise InvalidCursorError("分页游标与排序方式不匹配")
+        query = query.filter(_seek_condition(order_columns, values))
+    
+    # 多取一条用于判断是否还有下一页
+    rows = apply_order(query, order_columns).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in order_columns])
+    
+    return CursorPaginatedData(
+        items=rows,
+        page_size=limit,
+        next_cursor=next_cursor,
+        total=total
+    )
+
+def keyset_paginate_list(
+    items: List[T],
+    key: Callable[[T], List[Any]],
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    with_total: bool = False,
+    descending: bool = False
+) -> CursorPaginatedData[T]:
+    """
+    对已在内存中排好序的列表进行游标分页
+    
+    Args:
+        items: 已按key排序的列表
+        key: 返回排序键值列表的函数，最后一项应唯一
+        cursor: 上一页返回的游标，为空表示第一页
+        limit: 每页数量
+        with_total: 是否返回总数
+        descending: 列表是否为倒序
+        
+    Returns:
+        游标分页数据
+        
+    Raises:
+        InvalidCursorError: 游标无效或与排序方式不匹配
+    """
+    total = len(items) if with_total else None
+    
+    if cursor:
+        values = decode_cursor(cursor)
+        if items and len(values) != len(key(items[0])):
+            raise InvalidCursorError("分页游标与排序方式不匹配")
+        try:
+            if descending:
+                items = [item for item in items if key(item) < values]
+            else:
+                items = [item for item in items if key(item) > values]
+        except TypeError:
+            raise InvalidCursorError("分页游标与排序方式不匹配")
+    
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(key(items[-1]))
+    
+    return CursorPaginatedData(
+        items=items,
+        page_size=limit,
+        next_cursor=next_cursor,
+        total=total
+    )
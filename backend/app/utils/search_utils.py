@@ -0,0 +1,301 @@
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 中日韩统一表意文字（含扩展A区和兼容区）
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+# 倒排记录按 (内部文档号 << 16 | 词频) 存入无符号64位数组
+_TF_BITS = 16
+_TF_MASK = (1 << _TF_BITS) - 1
+
+# 前缀补全时单个前缀最多展开的索引词数
+MAX_PREFIX_TERMS = 100
+
+
+def _normalize(text: str) -> str:
+    """全角转半角、英文转小写"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    分词：中文按单字和相邻二字（bigram）切分，其他文字按连续的字母数字切分
+
+    Args:
+        text: 文本
+
+    Returns:
+        词列表（保留重复，用于统计词频）
+
+    示例:
+        tokenize("iPhone15手机壳") -> ["iphone15", "手", "机", "壳", "手机", "机壳"]
+    """
+    if not text:
+        return []
+    tokens = []
+    for run in _TOKEN_RE.findall(_normalize(text)):
+        if _CJK_RE.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def query_terms(text: Optional[str]) -> List[str]:
+    """
+    查询分词：中文只使用二字词（单字查询使用单字），词已去重
+
+    Args:
+        text: 查询文本
+
+    Returns:
+        词列表，保持在查询中出现的顺序
+    """
+    if not text:
+        return []
+    terms = []
+    for run in _TOKEN_RE.findall(_normalize(text)):
+        if _CJK_RE.match(run) and len(run) > 1:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run)
+    return list(dict.fromkeys(terms))
+
+
+class InvertedIndex:
+    """
+    进程内倒排索引，支持增量更新、BM25相关度排序和前缀补全
+
+    每个文档按字段权重累加词频（如名称权重3、描述权重1）；倒排记录使用紧凑数组，
+    百万文档的内存占用约为 倒排记录数 × 8 字节。更新文档时旧版本只打删除标记，
+    删除标记超过文档数的1/4时整理索引。查询时用numpy对倒排数组向量化计算得分。
+    所有读写在同一把锁内完成，可在请求和后台任务线程中同时使用
+    """
+
+    def __init__(self, fields: Dict[str, int], k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            fields: 字段名 -> 词频权重
+            k1: BM25词频饱和参数
+            b: BM25文档长度归一化参数
+        """
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, array] = {}
+        self._terms: List[str] = []  # 有序的索引词，用于前缀补全
+        self._doc_ids = array("q")  # 内部文档号 -> 外部ID，-1表示已删除
+        self._doc_lens = array("I")
+        self._docnos: Dict[int, int] = {}  # 外部ID -> 内部文档号
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docnos)
+
+    def _term_counts(self, record: Dict[str, Optional[str]]) -> Counter:
+        counts = Counter()
+        for field, weight in self.fields.items():
+            for term in tokenize(record.get(field)):
+                counts[term] += weight
+        return counts
+
+    def _append(self, doc_id: int, counts: Counter, sort_terms: bool = True) -> None:
+        docno = len(self._doc_ids)
+        length = sum(counts.values())
+        self._doc_ids.append(doc_id)
+        self._doc_lens.append(length)
+        self._docnos[doc_id] = docno
+        self._total_len += length
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("Q")
+                if sort_terms:
+                    insort(self._terms, term)
+            postings.append(docno << _TF_BITS | min(tf, _TF_MASK))
+
+    def _remove(self, doc_id: int) -> None:
+        docno = self._docnos.pop(doc_id, None)
+        if docno is None:
+            return
+        self._doc_ids[docno] = -1
+        self._total_len -= self._doc_lens[docno]
+        deleted = len(self._doc_ids) - len(self._docnos)
+        if deleted > 1000 and deleted * 4 > len(self._docnos):
+            self._compact()
+
+    def _compact(self) -> None:
+        """清除已删除文档的倒排记录并重新编号"""
+        remap = {}
+        doc_ids, doc_lens = array("q"), array("I")
+        for docno, doc_id in enumerate(self._doc_ids):
+            if doc_id >= 0:
+                remap[docno] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_lens.append(self._doc_lens[docno])
+        postings = {}
+        for term, values in self._postings.items():
+            kept = array("Q", (
+                remap[value >> _TF_BITS] << _TF_BITS | value & _TF_MASK
+                for value in values if (value >> _TF_BITS) in remap
+            ))
+            if kept:
+                postings[term] = kept
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._doc_ids, self._doc_lens = doc_ids, doc_lens
+        self._docnos = {doc_id: docno for docno, doc_id in enumerate(doc_ids)}
+
+    def add(self, doc_id: int, record: Dict[str, Optional[str]]) -> None:
+        """
+        添加或更新文档
+
+        Args:
+            doc_id: 文档ID
+            record: 字段名 -> 文本
+        """
+        counts = self._term_counts(record)
+        with self._lock:
+            self._remove(doc_id)
+            if counts:
+                self._append(doc_id, counts)
+
+    def remove(self, doc_id: int) -> None:
+        """删除文档，文档不存在时忽略"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def rebuild(self, records: Iterable[Tuple[int, Dict[str, Optional[str]]]]) -> int:
+        """
+        全量重建索引
+
+        新索引在锁外构建，完成后整体替换，重建期间仍可使用旧索引查询
+
+        Args:
+            records: (文档ID, 字段名 -> 文本) 迭代器，可以是数据库流式查询结果
+
+        Returns:
+            索引的文档数
+        """
+        building = InvertedIndex(self.fields, self.k1, self.b)
+        for doc_id, record in records:
+            counts = building._term_counts(record)
+            if counts:
+                building._remove(doc_id)
+                building._append(doc_id, counts, sort_terms=False)
+        building._terms = sorted(building._postings)
+        with self._lock:
+            self._postings, self._terms = building._postings, building._terms
+            self._doc_ids, self._doc_lens = building._doc_ids, building._doc_lens
+            self._docnos, self._total_len = building._docnos, building._total_len
+            self.ready = True
+        return len(building)
+
+    def clear(self) -> None:
+        """清空索引并标记为未就绪"""
+        with self._lock:
+            self._reset()
+            self.ready = False
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, text: str, limit: Optional[int] = 100, prefix: bool = False) -> List[Tuple[int, float]]:
+        """
+        查询包含全部查询词的文档，按BM25得分排序
+
+        Args:
+            text: 查询文本
+            limit: 最多返回的文档数，None表示全部
+            prefix: 最后一个查询词是否按前缀匹配（输入补全）
+
+        Returns:
+            [(文档ID, 得分), ...]，按得分降序，得分相同时按ID降序
+        """
+        terms = query_terms(text)
+        if not terms:
+            return []
+
+        with self._lock:
+            if not self._docnos:
+                return []
+            groups = []
+            for i, term in enumerate(terms):
+                expanded = self._expand(term) if prefix and i == len(terms) - 1 else [term]
+                expanded = [t for t in expanded if t in self._postings]
+                if not expanded:
+                    return []
+                groups.append(expanded)
+            # 从倒排最短的词开始求交集
+            groups.sort(key=lambda group: sum(len(self._postings[t]) for t in group))
+            return self._score(groups, limit)
+
+    def _score(self, groups: List[List[str]], limit: Optional[int]) -> List[Tuple[int, float]]:
+        """
+        按倒排数组向量化计算BM25得分
+
+        numpy数组直接引用倒排内存，需在锁内调用并在返回前释放
+        """
+        count = len(self._docnos)
+        avgdl = self._total_len / count
+        k1, b = self.k1, self.b
+        doc_ids = np.frombuffer(self._doc_ids, dtype=np.int64)
+        doc_lens = np.frombuffer(self._doc_lens, dtype=np.uint32)
+
+        candidates = scores = None
+        for group in groups:
+            docno_parts, score_parts = [], []
+            for term in group:
+                values = np.frombuffer(self._postings[term], dtype=np.uint64)
+                docnos = (values >> _TF_BITS).astype(np.int64)
+                tf = (values & _TF_MASK).astype(np.float64)
+                # 倒排中可能含已删除文档的记录，文档频率不超过文档数
+                df = min(len(values), count)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                norm = k1 * (1 - b + b * doc_lens[docnos] / avgdl)
+                docno_parts.append(docnos)
+                score_parts.append(idf * tf * (k1 + 1) / (tf + norm))
+            docnos, group_scores = np.concatenate(docno_parts), np.concatenate(score_parts)
+            if len(group) > 1:
+                # 前缀展开的多个词取最高分
+                order = np.lexsort((group_scores, docnos))
+                docnos, group_scores = docnos[order], group_scores[order]
+                last = np.append(docnos[1:] != docnos[:-1], True)
+                docnos, group_scores = docnos[last], group_scores[last]
+
+            if candidates is None:
+                live = doc_ids[docnos] >= 0
+                candidates, scores = docnos[live], group_scores[live]
+            else:
+                candidates, left, right = np.intersect1d(
+                    candidates, docnos, assume_unique=True, return_indices=True
+                )
+                scores = scores[left] + group_scores[right]
+            if not len(candidates):
+                return []
+
+        ids = doc_ids[candidates]
+        top = np.lexsort((-ids, -scores))[:limit]
+        return list(zip(ids[top].tolist(), scores[top].tolist()))
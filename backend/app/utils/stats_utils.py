@@ -0,0 +1,164 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+
+def count_if(condition: ColumnElement) -> ColumnElement:
+    """
+    条件计数：COUNT(CASE WHEN condition THEN 1 END) 的可移植写法
+
+    Args:
+        condition: 条件表达式
+
+    Returns:
+        聚合表达式，没有行时为0
+    """
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def sum_if(column: ColumnElement, condition: ColumnElement) -> ColumnElement:
+    """
+    条件求和：SUM(CASE WHEN condition THEN column ELSE 0 END)
+
+    Args:
+        column: 求和字段
+        condition: 条件表达式
+
+    Returns:
+        聚合表达式，没有行时为0
+    """
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def to_date(value: Any) -> Optional[date]:
+    """
+    将DATE()的结果转换为date（MySQL返回date，SQLite返回字符串）
+
+    Args:
+        value: 查询结果
+
+    Returns:
+        日期，空值返回None
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def aggregate(db: Session, *filters: ColumnElement, **measures: ColumnElement) -> Dict[str, Any]:
+    """
+    一条查询计算多个聚合值
+
+    Args:
+        db: 数据库会话
+        *filters: 过滤条件
+        **measures: 名称 -> 聚合表达式（可配合count_if、sum_if做条件聚合）
+
+    Returns:
+        名称 -> 聚合值
+
+    示例:
+        aggregate(db, Product.merchant_id == 1,
+                  total=func.count(Product.id), on_sale=count_if(Product.status == 1))
+    """
+    row = db.query(*[measure.label(name) for name, measure in measures.items()]).filter(*filters).one()
+    return dict(row._mapping)
+
+
+def aggregate_by(
+    db: Session,
+    group_by: ColumnElement,
+    *filters: ColumnElement,
+    keys: Optional[Iterable[Any]] = None,
+    **measures: ColumnElement
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    按字段分组，一条查询计算每组的多个聚合值
+
+    Args:
+        db: 数据库会话
+        group_by: 分组字段或表达式
+        *filters: 过滤条件
+        keys: 需要补齐的分组值，没有数据的分组各聚合值为0
+        **measures: 名称 -> 聚合表达式
+
+    Returns:
+        分组值 -> {名称: 聚合值}，按keys的顺序（未提供时按查询结果顺序）
+    """
+    key = group_by.label("key")
+    rows = db.query(key, *[measure.label(name) for name, measure in measures.items()]).filter(
+        *filters
+    ).group_by(key).all()
+    result = {row.key: {name: row._mapping[name] for name in measures} for row in rows}
+    if keys is None:
+        return result
+    return {k: result.get(k) or {name: 0 for name in measures} for k in keys}
+
+
+def count_by(
+    db: Session, group_by: ColumnElement, *filters: ColumnElement, keys: Optional[Iterable[Any]] = None
+) -> Dict[Any, int]:
+    """
+    按字段分组计数（GROUP BY）
+
+    Args:
+        db: 数据库会话
+        group_by: 分组字段
+        *filters: 过滤条件
+        keys: 需要补齐的分组值，没有数据的分组计数为0
+
+    Returns:
+        分组值 -> 数量
+    """
+    grouped = aggregate_by(db, group_by, *filters, keys=keys, count=func.count())
+    return {k: int(v["count"] or 0) for k, v in grouped.items()}
+
+
+def date_range(start: date, end: date) -> List[date]:
+    """
+    开始到结束日期（包含）的每一天
+
+    Args:
+        start: 开始日期
+        end: 结束日期
+
+    Returns:
+        日期列表
+    """
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def aggregate_by_date(
+    db: Session,
+    date_column: ColumnElement,
+    start: date,
+    end: date,
+    *filters: ColumnElement,
+    **measures: ColumnElement
+) -> Dict[date, Dict[str, Any]]:
+    """
+    按天分组（GROUP BY DATE(date_column)），一条查询得到时间序列，没有数据的日期补0
+
+    Args:
+        db: 数据库会话
+        date_column: 日期时间字段
+        start: 开始日期
+        end: 结束日期（包含）
+        *filters: 过滤条件
+        **measures: 名称 -> 聚合表达式
+
+    Returns:
+        日期 -> {名称: 聚合值}，按日期升序
+    """
+    in_range = date_column.between(datetime.combine(start, datetime.min.time()),
+                                   datetime.combine(end, datetime.max.time()))
+    grouped = aggregate_by(db, func.date(date_column), in_range, *filters, **measures)
+    by_date = {to_date(k): v for k, v in grouped.items()}
+    return {day: by_date.get(day) or {name: 0 for name in measures} for day in date_range(start, end)}
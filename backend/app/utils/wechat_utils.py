@@ -3,11 +3,12 @@ import json
 import hmac
 import hashlib
 import base64
-import requests
 from typing import Dict, Any, Optional, List, Union
 from urllib.parse import urlencode
 
-def get_access_token(appid: str, secret: str) -> Dict[str, Any]:
+from app.core.http_client import HttpClient
+
+async def get_access_token(appid: str, secret: str) -> Dict[str, Any]:
     """
     获取微信接口调用凭证
     
@@ -25,7 +26,7 @@ def get_access_token(appid: str, secret: str) -> Dict[str, Any]:
         Exception: 获取失败
     """
     url = f"https://api.weixin.qq.com/cgi-bin/token?grant_type=client_credential&appid={appid}&secret={secret}"
-    response = requests.get(url)
+    response = await HttpClient.get(url)
     data = response.json()
     
     if "errcode" in data and data["errcode"] != 0:
@@ -33,7 +34,7 @@ def get_access_token(appid: str, secret: str) -> Dict[str, Any]:
     
     return data
 
-def code_to_session(appid: str, secret: str, code: str) -> Dict[str, Any]:
+async def code_to_session(appid: str, secret: str, code: str) -> Dict[str, Any]:
     """
     小程序登录，通过code获取用户openid和session_key
     
@@ -53,7 +54,7 @@ def code_to_session(appid: str, secret: str, code: str) -> Dict[str, Any]:
         Exception: 登录失败
     """
     url = f"https://api.weixin.qq.com/sns/jscode2session?appid={appid}&secret={secret}&js_code={code}&grant_type=authorization_code"
-    response = requests.get(url)
+    response = await HttpClient.get(url)
     data = response.json()
     
     if "errcode" in data and data["errcode"] != 0:
@@ -118,7 +119,7 @@ def decrypt_phone_number(session_key: str, encrypted_data: str, iv: str) -> Dict
     # 与解密用户信息相同的方法
     return decrypt_user_info(session_key, encrypted_data, iv)
 
-def get_unlimited_qrcode(access_token: str, scene: str, page: Optional[str] = None, width: int = 430) -> bytes:
+async def get_unlimited_qrcode(access_token: str, scene: str, page: Optional[str] = None, width: int = 430) -> bytes:
     """
     获取小程序码，适用于需要的码数量极多的业务场景
     
@@ -144,7 +145,7 @@ def get_unlimited_qrcode(access_token: str, scene: str, page: Optional[str] = No
     if page:
         data["page"] = page
     
-    response = requests.post(url, json=data)
+    response = await HttpClient.post(url, json=data)
     
     # 判断是否返回JSON（表示请求失败）
     if response.headers.get("Content-Type", "").startswith("application/json"):
@@ -154,7 +155,7 @@ def get_unlimited_qrcode(access_token: str, scene: str, page: Optional[str] = No
     # 返回图片二进制数据
     return response.content
 
-def get_qrcode(access_token: str, path: str, width: int = 430) -> bytes:
+async def get_qrcode(access_token: str, path: str, width: int = 430) -> bytes:
     """
     获取小程序二维码
     
@@ -176,7 +177,7 @@ def get_qrcode(access_token: str, path: str, width: int = 430) -> bytes:
         "width": width
     }
     
-    response = requests.post(url, json=data)
+    response = await HttpClient.post(url, json=data)
     
     # 判断是否返回JSON（表示请求失败）
     if response.headers.get("Content-Type", "").startswith("application/json"):
@@ -186,7 +187,7 @@ def get_qrcode(access_token: str, path: str, width: int = 430) -> bytes:
     # 返回图片二进制数据
     return response.content
 
-def send_subscribe_message(access_token: str, openid: str, template_id: str, data: Dict[str, Dict[str, str]], page: Optional[str] = None) -> Dict[str, Any]:
+async def send_subscribe_message(access_token: str, openid: str, template_id: str, data: Dict[str, Dict[str, str]], page: Optional[str] = None) -> Dict[str, Any]:
     """
     发送订阅消息
     
@@ -214,7 +215,7 @@ def send_subscribe_message(access_token: str, openid: str, template_id: str, dat
     if page:
         body["page"] = page
     
-    response = requests.post(url, json=body)
+    response = await HttpClient.post(url, json=body)
     result = response.json()
     
     if result.get("errcode") != 0:
@@ -222,7 +223,7 @@ def send_subscribe_message(access_token: str, openid: str, template_id: str, dat
     
     return result
 
-def check_content_security(access_token: str, content: str) -> bool:
+async def check_content_security(access_token: str, content: str) -> bool:
     """
     检查文本内容是否安全
     
@@ -239,13 +240,13 @@ def check_content_security(access_token: str, content: str) -> bool:
         "content": content
     }
     
-    response = requests.post(url, json=data)
+    response = await HttpClient.post(url, json=data)
     result = response.json()
     
     # 返回0表示内容正常
     return result.get("errcode") == 0
 
-def check_image_security(access_token: str, image_data: bytes) -> bool:
+async def check_image_security(access_token: str, image_data: bytes) -> bool:
     """
     检查图片是否安全
     
@@ -263,7 +264,7 @@ def check_image_security(access_token: str, image_data: bytes) -> bool:
         "media": io.BytesIO(image_data)
     }
     
-    response = requests.post(url, files=files)
+    response = await HttpClient.post(url, files=files)
     result = response.json()
     
     # 返回0表示内容正常
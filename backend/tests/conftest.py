@@ -0,0 +1,86 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402  导入所有模型
+from app.services import counter_service, search_service  # noqa: E402
+from app.utils import cache_utils  # noqa: E402
+
+
+class QueryCounter:
+    """统计执行的SQL语句数量"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.fixture
+def engine():
+    """内存SQLite数据库引擎"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """数据库会话"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def query_counter(engine):
+    """SQL查询计数器"""
+    return QueryCounter(engine)
+
+
+@pytest.fixture(autouse=True)
+def local_cache_only(monkeypatch):
+    """测试环境不连接Redis缓存，每个测试使用空的本地缓存"""
+    monkeypatch.setattr(settings, "CACHE_L2_ENABLED", False)
+    cache_utils.default_cache.clear_local()
+    cache_utils.local_cache.clear_local()
+
+
+@pytest.fixture(autouse=True)
+def empty_counter_buffer():
+    """每个测试使用空的浏览量和销量缓冲"""
+    counter_service.local_buffer.drain()
+
+
+@pytest.fixture(autouse=True)
+def empty_search_indexes():
+    """每个测试使用未构建的搜索索引（关键词搜索回退到LIKE）"""
+    yield
+    for index in search_service.INDEXES.values():
+        index.clear()
+    search_service._synced_at.clear()
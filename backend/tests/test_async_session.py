@@ -0,0 +1,147 @@
+# tests/test_async_session.py
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base  # noqa: E402
+from app.models.group import Group  # noqa: E402
+from app.models.merchant import Merchant  # noqa: E402
+from app.models.order import Order, OrderItem  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import group_service, order_service, product_service  # noqa: E402
+
+# 异步会话使用aiosqlite驱动访问SQLite文件库
+pytest.importorskip("aiosqlite")
+
+
+def _seed(path, product_count=30):
+    """在SQLite文件库中创建测试数据，返回同步和异步会话工厂"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    SyncSession = sessionmaker(bind=engine, autoflush=False)
+
+    with SyncSession() as db:
+        merchant = Merchant(name="测试商户", status=1, latitude=30.0, longitude=120.0)
+        user = User(open_id="async-openid", nickname="tester")
+        db.add_all([merchant, user])
+        db.flush()
+        for i in range(product_count):
+            product = Product(
+                merchant_id=merchant.id, name=f"商品{i}", thumbnail="",
+                original_price=20, current_price=10, stock=100, status=1,
+            )
+            db.add(product)
+            db.flush()
+            db.add(Group(
+                merchant_id=merchant.id, product_id=product.id, title=f"团购{i}", price=8, status=1,
+                start_time=datetime.now(), end_time=datetime.now() + timedelta(days=1),
+            ))
+            order = Order(
+                order_no=f"NO{i:04d}", user_id=user.id, merchant_id=merchant.id,
+                total_amount=10, actual_amount=10, status=0,
+            )
+            db.add(order)
+            db.flush()
+            db.add(OrderItem(order_id=order.id, product_id=product.id, product_name=product.name,
+                             product_image="", price=10, quantity=1))
+        db.commit()
+        user_id = user.id
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return engine, SyncSession, async_engine, AsyncSession, user_id
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    engine, SyncSession, async_engine, AsyncSession, user_id = _seed(tmp_path / "async.db")
+    yield SyncSession, AsyncSession, user_id
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def test_async_session_matches_sync_session(sessions):
+    SyncSession, AsyncSession, user_id = sessions
+
+    with SyncSession() as db:
+        sync_products, sync_total = asyncio.run(product_service.search_products(db=db, skip=0, limit=10))
+        sync_orders, _ = asyncio.run(order_service.search_orders(db=db, user_id=user_id, skip=0, limit=5))
+
+    async def main():
+        async with AsyncSession() as db:
+            products, total = await product_service.search_products(db=db, skip=0, limit=10)
+            assert total == sync_total
+            assert [p["id"] for p in products] == [p["id"] for p in sync_products]
+
+            detail = await product_service.get_product(db, products[0]["id"], user_id=user_id)
+            assert detail["id"] == products[0]["id"]
+
+            groups, group_total = await group_service.search_groups(db=db, skip=0, limit=10)
+            assert group_total == 30
+            group = await group_service.get_group(db=db, group_id=groups[0]["id"])
+            assert group["id"] == groups[0]["id"]
+
+            orders, order_total = await order_service.search_orders(db=db, user_id=user_id, skip=0, limit=5)
+            assert order_total == 30
+            assert [o["id"] for o in orders] == [o["id"] for o in sync_orders]
+            order = await order_service.get_order(db=db, order_id=orders[0]["id"], user_id=user_id)
+            assert order["order_no"] == orders[0]["order_no"]
+
+            page = await product_service.search_products(db=db, cursor="", limit=7)
+            assert len(page.items) == 7 and page.has_next
+
+    asyncio.run(main())
+
+
+async def _benchmark(SyncSession, AsyncSession, clients=200):
+    """对比同步会话和异步会话在并发请求下的吞吐量和事件循环延迟"""
+    async def measure(worker):
+        lags = []
+
+        async def ticker():
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - start - 0.005)
+
+        tick = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(clients)])
+        elapsed = time.perf_counter() - start
+        # 等待心跳记录最后一次延迟
+        await asyncio.sleep(0.01)
+        tick.cancel()
+        return clients / elapsed, max(lags) * 1000
+
+    async def sync_worker():
+        with SyncSession() as db:
+            await product_service.search_products(db=db, skip=0, limit=20)
+
+    async def async_worker():
+        async with AsyncSession() as db:
+            await product_service.search_products(db=db, skip=0, limit=20)
+
+    for name, worker in (("同步会话", sync_worker), ("异步会话", async_worker)):
+        rps, lag = await measure(worker)
+        print(f"{name}: {clients}并发  {rps:8.1f} 请求/秒  最大事件循环延迟 {lag:7.1f}ms")
+
+
+if __name__ == "__main__":
+    # 运行方式: python tests/test_async_session.py
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, SyncSession, async_engine, AsyncSession, _ = _seed(os.path.join(tmp, "bench.db"), 200)
+        asyncio.run(_benchmark(SyncSession, AsyncSession))
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
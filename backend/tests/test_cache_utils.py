@@ -0,0 +1,162 @@
+# tests/test_cache_utils.py
+import asyncio
+import time
+
+import pytest
+
+from app.utils import cache_utils
+from app.utils.cache_utils import TwoTierCache, cached
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    cache = TwoTierCache("test", max_entries=3, max_bytes=10 ** 6)
+    for i in range(4):
+        cache.set(f"k{i}", i)
+    # 读取k1使其成为最近使用
+    assert cache.get("k1") == 1
+    cache.set("k4", 4)
+    assert cache.get("k0") is None and cache.get("k2") is None
+    assert [cache.get(k) for k in ("k1", "k3", "k4")] == [1, 3, 4]
+    assert cache.stats.evictions == 2
+
+    small = TwoTierCache("test", max_entries=100, max_bytes=2000)
+    for i in range(20):
+        small.set(f"k{i}", "x" * 400)
+    assert small.l1.size_bytes <= 2000
+    assert len(small.l1) < 5
+    # 单个值超过上限时不缓存
+    small.set("huge", "x" * 5000)
+    assert small.get("huge") is None
+
+
+def test_ttl_and_tag_invalidation():
+    cache = TwoTierCache("test")
+    cache.set("a", {"id": 1}, ttl=0.05, tags=["product:1"])
+    cache.set("b", {"id": 2}, tags=["product:2", "merchant:1"])
+    assert cache.get("a") == {"id": 1}
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+
+    cache.set("a", {"id": 1}, tags=["product:1", "merchant:1"])
+    cache.invalidate_tags("product:2")
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+    cache.invalidate_tags("merchant:1")
+    assert cache.get("a") is None
+
+    # 失效后写入的新值不受旧版本影响
+    cache.set("a", {"id": 1, "v": 2}, tags=["product:1", "merchant:1"])
+    assert cache.get("a") == {"id": 1, "v": 2}
+
+
+def test_cached_async_single_flight_and_invalidate():
+    calls = []
+    cache = TwoTierCache("test")
+
+    @cached(ttl=60, tags=["product:{product_id}"], cache=cache)
+    async def load_product(db, product_id: int, detail: bool = False):
+        calls.append(product_id)
+        await asyncio.sleep(0.02)
+        return {"id": product_id, "detail": detail}
+
+    async def main():
+        results = await asyncio.gather(*[load_product(None, 1) for _ in range(50)])
+        assert all(r == {"id": 1, "detail": False} for r in results)
+        # 数据库会话不参与缓存键
+        assert await load_product("another session", product_id=1) == {"id": 1, "detail": False}
+        await load_product(None, 2)
+        await load_product(None, 2, detail=True)
+
+        cache.invalidate_tags("product:1")
+        await load_product(None, 1)
+        load_product.invalidate(None, 2)
+        await load_product(None, 2)
+        await load_product(None, 2, detail=True)
+
+        load_product.invalidate_all()
+        await load_product(None, 2, detail=True)
+
+    asyncio.run(main())
+    assert calls == [1, 2, 2, 1, 2, 2]
+    stats = cache.get_stats()
+    assert stats["coalesced"] == 49
+    assert stats["loads"] == 6
+    assert stats["l1_hits"] >= 2
+
+
+def test_early_refresh_serves_stale_value(monkeypatch):
+    # 固定随机数，-ln(0.5)≈0.69，加载耗时3600秒时必然提前刷新
+    monkeypatch.setattr(cache_utils.random, "random", lambda: 0.5)
+    cache = TwoTierCache("test")
+    version = {"n": 0}
+
+    async def loader():
+        version["n"] += 1
+        return version["n"]
+
+    async def failing():
+        raise RuntimeError("数据库不可用")
+
+    async def main():
+        assert await cache.get_or_load("k", loader, ttl=60) == 1
+        # 加载耗时远大于剩余有效期时必然提前刷新
+        cache.l1.get("k").delta = 3600
+        assert await cache.get_or_load("k", loader, ttl=60) == 2
+        # 刷新失败时返回旧值
+        cache.l1.get("k").delta = 3600
+        assert await cache.get_or_load("k", failing, ttl=60) == 2
+        # 不存在旧值时抛出异常
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("missing", failing, ttl=60)
+
+    asyncio.run(main())
+    assert cache.stats.early_refreshes == 2
+
+
+def test_invalidation_during_load_is_not_lost():
+    cache = TwoTierCache("test")
+    version = {"n": 0}
+
+    async def loader():
+        version["n"] += 1
+        # 加载期间数据被修改并失效
+        cache.invalidate_tags("product:1")
+        return version["n"]
+
+    async def main():
+        assert await cache.get_or_load("static", loader, ttl=60, tags=["product:1"]) == 1
+        # 写入的条目记录加载前的版本，下次读取重新加载
+        assert await cache.get_or_load("static", loader, ttl=60, tags=["product:1"]) == 2
+        # 标签由结果决定时，加载期间标签变化过则不写入
+        tags = lambda value: ["product:1"]
+        assert await cache.get_or_load("dynamic", loader, ttl=60, tags=tags) == 3
+        assert cache.get("dynamic") is None
+
+    asyncio.run(main())
+
+
+def test_stats_counted_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = TwoTierCache("test")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.get(f"k{i % 10}"), range(4000)))
+    assert cache.stats.misses == 4000
+
+
+def test_sync_decorator_and_legacy_helpers():
+    calls = []
+
+    @cache_utils.cache_decorator(ttl=60, prefix="legacy")
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert [square(3), square(3), square(4)] == [9, 9, 16]
+    assert calls == [3, 4]
+
+    cache_utils.set_cache("token", "abc", ttl=60)
+    assert cache_utils.get_cache("token") == "abc"
+    assert cache_utils.delete_cache("token") is True
+    assert cache_utils.get_cache("token") is None
@@ -0,0 +1,86 @@
+# tests/test_counters.py
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.merchant import Merchant
+from app.models.product import Product
+from app.services import counter_service, product_service
+
+
+@pytest.fixture
+def session_local(engine, monkeypatch):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(counter_service, "SessionLocal", Session)
+    return Session
+
+
+def _seed(db, count=3):
+    merchant = Merchant(name="测试商户", status=1)
+    db.add(merchant)
+    db.flush()
+    updated_at = datetime(2024, 1, 1)
+    products = [
+        Product(merchant_id=merchant.id, name=f"商品{i}", thumbnail="", original_price=20, current_price=10,
+                stock=100, status=1, views=10, sales=5, updated_at=updated_at)
+        for i in range(count)
+    ]
+    db.add_all(products)
+    db.commit()
+    return merchant.id, [product.id for product in products]
+
+
+def test_views_buffered_and_merged_on_read(db, session_local, query_counter):
+    merchant_id, product_ids = _seed(db)
+
+    for _ in range(5):
+        detail = asyncio.run(product_service.get_product(db, product_ids[0]))
+    # 浏览详情不写数据库，读取时合并缓冲中的增量
+    assert detail["views"] == 15
+    assert db.query(Product.views).filter(Product.id == product_ids[0]).scalar() == 10
+
+    counter_service.incr_sales([(product_ids[1], 3), (product_ids[2], 2)], merchant_id)
+    items, _ = asyncio.run(product_service.search_products(db=db, skip=0, limit=10))
+    by_id = {item["id"]: item for item in items}
+    assert (by_id[product_ids[0]]["views"], by_id[product_ids[1]]["sales"]) == (15, 8)
+
+    with query_counter:
+        updated = asyncio.run(counter_service.flush_counters())
+    # 商品表和商户表各一条UPDATE
+    assert query_counter.count == 2
+    assert updated == 4
+
+    db.expire_all()
+    rows = {p.id: p for p in db.query(Product)}
+    assert [(rows[i].views, rows[i].sales) for i in product_ids] == [(15, 5), (10, 8), (10, 7)]
+    assert all(p.updated_at == datetime(2024, 1, 1) for p in rows.values())
+    merchant = db.query(Merchant).get(merchant_id)
+    assert (merchant.total_views, merchant.total_sales) == (5, 5)
+
+    # 写入后不重复计算
+    assert asyncio.run(product_service.get_product(db, product_ids[0]))["views"] == 16
+    assert asyncio.run(counter_service.flush_counters()) == 2
+    assert asyncio.run(counter_service.flush_counters()) == 0
+
+
+def test_failed_flush_keeps_increments(db, session_local, monkeypatch):
+    merchant_id, product_ids = _seed(db, 1)
+    counter_service.incr_sales([(product_ids[0], 4)], merchant_id)
+    counter_service.incr_sales([(product_ids[0], -1)], merchant_id)
+
+    def broken(db, drained):
+        raise RuntimeError("数据库不可用")
+
+    apply = counter_service._apply
+    monkeypatch.setattr(counter_service, "_apply", broken)
+    with pytest.raises(RuntimeError):
+        asyncio.run(counter_service.flush_counters())
+    assert counter_service.get_pending("product", "sales", product_ids) == {product_ids[0]: 3}
+
+    monkeypatch.setattr(counter_service, "_apply", apply)
+    asyncio.run(counter_service.flush_counters())
+    db.expire_all()
+    assert db.query(Product.sales).filter(Product.id == product_ids[0]).scalar() == 8
+    assert counter_service.get_pending("product", "sales", product_ids) == {product_ids[0]: 0}
@@ -0,0 +1,163 @@
+# tests/test_detail_cache.py
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base  # noqa: E402
+from app.models.group import Group, GroupParticipant  # noqa: E402
+from app.models.merchant import Merchant  # noqa: E402
+from app.models.product import Product, ProductImage, ProductSpecification  # noqa: E402
+from app.models.user import Favorite, User  # noqa: E402
+from app.schemas.group import GroupUpdate  # noqa: E402
+from app.schemas.product import ProductImageCreate, ProductUpdate  # noqa: E402
+from app.services import group_service, product_service  # noqa: E402
+from app.utils import cache_utils  # noqa: E402
+
+
+def _seed(db, participants=5):
+    """创建带图片、规格、收藏、团购和参与者的商品"""
+    merchant = Merchant(name="测试商户", status=1)
+    db.add(merchant)
+    db.flush()
+    product = Product(merchant_id=merchant.id, name="商品", thumbnail="", original_price=20,
+                      current_price=10, stock=100, status=1)
+    db.add(product)
+    db.flush()
+    users = [User(open_id=f"detail-openid-{i}", nickname=f"user{i}") for i in range(participants + 1)]
+    db.add_all(users)
+    db.flush()
+    group = Group(merchant_id=merchant.id, product_id=product.id, title="团购", price=8, status=1,
+                  min_participants=2, max_participants=50, current_participants=participants,
+                  start_time=datetime.now(), end_time=datetime.now() + timedelta(days=1))
+    db.add_all([
+        group,
+        ProductImage(product_id=product.id, image_url="a.jpg", sort_order=0),
+        ProductSpecification(product_id=product.id, name="颜色", value="红", stock=10),
+        Favorite(user_id=users[0].id, product_id=product.id),
+    ])
+    db.flush()
+    db.add_all([GroupParticipant(group_id=group.id, user_id=user.id, status=1) for user in users[:participants]])
+    db.commit()
+    return merchant.id, product.id, group.id, [user.id for user in users]
+
+
+def test_product_detail_cached_with_viewer_overlay(db, query_counter):
+    merchant_id, product_id, _, user_ids = _seed(db)
+
+    with query_counter:
+        first = asyncio.run(product_service.get_product(db, product_id, user_ids[0]))
+    cold_queries = query_counter.count
+
+    with query_counter:
+        second = asyncio.run(product_service.get_product(db, product_id, user_ids[1]))
+    # 命中缓存时只执行浏览量更新和两次主键查询
+    assert query_counter.count <= 3 < cold_queries
+
+    assert first["is_favorite"] is True and second["is_favorite"] is False
+    assert (first["views"], second["views"]) == (1, 2)
+    assert second["images"][0]["image_url"] == "a.jpg"
+    assert second["merchant_name"] == "测试商户"
+
+    # 库存和规格库存每次请求读取最新值
+    db.query(Product).filter(Product.id == product_id).update({Product.stock: 7})
+    db.query(ProductSpecification).filter(ProductSpecification.product_id == product_id).update(
+        {ProductSpecification.stock: 3}
+    )
+    db.commit()
+    detail = asyncio.run(product_service.get_product(db, product_id))
+    assert detail["stock"] == 7 and detail["specifications"][0]["stock"] == 3
+
+    asyncio.run(product_service.update_product(db, product_id, ProductUpdate(name="新名称"), merchant_id))
+    asyncio.run(product_service.update_product_images(
+        db, product_id, merchant_id, [ProductImageCreate(image_url="b.jpg", sort_order=0)]
+    ))
+    detail = asyncio.run(product_service.get_product(db, product_id))
+    assert detail["name"] == "新名称"
+    assert [image["image_url"] for image in detail["images"]] == ["b.jpg"]
+
+    asyncio.run(product_service.batch_operation(db, "update_status", [product_id], {"status": 0}, merchant_id))
+    assert asyncio.run(product_service.get_product(db, product_id))["status"] == 0
+
+
+def test_group_detail_cached_and_invalidated(db, query_counter):
+    merchant_id, product_id, group_id, user_ids = _seed(db)
+
+    detail = asyncio.run(group_service.get_group(db, group_id, user_ids[0]))
+    assert detail["is_joined"] is True
+    assert len(detail["participants"]) == 5
+    assert 0 < detail["remaining_seconds"] <= 86400
+
+    with query_counter:
+        other = asyncio.run(group_service.get_group(db, group_id, user_ids[-1]))
+    assert query_counter.count == 1
+    assert other["is_joined"] is False
+
+    asyncio.run(group_service.cancel_group_participation(db, group_id, user_ids[0]))
+    detail = asyncio.run(group_service.get_group(db, group_id, user_ids[0]))
+    assert detail["is_joined"] is False
+    assert detail["current_participants"] == 4
+
+    # 事务中修改团购时提交后才失效，提交前的并发读取不会把旧数据重新缓存到过期
+    group = db.get(Group, group_id)
+    group.current_participants = 9
+    group_service.invalidate_group_detail(group_id, db=db)
+    asyncio.run(group_service.get_group(db, group_id))
+    db.rollback()
+    assert asyncio.run(group_service.get_group(db, group_id))["current_participants"] == 4
+    db.get(Group, group_id).current_participants = 9
+    group_service.invalidate_group_detail(group_id, db=db)
+    db.commit()
+    assert asyncio.run(group_service.get_group(db, group_id))["current_participants"] == 9
+
+    asyncio.run(group_service.update_group(db, group_id, GroupUpdate(title="新团购"), merchant_id))
+    assert asyncio.run(group_service.get_group(db, group_id))["title"] == "新团购"
+
+    # 商品变更同时使团购详情失效
+    asyncio.run(product_service.update_product(db, product_id, ProductUpdate(name="新商品"), merchant_id))
+    assert asyncio.run(group_service.get_group(db, group_id))["product"]["name"] == "新商品"
+
+
+def _benchmark(requests=2000):
+    """对比缓存命中与未命中时的商品和团购详情延迟"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    _, product_id, group_id, user_ids = _seed(db, participants=30)
+    queries = [0]
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.__setitem__(0, queries[0] + 1))
+
+    def measure(call, invalidate):
+        queries[0] = 0
+        start = time.perf_counter()
+        for i in range(requests):
+            if invalidate:
+                cache_utils.default_cache.clear_local()
+            asyncio.run(call(user_ids[i % len(user_ids)]))
+        return (time.perf_counter() - start) / requests * 1000, queries[0] / requests
+
+    cases = {
+        "商品详情": lambda user_id: product_service.get_product(db, product_id, user_id),
+        "团购详情": lambda user_id: group_service.get_group(db, group_id, user_id),
+    }
+    for name, call in cases.items():
+        uncached_ms, uncached_q = measure(call, True)
+        cached_ms, cached_q = measure(call, False)
+        print(f"{name}: 未缓存 {uncached_ms:.2f}ms/{uncached_q:.0f}条SQL  "
+              f"缓存命中 {cached_ms:.2f}ms/{cached_q:.0f}条SQL  加速 {uncached_ms / cached_ms:.1f}x")
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    # 运行方式: python tests/test_detail_cache.py
+    from app.core.config import settings
+    settings.CACHE_L2_ENABLED = False
+    _benchmark()
@@ -0,0 +1,103 @@
+# tests/test_expiry_jobs.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.group import Group, GroupParticipant
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductSpecification
+from app.services import group_service, order_service
+from app.utils import job_utils
+
+
+@pytest.fixture
+def session_local(engine, monkeypatch):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(order_service, "SessionLocal", Session)
+    monkeypatch.setattr(group_service, "SessionLocal", Session)
+    monkeypatch.setattr(settings, "JOB_CHECKPOINT_ENABLED", False)
+    return Session
+
+
+def _seed(db, orders=60):
+    """创建超时未支付的团购订单，一半使用规格"""
+    old = datetime.now() - timedelta(hours=1)
+    product = Product(merchant_id=1, name="商品", thumbnail="", original_price=20, current_price=10, stock=0, status=1)
+    db.add(product)
+    db.flush()
+    spec = ProductSpecification(product_id=product.id, name="颜色", value="红", stock=0)
+    groups = [
+        Group(merchant_id=1, product_id=product.id, title=f"团购{i}", price=8, status=1,
+              min_participants=2, current_participants=orders // 3,
+              start_time=old, end_time=datetime.now() + timedelta(days=1))
+        for i in range(3)
+    ]
+    db.add_all([spec] + groups)
+    db.flush()
+
+    for i in range(orders):
+        group = groups[i % 3]
+        order = Order(order_no=f"NO{i:04d}", user_id=i + 1, merchant_id=1, group_id=group.id,
+                      total_amount=10, actual_amount=10, status=0, created_at=old)
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=product.id,
+                         specification_id=spec.id if i % 2 else None,
+                         product_name="商品", product_image="", price=10, quantity=2))
+        db.add(GroupParticipant(group_id=group.id, user_id=i + 1, status=1))
+    # 未超时的订单不受影响
+    db.add(Order(order_no="FRESH", user_id=999, merchant_id=1, total_amount=10, actual_amount=10, status=0))
+    db.commit()
+    return product.id, spec.id, [g.id for g in groups]
+
+
+def test_cancel_expired_orders_in_batches(db, session_local, query_counter):
+    product_id, spec_id, group_ids = _seed(db)
+
+    with query_counter:
+        cancelled = asyncio.run(order_service.check_and_cancel_expired_orders(batch_size=25))
+    assert cancelled == 60
+    # 3批数据 + 1次空查询，语句数与订单数无关
+    assert query_counter.count <= 4 * 8
+
+    db.expire_all()
+    assert db.query(Order).filter(Order.status == 4).count() == 60
+    assert db.query(Order).filter(Order.status == 0).count() == 1
+    assert db.query(Product.stock).filter(Product.id == product_id).scalar() == 60
+    assert db.query(ProductSpecification.stock).filter(ProductSpecification.id == spec_id).scalar() == 60
+    assert db.query(GroupParticipant).filter(GroupParticipant.status != 0).count() == 0
+    assert [g.current_participants for g in db.query(Group).order_by(Group.id)] == [0, 0, 0]
+
+    metrics = {m["name"]: m for m in job_utils.get_job_metrics()}["cancel_expired_orders"]
+    assert metrics["scanned"] == 60 and metrics["updated"] == 60 and metrics["batches"] == 3
+    assert metrics["duration_ms"] > 0
+
+    # 再次运行没有可处理的订单
+    assert asyncio.run(order_service.check_and_cancel_expired_orders(batch_size=25)) == 0
+
+
+def test_auto_confirm_and_expired_groups(db, session_local):
+    _, _, group_ids = _seed(db, orders=9)
+    long_ago = datetime.now() - timedelta(days=8)
+    db.query(Order).filter(Order.order_no.in_(["NO0000", "NO0001"])).update(
+        {Order.status: 2, Order.delivery_time: long_ago}, synchronize_session=False
+    )
+    db.query(Order).filter(Order.order_no == "NO0002").update(
+        {Order.status: 2, Order.delivery_time: datetime.now()}, synchronize_session=False
+    )
+    # 团购0人数达标，团购1人数不足，团购2未到期
+    db.query(Group).filter(Group.id.in_(group_ids[:2])).update(
+        {Group.end_time: datetime.now() - timedelta(minutes=1)}, synchronize_session=False
+    )
+    db.query(Group).filter(Group.id == group_ids[1]).update({Group.current_participants: 1}, synchronize_session=False)
+    db.commit()
+
+    assert asyncio.run(order_service.check_and_auto_confirm_orders(batch_size=1)) == 2
+    assert asyncio.run(group_service.check_and_update_expired_groups(batch_size=1)) == 2
+
+    db.expire_all()
+    assert db.query(Order).filter(Order.status == 3, Order.delivery_status == 2).count() == 2
+    assert [g.status for g in db.query(Group).order_by(Group.id)] == [2, 3, 1]
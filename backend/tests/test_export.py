@@ -0,0 +1,98 @@
+# tests/test_export.py
+import csv
+import io
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.api.api_v1.endpoints import stats
+from app.models.merchant import Merchant
+from app.models.order import Order
+from app.services import export_service
+from app.utils.export_utils import iter_csv, iter_xlsx
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _synthetic_rows(count):
+    created = datetime(2024, 1, 1, 8, 0, 0)
+    for i in range(count):
+        yield (i, f"NO{i:012d}", i % 100, "测试商户", "已支付", 99.5, created)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="需要/proc读取内存占用")
+def test_csv_export_million_rows_flat_memory():
+    count = 1_000_000
+    baseline = peak = _rss_bytes()
+    total_bytes = newlines = 0
+    first = last = b""
+    for i, chunk in enumerate(iter_csv(["ID", "编号", "商户", "商户名称", "状态", "金额", "时间"], _synthetic_rows(count))):
+        if i == 0:
+            first = chunk
+        last = chunk
+        total_bytes += len(chunk)
+        newlines += chunk.count(b"\n")
+        if i % 50 == 0:
+            peak = max(peak, _rss_bytes())
+
+    assert newlines == count + 1
+    assert first.startswith("\ufeffID,编号".encode("utf-8"))
+    assert last.endswith(f"NO{count - 1:012d},99,测试商户,已支付,99.5,2024-01-01 08:00:00\r\n".encode("utf-8"))
+    # 约80MB输出，内存增长与行数无关
+    assert total_bytes > 70 * 1024 * 1024
+    assert peak - baseline < 20 * 1024 * 1024
+
+
+def test_xlsx_export_write_only():
+    chunks = list(iter_xlsx(["ID", "编号"], ((i, f"NO{i}") for i in range(20000)), sheet_title="orders"))
+    workbook = load_workbook(io.BytesIO(b"".join(chunks)), read_only=True)
+    rows = list(workbook["orders"].iter_rows(values_only=True))
+    assert rows[0] == ("ID", "编号")
+    assert rows[-1] == (19999, "NO19999")
+    assert len(rows) == 20001
+
+
+def test_order_export_endpoint_streams_from_db(engine, db, monkeypatch):
+    monkeypatch.setattr(export_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(export_service.settings, "EXPORT_BATCH_SIZE", 2)
+    merchants = [Merchant(name=f"商户{i}", status=1) for i in range(2)]
+    db.add_all(merchants)
+    db.flush()
+    today = datetime.combine(date.today(), datetime.min.time())
+    for i in range(5):
+        db.add(Order(order_no=f"E{i}", user_id=1, merchant_id=merchants[i % 2].id, total_amount=10,
+                     actual_amount=10, status=i, created_at=today + timedelta(hours=i)))
+    db.add(Order(order_no="OLD", user_id=1, merchant_id=merchants[0].id, status=1,
+                 created_at=today - timedelta(days=30)))
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(stats.router, prefix="/stats")
+    app.dependency_overrides[deps.get_current_admin] = lambda: None
+    client = TestClient(app)
+
+    params = {"start_date": date.today().isoformat(), "end_date": date.today().isoformat()}
+    response = client.get("/stats/export/orders", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].startswith("attachment; filename*=UTF-8''orders_")
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0][:3] == ["订单ID", "订单编号", "商户ID"]
+    assert [row[1] for row in rows[1:]] == [f"E{i}" for i in range(5)]
+    assert [row[10] for row in rows[1:]] == ["待支付", "已支付", "已发货", "已完成", "已取消"]
+
+    response = client.get("/stats/export/orders", params={**params, "merchant_id": merchants[1].id, "format": "xlsx"})
+    sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+    assert [row[1] for row in sheet.iter_rows(min_row=2, values_only=True)] == ["E1", "E3"]
+
+    assert client.get("/stats/export/orders", params={**params, "format": "pdf"}).status_code == 422
+    with pytest.raises(HTTPException):
+        export_service.get_export("orders", date.today(), date.today() - timedelta(days=1))
@@ -0,0 +1,128 @@
+# tests/test_geo_search.py
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.group import Group
+from app.models.merchant import Merchant
+from app.models.product import Product
+from app.services import group_service, merchant_service
+from app.utils.geo_utils import calculate_distance, get_bounding_box
+
+CENTER = (30.0, 120.0)
+
+
+def _seed(db):
+    """在中心点正北方向按0.5km间隔创建商户，每个商户一个团购"""
+    merchants = []
+    for i in range(30):
+        merchant = Merchant(
+            name=f"商户{i}",
+            status=1,
+            latitude=CENTER[0] + (i + 1) * 0.5 / 111.195,
+            longitude=CENTER[1],
+        )
+        db.add(merchant)
+        merchants.append(merchant)
+    # 没有坐标的商户不参与距离查询
+    db.add(Merchant(name="无坐标商户", status=1))
+    db.flush()
+
+    for merchant in merchants:
+        product = Product(merchant_id=merchant.id, name="商品", thumbnail="", original_price=20, current_price=10, stock=10, status=1)
+        db.add(product)
+        db.flush()
+        db.add(Group(
+            merchant_id=merchant.id,
+            product_id=product.id,
+            title=f"团购{merchant.id}",
+            price=8,
+            status=1,
+            start_time=datetime.now(),
+            end_time=datetime.now() + timedelta(days=1),
+        ))
+    db.commit()
+    return merchants
+
+
+def test_bounding_box_contains_circle():
+    for lat, lng in [(30.0, 120.0), (60.0, 179.99), (-45.0, -179.9)]:
+        south, north, west, east = get_bounding_box(lat, lng, 50)
+        assert calculate_distance(lat, lng, north, lng) >= 49.9
+        assert calculate_distance(lat, lng, south, lng) >= 49.9
+    # 跨越180度经线时west大于east
+    _, _, west, east = get_bounding_box(60.0, 179.99, 50)
+    assert west > east
+
+
+def test_search_merchants_filters_before_pagination(db):
+    _seed(db)
+
+    items, total = asyncio.run(merchant_service.search_merchants(
+        db=db, latitude=CENTER[0], longitude=CENTER[1], distance=5.2, skip=0, limit=4
+    ))
+    # 0.5km ~ 5.0km 共10个商户，分页前完成筛选
+    assert total == 10
+    assert len(items) == 4
+
+    items, total = asyncio.run(merchant_service.search_merchants(
+        db=db, latitude=CENTER[0], longitude=CENTER[1], distance=5.2,
+        sort_by="distance", sort_order="asc", skip=4, limit=4
+    ))
+    assert total == 10
+    distances = [item["distance"] for item in items]
+    assert distances == sorted(distances)
+    assert 2.4 < distances[0] < 2.6
+
+
+def test_search_merchants_distance_cursor(db):
+    _seed(db)
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = asyncio.run(merchant_service.search_merchants(
+            db=db, latitude=CENTER[0], longitude=CENTER[1], sort_by="distance",
+            sort_order="desc", cursor=cursor, limit=7
+        ))
+        seen.extend(item["distance"] for item in page.items)
+        cursor = page.next_cursor
+    assert len(seen) == 30
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_search_groups_distance(db):
+    _seed(db)
+
+    items, total = asyncio.run(group_service.search_groups(
+        db=db, latitude=CENTER[0], longitude=CENTER[1], distance=3.2,
+        sort_by="distance", sort_order="asc", skip=0, limit=20
+    ))
+    assert total == 6
+    distances = [item["merchant"]["distance"] for item in items]
+    assert distances == sorted(distances)
+    assert all(d <= 3.2 for d in distances)
+
+    items, total = asyncio.run(group_service.search_groups(
+        db=db, latitude=CENTER[0], longitude=CENTER[1], distance=3.2, skip=0, limit=2
+    ))
+    assert total == 6
+    assert len(items) == 2
+
+
+def test_distance_ranking_widens_beyond_initial_radius(db):
+    merchants = _seed(db)
+
+    # 初始半径5km内只有10个商户，需要逐步扩大范围
+    items, total = asyncio.run(merchant_service.search_merchants(
+        db=db, latitude=CENTER[0], longitude=CENTER[1], sort_by="distance", sort_order="asc", skip=20, limit=5
+    ))
+    assert total == 30
+    assert [item["id"] for item in items] == [merchant.id for merchant in merchants[20:25]]
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = asyncio.run(merchant_service.search_merchants(
+            db=db, latitude=CENTER[0], longitude=CENTER[1], sort_by="distance", cursor=cursor, limit=7
+        ))
+        seen.extend(item["id"] for item in page.items)
+        cursor = page.next_cursor
+    assert seen == [merchant.id for merchant in merchants]
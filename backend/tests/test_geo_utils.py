@@ -0,0 +1,91 @@
+# tests/test_geo_utils.py
+import asyncio
+import random
+import timeit
+
+import numpy as np
+
+from app.models.merchant import Merchant
+from app.models.user import Address, User
+from app.services import location_service
+from app.utils.geo_utils import (
+    bounding_box_mask,
+    calculate_distance,
+    haversine_matrix,
+    haversine_one_to_many,
+    is_point_in_circle,
+    points_in_radius_mask,
+)
+
+
+def _random_points(n, seed=0):
+    rng = random.Random(seed)
+    return [rng.uniform(29.5, 30.5) for _ in range(n)], [rng.uniform(119.5, 120.5) for _ in range(n)]
+
+
+def test_vectorized_distances_match_scalar():
+    lats, lngs = _random_points(200)
+    distances = haversine_one_to_many(30.0, 120.0, lats, lngs)
+    expected = [calculate_distance(30.0, 120.0, lat, lng) for lat, lng in zip(lats, lngs)]
+    assert np.allclose(distances, expected)
+
+    matrix = haversine_matrix(lats[:5], lngs[:5], lats, lngs)
+    assert matrix.shape == (5, 200)
+    assert np.allclose(matrix[3], haversine_one_to_many(lats[3], lngs[3], lats, lngs))
+
+
+def test_radius_and_bounding_box_masks():
+    lats, lngs = _random_points(500, seed=1)
+    radius = 20.0
+    mask = points_in_radius_mask(30.0, 120.0, lats, lngs, radius)
+    expected = [is_point_in_circle(lat, lng, 30.0, 120.0, radius) for lat, lng in zip(lats, lngs)]
+    assert mask.tolist() == expected
+
+    # 外接矩形是圆的超集
+    box = bounding_box_mask(30.0, 120.0, lats, lngs, radius)
+    assert not np.any(mask & ~box)
+
+    # 每个点使用各自的半径
+    radii = [5.0] * 250 + [100.0] * 250
+    per_point = points_in_radius_mask(30.0, 120.0, lats, lngs, radii)
+    assert per_point[250:].all()
+
+
+def test_batch_delivery_fee_and_service_area(db):
+    user = User(open_id="geo-openid", nickname="tester")
+    db.add(user)
+    db.flush()
+    address = Address(
+        user_id=user.id, recipient="张三", phone="13800000000", province="浙江省",
+        city="杭州市", district="西湖区", detail="测试地址", latitude=30.0, longitude=120.0,
+    )
+    merchants = [
+        Merchant(name=f"商户{km}", status=1, latitude=30.0 + km / 111.195, longitude=120.0, service_radius=5.0)
+        for km in (1, 4, 8, 12)
+    ]
+    merchants.append(Merchant(name="无坐标商户", status=1))
+    db.add(address)
+    db.add_all(merchants)
+    db.commit()
+
+    ids = [merchant.id for merchant in merchants]
+    fees = asyncio.run(location_service.get_delivery_fees(ids, address.id, db))
+    assert [round(fees[merchant_id], 2) for merchant_id in ids] == [5.0, 7.0, 10.0, 12.0, 5.0]
+
+    for merchant_id in ids[:4]:
+        assert asyncio.run(location_service.get_delivery_fee(merchant_id, address.id, db)) == fees[merchant_id]
+
+    in_area = asyncio.run(location_service.check_in_service_areas(ids, 30.0, 120.0, db))
+    assert [in_area[merchant_id] for merchant_id in ids] == [True, True, False, False, False]
+
+
+if __name__ == "__main__":
+    # 微基准：对比逐个调用标量函数与一次批量计算
+    # 运行方式: PYTHONPATH=. python tests/test_geo_utils.py
+    for n in (100, 1000, 10000):
+        lats, lngs = _random_points(n)
+        scalar = timeit.timeit(
+            lambda: [calculate_distance(30.0, 120.0, lat, lng) for lat, lng in zip(lats, lngs)], number=20
+        ) / 20
+        vector = timeit.timeit(lambda: haversine_one_to_many(30.0, 120.0, lats, lngs), number=20) / 20
+        print(f"n={n:>6}  标量 {scalar * 1000:8.3f}ms  批量 {vector * 1000:8.3f}ms  加速 {scalar / vector:6.1f}x")
@@ -0,0 +1,112 @@
+# tests/test_group_join.py
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import Base  # noqa: E402
+from app.models.group import Group, GroupParticipant  # noqa: E402
+from app.services import group_join_service, group_service  # noqa: E402
+from app.services.group_join_service import GroupJoinBatcher  # noqa: E402
+
+
+def _seed(path, max_participants=None):
+    """在SQLite文件库中创建一个进行中的团购，返回会话工厂和团购ID"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30, "check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        group = Group(
+            merchant_id=1, product_id=1, title="热门团购", price=8, status=1,
+            min_participants=2, max_participants=max_participants, current_participants=0,
+            start_time=datetime.now(), end_time=datetime.now() + timedelta(days=1),
+        )
+        db.add(group)
+        db.commit()
+        group_id = group.id
+
+    return engine, Session, group_id
+
+
+async def _join_all(Session, group_id, user_ids):
+    """并发参与团购，返回每个请求的结果或异常"""
+    async def join(user_id):
+        with Session() as db:
+            return await group_service.join_group(db, group_id, user_id)
+
+    results = await asyncio.gather(*[join(user_id) for user_id in user_ids], return_exceptions=True)
+    await group_join_service.join_batcher.close()
+    return results
+
+
+@pytest.fixture
+def hot_group(tmp_path, monkeypatch):
+    engine, Session, group_id = _seed(tmp_path / "group.db", max_participants=30)
+    monkeypatch.setattr(group_join_service, "join_batcher", GroupJoinBatcher(session_factory=Session))
+    yield Session, group_id
+    engine.dispose()
+
+
+def test_concurrent_joins_respect_cap_and_single_leader(hot_group):
+    Session, group_id = hot_group
+
+    # 用户1重复提交三次
+    user_ids = [1, 1, 1] + list(range(2, 51))
+    results = asyncio.run(_join_all(Session, group_id, user_ids))
+
+    joined = [r for r in results if isinstance(r, dict)]
+    errors = [r.detail for r in results if isinstance(r, HTTPException)]
+    assert len(joined) == 30
+    assert errors.count("已参与该团购") == 2
+    assert errors.count("团购已满员") == len(user_ids) - 32
+    assert sum(r["is_leader"] for r in joined) == 1
+    assert sorted(r["current_participants"] for r in joined) == list(range(1, 31))
+
+    with Session() as db:
+        assert db.query(Group.current_participants).filter(Group.id == group_id).scalar() == 30
+        assert db.query(GroupParticipant).filter(GroupParticipant.is_leader.is_(True)).count() == 1
+        user_counts = db.query(GroupParticipant.user_id).distinct().count()
+        assert user_counts == db.query(GroupParticipant).count() == 30
+
+
+def test_rejoin_after_cancel(hot_group):
+    Session, group_id = hot_group
+
+    asyncio.run(_join_all(Session, group_id, [1, 2]))
+    with Session() as db:
+        assert asyncio.run(group_service.cancel_group_participation(db, group_id, 1))
+
+    results = asyncio.run(_join_all(Session, group_id, [1]))
+    assert results[0]["current_participants"] == 2
+    # 团长取消后由用户2接任，重新参与的用户不是团长
+    assert results[0]["is_leader"] is False
+
+
+async def _benchmark(Session, group_id, users):
+    """单个热门团购的并发参与吞吐量"""
+    for batch_size in (1, 200):
+        group_join_service.join_batcher = GroupJoinBatcher(session_factory=Session, batch_size=batch_size)
+        offset = batch_size * 100000
+        start = time.perf_counter()
+        results = await _join_all(Session, group_id, range(offset, offset + users))
+        elapsed = time.perf_counter() - start
+        assert all(isinstance(r, dict) for r in results)
+        print(f"每批{batch_size:>4}条: {users}人参与  {users / elapsed:8.1f} 次/秒")
+
+
+if __name__ == "__main__":
+    # 运行方式: python tests/test_group_join.py
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, group_id = _seed(os.path.join(tmp, "bench.db"))
+        asyncio.run(_benchmark(Session, group_id, 2000))
+        engine.dispose()
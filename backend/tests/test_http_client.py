@@ -0,0 +1,141 @@
+# tests/test_http_client.py
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.core.http_client import HttpClient
+
+
+class StubServer:
+    """本地HTTP桩服务，按路径模拟慢接口和失败接口"""
+
+    def __init__(self, delay: float = 0.2, fail_times: int = 0):
+        self.delay = delay
+        self.fail_times = fail_times
+        self.active = 0
+        self.max_active = 0
+        self.hits = 0
+
+    async def handle(self, reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        self.hits += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                status, body = "503 Service Unavailable", b"{}"
+            else:
+                status, body = "200 OK", json.dumps({"errcode": 0}).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+        await HttpClient.close()
+
+
+def test_event_loop_stays_responsive_under_slow_upstream(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_PER_HOST_LIMIT", 5)
+
+    async def main():
+        async with StubServer(delay=0.2) as stub:
+            # 预先创建客户端，加载SSL证书的一次性开销不计入心跳延迟
+            HttpClient.get_client()
+            lags = []
+
+            async def ticker():
+                # 事件循环被阻塞时，心跳间隔会明显变长
+                while True:
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.01)
+                    lags.append(time.perf_counter() - start - 0.01)
+
+            tick = asyncio.create_task(ticker())
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[HttpClient.get(stub.url) for _ in range(20)])
+            elapsed = time.perf_counter() - start
+            tick.cancel()
+
+            assert all(response.json() == {"errcode": 0} for response in responses)
+            # 20个请求按每个域名5个并发执行，约4轮
+            assert stub.max_active <= 5
+            assert elapsed < 20 * 0.2 / 2
+            assert max(lags) < 0.1
+            metrics = HttpClient.get_metrics()[stub.url.split("/")[2]]
+            assert metrics["requests"] == 20
+            assert metrics["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_idempotent_requests_retry_on_unavailable():
+    async def main():
+        async with StubServer(delay=0, fail_times=2) as stub:
+            response = await HttpClient.get(stub.url, retries=2)
+            assert response.status_code == 200
+            assert stub.hits == 3
+
+        # POST默认不重试，直接返回上游的失败响应
+        async with StubServer(delay=0, fail_times=1) as stub:
+            response = await HttpClient.post(stub.url, json={})
+            assert response.status_code == 503
+            assert stub.hits == 1
+
+    asyncio.run(main())
+
+
+def test_clients_of_finished_loops_are_closed():
+    import threading
+
+    closed = threading.Event()
+
+    async def handle(reader, writer):
+        # 保持长连接，客户端关闭连接时读到EOF
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}")
+        await writer.drain()
+        await reader.read()
+        closed.set()
+        writer.close()
+
+    server_loop = asyncio.new_event_loop()
+    started = threading.Event()
+    address = {}
+
+    def serve():
+        server = server_loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0))
+        address["url"] = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+        started.set()
+        server_loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait(5)
+    try:
+        # 第一个事件循环结束后遗留的长连接，在新的事件循环中使用客户端时关闭
+        assert asyncio.run(HttpClient.get(address["url"])).status_code == 200
+        assert not closed.is_set()
+
+        async def main():
+            HttpClient.get_client()
+            await HttpClient.close()
+
+        asyncio.run(main())
+        assert closed.wait(5)
+    finally:
+        server_loop.call_soon_threadsafe(server_loop.stop)
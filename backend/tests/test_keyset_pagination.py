@@ -0,0 +1,146 @@
+# tests/test_keyset_pagination.py
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import deps
+from app.models.merchant import Merchant
+from app.models.message import Message
+from app.models.product import Product
+from app.services import message_service, product_service
+from app.utils.pagination_utils import decode_cursor, encode_cursor
+
+
+def _walk(fetch, page_size):
+    """沿着next_cursor翻完所有页"""
+    ids, cursor = [], ""
+    while True:
+        page = fetch(cursor, page_size)
+        ids.extend(item["id"] if isinstance(item, dict) else item.id for item in page.items)
+        if not page.has_next:
+            return ids
+        cursor = page.next_cursor
+
+
+def test_cursor_round_trip():
+    values = [datetime(2024, 5, 1, 12, 30), 3.5, None, 42, Decimal("19.90")]
+    decoded = decode_cursor(encode_cursor(values))
+    assert decoded == values
+    # Decimal按字符串编码，不经过浮点数
+    assert isinstance(decoded[-1], Decimal) and str(decoded[-1]) == "19.90"
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_search_products_cursor_covers_all_rows(db):
+    merchant = Merchant(name="测试商户", status=1)
+    db.add(merchant)
+    db.flush()
+    # 相同的创建时间和价格，检验ID作为排序键兜底
+    created_at = datetime(2024, 1, 1)
+    for i in range(23):
+        db.add(Product(
+            merchant_id=merchant.id,
+            name=f"商品{i}",
+            thumbnail="",
+            original_price=20,
+            current_price=10 + i % 3,
+            stock=100,
+            status=1,
+            created_at=created_at,
+        ))
+    db.commit()
+
+    offset_items, total = asyncio.run(product_service.search_products(db=db, skip=0, limit=100))
+
+    def fetch(cursor, size):
+        return asyncio.run(product_service.search_products(db=db, cursor=cursor, limit=size))
+
+    ids = _walk(fetch, 5)
+    assert total == 23
+    assert ids == [item["id"] for item in offset_items]
+
+    def fetch_by_price(cursor, size):
+        return asyncio.run(product_service.search_products(
+            db=db, sort_by="current_price", sort_order="asc", cursor=cursor, limit=size
+        ))
+
+    ids = _walk(fetch_by_price, 4)
+    assert len(ids) == len(set(ids)) == 23
+    prices = [db.get(Product, product_id).current_price for product_id in ids]
+    assert prices == sorted(prices)
+
+
+def test_search_messages_cursor_with_total(db):
+    for i in range(7):
+        db.add(Message(user_id=1, title=f"消息{i}", content="内容", type="system", created_at=datetime(2024, 1, 1)))
+    db.commit()
+
+    page = asyncio.run(message_service.search_messages(db=db, user_id=1, cursor="", limit=3, with_total=True))
+    assert page.total == 7
+    assert page.has_next
+
+    def fetch(cursor, size):
+        return asyncio.run(message_service.search_messages(db=db, user_id=1, cursor=cursor, limit=size))
+
+    ids = _walk(fetch, 3)
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == 7
+
+
+def test_cursor_from_other_sort_is_bad_request(db):
+    merchant = Merchant(name="测试商户", status=1)
+    db.add(merchant)
+    db.flush()
+    for i in range(3):
+        db.add(Product(merchant_id=merchant.id, name=f"商品{i}", thumbnail="", original_price=20,
+                       current_price=10 + i, stock=100, status=1))
+    db.commit()
+    cursor = asyncio.run(product_service.search_products(db=db, cursor="", limit=1)).next_cursor
+
+    # 换了排序方式的游标可以解码，分页时才发现不匹配，由依赖转换为400
+    params = deps.get_cursor_params(cursor=cursor, with_total=False)
+    values = next(params)
+    with pytest.raises(HTTPException) as exc:
+        try:
+            asyncio.run(product_service.search_products(
+                db=db, sort_by="current_price", sort_order="asc", cursor=values["cursor"], limit=1
+            ))
+        except Exception as e:
+            params.throw(e)
+    assert exc.value.status_code == 400
+
+
+def test_product_endpoint_rejects_cursor_from_other_sort(db):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.api_v1.endpoints import products
+    from app.core.principal import UserPrincipal
+
+    merchant = Merchant(name="测试商户", status=1)
+    db.add(merchant)
+    db.flush()
+    for i in range(3):
+        db.add(Product(merchant_id=merchant.id, name=f"商品{i}", thumbnail="", original_price=20,
+                       current_price=10, stock=100, sales=i, status=1))
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    app.dependency_overrides[deps.get_async_db] = lambda: db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: UserPrincipal(
+        {"id": 1, "nickname": "tester", "is_active": True}
+    )
+    client = TestClient(app)
+
+    response = client.get("/products/", params={"sort_by": "sales", "sort_order": "desc", "cursor": "", "page_size": 1})
+    assert response.status_code == 200
+    cursor = response.json()["data"]["next_cursor"]
+
+    # 按销量排序的游标用于按创建时间排序，返回400而不是500
+    response = client.get("/products/", params={"sort_by": "created_at", "sort_order": "desc", "cursor": cursor})
+    assert response.status_code == 400
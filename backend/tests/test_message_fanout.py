@@ -0,0 +1,53 @@
+# tests/test_message_fanout.py
+import asyncio
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.merchant import Merchant
+from app.models.message import Message
+from app.models.user import User
+from app.schemas.message import MessageCreate
+from app.services import message_service, notification_service
+from app.utils import job_utils
+
+
+def test_fan_out_to_all_users_in_batches(db, query_counter, monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_FANOUT_BATCH_SIZE", 10)
+    db.add_all([User(open_id=f"fanout{i}", nickname=f"u{i}", is_active=i % 8 != 0) for i in range(25)])
+    db.commit()
+
+    data = MessageCreate(title="公告", content="系统维护", is_all_users=True, link_type="url", link_url="/notice")
+    with query_counter:
+        count = asyncio.run(message_service.create_bulk_messages(db, data))
+    # 每批：查询一段接收者ID + 一条 INSERT ... SELECT
+    assert count == 21
+    assert query_counter.count == 6
+
+    messages = db.query(Message).order_by(Message.user_id).all()
+    active_ids = [user.id for user in db.query(User).filter(User.is_active == True).order_by(User.id)]
+    assert [m.user_id for m in messages] == active_ids
+    assert all(m.title == "公告" and m.link_url == "/notice" and m.is_read is False for m in messages)
+    assert all(m.merchant_id is None and m.created_at is not None for m in messages)
+
+    metrics = {m["name"]: m for m in job_utils.get_job_metrics()}["message_fanout:users"]
+    assert (metrics["scanned"], metrics["updated"], metrics["batches"]) == (21, 21, 3)
+
+
+def test_system_notification_to_id_lists(engine, db, query_counter, monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_FANOUT_BATCH_SIZE", 4)
+    monkeypatch.setattr(notification_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    merchants = [Merchant(name=f"商户{i}", status=1) for i in range(3)]
+    db.add_all(merchants)
+    db.commit()
+    merchant_ids = [m.id for m in merchants]
+
+    with query_counter:
+        asyncio.run(notification_service._send_system_notification_task(
+            "通知", "内容", user_ids=list(range(1, 10)) + [3], merchant_ids=merchant_ids
+        ))
+    # 9个用户分3批、3个商户1批，每批一条批量插入
+    assert query_counter.count == 4
+
+    assert db.query(Message).filter(Message.user_id.isnot(None)).count() == 9
+    assert sorted(m.merchant_id for m in db.query(Message).filter(Message.merchant_id.isnot(None))) == merchant_ids
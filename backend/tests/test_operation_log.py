@@ -0,0 +1,66 @@
+# tests/test_operation_log.py
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.admin import OperationLog
+from app.services import admin_service
+from app.services.admin_service import OperationLogWriter
+
+
+def test_logs_are_queued_and_written_in_batches(engine, db, query_counter, monkeypatch):
+    writer = OperationLogWriter(sessionmaker(bind=engine, autoflush=False), batch_size=4, max_wait=1)
+    monkeypatch.setattr(admin_service, "operation_log_writer", writer)
+
+    async def log_actions():
+        for i in range(10):
+            assert await admin_service.add_operation_log(
+                db, operator_id=1, operator_type="admin", module="product", action=f"update-{i}",
+                request_params={"id": i}
+            )
+        # 请求中不执行SQL，停止时写完队列
+        assert query_counter.count == 0
+        await writer.close()
+
+    with query_counter:
+        asyncio.run(log_actions())
+    # 4 + 4 + 2 条，每批一条多行INSERT
+    assert query_counter.count == 3
+    assert writer.get_stats() == {"queued": 0, "written": 10, "dropped": 0, "failed": 0}
+    rows = db.query(OperationLog).order_by(OperationLog.id).all()
+    assert [row.action for row in rows] == [f"update-{i}" for i in range(10)]
+    assert rows[3].request_params == {"id": 3} and rows[0].operation_time is not None
+
+
+def test_full_queue_drops_after_timeout(engine, db):
+    writer = OperationLogWriter(sessionmaker(bind=engine, autoflush=False), queue_size=2, put_timeout=0)
+
+    async def flood():
+        # 放入队列不让出事件循环，后台任务来不及写入
+        accepted = [await writer.submit({"module": "m", "action": str(i)}) for i in range(5)]
+        await writer.close()
+        return accepted
+
+    assert asyncio.run(flood()) == [True, True, False, False, False]
+    assert writer.get_stats()["dropped"] == 3 and writer.written == 2
+    assert db.query(OperationLog).count() == 2
+
+
+def test_operation_logs_keyset_pagination(db):
+    same_time = datetime(2024, 5, 1, 12, 0, 0)
+    db.add_all([OperationLog(module="order", action=f"a{i}", operation_time=same_time if i < 4 else datetime(2024, 5, 2))
+                for i in range(6)])
+    db.add(OperationLog(module="user", action="other", operation_time=datetime(2024, 5, 3)))
+    db.commit()
+
+    actions, cursor = [], ""
+    while cursor is not None:
+        page = asyncio.run(admin_service.get_operation_logs(db, module="order", cursor=cursor, limit=4))
+        actions += [log.action for log in page.items]
+        cursor = page.next_cursor
+    # 操作时间相同时按ID倒序，翻页不重复不遗漏
+    assert actions == ["a5", "a4", "a3", "a2", "a1", "a0"]
+
+    logs, total = asyncio.run(admin_service.get_operation_logs(db, module="order", skip=4, limit=4))
+    assert total == 6 and [log.action for log in logs] == ["a1", "a0"]
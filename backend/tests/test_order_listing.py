@@ -0,0 +1,93 @@
+# tests/test_order_listing.py
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.group import Group
+from app.models.merchant import Merchant
+from app.models.order import Order, OrderItem, Payment
+from app.models.user import Address, User
+from app.services import order_service
+
+
+def _seed(db):
+    user = User(open_id="orders-user", nickname="u")
+    merchants = [Merchant(name=f"商户{i}", logo=f"{i}.png", status=1) for i in range(3)]
+    db.add_all([user, *merchants])
+    db.flush()
+    address = Address(user_id=user.id, recipient="张三", phone="1", province="北京", city="北京",
+                      district="朝阳", detail="1号")
+    group = Group(merchant_id=merchants[0].id, product_id=1, title="拼团", price=8, status=1,
+                  min_participants=2, current_participants=1,
+                  start_time=datetime.now(), end_time=datetime.now() + timedelta(days=1))
+    db.add_all([address, group])
+    db.flush()
+    created = datetime.now() - timedelta(hours=1)
+    for i in range(9):
+        order = Order(order_no=f"ORD{i:04d}", user_id=user.id, merchant_id=merchants[i % 3].id,
+                      address_id=address.id, group_id=group.id if i == 0 else None, total_amount=10,
+                      actual_amount=10, status=i % 2, buyer_comment="尽快发货" if i == 4 else None,
+                      created_at=created + timedelta(minutes=i))
+        db.add(order)
+        db.flush()
+        db.add_all([
+            OrderItem(order_id=order.id, product_id=1, product_name=name, price=5, quantity=1, subtotal=5)
+            for name in (["有机牛奶", "全麦面包"] if i == 3 else [f"商品{i}", "赠品"])
+        ])
+        db.add(Payment(order_id=order.id, payment_no=f"PAY{i}", amount=10, method="wechat", status=1))
+    db.commit()
+    return user.id
+
+
+def test_order_list_and_detail_fixed_queries(db, query_counter):
+    user_id = _seed(db)
+    first_id = db.query(Order.id).filter(Order.order_no == "ORD0000").scalar()
+
+    with query_counter:
+        orders, total = asyncio.run(order_service.search_orders(db, user_id=user_id, skip=0, limit=20))
+    # 总数 + 订单 + 订单项 + 商户，与每页订单数无关
+    assert query_counter.count == 4
+    assert total == 9
+    assert [order["order_no"] for order in orders] == [f"ORD{i:04d}" for i in range(8, -1, -1)]
+    assert orders[-1]["merchant_name"] == "商户0" and orders[-1]["merchant_logo"] == "0.png"
+    assert [item["product_name"] for item in orders[-1]["items"]] == ["商品0", "赠品"]
+    assert orders[-1]["countdown_seconds"] == 0 and orders[-2]["countdown_seconds"] is None
+
+    with query_counter:
+        page = asyncio.run(order_service.search_orders(db, user_id=user_id, cursor="", limit=4))
+    assert query_counter.count == 3
+    assert len(page.items) == 4 and page.has_next
+
+    with query_counter:
+        detail = asyncio.run(order_service.get_order(db, first_id, user_id=user_id))
+    # 订单JOIN商户、地址、团购 + 订单项 + 支付记录
+    assert query_counter.count == 3
+    assert detail["merchant_name"] == "商户0"
+    assert detail["address"]["recipient"] == "张三"
+    assert detail["group"]["title"] == "拼团"
+    assert [item["product_name"] for item in detail["items"]] == ["商品0", "赠品"]
+    assert [payment["payment_no"] for payment in detail["payments"]] == ["PAY0"]
+
+
+def test_keyword_search_uses_backfilled_search_text(engine, db, monkeypatch):
+    monkeypatch.setattr(order_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(settings, "JOB_CHECKPOINT_ENABLED", False)
+    user_id = _seed(db)
+    updated_at = dict(db.query(Order.id, Order.updated_at).all())
+
+    assert asyncio.run(order_service.backfill_order_search_text(batch_size=4)) == 9
+    assert asyncio.run(order_service.backfill_order_search_text()) == 0
+    db.expire_all()
+    assert dict(db.query(Order.id, Order.updated_at).all()) == updated_at
+    assert db.query(Order.search_text).filter(Order.order_no == "ORD0003").scalar() == "ORD0003 有机牛奶 全麦面包"
+
+    def keyword_search(keyword):
+        orders, _ = asyncio.run(order_service.search_orders(db, user_id=user_id, keyword=keyword))
+        return [order["order_no"] for order in orders]
+
+    assert keyword_search("牛奶") == ["ORD0003"]
+    assert keyword_search("尽快") == ["ORD0004"]
+    assert keyword_search("ord0007") == ["ORD0007"]
+    assert len(keyword_search("赠品")) == 8
@@ -0,0 +1,90 @@
+# tests/test_principal.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import deps
+from app.core.principal import invalidate_user_principal
+from app.core.security import create_access_token
+from app.models.admin import Admin
+from app.models.user import User
+from app.schemas.admin import AdminUpdate
+from app.schemas.user import UserUpdate
+from app.services import admin_service, user_service
+
+
+def test_current_user_served_from_cache(db, query_counter):
+    user = User(open_id="principal-openid", nickname="旧昵称", phone="13800000000", merchant_id=None)
+    db.add(user)
+    db.commit()
+    token = create_access_token(user.id)
+    db.expunge_all()
+
+    with query_counter:
+        first = asyncio.run(deps.get_current_user(db=db, token=token))
+    assert query_counter.count == 1
+
+    db.expunge_all()
+    with query_counter:
+        principal = asyncio.run(deps.get_current_user(db=db, token=token))
+        assert (principal.id, principal.nickname, principal.merchant_id) == (user.id, "旧昵称", None)
+    # 缓存命中时不访问数据库
+    assert query_counter.count == 0
+
+    # 访问快照之外的属性时加载完整用户
+    with query_counter:
+        assert principal.phone == "13800000000"
+        assert principal.phone == "13800000000"
+    assert query_counter.count == 1
+    assert first.phone == "13800000000"
+
+    asyncio.run(user_service.update_user_profile(db, user.id, UserUpdate(nickname="新昵称")))
+    assert asyncio.run(deps.get_current_user(db=db, token=token)).nickname == "新昵称"
+
+    # 禁用后使快照失效
+    db.query(User).filter(User.id == user.id).update({User.is_active: False})
+    db.commit()
+    invalidate_user_principal(user.id)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(deps.get_current_user(db=db, token=token))
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(deps.get_current_user(db=db, token=create_access_token(user.id + 100)))
+    assert exc.value.status_code == 404
+
+
+def test_current_admin_invalidated_on_update(db):
+    admin = Admin(username="root", hashed_password="x", role="admin", is_active=True)
+    db.add(admin)
+    db.commit()
+    token = create_access_token(admin.id)
+
+    assert asyncio.run(deps.get_current_admin(db=db, token=token)).username == "root"
+    asyncio.run(admin_service.update_admin(db, admin.id, AdminUpdate(is_active=False)))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(deps.get_current_admin(db=db, token=token))
+    assert exc.value.status_code == 403
+
+
+def test_principal_cache_miss_queries_off_event_loop(engine, db):
+    import threading
+
+    from sqlalchemy import event
+
+    user = User(open_id="thread-openid", nickname="线程", merchant_id=None)
+    db.add(user)
+    db.commit()
+    token = create_access_token(user.id)
+    db.expunge_all()
+
+    threads = []
+    record = lambda *args: threads.append(threading.get_ident())
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        asyncio.run(deps.get_current_user(db=db, token=token))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # 缓存未命中时的查询不在事件循环线程中执行
+    assert threads and threading.get_ident() not in threads
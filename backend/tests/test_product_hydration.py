@@ -0,0 +1,101 @@
+# tests/test_product_hydration.py
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.category import Category, product_categories
+from app.models.group import Group
+from app.models.merchant import Merchant
+from app.models.product import Product
+from app.models.user import Favorite, User
+from app.services import product_service
+
+
+def _seed(db, product_count):
+    """创建商户、分类、商品、收藏和团购测试数据"""
+    merchant = Merchant(name="测试商户", status=1)
+    category = Category(name="水果")
+    user = User(open_id="test-openid", nickname="tester")
+    db.add_all([merchant, category, user])
+    db.flush()
+
+    products = []
+    for i in range(product_count):
+        product = Product(
+            merchant_id=merchant.id,
+            name=f"商品{i}",
+            thumbnail="",
+            original_price=20,
+            current_price=10,
+            stock=100,
+            status=1,
+        )
+        db.add(product)
+        products.append(product)
+    db.flush()
+
+    for i, product in enumerate(products):
+        db.execute(product_categories.insert().values(product_id=product.id, category_id=category.id))
+        if i % 2 == 0:
+            db.add(Favorite(user_id=user.id, product_id=product.id))
+        if i % 3 == 0:
+            db.add(Group(
+                merchant_id=merchant.id,
+                product_id=product.id,
+                title=f"团购{i}",
+                price=8,
+                status=1,
+                start_time=datetime.now(),
+                end_time=datetime.now() + timedelta(days=1),
+            ))
+    db.commit()
+    return user, products
+
+
+def _search(db, user_id, limit):
+    return asyncio.run(product_service.search_products(db=db, user_id=user_id, skip=0, limit=limit))
+
+
+def test_search_products_query_count_is_constant(db, query_counter):
+    user, _ = _seed(db, 40)
+    user_id = user.id
+
+    with query_counter:
+        items, total = _search(db, user_id, 5)
+    small_page_queries = query_counter.count
+
+    with query_counter:
+        items, total = _search(db, user_id, 40)
+    large_page_queries = query_counter.count
+
+    assert total == 40
+    assert len(items) == 40
+    assert large_page_queries == small_page_queries
+    # 计数 + 分页 + 商户 + 分类 + 收藏数 + 用户收藏 + 团购
+    assert large_page_queries <= 7
+
+
+def test_search_products_hydrates_fields(db):
+    user, products = _seed(db, 6)
+
+    items, _ = _search(db, user.id, 10)
+    by_id = {item["id"]: item for item in items}
+
+    for i, product in enumerate(products):
+        item = by_id[product.id]
+        assert item["merchant_name"] == "测试商户"
+        assert [c["name"] for c in item["categories"]] == ["水果"]
+        assert item["is_favorite"] == (i % 2 == 0)
+        assert item["favorite_count"] == (1 if i % 2 == 0 else 0)
+        assert item["has_group"] == (i % 3 == 0)
+
+
+def test_get_product_uses_shared_hydration(db):
+    user, products = _seed(db, 1)
+
+    detail = asyncio.run(product_service.get_product(db, products[0].id, user.id))
+
+    assert detail["merchant_name"] == "测试商户"
+    assert detail["is_favorite"] is True
+    assert detail["has_group"] is True
+    assert detail["views"] == 1
+    assert detail["images"] == [] and detail["specifications"] == []
@@ -0,0 +1,74 @@
+# tests/test_recommend.py
+import asyncio
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.category import Category
+from app.models.merchant import Merchant
+from app.models.order import Order, OrderItem
+from app.models.product import Product, ProductRelation
+from app.services import product_service, recommend_service
+
+
+def _seed(db):
+    merchants = [Merchant(name=name, status=1) for name in ("果园", "超市")]
+    fruit, snack = Category(name="水果"), Category(name="零食")
+    db.add_all([*merchants, fruit, snack])
+    db.flush()
+    rows = [
+        ("苹果", 0, [fruit], 10, 1), ("香蕉", 0, [fruit], 50, 1), ("薯片", 1, [snack], 30, 1),
+        ("橙子", 1, [fruit], 5, 1), ("下架水果", 0, [fruit], 80, 0), ("可乐", 1, [], 100, 1),
+    ]
+    products = []
+    for name, merchant, categories, sales, status in rows:
+        product = Product(merchant_id=merchants[merchant].id, name=name, thumbnail="", original_price=10,
+                          current_price=8, sales=sales, status=status, categories=categories)
+        db.add(product)
+        products.append(product)
+    db.flush()
+    apple, _, chips, orange, offline, _ = products
+    baskets = [([apple, chips], 1), ([apple, chips], 2), ([apple, chips], 3), ([apple, offline], 1),
+               ([apple, orange], 4)]
+    for i, (basket, status) in enumerate(baskets):
+        order = Order(order_no=f"R{i}", user_id=1, merchant_id=merchants[0].id, status=status)
+        db.add(order)
+        db.flush()
+        db.add_all([OrderItem(order_id=order.id, product_id=p.id, product_name=p.name, price=8, quantity=1,
+                              subtotal=8) for p in basket])
+    db.commit()
+    return [product.id for product in products]
+
+
+def test_related_products_from_precomputed_table(engine, db, query_counter, monkeypatch):
+    monkeypatch.setattr(recommend_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(settings, "JOB_CHECKPOINT_ENABLED", False)
+    apple, banana, chips, orange, offline, cola = _seed(db)
+
+    def related_names(product_id, limit=4):
+        return [item["name"] for item in asyncio.run(product_service.get_related_products(db, product_id, limit))]
+
+    # 尚未计算时用热销商品补充，不含下架商品和自身
+    assert related_names(apple) == ["可乐", "香蕉", "薯片", "橙子"]
+
+    assert asyncio.run(recommend_service.rebuild_product_relations(batch_size=2)) > 0
+    relations = db.query(ProductRelation).filter(ProductRelation.product_id == apple).all()
+    by_id = {relation.related_product_id: relation for relation in relations}
+    # 共同购买3单（已取消的订单不计），相似度 3 / sqrt(4 * 3)
+    assert by_id[chips].co_order_count == 3 and abs(by_id[chips].score - 3 / 12 ** 0.5) < 1e-6
+    assert orange in by_id and by_id[orange].co_order_count == 0
+    assert offline not in by_id and cola not in by_id
+
+    # 共同购买 > 同分类同商户 > 同分类，不足时用热销商品补充
+    with query_counter:
+        items = asyncio.run(product_service.get_related_products(db, apple, 4))
+    assert query_counter.count == 1
+    assert [item["name"] for item in items] == ["薯片", "香蕉", "橙子", "可乐"]
+    assert items[0]["merchant_name"] == "超市"
+    assert related_names(chips, limit=2) == ["苹果", "可乐"]
+
+    # 重新计算时替换旧结果
+    db.query(Product).filter(Product.id == orange).update({"status": 0})
+    db.commit()
+    asyncio.run(recommend_service.rebuild_product_relations())
+    assert db.query(ProductRelation).filter(ProductRelation.related_product_id == orange).count() == 0
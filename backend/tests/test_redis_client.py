@@ -0,0 +1,157 @@
+# tests/test_redis_client.py
+import asyncio
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.core.redis import AsyncRedisClient, RedisClient, get_serializer, msgpack, orjson  # noqa: E402
+from app.utils.cache_utils import TwoTierCache  # noqa: E402
+
+
+def _redis_available() -> bool:
+    try:
+        socket.create_connection((settings.REDIS_HOST, settings.REDIS_PORT), timeout=0.2).close()
+        return True
+    except OSError:
+        return False
+
+
+requires_redis = pytest.mark.skipif(not _redis_available(), reason="需要可连接的Redis服务")
+
+
+@pytest.mark.parametrize("name", [
+    "json",
+    pytest.param("orjson", marks=pytest.mark.skipif(orjson is None, reason="未安装orjson")),
+    pytest.param("msgpack", marks=pytest.mark.skipif(msgpack is None, reason="未安装msgpack")),
+])
+def test_serializers_round_trip(name):
+    serializer = get_serializer(name)
+    value = {"id": 1, "name": "商品", "tags": ["热卖"], "created_at": datetime(2024, 5, 1, 8, 30)}
+    # 日期时间与JSONEncoder格式一致
+    assert serializer.loads(serializer.dumps(value)) == {**value, "created_at": "2024-05-01 08:30:00"}
+
+    if not serializer.binary:
+        # 字符串和数字原样写入，读取时能解析为JSON的返回解析结果
+        assert serializer.dumps("token") == "token"
+        assert serializer.loads("token") == "token"
+        assert serializer.loads(str(serializer.dumps(42))) == 42
+
+
+def test_json_serializer_keeps_bool_and_none():
+    serializer = get_serializer("json")
+    for value in (True, False, None):
+        assert serializer.loads(serializer.dumps(value)) is value
+
+
+@pytest.mark.skipif(msgpack is None, reason="未安装msgpack")
+def test_msgpack_reads_incr_counters():
+    serializer = get_serializer("msgpack")
+    # INCR写入的是十进制文本，不能按msgpack的fixint解析
+    assert serializer.loads(b"5") == 5
+    assert serializer.loads(b"-12") == -12
+    # 写入的整数与INCR格式一致，可以继续递增
+    assert serializer.dumps(42) == b"42"
+    assert serializer.loads(serializer.dumps(42)) == 42
+    assert serializer.loads(serializer.dumps(3.5)) == 3.5
+    assert serializer.loads(serializer.dumps(True)) is True
+
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        get_serializer("pickle")
+
+
+@requires_redis
+def test_batch_operations():
+    keys = [f"test:redis_client:{i}" for i in range(3)]
+    assert RedisClient.mset({key: {"i": i} for i, key in enumerate(keys)}, expire={keys[0]: 60, keys[1]: 120})
+    assert RedisClient.mget(keys + ["test:redis_client:missing"]) == [{"i": 0}, {"i": 1}, {"i": 2}, None]
+    assert 0 < RedisClient.ttl(keys[0]) <= 60 and RedisClient.ttl(keys[2]) == -1
+
+    assert RedisClient.hset_many("test:redis_client:hash", {"a": 1, "b": {"x": [1, 2]}}, expire=60)
+    assert RedisClient.hgetall_many(["test:redis_client:hash", "test:redis_client:none"]) == [
+        {"a": 1, "b": {"x": [1, 2]}}, {}
+    ]
+
+    with RedisClient.pipeline() as pipe:
+        for key in keys + ["test:redis_client:hash"]:
+            pipe.delete(key)
+    assert RedisClient.mget(keys) == [None, None, None]
+
+
+def test_async_client_per_loop_and_unavailable_fallback(monkeypatch):
+    # 指向没有服务的端口，连接立即被拒绝
+    monkeypatch.setattr(settings, "REDIS_PORT", 1)
+    monkeypatch.setattr(settings, "CACHE_L2_ENABLED", True)
+    cache = TwoTierCache("test_async")
+    clients = []
+
+    async def loader():
+        return {"id": 1}
+
+    async def main():
+        client = AsyncRedisClient.get_client()
+        assert AsyncRedisClient.get_client() is client
+        clients.append(client)
+        pool = client.connection_pool
+        assert (pool.max_connections, pool.timeout) == (settings.REDIS_MAX_CONNECTIONS, settings.REDIS_POOL_TIMEOUT)
+        assert pool.connection_kwargs["health_check_interval"] == settings.REDIS_HEALTH_CHECK_INTERVAL
+
+        # 命令失败时与同步客户端一样返回默认值
+        assert await AsyncRedisClient.get("test:async") is None
+        assert await AsyncRedisClient.set("test:async", 1, 60) is False
+        assert await AsyncRedisClient.mget(["a", "b"]) == [None, None]
+        assert await AsyncRedisClient.ping() is False
+
+        # Redis不可用时缓存退回L1，并在重试间隔内不再访问L2
+        assert await cache.get_or_load("k", loader, ttl=60) == {"id": 1}
+        assert await cache.aget("k") == {"id": 1}
+        await AsyncRedisClient.close()
+
+    asyncio.run(main())
+    asyncio.run(main())
+    # 每个事件循环使用独立的连接池
+    assert clients[0] is not clients[1]
+    assert cache.stats.l2_errors == 1
+
+
+def _benchmark(count=1000):
+    """对比逐个读写与批量读写的耗时"""
+    keys = [f"bench:redis_client:{i}" for i in range(count)]
+    value = {"id": 1, "nickname": "用户", "is_active": True, "merchant_id": None}
+
+    def measure(name, func):
+        start = time.perf_counter()
+        func()
+        print(f"{name}: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    measure(f"逐个SET EX x{count}", lambda: [RedisClient.set(key, value, 60) for key in keys])
+    measure(f"mset x{count}", lambda: RedisClient.mset({key: value for key in keys}, expire=60))
+    measure(f"逐个GET x{count}", lambda: [RedisClient.get(key) for key in keys])
+    measure(f"mget x{count}", lambda: RedisClient.mget(keys))
+    for name in ("json", "orjson", "msgpack"):
+        try:
+            RedisClient.set_serializer(name)
+        except ModuleNotFoundError as e:
+            print(e)
+            continue
+        measure(f"{name}: mset+mget x{count}", lambda: (RedisClient.mset({key: value for key in keys}, 60), RedisClient.mget(keys)))
+    RedisClient.set_serializer(settings.REDIS_SERIALIZER)
+    with RedisClient.pipeline() as pipe:
+        for key in keys:
+            pipe.delete(key)
+
+
+if __name__ == "__main__":
+    # 运行方式: python tests/test_redis_client.py （需要可连接的Redis服务）
+    if not _redis_available():
+        print(f"无法连接Redis {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+    else:
+        _benchmark()
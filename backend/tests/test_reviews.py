@@ -0,0 +1,89 @@
+# tests/test_reviews.py
+import asyncio
+
+from app.models.merchant import Merchant
+from app.models.product import Product
+from app.models.review import ProductReviewSummary, Review, ReviewImage
+from app.models.user import User
+from app.services import review_service
+
+
+def _seed(db):
+    merchant = Merchant(name="鲜果铺", status=1)
+    users = [User(open_id=f"review-user-{i}", nickname=f"用户{i}", avatar_url=f"{i}.png") for i in range(3)]
+    db.add_all([merchant, *users])
+    db.flush()
+    products = [Product(merchant_id=merchant.id, name=f"商品{i}", thumbnail=f"p{i}.jpg", original_price=20,
+                        current_price=10, stock=5, status=1) for i in range(2)]
+    db.add_all(products)
+    db.flush()
+    reviews = []
+    for i in range(8):
+        review = Review(user_id=users[i % 3].id, product_id=products[i % 2].id, rating=5 - i % 3,
+                        content=f"评价{i}", is_anonymous=i == 1, status=1)
+        db.add(review)
+        db.flush()
+        reviews.append(review)
+        if i % 2 == 0:
+            db.add_all([ReviewImage(review_id=review.id, image_url=f"r{i}-{n}.jpg", sort_order=-n)
+                        for n in range(2)])
+    db.commit()
+    return products[0].id, [review.id for review in reviews]
+
+
+def test_review_page_fixed_queries_and_image_filter(db, query_counter):
+    product_id, review_ids = _seed(db)
+
+    with query_counter:
+        reviews, total = asyncio.run(review_service.search_reviews(db, skip=0, limit=20))
+    # 总数 + 评价 + 图片 + 用户 + 商品JOIN商户，与每页评价数无关
+    assert query_counter.count == 5
+    assert total == 8
+    by_id = {review["id"]: review for review in reviews}
+    first = by_id[review_ids[0]]
+    assert first["user"]["nickname"] == "用户0" and first["product_image"] == "p0.jpg"
+    assert first["merchant_name"] == "鲜果铺"
+    assert [image["image_url"] for image in first["images"]] == ["r0-1.jpg", "r0-0.jpg"]
+    assert by_id[review_ids[1]]["user"]["nickname"] == "匿名用户"
+
+    with query_counter:
+        page = asyncio.run(review_service.search_reviews(db, cursor="", limit=3))
+    assert query_counter.count == 4
+    assert len(page.items) == 3 and page.has_next
+
+    reviews, total = asyncio.run(review_service.search_reviews(db, has_image=True))
+    assert total == 4 and sorted(review["id"] for review in reviews) == review_ids[0::2]
+    reviews, total = asyncio.run(review_service.search_reviews(db, product_id=product_id, has_image=False))
+    assert total == 0
+
+    detail = asyncio.run(review_service.get_review(db, review_ids[2]))
+    assert detail["images"] == [
+        {"id": image["id"], "image_url": image["image_url"], "sort_order": image["sort_order"]}
+        for image in detail["images"]
+    ]
+    assert [image["sort_order"] for image in detail["images"]] == [-1, 0]
+
+
+def test_review_summary_follows_status_changes(db):
+    product_id, review_ids = _seed(db)
+    stats = asyncio.run(review_service.get_product_review_stats(db, product_id))
+    # 商品0的评价：5、3、4、5星，均带图
+    assert stats["total_count"] == 4 and stats["image_count"] == 4
+    assert stats["rating_counts"] == {"1": 0, "2": 0, "3": 1, "4": 1, "5": 2}
+
+    asyncio.run(review_service.update_review_status(db, review_ids[0], 2))
+    summary = db.get(ProductReviewSummary, product_id)
+    assert summary.review_count == 3 and summary.rating_5_count == 1
+    assert (summary.image_count, summary.good_count, summary.rating_sum) == (3, 2, 12)
+    # 商户评分为全部已审核评价的平均值
+    merchant_id = db.get(Product, product_id).merchant_id
+    assert db.get(Merchant, merchant_id).rating == sum(5 - i % 3 for i in range(1, 8)) / 7
+    # 重复设置相同状态不改变汇总
+    asyncio.run(review_service.update_review_status(db, review_ids[0], 0))
+    db.refresh(summary)
+    assert summary.review_count == 3
+    stats = asyncio.run(review_service.get_product_review_stats(db, product_id))
+    assert stats["total_count"] == 3 and stats["avg_rating"] == 4.0
+
+    asyncio.run(review_service.update_review_status(db, review_ids[0], 1))
+    assert asyncio.run(review_service.get_product_review_stats(db, product_id))["rating_counts"]["5"] == 2
@@ -0,0 +1,74 @@
+# tests/test_scheduler.py
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app.core.scheduler import CronTrigger, IntervalTrigger, Scheduler
+
+
+def test_cron_trigger_next_run():
+    trigger = CronTrigger("*/15 2-3 * * *")
+    assert trigger.next_run(datetime(2024, 5, 1, 1, 59)) == datetime(2024, 5, 1, 2, 0)
+    assert trigger.next_run(datetime(2024, 5, 1, 2, 0)) == datetime(2024, 5, 1, 2, 15)
+    assert trigger.next_run(datetime(2024, 5, 1, 3, 45)) == datetime(2024, 5, 2, 2, 0)
+
+    # 每年12月31日23:59，跨年
+    assert CronTrigger("59 23 31 12 *").next_run(datetime(2024, 12, 31, 23, 59)) == datetime(2025, 12, 31, 23, 59)
+    # 周日（0和7都表示周日）
+    assert CronTrigger("0 8 * * 7").next_run(datetime(2024, 5, 1)) == datetime(2024, 5, 5, 8, 0)
+    # 日和周同时限制时满足其一即可
+    assert CronTrigger("0 0 10 * 1").next_run(datetime(2024, 5, 1)) == datetime(2024, 5, 6, 0, 0)
+
+    with pytest.raises(ValueError):
+        CronTrigger("61 * * * *")
+    with pytest.raises(ValueError):
+        CronTrigger("* * *")
+
+
+def test_interval_jobs_respect_max_instances():
+    calls = {"fast": 0, "slow": 0}
+
+    async def fast():
+        calls["fast"] += 1
+        return 3
+
+    async def slow():
+        calls["slow"] += 1
+        # 同步阻塞操作在线程中运行，不影响其他任务
+        time.sleep(0.25)
+        return calls["slow"]
+
+    async def main():
+        scheduler = Scheduler()
+        scheduler.add_job("fast", fast, IntervalTrigger(0.05, jitter=0.01))
+        scheduler.add_job("slow", slow, IntervalTrigger(0.05), max_instances=1)
+        scheduler.start()
+        await asyncio.sleep(0.6)
+        await scheduler.stop()
+        return {job["name"]: job for job in scheduler.get_status()}
+
+    status = asyncio.run(main())
+    assert status["fast"]["run_count"] >= 5
+    assert status["fast"]["last_result"] == 3
+    assert status["fast"]["last_duration_ms"] is not None
+    # 慢任务运行期间的触发被跳过
+    assert 2 <= status["slow"]["run_count"] <= 3
+    assert status["slow"]["skipped_count"] >= 3
+    assert status["slow"]["running"] == 0
+
+
+def test_run_job_records_errors():
+    async def broken():
+        raise RuntimeError("数据库不可用")
+
+    async def main():
+        scheduler = Scheduler()
+        scheduler.add_job("broken", broken, IntervalTrigger(3600), in_thread=False)
+        assert await scheduler.run_job("broken") is None
+        return scheduler.get_status()[0]
+
+    status = asyncio.run(main())
+    assert status["error_count"] == 1
+    assert status["last_error"] == "数据库不可用"
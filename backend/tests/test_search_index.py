@@ -0,0 +1,187 @@
+# tests/test_search_index.py
+import asyncio
+import os
+import random
+import time
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.merchant import Merchant
+from app.models.product import Product
+from app.services import merchant_service, product_service, search_service
+from app.utils.search_utils import InvertedIndex, query_terms, tokenize
+
+
+def test_tokenize_cjk_bigrams_and_words():
+    assert tokenize("iPhone15 手机壳") == ["iphone15", "手", "机", "壳", "手机", "机壳"]
+    # 全角字母数字归一化
+    assert tokenize("ＡＢＣ１２３") == ["abc123"]
+    assert query_terms("苹果手机 苹果") == ["苹果", "果手", "手机"]
+    assert query_terms("茶") == ["茶"]
+
+
+def test_bm25_ranking_updates_and_prefix():
+    index = InvertedIndex({"name": 3, "description": 1})
+    index.rebuild([
+        (1, {"name": "红富士苹果", "description": "新鲜水果"}),
+        (2, {"name": "苹果汁", "description": None}),
+        (3, {"name": "香蕉", "description": "产地直发，不是苹果"}),
+        (4, {"name": "Apple Watch", "description": "智能手表"}),
+    ])
+    assert index.ready and len(index) == 4
+
+    # 名称命中（权重3）排在描述命中之前，短名称排在长名称之前
+    assert [doc_id for doc_id, _ in index.search("苹果")] == [2, 1, 3]
+    # 所有查询词都要命中
+    assert [doc_id for doc_id, _ in index.search("苹果 水果")] == [1]
+    assert index.search("榴莲") == []
+    assert [doc_id for doc_id, _ in index.search("APPLE")] == [4]
+
+    # 最后一个词按前缀补全
+    assert index.search("app") == []
+    assert [doc_id for doc_id, _ in index.search("app", prefix=True)] == [4]
+    assert [doc_id for doc_id, _ in index.search("智能 手", prefix=True)] == [4]
+
+    index.add(2, {"name": "橙汁"})
+    assert [doc_id for doc_id, _ in index.search("苹果")] == [1, 3]
+    assert [doc_id for doc_id, _ in index.search("橙汁")] == [2]
+    index.remove(1)
+    index.remove(99)
+    assert [doc_id for doc_id, _ in index.search("苹果")] == [3]
+
+
+def test_compaction_keeps_results():
+    index = InvertedIndex({"name": 1})
+    index.rebuild((i, {"name": f"商品{i} 手机"}) for i in range(2000))
+    for i in range(1700):
+        index.remove(i)
+    assert len(index._doc_ids) < 1000
+    index.add(5, {"name": "手机壳"})
+    hits = index.search("手机", limit=1000)
+    assert sorted(doc_id for doc_id, _ in hits) == [5] + list(range(1700, 2000))
+
+
+def test_product_and_merchant_search_by_relevance(engine, db, monkeypatch):
+    monkeypatch.setattr(search_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    merchant = Merchant(name="鲜果铺", status=1, description="专营进口水果", address="北京市朝阳区")
+    other = Merchant(name="数码城", status=1, description="手机配件", address="上海市")
+    db.add_all([merchant, other])
+    db.flush()
+    names = [("苹果", None, 1), ("红富士苹果礼盒", "产地直发", 1), ("香梨", "比苹果更甜", 1), ("苹果干", None, 0)]
+    for name, description, status in names:
+        db.add(Product(merchant_id=merchant.id, name=name, description=description, thumbnail="",
+                       original_price=20, current_price=10, stock=5, status=status))
+    db.commit()
+    assert asyncio.run(search_service.refresh_search_indexes()) == 6
+
+    items, total = asyncio.run(product_service.search_products(db=db, keyword="苹果", status=1))
+    assert total == 3
+    assert [item["name"] for item in items] == ["苹果", "红富士苹果礼盒", "香梨"]
+
+    # 游标分页沿相关度顺序翻页
+    page = asyncio.run(product_service.search_products(db=db, keyword="苹果", status=1, cursor="", limit=2))
+    assert [item["name"] for item in page.items] == ["苹果", "红富士苹果礼盒"] and page.has_next
+    page = asyncio.run(product_service.search_products(
+        db=db, keyword="苹果", status=1, cursor=page.next_cursor, limit=2
+    ))
+    assert [item["name"] for item in page.items] == ["香梨"] and not page.has_next
+
+    # 指定排序字段时只用索引筛选
+    items, _ = asyncio.run(product_service.search_products(
+        db=db, keyword="苹果", sort_by="id", sort_order="desc"
+    ))
+    assert [item["name"] for item in items] == ["苹果干", "香梨", "红富士苹果礼盒", "苹果"]
+
+    merchants, total = asyncio.run(merchant_service.search_merchants(db, keyword="朝阳 水果"))
+    assert total == 1 and merchants[0]["name"] == "鲜果铺"
+
+    # 其他进程的修改由增量同步收录
+    db.query(Product).filter(Product.name == "香梨").update({"name": "雪梨"})
+    db.commit()
+    asyncio.run(search_service.refresh_search_indexes())
+    assert [i for i, _ in search_service.search_ids(Product, "雪梨")] == [3]
+
+    suggestions = asyncio.run(search_service.suggest(db, "product", "苹"))
+    assert [s["name"] for s in suggestions] == ["苹果", "红富士苹果礼盒", "雪梨"]
+
+
+def test_filters_apply_before_paging_beyond_chunk_size(engine, db, monkeypatch):
+    monkeypatch.setattr(search_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setattr(settings, "SEARCH_ID_CHUNK_SIZE", 5)
+    merchants = [Merchant(name=f"商户{i}", status=1) for i in range(2)]
+    db.add_all(merchants)
+    db.flush()
+    for i in range(11):
+        db.add(Product(merchant_id=merchants[0 if i < 10 else 1].id, name=f"苹果{i}", thumbnail="",
+                       original_price=20, current_price=10, stock=5, status=1))
+    db.add(Product(merchant_id=merchants[0].id, name="iPhone15 手机", thumbnail="", original_price=20,
+                   current_price=10, stock=5, status=1))
+    db.commit()
+    asyncio.run(search_service.refresh_search_indexes())
+
+    # 筛选条件在分页前作用于全部命中，不受每次IN查询的ID数限制
+    items, total = asyncio.run(product_service.search_products(db=db, keyword="苹果", merchant_id=merchants[1].id))
+    assert total == 1 and items[0]["name"] == "苹果10"
+    items, total = asyncio.run(product_service.search_products(db=db, keyword="苹果", limit=20))
+    assert total == 11 and len(items) == 11
+    # 指定排序且命中超过IN查询上限时回退到LIKE
+    items, total = asyncio.run(product_service.search_products(
+        db=db, keyword="苹果", sort_by="created_at", sort_order="desc"
+    ))
+    assert total == 11
+
+    names, cursor = [], ""
+    while cursor is not None:
+        page = asyncio.run(product_service.search_products(db=db, keyword="苹果", cursor=cursor, limit=4))
+        names += [item["name"] for item in page.items]
+        cursor = page.next_cursor
+    assert sorted(names) == sorted(f"苹果{i}" for i in range(11))
+
+    # 最后一个词按前缀匹配
+    items, _ = asyncio.run(product_service.search_products(db=db, keyword="iphone"))
+    assert [item["name"] for item in items] == ["iPhone15 手机"]
+
+
+@pytest.mark.skipif(not os.getenv("SEARCH_BENCHMARK"), reason="设置SEARCH_BENCHMARK=1运行百万商品搜索基准")
+def test_benchmark_index_vs_like(db):
+    count = int(os.getenv("SEARCH_BENCHMARK_ROWS", "1000000"))
+    rng = random.Random(42)
+    words = ["苹果", "香蕉", "手机", "耳机", "牛奶", "大米", "礼盒", "进口", "有机", "新鲜", "充电器", "保温杯"]
+    rows = [
+        {"merchant_id": 1, "name": f"{rng.choice(words)}{rng.choice(words)}{i}", "thumbnail": "",
+         "description": f"{rng.choice(words)}{rng.choice(words)}", "original_price": 10, "current_price": 10,
+         "stock": 1, "status": 1}
+        for i in range(count)
+    ]
+    for i in range(0, count, 50000):
+        db.execute(insert(Product), rows[i:i + 50000])
+    db.commit()
+    del rows
+
+    started = time.perf_counter()
+    search_service.rebuild_index(db, Product)
+    build_s = time.perf_counter() - started
+
+    def like(keyword):
+        # 原LIKE路径：全表扫描计数 + 取第一页
+        query = db.query(Product.id).filter(
+            Product.name.ilike(f"%{keyword}%") | Product.description.ilike(f"%{keyword}%")
+        )
+        return query.count(), query.order_by(Product.id.desc()).limit(20).all()
+
+    def timed(fn, keyword):
+        started = time.perf_counter()
+        for _ in range(3):
+            fn(keyword)
+        return (time.perf_counter() - started) / 3 * 1000
+
+    print(f"\n{count} 个商品，索引构建 {build_s:.1f}s")
+    for keyword in ["耳机礼盒", "保温杯"]:
+        like_ms = timed(like, keyword)
+        index_ms = timed(lambda k: search_service.search_ids(Product, k), keyword)
+        print(f"{keyword}: LIKE {like_ms:.1f}ms，索引 {index_ms:.1f}ms，"
+              f"命中 {like(keyword)[0]} / {len(search_service.search_ids(Product, keyword, limit=count))}")
+        assert index_ms < like_ms
@@ -0,0 +1,102 @@
+# tests/test_stats_rollup.py
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.group import Group
+from app.models.merchant import Merchant
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.stats import PlatformDailyStats
+from app.models.user import User
+from app.services import rollup_service, stats_service
+
+
+def _days_ago(days, hour=10):
+    return datetime.combine(date.today() - timedelta(days=days), datetime.min.time()) + timedelta(hours=hour)
+
+
+def _seed(db):
+    """两个商户，10天内的订单，覆盖各种状态和回头客"""
+    merchants = [Merchant(name=f"商户{i}", status=1, total_views=12, created_at=_days_ago(9)) for i in range(2)]
+    db.add_all(merchants)
+    db.flush()
+    products = [Product(merchant_id=merchants[i % 2].id, name=f"商品{i}", thumbnail="", original_price=20,
+                        current_price=10, stock=100, status=1, views=5) for i in range(3)]
+    users = [User(open_id=f"rollup-{i}", nickname=f"u{i}", created_at=_days_ago(i)) for i in range(6)]
+    db.add_all(products + users)
+    db.flush()
+    group = Group(merchant_id=merchants[0].id, product_id=products[0].id, title="团购", price=8, status=1,
+                  min_participants=2, max_participants=10, current_participants=0,
+                  start_time=_days_ago(9), end_time=_days_ago(-1))
+    db.add(group)
+    db.flush()
+
+    orders = []
+    # (天数前, 用户, 商户, 状态, 金额, 商品, 数量, 团购)
+    spec = [
+        (0, 0, 0, 1, 30.0, 0, 3, True),
+        (0, 1, 0, 0, 10.0, 0, 1, False),
+        (0, 0, 1, 3, 20.0, 1, 2, False),
+        (1, 2, 0, 2, 50.0, 2, 5, False),
+        (1, 2, 0, 4, 10.0, 0, 1, False),
+        (3, 3, 1, 5, 40.0, 1, 4, False),
+        (8, 0, 0, 3, 15.0, 0, 1, True),
+        (8, 4, 1, 1, 25.0, 1, 2, False),
+    ]
+    for i, (days, user, merchant, status, amount, product, quantity, grouped) in enumerate(spec):
+        order = Order(order_no=f"R{i}", user_id=users[user].id, merchant_id=merchants[merchant].id,
+                      group_id=group.id if grouped else None, total_amount=amount, actual_amount=amount,
+                      status=status, created_at=_days_ago(days, 8 + i), updated_at=_days_ago(days, 8 + i))
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=products[product].id, product_name="x", price=10,
+                         quantity=quantity, subtotal=amount))
+        orders.append(order)
+    db.commit()
+    return merchants, products, users, group, orders
+
+
+def test_dashboards_read_rollups(engine, db, query_counter, monkeypatch):
+    monkeypatch.setattr(rollup_service, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    merchants, products, users, group, orders = _seed(db)
+
+    # 首次运行从最早的数据开始汇总
+    assert asyncio.run(rollup_service.refresh_daily_stats()) == 10
+
+    with query_counter:
+        admin = asyncio.run(stats_service.get_admin_dashboard(db))
+    assert query_counter.count <= 4
+
+    assert (admin["total_users"], admin["total_merchants"], admin["total_orders"]) == (6, 2, 8)
+    assert admin["total_sales"] == 30 + 20 + 50 + 15 + 25
+    assert (admin["today_users"], admin["today_orders"], admin["today_sales"]) == (1, 3, 50.0)
+    assert [d["orders"] for d in admin["sales_trend"]] == [0, 0, 0, 1, 0, 2, 3]
+    assert [d["new_user_count"] for d in admin["user_trend"]] == [0, 1, 1, 1, 1, 1, 1]
+    assert [d["total_user_count"] for d in admin["user_trend"]] == [0, 1, 2, 3, 4, 5, 6]
+    assert admin["user_trend"][-1]["active_user_count"] == 2
+    assert admin["top_merchants"][0] == {
+        "merchant_id": merchants[0].id, "merchant_name": "商户0", "order_count": 3, "sales_amount": 95.0
+    }
+    assert admin["top_products"][0]["product_id"] == products[2].id
+
+    with query_counter:
+        dashboard = asyncio.run(stats_service.get_merchant_dashboard(db, merchants[0].id))
+    assert query_counter.count <= 6
+    assert dashboard["total_orders"] == 5 and dashboard["total_sales"] == 95.0
+    assert dashboard["total_customers"] == 3
+    assert dashboard["total_products"] == 2 and dashboard["today_views"] == 12
+    assert (dashboard["today_orders"], dashboard["today_sales"]) == (2, 30.0)
+    assert dashboard["order_status_counts"] == {"0": 1, "1": 1, "2": 1, "3": 1, "4": 1, "5": 0}
+    assert dashboard["top_groups"] == [{"id": group.id, "title": "团购", "order_count": 2, "sales_amount": 45.0}]
+
+    # 旧订单退款后只重新汇总变动的日期
+    old = db.get(Order, orders[6].id)
+    old.status, old.updated_at = 5, datetime.now()
+    db.commit()
+    assert asyncio.run(rollup_service.refresh_daily_stats()) == 2
+    dashboard = asyncio.run(stats_service.get_merchant_dashboard(db, merchants[0].id))
+    assert dashboard["total_sales"] == 80.0
+    assert dashboard["order_status_counts"]["3"] == 0 and dashboard["order_status_counts"]["5"] == 1
+    assert db.query(PlatformDailyStats).count() == 10
@@ -0,0 +1,83 @@
+# tests/test_stats_utils.py
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+
+from app.models.merchant import Merchant
+from app.models.order import Order
+from app.models.product import Product
+from app.models.review import Review, ReviewImage
+from app.models.user import User
+from app.services import product_service, review_service
+from app.utils.stats_utils import aggregate_by_date, count_by, count_if, sum_if
+
+
+def test_grouped_helpers_fill_missing_keys(db, query_counter):
+    user = User(open_id="stats-utils", nickname="u")
+    db.add(user)
+    db.flush()
+    today = date.today()
+    for days, status, amount in [(0, 1, 10.0), (0, 4, 5.0), (2, 1, 20.0), (2, 1, 30.0), (9, 1, 99.0)]:
+        created = datetime.combine(today - timedelta(days=days), datetime.min.time()) + timedelta(hours=12)
+        db.add(Order(order_no=f"S{days}{amount}", user_id=user.id, merchant_id=1, status=status,
+                     actual_amount=amount, created_at=created))
+    db.commit()
+
+    with query_counter:
+        series = aggregate_by_date(
+            db, Order.created_at, today - timedelta(days=6), today,
+            orders=func.count(Order.id),
+            sales=sum_if(Order.actual_amount, Order.status.in_([1, 2, 3])),
+            cancelled=count_if(Order.status == 4)
+        )
+        statuses = count_by(db, Order.status, keys=range(6))
+    assert query_counter.count == 2
+
+    assert list(series) == [today - timedelta(days=i) for i in range(6, -1, -1)]
+    assert series[today] == {"orders": 2, "sales": 10.0, "cancelled": 1}
+    assert series[today - timedelta(days=2)] == {"orders": 2, "sales": 50.0, "cancelled": 0}
+    assert series[today - timedelta(days=1)] == {"orders": 0, "sales": 0, "cancelled": 0}
+    assert statuses == {0: 0, 1: 4, 2: 0, 3: 0, 4: 1, 5: 0}
+
+
+def test_review_and_product_stats_single_query(db, query_counter):
+    merchant = Merchant(name="商户", status=1)
+    db.add(merchant)
+    db.flush()
+    products = [
+        Product(merchant_id=merchant.id, name=f"p{i}", thumbnail="", original_price=20, current_price=price,
+                stock=stock, status=status, is_hot=i == 0, sales=3, views=30)
+        for i, (price, stock, status) in enumerate([(10, 0, 1), (20, 5, 1), (30, 50, 0)])
+    ]
+    db.add_all(products)
+    db.flush()
+    reviews = [Review(user_id=1, product_id=products[0].id, rating=rating, status=status)
+               for rating, status in [(5, 1), (5, 1), (4, 1), (2, 1), (1, 0)]]
+    db.add_all(reviews)
+    db.flush()
+    db.add_all([ReviewImage(review_id=reviews[0].id, image_url=f"{i}.jpg") for i in range(2)])
+    db.commit()
+    product_id, merchant_id = products[0].id, merchant.id
+
+    expected = {
+        "total_count": 4, "avg_rating": 4.0,
+        "rating_counts": {"1": 0, "2": 1, "3": 0, "4": 1, "5": 2},
+        "image_count": 1, "good_count": 3, "good_rate": 75.0,
+    }
+    # 首次读取时按星级分组计算并写入汇总表
+    assert asyncio.run(review_service.get_product_review_stats(db, product_id)) == expected
+    with query_counter:
+        stats = asyncio.run(review_service.get_product_review_stats(db, product_id))
+    # 商品JOIN评价汇总一条查询
+    assert query_counter.count == 1
+    assert stats == expected
+
+    with query_counter:
+        stats = asyncio.run(product_service.get_merchant_product_stats(db, merchant_id))
+    assert query_counter.count == 1
+    assert stats["basic_stats"] == {"total_products": 3, "on_sale": 2, "off_sale": 1}
+    assert stats["tag_stats"]["hot_products"] == 1
+    assert stats["stock_stats"] == {"low_stock_products": 2, "out_of_stock": 1, "total_stock": 55}
+    assert stats["sales_stats"]["total_sales"] == 9 and stats["sales_stats"]["avg_conversion_rate"] == 10.0
+    assert stats["price_stats"] == {"avg_price": 20.0, "max_price": 30.0, "min_price": 10.0}
@@ -0,0 +1,172 @@
+# tests/test_stock_reservation.py
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.models.merchant import Merchant  # noqa: E402
+from app.models.order import Order, OrderItem  # noqa: E402
+from app.models.product import Product, ProductSpecification  # noqa: E402
+from app.models.user import Address, User  # noqa: E402
+from app.schemas.order import OrderCancelRequest, OrderCreate, OrderItemCreate  # noqa: E402
+from app.services import order_service  # noqa: E402
+
+
+def _seed(path, stock=10, users=40):
+    """在SQLite文件库中创建商户、商品和用户，返回会话工厂和ID"""
+    # 文件库在多线程间共享，等待写锁而不是立即报错
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30, "check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        merchant = Merchant(name="测试商户", status=1)
+        db.add(merchant)
+        db.flush()
+        product = Product(merchant_id=merchant.id, name="秒杀商品", thumbnail="", original_price=20,
+                          current_price=10, stock=stock, status=1)
+        db.add(product)
+        db.flush()
+        spec = ProductSpecification(product_id=product.id, name="颜色", value="红", stock=stock)
+        db.add(spec)
+
+        user_addresses = []
+        for i in range(users):
+            user = User(open_id=f"stock-openid-{i}", nickname=f"user{i}")
+            db.add(user)
+            db.flush()
+            address = Address(user_id=user.id, recipient="张三", phone="13800000000", province="浙江省",
+                              city="杭州市", district="西湖区", detail="测试地址")
+            db.add(address)
+            db.flush()
+            user_addresses.append((user.id, address.id))
+        db.commit()
+        ids = (merchant.id, product.id, spec.id)
+
+    return engine, Session, ids, user_addresses
+
+
+def _order(merchant_id, address_id, *items):
+    return OrderCreate(
+        merchant_id=merchant_id,
+        address_id=address_id,
+        items=[OrderItemCreate(product_id=pid, specification_id=sid, quantity=qty) for pid, sid, qty in items],
+    )
+
+
+def _stress(Session, merchant_id, user_addresses, item, workers):
+    """多线程同时下单，返回(成功数, 库存不足数)"""
+    barrier = threading.Barrier(workers)
+    results = []
+
+    def place(user_id, address_id):
+        barrier.wait()
+        with Session() as db:
+            try:
+                asyncio.run(order_service.create_order(db, _order(merchant_id, address_id, item), user_id))
+                results.append(True)
+            except HTTPException as e:
+                assert e.status_code == 400
+                results.append(False)
+
+    threads = [threading.Thread(target=place, args=ua) for ua in user_addresses[:workers]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.count(True), results.count(False)
+
+
+@pytest.fixture
+def shop(tmp_path):
+    engine, Session, ids, user_addresses = _seed(tmp_path / "stock.db")
+    yield Session, ids, user_addresses
+    engine.dispose()
+
+
+def test_concurrent_orders_never_oversell(shop):
+    Session, (merchant_id, product_id, spec_id), user_addresses = shop
+
+    succeeded, rejected = _stress(Session, merchant_id, user_addresses, (product_id, None, 1), 40)
+    assert (succeeded, rejected) == (10, 30)
+
+    succeeded, rejected = _stress(Session, merchant_id, user_addresses, (product_id, spec_id, 3), 40)
+    assert (succeeded, rejected) == (3, 37)
+
+    with Session() as db:
+        assert db.query(Product.stock).filter(Product.id == product_id).scalar() == 0
+        assert db.query(ProductSpecification.stock).filter(ProductSpecification.id == spec_id).scalar() == 1
+        sold = db.query(func.sum(OrderItem.quantity)).filter(OrderItem.specification_id.is_(None)).scalar()
+        assert sold == 10
+
+
+def test_failed_item_rolls_back_whole_order(shop):
+    Session, (merchant_id, product_id, spec_id), user_addresses = shop
+    user_id, address_id = user_addresses[0]
+
+    with Session() as db:
+        with pytest.raises(HTTPException):
+            asyncio.run(order_service.create_order(
+                db, _order(merchant_id, address_id, (product_id, None, 4), (product_id, spec_id, 11)), user_id
+            ))
+
+    with Session() as db:
+        assert db.query(Product.stock).filter(Product.id == product_id).scalar() == 10
+        assert db.query(Order).count() == 0
+
+
+def test_cancel_and_timeout_release_stock_once(shop, monkeypatch):
+    Session, (merchant_id, product_id, spec_id), user_addresses = shop
+    monkeypatch.setattr(order_service, "SessionLocal", Session)
+    monkeypatch.setattr(settings, "JOB_CHECKPOINT_ENABLED", False)
+
+    order_ids = []
+    for user_id, address_id in user_addresses[:2]:
+        with Session() as db:
+            order = asyncio.run(order_service.create_order(
+                db, _order(merchant_id, address_id, (product_id, spec_id, 2), (product_id, None, 1)), user_id
+            ))
+            order_ids.append(order.id)
+
+    with Session() as db:
+        user_id = user_addresses[0][0]
+        asyncio.run(order_service.cancel_order(db, OrderCancelRequest(order_id=order_ids[0], cancel_reason="不想要了"), user_id))
+        # 重复取消不会重复归还库存
+        with pytest.raises(HTTPException):
+            asyncio.run(order_service.cancel_order(db, OrderCancelRequest(order_id=order_ids[0], cancel_reason="不想要了"), user_id))
+
+        # 第二个订单超过支付时限
+        db.query(Order).filter(Order.id == order_ids[1]).update({Order.created_at: datetime.now() - timedelta(minutes=31)})
+        db.commit()
+
+    assert asyncio.run(order_service.check_and_cancel_expired_orders()) == 1
+    assert asyncio.run(order_service.check_and_cancel_expired_orders()) == 0
+
+    with Session() as db:
+        assert db.query(Product.stock).filter(Product.id == product_id).scalar() == 10
+        assert db.query(ProductSpecification.stock).filter(ProductSpecification.id == spec_id).scalar() == 10
+
+
+if __name__ == "__main__":
+    # 运行方式: python tests/test_stock_reservation.py
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, (merchant_id, product_id, _), user_addresses = _seed(os.path.join(tmp, "bench.db"), 50, 200)
+        start = time.perf_counter()
+        succeeded, rejected = _stress(Session, merchant_id, user_addresses, (product_id, None, 1), 200)
+        elapsed = time.perf_counter() - start
+        with Session() as db:
+            left = db.query(Product.stock).filter(Product.id == product_id).scalar()
+        print(f"200并发抢购50件: 成功 {succeeded}  库存不足 {rejected}  剩余库存 {left}  耗时 {elapsed:.2f}s")
+        engine.dispose()